@@ -2,7 +2,6 @@
 import streamlit as st
 import os
 import sys
-import difflib
 from typing import Optional
 
 # Add src to path for imports
@@ -11,6 +10,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 # Import modules
 from src.ui.streamlit_ui import inject_custom_css, show_homepage_ui
 from src.reports.generator import generate_audit_report
+from src.core.text_diff import unified_diff
 
 # Try to import AI agent (gracefully handle if API key not set)
 try:
@@ -277,10 +277,13 @@ def display_refactoring_results(result: RefactoringResult):
     tab1, tab2, tab3 = st.tabs(["📊 Unified Diff", "⚖️ Side by Side", "📋 Refactored Code"])
 
     with tab1:
-        diff_lines = list(difflib.unified_diff(
+        intraline = st.checkbox("Highlight changed words", value=False,
+                                help="Marks removed words as [-...-] and added words as {+...+}")
+        diff_lines = list(unified_diff(
             result.original_code.splitlines(keepends=True),
             result.refactored_code.splitlines(keepends=True),
-            lineterm=''
+            lineterm='',
+            intraline=intraline
         ))
         if diff_lines:
             diff_text = ''.join(diff_lines)
@@ -310,12 +313,14 @@ def display_refactoring_results(result: RefactoringResult):
     with col1:
         if st.button("📄 Generate Report", use_container_width=True):
             try:
-                generate_audit_report(
+                report_path = generate_audit_report(
                     "AI Refactoring",
                     result.metrics_before,
-                    result.metrics_after
+                    result.metrics_after,
+                    original_code=result.original_code,
+                    refactored_code=result.refactored_code
                 )
-                st.success("✅ Report generated in /reports folder!")
+                st.success(f"✅ Report generated: {report_path}")
             except Exception as e:
                 st.error(f"Report generation failed: {e}")
 
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rendering a batch of PDF audit reports.
+
+Usage:
+    python benchmarks/bench_audit_reports.py [--reports N] [--functions F] [--workers W]
+
+Renders N reports, each with the metrics tables, charts and diff of a
+generated module of F functions, first one after another in this process
+and then through generate_audit_reports with W worker processes.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.reports.generator import generate_audit_report, generate_audit_reports
+
+FUNCTION = '''def check_{i}(items, limit={i}):
+    total = 0
+    for item in items:
+        if item > limit:
+            total += item
+    return total if total else -1
+
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=24)
+    parser.add_argument("--functions", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    original = "".join(FUNCTION.format(i=i) for i in range(args.functions))
+    refactored = original.replace("total if total else -1", "total or -1")
+    metrics = ({"complexity": 4 * args.functions, "lint_errors": 5}, {"complexity": 3 * args.functions, "lint_errors": 0})
+
+    with tempfile.TemporaryDirectory(prefix="neurorefactor-bench-") as root:
+        def jobs(prefix):
+            return [{"edit_program": "APPLY simplify", "before_metrics": metrics[0], "after_metrics": metrics[1],
+                     "original_code": original, "refactored_code": refactored,
+                     "output_path": os.path.join(root, f"{prefix}_{n}.pdf")} for n in range(args.reports)]
+
+        start = time.perf_counter()
+        for job in jobs("serial"):
+            generate_audit_report(**job)
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        generate_audit_reports(jobs("pool"), max_workers=args.workers)
+        pooled = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(root, "pool_0.pdf"))
+
+    print(f"{args.reports} reports, {args.functions} functions each ({size / 1024:.0f} KiB per PDF)")
+    print(f"  serial       : {serial:7.2f}s ({serial / args.reports * 1000:.0f} ms/report)")
+    print(f"  process pool : {pooled:7.2f}s ({serial / pooled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
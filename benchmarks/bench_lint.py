@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batched LintEngine vs one ruff process per snippet.
+
+Usage:
+    python benchmarks/bench_lint.py [--snippets N]
+
+Lints N distinct snippets (a) with one `ruff check -` process each and
+(b) with a single LintEngine.lint_many call, then repeats (b) to show the
+cost of a fully cached batch.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.lint import LintEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snippets", type=int, default=200)
+    args = parser.parse_args()
+
+    ruff = shutil.which("ruff")
+    if ruff is None:
+        sys.exit("ruff is not installed")
+    snippets = [f"import os\n\n\ndef f{i}(x):\n    y = {i}\n    return x + {i}\n" for i in range(args.snippets)]
+
+    start = time.perf_counter()
+    for code in snippets:
+        subprocess.run([ruff, "check", "--isolated", "--no-cache", "--exit-zero", "--output-format=json",
+                        "--stdin-filename=snippet.py", "-"], input=code, capture_output=True, text=True, check=False)
+    per_snippet = time.perf_counter() - start
+
+    engine = LintEngine()
+    start = time.perf_counter()
+    results = engine.lint_many(snippets)
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine.lint_many(snippets)
+    cached = time.perf_counter() - start
+
+    print(f"{args.snippets} snippets, {sum(map(len, results))} violations")
+    print(f"  one ruff process per snippet : {per_snippet:8.3f}s")
+    print(f"  one batch ({engine.spawns} ruff process)   : {batched:8.3f}s")
+    print(f"  cached batch                 : {cached:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
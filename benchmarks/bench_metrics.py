@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fused code metrics vs. separate radon visitors.
+
+Usage:
+    python benchmarks/bench_metrics.py [--functions N] [--repeat R]
+
+Times cc_visit + h_visit + analyze + mi_visit(multi=True) (what the agent,
+the feature extractor and the metrics table used to call) against a single
+code_metrics call on a generated module of N functions, and checks that
+both report the same numbers.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from radon.complexity import cc_visit
+from radon.metrics import h_visit, mi_visit
+from radon.raw import analyze
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.metrics import code_metrics
+
+FUNCTION = '''
+def process_{i}(items, limit={i}):
+    """Filters and totals items."""
+    total = 0
+    for item in items:
+        if item is None:
+            continue  # Skip gaps
+        if item > limit and item % 2 == 0:
+            total += item * 2
+        elif item < 0:
+            total -= item
+        else:
+            total += 1
+    return total if total > 0 else None
+'''
+
+
+def _radon(code):
+    blocks = cc_visit(code)
+    return sum(b.complexity for b in blocks), h_visit(code).total.volume, analyze(code).lloc, mi_visit(code, True)
+
+
+def _fused(code):
+    metrics = code_metrics(code)
+    return metrics["complexity"], metrics["halstead_volume"], metrics["lloc"], metrics["maintainability"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--functions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    code = "import os\n" + "".join(FUNCTION.format(i=i) for i in range(args.functions))
+    lines = code.count("\n")
+    assert _radon(code) == _fused(code), "fused metrics disagree with radon"
+
+    timings = {}
+    for name, measure in (("radon", _radon), ("fused", _fused)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            measure(code)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+
+    print(f"{args.functions} functions, {lines} lines (best of {args.repeat})")
+    for name, seconds in timings.items():
+        print(f"  {name:6}: {seconds * 1000:9.1f} ms ({lines / seconds:,.0f} lines/s)")
+    print(f"  speedup: {timings['radon'] / timings['fused']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: building a MetricsTable for a synthetic code base.
+
+Usage:
+    python benchmarks/bench_metrics_table.py [--files N] [--workers W] [--no-lint]
+
+Writes N generated modules (about 250 lines each) to a temp dir, builds the
+table with W worker processes and reports throughput in lines per second,
+then times the aggregations and a Parquet round trip.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.metrics_table import MetricsTable
+
+FUNCTION = '''
+def process_{i}(items, limit={i}):
+    """Filters and totals items."""
+    total = 0
+    for item in items:
+        if item is None:
+            continue  # Skip gaps
+        if item > limit and item % 2 == 0:
+            total += item * 2
+        elif item < 0:
+            total -= item
+        else:
+            total += 1
+    return total if total > 0 else None
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-lint", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="neurorefactor-bench-") as root:
+        lines = 0
+        for index in range(args.files):
+            package = os.path.join(root, f"pkg{index % 10}", f"sub{index % 3}")
+            os.makedirs(package, exist_ok=True)
+            code = "import os\n" + "".join(FUNCTION.format(i=index * 20 + j) for j in range(18))
+            lines += code.count("\n")
+            with open(os.path.join(package, f"module_{index}.py"), "w", encoding="utf-8") as f:
+                f.write(code)
+
+        start = time.perf_counter()
+        table = MetricsTable.build(root, max_workers=args.workers, lint=not args.no_lint)
+        built = time.perf_counter() - start
+
+        start = time.perf_counter()
+        table.percentiles()
+        table.rollup(depth=1)
+        table.worst("complexity", 20)
+        aggregated = time.perf_counter() - start
+
+        start = time.perf_counter()
+        path = os.path.join(root, "metrics.parquet")
+        table.to_parquet(path)
+        MetricsTable.from_parquet(path)
+        stored = time.perf_counter() - start
+
+    print(f"{args.files} files, {lines} lines, {len(table.frame)} rows")
+    print(f"  build        : {built:8.3f}s ({lines / built:,.0f} lines/s)")
+    print(f"  aggregations : {aggregated:8.3f}s")
+    print(f"  parquet I/O  : {stored:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming Markdown reports for a large changeset.
+
+Usage:
+    python benchmarks/bench_report.py [--files N] [--lines L] [--reports R]
+
+Writes N file pairs of L lines (every tenth line edited), then
+(a) generates one report whose diff covers the whole changeset and whose
+test output is a generator of 50k lines, tracking peak Python memory,
+and (b) generates R single-file reports as one batch sharing a template.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from report_generator import ReportGenerator, iter_changeset_diff
+
+VALIDATION = {
+    "ast_comparison": {"structural_similarity": 0.95, "message": "Renames only"},
+    "unit_tests": {"tests_run": 50000, "tests_passed": 50000, "tests_failed": 0, "success": True},
+    "overall_success": True,
+    "message": "Validated",
+}
+
+
+def _write_pairs(root, files, lines):
+    pairs = []
+    for index in range(files):
+        old_path, new_path = os.path.join(root, f"old_{index}.py"), os.path.join(root, f"new_{index}.py")
+        code = [f"value_{index}_{n} = compute({n})\n" for n in range(lines)]
+        with open(old_path, "w", encoding="utf-8") as f:
+            f.writelines(code)
+        with open(new_path, "w", encoding="utf-8") as f:
+            f.writelines(line.replace("compute", "evaluate") if n % 10 == 0 else line for n, line in enumerate(code))
+        pairs.append((old_path, new_path))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=300)
+    parser.add_argument("--reports", type=int, default=500)
+    args = parser.parse_args()
+
+    generator = ReportGenerator()
+    with tempfile.TemporaryDirectory(prefix="neurorefactor-bench-") as root:
+        pairs = _write_pairs(root, args.files, args.lines)
+        unit_tests = dict(VALIDATION["unit_tests"], test_output=(f"test_{n} PASSED" for n in range(50000)))
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        path = generator.generate_report(pairs[0][0], pairs[0][1], [], dict(VALIDATION, unit_tests=unit_tests),
+                                         os.path.join(root, "changeset.md"),
+                                         diff_lines=iter_changeset_diff(pairs, root))
+        streamed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = os.path.getsize(path)
+
+        jobs = [{"original_file_path": old, "refactored_file_path": new, "suggestions": [],
+                 "validation_results": VALIDATION, "report_output_path": os.path.join(root, f"report_{n}.md")}
+                for n, (old, new) in enumerate(pairs[:args.reports])]
+        start = time.perf_counter()
+        generator.generate_reports(jobs)
+        batched = time.perf_counter() - start
+
+    print(f"changeset report: {args.files} files x {args.lines} lines -> {size / 1e6:.1f} MB "
+          f"in {streamed:.2f}s, peak memory {peak / 1e6:.2f} MB")
+    print(f"batch: {len(jobs)} reports in {batched:.2f}s ({batched / len(jobs) * 1000:.2f} ms/report)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: line diffs of large files, text_diff vs. difflib.
+
+Usage:
+    python benchmarks/bench_text_diff.py [--lines N] [--edits E] [--distinct D]
+
+Builds an N-line file out of D distinct code-like lines (so most lines
+repeat, as blank lines, `return None` and closing brackets do in real
+code), applies E random edits and times the patience and Myers diffs
+against difflib.SequenceMatcher. Also reports how many lines each aligned
+as unchanged: difflib's autojunk heuristic ignores lines that make up
+more than 1% of a long file, which can leave it with almost no matches.
+"""
+
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.text_diff import diff_opcodes
+
+
+def _make_files(lines, edits, distinct, seed=0):
+    rng = random.Random(seed)
+    pool = [f"    value_{i} = item[{i}]" for i in range(distinct)]
+    old = [rng.choice(pool) for _ in range(lines)]
+    new = list(old)
+    for _ in range(edits):
+        index, kind = rng.randrange(len(new)), rng.random()
+        if kind < 0.3:
+            del new[index]
+        elif kind < 0.6:
+            new.insert(index, rng.choice(pool))
+        else:
+            new[index] += "  # edited"
+    return old, new
+
+
+def _time(function):
+    start = time.perf_counter()
+    opcodes = function()
+    return time.perf_counter() - start, sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--distinct", type=int, nargs="+", default=[5000, 100, 60])
+    args = parser.parse_args()
+
+    for distinct in args.distinct:
+        old, new = _make_files(args.lines, args.edits, distinct)
+        print(f"{args.lines} lines, {args.edits} edits, {distinct} distinct lines")
+        for name, function in (("patience", lambda old=old, new=new: diff_opcodes(old, new, "patience")),
+                               ("myers", lambda old=old, new=new: diff_opcodes(old, new, "myers")),
+                               ("difflib", lambda old=old, new=new: difflib.SequenceMatcher(None, old, new).get_opcodes())):
+            seconds, unchanged = _time(function)
+            print(f"  {name:8}: {seconds * 1000:8.1f} ms, {unchanged} unchanged lines")
+
+
+if __name__ == "__main__":
+    main()
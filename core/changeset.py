@@ -0,0 +1,387 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_BACKUP_DIR = os.path.join(".neurorefactor_cache", "backups")
+
+_umask_lock = threading.Lock()
+
+
+def _fsync_directory(directory: str) -> None:
+    """
+    Makes renames inside ``directory`` durable. Not supported on every
+    platform (e.g. Windows), where it is skipped.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _default_mode() -> int:
+    """The mode ``open(path, "w")`` would give a new file under the current umask."""
+    # The umask can only be read by setting it, so concurrent callers are serialized
+    with _umask_lock:
+        umask = os.umask(0)
+        os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _file_digest(path: str) -> Optional[str]:
+    """sha256 of the file's content, or None if it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _try_lock(fd: int) -> bool:
+    """Non-blocking exclusive lock, released by the OS when its owner dies."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _stage(path: str, data: bytes, mode: Optional[int] = None) -> str:
+    """
+    Writes ``data`` to a temp file next to ``path`` and fsyncs it.
+    Returns the temp file path, ready for ``os.replace``. Without ``mode``
+    the file gets the usual umask-derived mode instead of mkstemp's 0600.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode if mode is not None else _default_mode())
+        return tmp_path
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write(path: str, data: bytes, mode: Optional[int] = None) -> None:
+    """
+    Replaces ``path`` with ``data`` so readers see either the old or the new
+    content, never a partial file, even if the process dies mid-write.
+    """
+    os.replace(_stage(path, data, mode), path)
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+class BackupStore:
+    """
+    Content-addressed store of file contents. Each distinct content is kept
+    once under its sha256, so repeated backups of the same file cost nothing.
+    """
+
+    def __init__(self, root_dir: str = DEFAULT_BACKUP_DIR):
+        self.objects_dir = os.path.join(root_dir, "objects")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write(path, data)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        with open(self._object_path(digest), "rb") as f:
+            return f.read()
+
+
+class ChangesetWriter:
+    """
+    Applies a set of file changes as one transaction.
+
+    Originals are saved to a content-addressed BackupStore and a journal entry
+    is written before any file is touched. New contents are staged in fsynced
+    temp files in parallel, then swapped in with ``os.replace`` in one short
+    loop. If anything fails, every file already swapped is restored; after a
+    crash, ``recover()`` rolls back transactions left pending.
+
+    While a transaction runs, its process holds a lock on
+    ``<id>.lock`` (which records its pid) next to the journal, so
+    ``recover()`` leaves transactions of live processes alone.
+    """
+
+    def __init__(self, backup_dir: str = DEFAULT_BACKUP_DIR, max_workers: Optional[int] = None):
+        self.store = BackupStore(backup_dir)
+        self.journal_dir = os.path.join(backup_dir, "transactions")
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+
+    # --- Journal ---
+
+    def _journal_path(self, transaction_id: str) -> str:
+        return os.path.join(self.journal_dir, f"{transaction_id}.json")
+
+    def _write_journal(self, entry: Dict[str, Any]) -> None:
+        os.makedirs(self.journal_dir, exist_ok=True)
+        atomic_write(self._journal_path(entry["id"]), json.dumps(entry, indent=2).encode("utf-8"))
+
+    def _lock_path(self, transaction_id: str) -> str:
+        return os.path.join(self.journal_dir, f"{transaction_id}.lock")
+
+    def _lock(self, transaction_id: str) -> Optional[int]:
+        """
+        Locks the transaction's lock file and writes our pid to it. Returns
+        the descriptor, or None if another live process holds the lock.
+        """
+        os.makedirs(self.journal_dir, exist_ok=True)
+        fd = os.open(self._lock_path(transaction_id), os.O_RDWR | os.O_CREAT, 0o644)
+        if not _try_lock(fd):
+            os.close(fd)
+            return None
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        return fd
+
+    def _unlock(self, transaction_id: str, fd: int) -> None:
+        path = self._lock_path(transaction_id)
+        if fcntl is not None:
+            # Removed while still locked, so nobody can lock a file about to vanish
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+        else:
+            os.close(fd)  # Windows cannot remove a file that is still open
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _read_journal(self, transaction_id: str) -> Dict[str, Any]:
+        with open(self._journal_path(transaction_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def transactions(self) -> List[Dict[str, Any]]:
+        """All journaled transactions, oldest first."""
+        if not os.path.isdir(self.journal_dir):
+            return []
+        entries = [self._read_journal(name[:-len(".json")])
+                   for name in os.listdir(self.journal_dir) if name.endswith(".json")]
+        return sorted(entries, key=lambda entry: entry["created_at"])
+
+    # --- Apply / rollback ---
+
+    def _read_original(self, path: str) -> Tuple[Optional[bytes], Optional[os.stat_result]]:
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                return f.read(), st
+        except FileNotFoundError:
+            return None, None
+
+    def apply(self, changes: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Writes ``{file_path: new_content}`` atomically as a whole: either every
+        file ends up with its new content or all of them keep the old one.
+        Files whose content would not change are not rewritten.
+        """
+        result = {
+            "success": False,
+            "message": "",
+            "transaction_id": None,
+            "written": [],
+            "unchanged": []
+        }
+        transaction_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        files = []
+        try:
+            for path, content in changes.items():
+                path = os.path.abspath(path)
+                data = content.encode("utf-8")
+                original, st = self._read_original(path)
+                if original == data:
+                    result["unchanged"].append(path)
+                    continue
+                files.append({
+                    "path": path,
+                    "data": data,
+                    "before": self.store.put(original) if original is not None else None,
+                    "after": hashlib.sha256(data).hexdigest(),
+                    "mode": stat.S_IMODE(st.st_mode) if st is not None else None,
+                    "stat": (st.st_mtime_ns, st.st_size) if st is not None else None
+                })
+        except OSError as e:
+            result["message"] = f"Error backing up files: {e}"
+            return result
+
+        if not files:
+            result["success"] = True
+            result["message"] = "No files changed"
+            return result
+
+        journal = {
+            "id": transaction_id,
+            "created_at": time.time(),
+            "status": "pending",
+            "files": [{"path": f["path"], "before": f["before"], "after": f["after"]} for f in files]
+        }
+        lock = self._lock(transaction_id)  # Taken before the journal exists, so recover() never sees it unlocked
+        try:
+            self._write_journal(journal)
+            result["transaction_id"] = transaction_id
+            self._swap(files, journal, result)
+        finally:
+            self._unlock(transaction_id, lock)
+        return result
+
+    def _swap(self, files: List[Dict[str, Any]], journal: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Stages and swaps in the new contents, recording the outcome in the journal and ``result``."""
+        staged: Dict[str, str] = {}
+        swapped: List[Dict[str, Any]] = []
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {f["path"]: pool.submit(_stage, f["path"], f["data"], f["mode"]) for f in files}
+            errors = [future.exception() for future in futures.values() if future.exception()]
+            staged.update((path, future.result()) for path, future in futures.items() if not future.exception())
+            if errors:
+                raise errors[0]
+
+            for f in files:
+                current = os.stat(f["path"]) if f["stat"] is not None else None
+                if f["stat"] is not None and (current.st_mtime_ns, current.st_size) != f["stat"]:
+                    raise RuntimeError(f"{f['path']} changed while the changeset was being applied")
+                os.replace(staged.pop(f["path"]), f["path"])
+                swapped.append(f)
+
+            for directory in {os.path.dirname(f["path"]) for f in files}:
+                _fsync_directory(directory)
+        except Exception as e:
+            for tmp_path in staged.values():
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._restore(swapped)
+            journal["status"] = "rolled_back"
+            self._write_journal(journal)
+            result["message"] = f"Error applying changeset, all files restored: {e}"
+            return
+
+        journal["status"] = "committed"
+        self._write_journal(journal)
+        result["success"] = True
+        result["written"] = [f["path"] for f in files]
+        result["message"] = f"Wrote {len(files)} file(s) in transaction {journal['id']}"
+
+    def _restore(self, files: List[Dict[str, Any]]) -> List[str]:
+        def stage_original(f: Dict[str, Any]) -> Optional[str]:
+            if f["before"] is None:
+                return None
+            try:
+                mode = stat.S_IMODE(os.stat(f["path"]).st_mode)
+            except FileNotFoundError:
+                mode = None
+            return _stage(f["path"], self.store.get(f["before"]), mode)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            staged = list(pool.map(stage_original, files))
+
+        restored = []
+        for f, tmp_path in zip(files, staged):
+            if tmp_path is not None:
+                os.replace(tmp_path, f["path"])
+            elif os.path.exists(f["path"]):
+                os.remove(f["path"])  # Created by the transaction
+            restored.append(f["path"])
+        for directory in {os.path.dirname(f["path"]) for f in files}:
+            _fsync_directory(directory)
+        return restored
+
+    def rollback(self, transaction_id: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        Restores every file of a transaction (the latest committed one by
+        default) to its content from before the transaction.
+
+        Only files still holding the content the transaction wrote are
+        restored; files already back to their old content are left alone.
+        If any file was changed since, nothing is restored and the files are
+        listed in ``conflicts``, unless ``force`` overwrites them too.
+        """
+        result = {"success": False, "message": "", "restored": [], "conflicts": []}
+        if transaction_id is None:
+            committed = [entry for entry in self.transactions() if entry["status"] == "committed"]
+            if not committed:
+                result["message"] = "No committed transaction to roll back"
+                return result
+            journal = committed[-1]
+        else:
+            try:
+                journal = self._read_journal(transaction_id)
+            except FileNotFoundError:
+                result["message"] = f"Unknown transaction: {transaction_id}"
+                return result
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                digests = list(pool.map(_file_digest, [f["path"] for f in journal["files"]]))
+            files = [f for f, digest in zip(journal["files"], digests) if digest != f["before"]]
+            result["conflicts"] = [f["path"] for f, digest in zip(journal["files"], digests)
+                                   if digest not in (f["before"], f["after"])]
+            if result["conflicts"] and not force:
+                result["message"] = (f"Refusing to roll back transaction {journal['id']}: "
+                                     f"{len(result['conflicts'])} file(s) changed since it was applied "
+                                     f"({', '.join(result['conflicts'])}); use force=True to overwrite them")
+                return result
+            result["restored"] = self._restore(files)
+        except OSError as e:
+            result["message"] = f"Error rolling back transaction {journal['id']}: {e}"
+            return result
+        journal["status"] = "rolled_back"
+        self._write_journal(journal)
+        result["success"] = True
+        result["message"] = f"Rolled back {len(result['restored'])} file(s) from transaction {journal['id']}"
+        return result
+
+    def recover(self) -> List[str]:
+        """
+        Rolls back transactions interrupted by a crash: still ``pending``
+        and with no live process holding their lock. Returns their ids.
+        """
+        recovered = []
+        for entry in self.transactions():
+            if entry["status"] != "pending":
+                continue
+            lock = self._lock(entry["id"])
+            if lock is None:
+                continue  # Still being applied
+            try:
+                # Re-read under the lock: the owner may have finished in between
+                if self._read_journal(entry["id"])["status"] == "pending" and self.rollback(entry["id"])["success"]:
+                    recovered.append(entry["id"])
+            finally:
+                self._unlock(entry["id"], lock)
+        return recovered
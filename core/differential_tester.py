@@ -0,0 +1,297 @@
+import ast
+import concurrent.futures
+import copy
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import types
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+# Assuming impact_map.py is in the same directory for the changed functions
+from impact_map import changed_functions
+
+# Input generation is shared with the performance gate in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.core.input_generation import function_parameters, generate_inputs
+
+try:
+    import resource  # Not available on Windows: memory limits are skipped there
+except ImportError:
+    resource = None
+
+MAX_REPR = 200
+
+
+class _CallTimeout(BaseException):
+    """Raised in a worker when a call exceeds its time limit; a BaseException
+    so the code under test cannot swallow it with ``except Exception``."""
+
+
+# --- Execution in the worker processes ---
+
+_modules: Dict[Tuple[str, str], types.ModuleType] = {}
+
+
+def _init_worker(memory_limit: Optional[int], search_path: Optional[str], work_dir: str) -> None:
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    if search_path:
+        sys.path.insert(0, search_path)
+    os.chdir(work_dir)  # Relative paths written by the code under test land in a throwaway directory
+
+
+def _load(code: str, name: str) -> types.ModuleType:
+    """Executes ``code`` as a fresh module once per worker."""
+    key = (name, code)
+    if key not in _modules:
+        module = types.ModuleType(name)
+        module.__file__ = f"<{name}>"
+        exec(compile(code, f"<{name}>", "exec"), module.__dict__)
+        _modules[key] = module
+    return _modules[key]
+
+
+def _on_alarm(signum, frame):
+    raise _CallTimeout()
+
+
+def _short_repr(value: Any) -> str:
+    try:
+        text = repr(value)
+    except Exception as e:
+        text = f"<unrepresentable {type(value).__name__}: {e}>"
+    return text if len(text) <= MAX_REPR else text[:MAX_REPR] + "..."
+
+
+def _observe(function: Callable, args: tuple, time_limit: float) -> Dict[str, Any]:
+    """Calls ``function`` on a copy of ``args`` within the time limit."""
+    args = copy.deepcopy(args)
+    signal.setitimer(signal.ITIMER_REAL, time_limit)
+    try:
+        value = function(*args)
+        outcome = {"kind": "return", "value": value}
+    except _CallTimeout:
+        return {"kind": "timeout"}
+    except MemoryError:
+        return {"kind": "memory"}
+    except Exception as e:
+        outcome = {"kind": "raise", "type": type(e).__name__}
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    outcome["args"] = args  # Arguments mutated in place are part of the behavior
+    return outcome
+
+
+def _same(left: Dict[str, Any], right: Dict[str, Any]) -> bool:
+    if left["kind"] != right["kind"]:
+        return False
+    if left["kind"] == "raise" and left["type"] != right["type"]:
+        return False
+    for field in ("value", "args"):
+        if field in left:
+            try:
+                if left[field] == right[field] and type(left[field]) is type(right[field]):
+                    continue
+            except Exception:
+                pass
+            if _short_repr(left[field]) != _short_repr(right[field]):
+                return False
+    return True
+
+
+def _describe(outcome: Dict[str, Any]) -> str:
+    if outcome["kind"] == "return":
+        return _short_repr(outcome["value"])
+    if outcome["kind"] == "raise":
+        return f"raises {outcome['type']}"
+    return outcome["kind"]
+
+
+def _compare_function(original_code: str, refactored_code: str, name: str, inputs: List[tuple],
+                      time_limit: float) -> Dict[str, Any]:
+    """Runs one function of both modules on every input; stops at the first mismatch."""
+    signal.signal(signal.SIGALRM, _on_alarm)
+    try:
+        original = getattr(_load(original_code, "original"), name)
+        refactored = getattr(_load(refactored_code, "refactored"), name)
+    except _CallTimeout:
+        return {"status": "error", "cases": 0, "reason": "Module import timed out"}
+    except Exception as e:
+        return {"status": "error", "cases": 0, "reason": f"Could not import module: {type(e).__name__}: {e}"}
+
+    limited = rejected = 0
+    for index, args in enumerate(inputs):
+        before, after = _observe(original, args, time_limit), _observe(refactored, args, time_limit)
+        if before["kind"] in ("timeout", "memory") and before["kind"] == after["kind"]:
+            limited += 1  # Both hit the limit: no evidence either way
+            continue
+        if not _same(before, after):
+            return {"status": "different", "cases": index + 1, "mismatch": {
+                "input": _short_repr(args), "original": _describe(before), "refactored": _describe(after)}}
+        if before["kind"] == "raise" and before["type"] == "TypeError":
+            rejected += 1
+    if limited == len(inputs):
+        return {"status": "error", "cases": len(inputs), "reason": "Every call hit the time or memory limit"}
+    if limited + rejected == len(inputs):
+        # Most likely the generated calls do not fit the signature, so neither body ran
+        return {"status": "error", "cases": len(inputs), "reason": "Every call raised TypeError on both sides"}
+    return {"status": "equivalent", "cases": len(inputs) - limited}
+
+
+def _top_level_functions(code: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Module-level functions that can be called positionally (see
+    ``function_parameters``), each with its full ``signature``: defaults and
+    keyword-only parameters never show up in the generated calls.
+    """
+    signatures = {node.name: (ast.dump(node.args), ast.dump(node.returns) if node.returns else None)
+                  for node in ast.parse(code).body if isinstance(node, ast.FunctionDef)}
+    functions = function_parameters(code)
+    for name, function in functions.items():
+        function["signature"] = signatures[name]
+    return functions
+
+
+class DifferentialTester:
+    """
+    Checks behavioral equivalence of a refactoring by running the original
+    and refactored modules side by side on generated inputs.
+
+    Every module-level function the refactoring changed whose signature
+    and annotations are unchanged gets inputs generated from those
+    annotations; functions it did not touch, and functions with required
+    keyword-only parameters, are never called. If every call raises
+    TypeError on both sides the function counts as not compared. Return values, raised exception types and
+    in-place argument mutations must match. Calls run in a fork-server
+    process pool with a per-call time limit, a per-worker memory limit and
+    a temporary working directory removed by ``close()``.
+
+    This is not a sandbox: the code under test runs with the caller's
+    permissions, so absolute paths, environment variables, subprocesses and
+    the network are all reachable. Only check code you would import.
+    """
+
+    def __init__(self, workers: Optional[int] = None, cases: int = 50, time_limit: float = 1.0,
+                 memory_limit_mb: Optional[int] = 512, seed: int = 0):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.cases = cases
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.seed = seed
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._pool_path: Optional[str] = None
+        self._work_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    def _executor(self, search_path: Optional[str]) -> concurrent.futures.ProcessPoolExecutor:
+        """The worker pool, kept warm between checks with the same search path."""
+        if self._pool is None or self._pool_path != search_path:
+            self.close()
+            self._work_dir = tempfile.TemporaryDirectory(prefix="neurorefactor-differential-")
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=self._ctx,
+                initializer=_init_worker, initargs=(self.memory_limit, search_path, self._work_dir.name))
+            self._pool_path = search_path
+        return self._pool
+
+    def close(self, kill: bool = False) -> None:
+        if self._pool is None:
+            return
+        if kill:
+            for process in list((self._pool._processes or {}).values()):
+                process.kill()  # Workers may be stuck in code under test
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+        self._work_dir.cleanup()
+        self._work_dir = None
+
+    def __enter__(self) -> "DifferentialTester":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def check(self, original_code: str, refactored_code: str, search_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns {equivalent, functions: {name: {status, cases, ...}}, message}.
+        ``equivalent`` is True when every compared function agreed on every
+        input, False on any mismatch and None when nothing could be compared;
+        use ``covers_change`` to check that the changed functions were among
+        the compared ones.
+        ``search_path`` makes sibling modules importable.
+        """
+        try:
+            before, after = _top_level_functions(original_code), _top_level_functions(refactored_code)
+            changed = changed_functions(original_code, refactored_code)
+        except SyntaxError as e:
+            return {"equivalent": None, "functions": {}, "message": f"Syntax error in code: {e}"}
+
+        functions: Dict[str, Dict[str, Any]] = {}
+        jobs = {}
+        for name, function in before.items():
+            if name not in changed:
+                continue  # Running untouched code proves nothing and risks its side effects
+            if name not in after:
+                functions[name] = {"status": "skipped", "reason": "Removed or renamed"}
+            elif function != after[name]:
+                functions[name] = {"status": "skipped", "reason": "Signature or annotations changed"}
+            else:
+                inputs = generate_inputs(function["parameters"], self.cases, self.seed)
+                if inputs is None:
+                    functions[name] = {"status": "skipped", "reason": "Unsupported parameter annotation"}
+                else:
+                    jobs[name] = inputs
+
+        executor = self._executor(search_path)
+        futures = {executor.submit(_compare_function, original_code, refactored_code, name, inputs,
+                                   self.time_limit): name for name, inputs in jobs.items()}
+        # Calls are interrupted inside the worker; this deadline only catches
+        # code that blocks the alarm signal (e.g. a long C call)
+        deadline = self.time_limit * 2 * self.cases * max(1, len(jobs)) + 10
+        broken = False
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=deadline):
+                try:
+                    functions[futures[future]] = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    functions[futures[future]] = {"status": "error", "reason": "Worker crashed (memory limit or fatal error)"}
+        except concurrent.futures.TimeoutError:
+            broken = True
+            for name in futures.values():
+                functions.setdefault(name, {"status": "error", "reason": "Timed out"})
+        if broken:
+            self.close(kill=True)
+
+        statuses = [result["status"] for result in functions.values()]
+        if "different" in statuses:
+            equivalent = False
+        elif "equivalent" in statuses:
+            equivalent = True
+        else:
+            equivalent = None
+        compared = statuses.count("equivalent")
+        if equivalent is False:
+            names = [name for name, result in functions.items() if result["status"] == "different"]
+            message = f"Behavior differs in: {', '.join(sorted(names))}"
+        elif equivalent:
+            message = f"{compared} function(s) behaved identically on generated inputs"
+        else:
+            message = "No function could be compared"
+        return {"equivalent": equivalent, "functions": functions, "message": message}
+
+    def covers_change(self, original_code: str, refactored_code: str, report: Dict[str, Any]) -> bool:
+        """
+        True when every function the refactoring changed was compared and
+        found equivalent, so the report is evidence for the whole change.
+        """
+        try:
+            changed = changed_functions(original_code, refactored_code)
+        except SyntaxError:
+            return False
+        return bool(changed) and all(
+            report["functions"].get(name, {}).get("status") == "equivalent" for name in changed)
@@ -0,0 +1,174 @@
+import json
+import os
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILES = {
+    "jsonl": "metadata.jsonl",
+    "parquet": "metadata.parquet"
+}
+EMBEDDING_DIM = 768  # CodeBERT hidden size
+STORE_VERSION = 1
+
+
+def _iter_feature_rows(features: Dict[str, Any]) -> Iterator[Tuple[Dict[str, Any], Any]]:
+    """
+    Flattens one ``extract_features`` result into (row, embedding) pairs:
+    one row for the file itself, then one per function and class.
+    """
+    file_path = features.get("file_path", "")
+    file_metrics = features.get("file_metrics", {})
+    yield ({
+        "file_path": file_path,
+        "kind": "file",
+        "name": os.path.basename(file_path),
+        "start_line": 1,
+        "end_line": features.get("lines_of_code", 0),
+        **file_metrics
+    }, features.get("file_embedding"))
+
+    for kind, key in (("function", "functions"), ("class", "classes")):
+        for item in features.get(key, []):
+            yield ({
+                "file_path": file_path,
+                "kind": kind,
+                "name": item.get("name", ""),
+                "start_line": item.get("start_line", 0),
+                "end_line": item.get("end_line", 0),
+                **item.get("metrics", {})
+            }, item.get("embedding"))
+
+
+class FeatureStoreWriter:
+    """
+    Writes extracted features as a compact row file plus a float16 embedding
+    matrix. Row ``row_id`` is the index of its vector in ``embeddings.npy``.
+    """
+
+    def __init__(self, output_dir: str, metadata_format: str = "jsonl", embedding_dim: int = EMBEDDING_DIM):
+        if metadata_format not in METADATA_FILES:
+            raise ValueError(f"Unsupported metadata format: {metadata_format}")
+        self.output_dir = output_dir
+        self.metadata_format = metadata_format
+        self.embedding_dim = embedding_dim
+        self._rows: List[Dict[str, Any]] = []
+        self._vectors: List[np.ndarray] = []
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, features: Dict[str, Any]) -> None:
+        """
+        Adds the rows of one file. Embeddings are narrowed to float16 right
+        away so the writer never holds Python float lists.
+        """
+        for row, embedding in _iter_feature_rows(features):
+            vector = np.zeros(self.embedding_dim, dtype=np.float16)
+            has_embedding = embedding is not None and len(embedding) > 0
+            if has_embedding:
+                values = np.asarray(embedding, dtype=np.float32).ravel()
+                if values.shape[0] != self.embedding_dim:
+                    raise ValueError(f"Expected {self.embedding_dim}-d embedding, got {values.shape[0]}")
+                vector[:] = values
+            row["row_id"] = len(self._rows)
+            row["has_embedding"] = has_embedding
+            self._rows.append(row)
+            self._vectors.append(vector)
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Writes the metadata rows, the embedding sidecar and the manifest.
+        """
+        metadata_file = METADATA_FILES[self.metadata_format]
+        metadata_path = os.path.join(self.output_dir, metadata_file)
+        if self.metadata_format == "parquet":
+            pd.DataFrame(self._rows).to_parquet(metadata_path, index=False)
+        else:
+            with open(metadata_path, "w", encoding="utf-8") as f:
+                for row in self._rows:
+                    f.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+        if self._vectors:
+            embeddings = np.stack(self._vectors)
+        else:
+            embeddings = np.zeros((0, self.embedding_dim), dtype=np.float16)
+        np.save(os.path.join(self.output_dir, EMBEDDINGS_FILE), embeddings)
+
+        manifest = {
+            "version": STORE_VERSION,
+            "rows": len(self._rows),
+            "embedding_dim": self.embedding_dim,
+            "embedding_dtype": "float16",
+            "metadata_file": metadata_file,
+            "embeddings_file": EMBEDDINGS_FILE
+        }
+        with open(os.path.join(self.output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def write_feature_store(features_list: List[Dict[str, Any]], output_dir: str, metadata_format: str = "jsonl") -> Dict[str, Any]:
+    """
+    Convenience wrapper that writes a list of ``extract_features`` results.
+    """
+    writer = FeatureStoreWriter(output_dir, metadata_format=metadata_format)
+    for features in features_list:
+        writer.add(features)
+    return writer.close()
+
+
+class FeatureStore:
+    """
+    Read side of the feature store. Metadata is loaded eagerly (it is small);
+    embeddings are memory-mapped so filtering by file or function only pages
+    in the selected vectors.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        metadata_path = os.path.join(store_dir, self.manifest["metadata_file"])
+        if metadata_path.endswith(".parquet"):
+            self.metadata = pd.read_parquet(metadata_path)
+        elif self.manifest["rows"]:
+            self.metadata = pd.read_json(metadata_path, lines=True)
+        else:
+            self.metadata = pd.DataFrame(columns=["row_id", "file_path", "kind", "name"])
+
+        self.embeddings = np.load(os.path.join(store_dir, self.manifest["embeddings_file"]), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    def filter(self, file_path: Optional[str] = None, function: Optional[str] = None, kind: Optional[str] = None) -> pd.DataFrame:
+        """
+        Returns the metadata rows matching every given criterion.
+        ``function`` matches row names of kind ``function``.
+        """
+        mask = pd.Series(True, index=self.metadata.index)
+        if file_path is not None:
+            mask &= self.metadata["file_path"] == os.path.abspath(file_path)
+        if function is not None:
+            mask &= (self.metadata["kind"] == "function") & (self.metadata["name"] == function)
+        if kind is not None:
+            mask &= self.metadata["kind"] == kind
+        return self.metadata[mask]
+
+    def get_embeddings(self, row_ids: Any) -> np.ndarray:
+        """
+        Reads the vectors for the given row ids from the memory-mapped sidecar.
+        """
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        return np.asarray(self.embeddings[row_ids])
+
+    def query(self, file_path: Optional[str] = None, function: Optional[str] = None, kind: Optional[str] = None) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Filters metadata and returns the matching rows with their embeddings,
+        both ordered by ``row_id``.
+        """
+        rows = self.filter(file_path=file_path, function=function, kind=kind).sort_values("row_id")
+        return rows, self.get_embeddings(rows["row_id"].to_numpy())
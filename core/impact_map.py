@@ -0,0 +1,179 @@
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Set, Tuple
+
+# The structural diff is shared with the app in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.core.ast_diff import structural_diff
+
+DEFAULT_CACHE_DIR = os.path.join(".neurorefactor_cache", "test_impact")
+MAP_VERSION = 1
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- pytest plugin (loaded with ``-p impact_map`` in the coverage run) ---
+
+def pytest_runtest_protocol(item, nextitem):
+    """
+    Records every test under its own coverage context, named after the
+    in-file part of its node id (``test_fn`` / ``TestClass::test_fn[param]``).
+    """
+    import coverage
+    cov = coverage.Coverage.current()
+    if cov is not None:
+        cov.switch_context(item.nodeid.split("::", 1)[-1])
+
+
+def _function_ranges(file_path: str) -> List[Tuple[int, int, str]]:
+    """(start, end, qualname) of every function in a file, outermost first."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return []
+    ranges = []
+
+    def walk(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                qualname = f"{prefix}.{child.name}" if prefix else child.name
+                if not isinstance(child, ast.ClassDef):
+                    ranges.append((child.lineno, child.end_lineno, qualname))
+                walk(child, qualname)
+            else:
+                walk(child, prefix)
+
+    walk(tree, "")
+    return ranges
+
+
+def _innermost(ranges: List[Tuple[int, int, str]], line: int) -> Optional[str]:
+    found = None
+    for start, end, qualname in ranges:
+        if start <= line <= end:
+            found = qualname  # Later ranges are nested deeper
+    return found
+
+
+def changed_functions(original_code: str, refactored_code: str) -> Set[str]:
+    """
+    Qualified names of the functions/classes a refactoring touches; ""
+    stands for a module-level change, which may affect any function.
+    """
+    return {change.qualname for change in structural_diff(original_code, refactored_code).changes}
+
+
+class TestImpactMap:
+    """
+    Maps each test of a test file to the source functions it executes, using
+    one coverage run with a context per test. The map is cached and reused
+    until the test file, a conftest.py next to it or the source module it
+    was built for changes, or it is built for another code directory.
+    """
+    __test__ = False  # Not a pytest test class
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, timeout: Optional[float] = None):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+
+    def _cache_key(self, test_file_path: str, code_dir: Optional[str], source_path: Optional[str]) -> str:
+        import coverage
+        test_dir = os.path.dirname(os.path.abspath(test_file_path))
+        paths = [os.path.abspath(path) if path else "" for path in (test_file_path, code_dir, source_path)]
+        digest = hashlib.sha256(f"{MAP_VERSION}:{coverage.__version__}:{':'.join(paths)}".encode())
+        for path in (test_file_path, os.path.join(test_dir, "conftest.py"), source_path):
+            if path and os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+            else:
+                digest.update(b"-")  # Keeps each file's hash in its own slot
+        return digest.hexdigest()
+
+    def coverage_map(self, test_file_path: str, code_dir: Optional[str] = None,
+                     source_path: Optional[str] = None) -> Optional[Dict[str, List[str]]]:
+        """
+        ``{test id: ["<abs source path>::<qualname>", ...]}`` for a test file,
+        from the cache while the test file and ``source_path`` (whose line
+        numbers the map relies on) are unchanged. Returns None if the
+        coverage run fails.
+        """
+        cache_path = os.path.join(self.cache_dir, f"{self._cache_key(test_file_path, code_dir, source_path)}.json")
+        if os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        mapping = self._build(test_file_path, code_dir)
+        if mapping is None:
+            return None
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(mapping, f)
+        os.replace(tmp_path, cache_path)
+        return mapping
+
+    def _build(self, test_file_path: str, code_dir: Optional[str]) -> Optional[Dict[str, List[str]]]:
+        import coverage
+        test_file_path = os.path.abspath(test_file_path)
+        test_dir = os.path.dirname(test_file_path)
+        with tempfile.TemporaryDirectory() as work_dir:
+            data_file = os.path.join(work_dir, ".coverage")
+            env = dict(os.environ)
+            env["PYTHONPATH"] = os.pathsep.join(
+                [CORE_DIR, os.path.abspath(code_dir or test_dir)] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+            command = [sys.executable, "-m", "coverage", "run", f"--data-file={data_file}",
+                       f"--omit={test_file_path},{os.path.abspath(__file__)}",
+                       "-m", "pytest", test_file_path, "-p", "impact_map", "-q", "-p", "no:cacheprovider"]
+            try:
+                subprocess.run(command, capture_output=True, text=True, cwd=test_dir, env=env,
+                               timeout=self.timeout, check=False)
+            except subprocess.TimeoutExpired:
+                return None
+            if not os.path.exists(data_file):
+                return None
+
+            data = coverage.CoverageData(basename=data_file)
+            data.read()
+            mapping: Dict[str, Set[str]] = {}
+            for measured in data.measured_files():
+                ranges = _function_ranges(measured)
+                for line, contexts in data.contexts_by_lineno(measured).items():
+                    qualname = _innermost(ranges, line)
+                    for context in contexts:
+                        if context and qualname:
+                            mapping.setdefault(context, set()).add(f"{os.path.abspath(measured)}::{qualname}")
+        return {test: sorted(functions) for test, functions in mapping.items()}
+
+    def affected_tests(self, test_file_path: str, source_path: str, original_code: str,
+                       refactored_code: str) -> Optional[List[str]]:
+        """
+        Test ids (in-file node id parts) that execute any function the
+        refactoring changed. [] means no test is affected; None means the
+        map is unavailable, or never saw the module run (it may have been
+        imported under another path), and every test should run.
+        """
+        source = os.path.abspath(source_path)
+        mapping = self.coverage_map(test_file_path, os.path.dirname(source), source)
+        if mapping is None or not any(function.startswith(f"{source}::")
+                                      for functions in mapping.values() for function in functions):
+            return None
+        try:
+            changed = changed_functions(original_code, refactored_code)
+        except SyntaxError:
+            return None
+        prefixes = [f"{source}::{qualname}" for qualname in changed if qualname]
+        module_level = "" in changed
+
+        affected = []
+        for test, functions in mapping.items():
+            for function in functions:
+                if (module_level and function.startswith(f"{source}::")) or any(
+                        function == prefix or function.startswith(f"{prefix}.") for prefix in prefixes):
+                    affected.append(test)
+                    break
+        return sorted(affected)
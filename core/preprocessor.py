@@ -1,139 +1,483 @@
 import libcst as cst
+from libcst.metadata import MetadataWrapper, PositionProvider
+import ast
+import functools
+import hashlib
+import io
 import json
 import os
+import tempfile
+import time
+import tokenize
+from typing import Dict, Any, Optional, Callable, Mapping, List, Tuple
+
+DEFAULT_CACHE_DIR = os.path.join(".neurorefactor_cache", "metadata")
+CACHE_VERSION = 2
+# Files modified this close to the moment they were cached may share an mtime
+# with the cached version (coarse filesystem timestamps), so they are re-hashed.
+RACY_WINDOW_NS = 2_000_000_000
+BACKENDS = ("auto", "ast", "libcst")
+
+
+def _empty_metadata() -> Dict[str, Any]:
+    return {
+        "imports": [],
+        "functions": [],
+        "classes": [],
+        "comments": [],
+        "lines_of_code": 0,
+        "indentation_style": "",  # To be determined from first indented line
+        "file_path": ""
+    }
+
+
+def _detect_indentation_style(code: str) -> str:
+    """
+    Basic attempt to determine indentation style from the most common indent.
+    """
+    indent_counts = {}
+    for line in code.splitlines():
+        if line.strip() and (line.startswith(' ') or line.startswith('\t')):
+            indent = len(line) - len(line.lstrip())
+            indent_counts[indent] = indent_counts.get(indent, 0) + 1
+    if not indent_counts:
+        return ""
+    most_common_indent = max(indent_counts, key=indent_counts.get)
+    return f"{most_common_indent} spaces" if most_common_indent > 0 and most_common_indent % 2 == 0 else "tabs" if '\t' in code else "mixed/unknown"
+
+
+def _normalize_expression(source: str) -> Optional[str]:
+    """
+    Canonical text for an annotation or default value, so both backends
+    report e.g. ``Dict[str,int]`` as ``Dict[str, int]``.
+    """
+    try:
+        # Parenthesized so expressions that span lines inside a call still parse
+        return ast.unparse(ast.parse(f"({source.strip()})", mode="eval").body)
+    except SyntaxError:
+        return source.strip()
+
+
 class CodeMetadataExtractor(cst.CSTVisitor):
-"""
-A CSTVisitor to extract key metadata from Python source code.
-"""
-def __init__(self):
-self.metadata = {
-"imports": [],
-"functions": [],
-"classes": [],
-"comments": [],
-"lines_of_code": 0,
-"indentation_style": "", # To be determined from first indented
-line
-"file_path": ""
-}
-self._indent_counts = {}
-def visit_Module(self, node: cst.Module) -> None:
-self.metadata["lines_of_code"] = len(node.code.splitlines())
-# Basic attempt to determine indentation style
-for line in node.code.splitlines():
-if line.strip() and (line.startswith(' ') or
-line.startswith('\t')):
-indent = len(line) - len(line.lstrip())
-self._indent_counts[indent] = self._indent_counts.get(indent,
-0) + 1
-if self._indent_counts:
-# Most common indentation
-most_common_indent = max(self._indent_counts,
-key=self._indent_counts.get)
-self.metadata["indentation_style"] = f"{most_common_indent}
-spaces" if most_common_indent > 0 and most_common_indent % 2 == 0 else "tabs"
-if '\t' in node.code else "mixed/unknown"
-def visit_Import(self, node: cst.Import) -> None:
-for import_alias in node.names:
-self.metadata["imports"].append({
-"module": import_alias.name.value,
-"alias": import_alias.asname.name.value if
-import_alias.asname else None,
-"line": node.start_pos.line
-})
-def visit_ImportFrom(self, node: cst.ImportFrom) -> None:
-module_name = node.module.value if node.module else ""
-for import_alias in node.names:
-self.metadata["imports"].append({
-"module": module_name,
-"name": import_alias.name.value,
-"alias": import_alias.asname.name.value if
-import_alias.asname else None,
-"line": node.start_pos.line
-})
-def visit_FunctionDef(self, node: cst.FunctionDef) -> None:
-# Extract signature details
-params = []
-for param in node.params.params:
-param_info = {"name": param.name.value}
-if param.annotation:
-param_info["annotation"] =
-cst.helpers.get_full_name_for_node(param.annotation)
-if param.default:
-param_info["default"] =
-cst.helpers.get_full_name_for_node(param.default)
-params.append(param_info)
-returns_annotation = cst.helpers.get_full_name_for_node(node.returns)
-if node.returns else None
-self.metadata["functions"].append({
-"name": node.name.value,
-"signature": f"({', '.join([p['name'] for p in params])})", #
-Simplified signature
-"parameters": params,
-"returns_annotation": returns_annotation,
-"start_line": node.start_pos.line,
-"end_line": node.end_pos.line,
-"docstring": node.get_docstring() # Extract docstring
-})
-def visit_ClassDef(self, node: cst.ClassDef) -> None:
-bases = []
-for base in node.bases:
-bases.append(cst.helpers.get_full_name_for_node(base.value))
-self.metadata["classes"].append({
-"name": node.name.value,
-"bases": bases,
-"start_line": node.start_pos.line,
-"end_line": node.end_pos.line,
-"docstring": node.get_docstring() # Extract docstring
-})
-def visit_Comment(self, node: cst.Comment) -> None:
-self.metadata["comments"].append({
-"value": node.value,
-"line": node.start_pos.line
-})
-def preprocess_code(file_path: str) -> dict:
-"""
-Parses a Python file and extracts structured metadata.
-"""
-if not os.path.exists(file_path):
-raise FileNotFoundError(f"File not found: {file_path}")
-with open(file_path, "r", encoding="utf-8") as f:
-source_code = f.read()
-try:
-tree = cst.parse_module(source_code)
-extractor = CodeMetadataExtractor()
-tree.visit(extractor)
-extractor.metadata["file_path"] = os.path.abspath(file_path)
-return extractor.metadata
-except cst.ParserSyntaxError as e:
-print(f"Error parsing {file_path}: {e}")
-return {"error": str(e), "file_path": os.path.abspath(file_path)}
+    """
+    A CSTVisitor to extract key metadata from Python source code.
+    Line numbers come from a PositionProvider mapping resolved by the caller
+    (``self.metadata`` is the result dict, so libcst's own metadata
+    resolution is not used here).
+    """
+
+    def __init__(self, positions: Optional[Mapping[cst.CSTNode, Any]] = None,
+                 include_comments: bool = False, include_indentation: bool = False):
+        self.metadata = _empty_metadata()
+        self.include_comments = include_comments
+        self.include_indentation = include_indentation
+        self._positions = positions or {}
+        self._module: Optional[cst.Module] = None
+
+    def _start_line(self, node: cst.CSTNode) -> int:
+        return self._positions[node].start.line
+
+    def _end_line(self, node: cst.CSTNode) -> int:
+        return self._positions[node].end.line
+
+    def _expression(self, node: cst.CSTNode) -> str:
+        return _normalize_expression(self._module.code_for_node(node))
+
+    def visit_Module(self, node: cst.Module) -> None:
+        self._module = node
+        self.metadata["lines_of_code"] = len(node.code.splitlines())
+        if self.include_indentation:
+            self.metadata["indentation_style"] = _detect_indentation_style(node.code)
+
+    def visit_Import(self, node: cst.Import) -> None:
+        for import_alias in node.names:
+            self.metadata["imports"].append({
+                "module": cst.helpers.get_full_name_for_node(import_alias.name),
+                "alias": import_alias.asname.name.value if import_alias.asname else None,
+                "line": self._start_line(node)
+            })
+
+    def visit_ImportFrom(self, node: cst.ImportFrom) -> None:
+        module_name = cst.helpers.get_full_name_for_node(node.module) if node.module else ""
+        if isinstance(node.names, cst.ImportStar):
+            self.metadata["imports"].append({
+                "module": module_name,
+                "name": "*",
+                "alias": None,
+                "line": self._start_line(node)
+            })
+            return
+        for import_alias in node.names:
+            self.metadata["imports"].append({
+                "module": module_name,
+                "name": import_alias.name.value,
+                "alias": import_alias.asname.name.value if import_alias.asname else None,
+                "line": self._start_line(node)
+            })
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> None:
+        # Extract signature details
+        params = []
+        for param in node.params.params:
+            param_info = {"name": param.name.value}
+            if param.annotation:
+                param_info["annotation"] = self._expression(param.annotation.annotation)
+            if param.default:
+                param_info["default"] = self._expression(param.default)
+            params.append(param_info)
+
+        returns_annotation = self._expression(node.returns.annotation) if node.returns else None
+
+        self.metadata["functions"].append({
+            "name": node.name.value,
+            "signature": f"({', '.join([p['name'] for p in params])})",  # Simplified signature
+            "parameters": params,
+            "returns_annotation": returns_annotation,
+            "start_line": self._start_line(node),
+            "end_line": self._end_line(node),
+            "docstring": node.get_docstring()  # Extract docstring
+        })
+
+    def visit_ClassDef(self, node: cst.ClassDef) -> None:
+        bases = []
+        for base in node.bases:
+            bases.append(cst.helpers.get_full_name_for_node(base.value))
+
+        self.metadata["classes"].append({
+            "name": node.name.value,
+            "bases": bases,
+            "start_line": self._start_line(node),
+            "end_line": self._end_line(node),
+            "docstring": node.get_docstring()  # Extract docstring
+        })
+
+    def visit_Comment(self, node: cst.Comment) -> None:
+        if not self.include_comments:
+            return
+        self.metadata["comments"].append({
+            "value": node.value,
+            "line": self._start_line(node)
+        })
+
+
+def _ast_full_name(node: ast.AST) -> Optional[str]:
+    """
+    Stdlib counterpart of ``cst.helpers.get_full_name_for_node``.
+    """
+    if isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Attribute):
+        return f"{_ast_full_name(node.value)}.{node.attr}"
+    elif isinstance(node, ast.Call):
+        return _ast_full_name(node.func)
+    elif isinstance(node, ast.Subscript):
+        return _ast_full_name(node.value)
+    return None
+
+
+class AstMetadataExtractor(ast.NodeVisitor):
+    """
+    Fast path for CodeMetadataExtractor built on the stdlib ``ast`` module.
+    Produces the same metadata schema; comments are read with ``tokenize``
+    since the AST does not keep them.
+    """
+
+    def __init__(self, include_comments: bool = False, include_indentation: bool = False):
+        self.metadata = _empty_metadata()
+        self.include_comments = include_comments
+        self.include_indentation = include_indentation
+
+    def extract(self, source_code: str) -> Dict[str, Any]:
+        self.visit(ast.parse(source_code))
+        self.metadata["lines_of_code"] = len(source_code.splitlines())
+        if self.include_indentation:
+            self.metadata["indentation_style"] = _detect_indentation_style(source_code)
+        if self.include_comments:
+            self.metadata["comments"] = self._comments(source_code)
+        return self.metadata
+
+    def _comments(self, source_code: str) -> List[Dict[str, Any]]:
+        return [
+            {"value": token.string, "line": token.start[0]}
+            for token in tokenize.generate_tokens(io.StringIO(source_code).readline)
+            if token.type == tokenize.COMMENT
+        ]
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for import_alias in node.names:
+            self.metadata["imports"].append({
+                "module": import_alias.name,
+                "alias": import_alias.asname,
+                "line": node.lineno
+            })
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for import_alias in node.names:
+            self.metadata["imports"].append({
+                "module": node.module or "",
+                "name": import_alias.name,
+                "alias": import_alias.asname,
+                "line": node.lineno
+            })
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        params = []
+        for arg in node.args.args:
+            params.append({"name": arg.arg})
+            if arg.annotation:
+                params[-1]["annotation"] = ast.unparse(arg.annotation)
+        # Defaults align with the last positional parameters
+        positional = node.args.posonlyargs + node.args.args
+        offset = len(positional) - len(node.args.defaults)
+        for index, default in enumerate(node.args.defaults):
+            if index + offset >= len(node.args.posonlyargs):
+                params[index + offset - len(node.args.posonlyargs)]["default"] = ast.unparse(default)
+
+        self.metadata["functions"].append({
+            "name": node.name,
+            "signature": f"({', '.join([p['name'] for p in params])})",  # Simplified signature
+            "parameters": params,
+            "returns_annotation": ast.unparse(node.returns) if node.returns else None,
+            "start_line": node.lineno,
+            "end_line": node.end_lineno,
+            "docstring": ast.get_docstring(node)
+        })
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.metadata["classes"].append({
+            "name": node.name,
+            "bases": [_ast_full_name(base) for base in node.bases],
+            "start_line": node.lineno,
+            "end_line": node.end_lineno,
+            "docstring": ast.get_docstring(node)
+        })
+        self.generic_visit(node)
+
+
+def _extract_metadata(source_code: str, file_path: str, backend: str = "auto",
+                      include_comments: bool = False, include_indentation: bool = False) -> Dict[str, Any]:
+    """
+    Runs the selected metadata extractor over already-read source code.
+    ``auto`` uses the stdlib ``ast`` backend unless comments are requested.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown preprocessing backend: {backend}")
+    if backend == "auto":
+        backend = "libcst" if include_comments else "ast"
+
+    try:
+        if backend == "ast":
+            extractor = AstMetadataExtractor(include_comments, include_indentation)
+            metadata = extractor.extract(source_code)
+        else:
+            wrapper = MetadataWrapper(cst.parse_module(source_code))
+            extractor = CodeMetadataExtractor(wrapper.resolve(PositionProvider), include_comments, include_indentation)
+            wrapper.module.visit(extractor)
+            metadata = extractor.metadata
+        metadata["file_path"] = os.path.abspath(file_path)
+        return metadata
+    except (cst.ParserSyntaxError, SyntaxError, tokenize.TokenError) as e:
+        print(f"Error parsing {file_path}: {e}")
+        return {"error": str(e), "file_path": os.path.abspath(file_path)}
+
+
+class MetadataCache:
+    """
+    On-disk cache of CodeMetadataExtractor output, keyed by absolute file path.
+
+    A lookup first compares mtime and size (no read needed); if those differ,
+    the file is hashed and the entry is reused when the content is unchanged.
+    Each entry is its own JSON file replaced atomically, so concurrent
+    processes can share a cache directory without locking.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.hash_hits = 0
+        self.misses = 0
+
+    def _entry_path(self, abs_path: str, variant: str = "") -> str:
+        key = hashlib.sha1(f"{abs_path}\0{variant}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_entry(self, abs_path: str, variant: str = "") -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._entry_path(abs_path, variant), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (entry.get("version") != CACHE_VERSION
+                or entry.get("file_path") != abs_path
+                or entry.get("variant", "") != variant):
+            return None
+        return entry
+
+    def _write_entry(self, abs_path: str, entry: Dict[str, Any]) -> None:
+        entry_path = self._entry_path(abs_path, entry.get("variant", ""))
+        entry_dir = os.path.dirname(entry_path)
+        os.makedirs(entry_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, entry_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_or_extract(self, file_path: str, extract: Callable[[str, str], Dict[str, Any]], variant: str = "") -> Dict[str, Any]:
+        """
+        Returns cached metadata for ``file_path``, calling
+        ``extract(source_code, file_path)`` only when the file changed.
+        ``variant`` separates entries produced with different extractor options.
+        """
+        return self.lookup(file_path, extract, variant)[0]
+
+    def lookup(self, file_path: str, extract: Callable[[str, str], Dict[str, Any]], variant: str = "") -> Tuple[Dict[str, Any], str]:
+        """
+        Like ``get_or_extract`` but also returns the sha256 of the file
+        content, so callers can detect changes without rereading the file.
+        """
+        abs_path = os.path.abspath(file_path)
+        stat = os.stat(abs_path)
+        entry = self._read_entry(abs_path, variant)
+
+        if (entry is not None
+                and entry["mtime_ns"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size
+                and stat.st_mtime_ns + RACY_WINDOW_NS < entry["checked_at_ns"]):
+            self.hits += 1
+            return entry["metadata"], entry["content_hash"]
+
+        with open(abs_path, "rb") as f:
+            raw = f.read()
+        content_hash = hashlib.sha256(raw).hexdigest()
+
+        if entry is not None and entry["content_hash"] == content_hash:
+            self.hash_hits += 1
+            metadata = entry["metadata"]
+        else:
+            self.misses += 1
+            metadata = extract(raw.decode("utf-8"), abs_path)
+
+        self._write_entry(abs_path, {
+            "version": CACHE_VERSION,
+            "file_path": abs_path,
+            "variant": variant,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "checked_at_ns": time.time_ns(),
+            "content_hash": content_hash,
+            "metadata": metadata
+        })
+        return metadata, content_hash
+
+    def invalidate(self, file_path: str, variant: str = "") -> None:
+        """
+        Drops the entry for one file, if any.
+        """
+        try:
+            os.remove(self._entry_path(os.path.abspath(file_path), variant))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Reports lookups served from the stat check, from the content hash,
+        and misses that required a reparse.
+        """
+        lookups = self.hits + self.hash_hits + self.misses
+        return {
+            "lookups": lookups,
+            "hits": self.hits,
+            "hash_hits": self.hash_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.hash_hits) / lookups if lookups else 0.0
+        }
+
+
+def metadata_extractor(backend: str = "auto", include_comments: bool = False,
+                       include_indentation: bool = False) -> Tuple[Callable[[str, str], Dict[str, Any]], str]:
+    """
+    Returns an ``extract(source_code, file_path)`` callable for the given
+    options together with the cache variant key those options map to.
+    """
+    extract = functools.partial(_extract_metadata, backend=backend, include_comments=include_comments,
+                                include_indentation=include_indentation)
+    return extract, f"{backend}:{int(include_comments)}:{int(include_indentation)}"
+
+
+def preprocess_code(file_path: str, cache: Optional[MetadataCache] = None, backend: str = "auto",
+                    include_comments: bool = False, include_indentation: bool = False) -> dict:
+    """
+    Parses a Python file and extracts structured metadata.
+    When a MetadataCache is given, unchanged files are not reparsed.
+    Comments and the indentation scan are only collected when asked for.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    extract, variant = metadata_extractor(backend, include_comments, include_indentation)
+    if cache is not None:
+        return cache.get_or_extract(file_path, extract, variant=variant)
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        source_code = f.read()
+    return extract(source_code, file_path)
+
+
+def preprocess_directory(root_dir: str, cache: Optional[MetadataCache] = None, **options: Any) -> Dict[str, dict]:
+    """
+    Preprocesses every Python file under ``root_dir``, keyed by absolute path.
+    """
+    results = {}
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d != "__pycache__"]
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                file_path = os.path.abspath(os.path.join(dirpath, filename))
+                results[file_path] = preprocess_code(file_path, cache=cache, **options)
+    return results
+
+
 if __name__ == "__main__":
-# Example Usage:
-# Create a dummy Python file for testing
-dummy_code = """
+    # Example Usage:
+    # Create a dummy Python file for testing
+    dummy_code = '''
 import os
 from collections import defaultdict as dd
+
 # This is a global comment
 def calculate_sum(a: int, b: int = 10) -> int:
-"""Calculates the sum of two numbers."""
-# Inline comment inside function
-result = a + b
-return result
+    """Calculates the sum of two numbers."""
+    # Inline comment inside function
+    result = a + b
+    return result
+
 class MyClass(object):
-"""A simple example class."""
-def __init__(self, name):
-self.name = name
-def greet(self):
-return f"Hello, {self.name}!"
+    """A simple example class."""
+    def __init__(self, name):
+        self.name = name
+
+    def greet(self):
+        return f"Hello, {self.name}!"
+
 if __name__ == "__main__":
-total = calculate_sum(5)
-print(f"Total: {total}")
-"""
-with open("dummy_code.py", "w", encoding="utf-8") as f:
-f.write(dummy_code)
-print("Processing dummy_code.py...")
-metadata = preprocess_code("dummy_code.py")
-print(json.dumps(metadata, indent=2))
-# Clean up dummy file
-os.remove("dummy_code.py")
\ No newline at end of file
+    total = calculate_sum(5)
+    print(f"Total: {total}")
+'''
+    # Written to a temp directory so the demo never leaves files in the tree
+    with tempfile.TemporaryDirectory() as demo_dir:
+        dummy_path = os.path.join(demo_dir, "dummy_code.py")
+        with open(dummy_path, "w", encoding="utf-8") as f:
+            f.write(dummy_code)
+
+        print("Processing dummy_code.py...")
+        metadata = preprocess_code(dummy_path, include_comments=True, include_indentation=True)
+        print(json.dumps(metadata, indent=2))
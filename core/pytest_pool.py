@@ -0,0 +1,200 @@
+import atexit
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional
+
+# Imported once in the fork server, so every forked worker starts warm
+PRELOAD_MODULES = ["pytest", "_pytest.config", "_pytest.main", "_pytest.python", "_pytest.assertion"]
+
+
+def _context() -> multiprocessing.context.BaseContext:
+    """
+    Fork-server context where available (POSIX): workers are forked from a
+    clean server that has already imported pytest, without inheriting the
+    caller's state. Falls back to spawn elsewhere.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(PRELOAD_MODULES)
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs pytest in-process in a private temp dir. The JSON report and the
+    captured output go to files inside that dir, and sys.path, the working
+    directory and newly imported modules are restored afterwards.
+    """
+    import pytest
+
+    modules = set(sys.modules)
+    sys_path = list(sys.path)
+    cwd = os.getcwd()
+    result = {"exit_code": None, "output": "", "summary": None, "error": None, "worker_pid": os.getpid()}
+
+    with tempfile.TemporaryDirectory(prefix="neurorefactor-tests-") as work_dir:
+        report_path = os.path.join(work_dir, "report.json")
+        output_path = os.path.join(work_dir, "output.txt")
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved_fds = (os.dup(1), os.dup(2))
+        try:
+            with open(output_path, "wb") as output:
+                os.dup2(output.fileno(), 1)
+                os.dup2(output.fileno(), 2)
+                if job.get("code_dir"):
+                    sys.path.insert(0, job["code_dir"])
+                os.chdir(work_dir)
+                result["exit_code"] = int(pytest.main(
+                    [*job["targets"], *job.get("args", []), "-p", "no:cacheprovider",
+                     "--json-report", f"--json-report-file={report_path}"]))
+        except BaseException as e:  # pytest.main may raise SystemExit
+            result["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            for fd in saved_fds:
+                os.close(fd)
+            os.chdir(cwd)
+            sys.path[:] = sys_path
+            for name in set(sys.modules) - modules:
+                del sys.modules[name]  # The next job must re-import the code under test
+
+        if os.path.exists(output_path):
+            with open(output_path, "r", encoding="utf-8", errors="replace") as f:
+                result["output"] = f.read()
+        if os.path.exists(report_path):
+            with open(report_path, "r", encoding="utf-8") as f:
+                result["summary"] = json.load(f).get("summary", {})
+    return result
+
+
+def _worker_main(conn, max_jobs: int) -> None:
+    """Serves jobs from ``conn`` until told to stop or ``max_jobs`` are done."""
+    for _ in range(max_jobs):
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        conn.send(_run_job(job))
+
+
+class _Worker:
+    def __init__(self, ctx: multiprocessing.context.BaseContext, max_jobs: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, max_jobs), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def stop(self, graceful: bool = True) -> None:
+        if graceful and self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+            self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class PytestWorkerPool:
+    """
+    Pool of pre-warmed pytest worker processes.
+
+    Workers are forked from a fork server that has already imported pytest,
+    so a job pays neither interpreter startup nor pytest's import cost. Each
+    job runs in its own temp dir with its own report file, so concurrent
+    validations do not clobber each other. A worker is replaced after
+    ``max_jobs_per_worker`` jobs (or on timeout/crash) so state leaked by
+    the code under test does not accumulate.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_jobs_per_worker: int = 50, timeout: Optional[float] = 300):
+        self.size = workers or min(4, os.cpu_count() or 1)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.timeout = timeout
+        self._ctx = _context()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+
+    def start(self) -> None:
+        """Starts the workers now instead of on the first job."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("PytestWorkerPool is closed")
+            if not self._started:
+                for _ in range(self.size):
+                    self._idle.put(_Worker(self._ctx, self.max_jobs_per_worker))
+                self._started = True
+                atexit.register(self.close)
+
+    def run(self, targets: List[str], code_dir: Optional[str] = None, args: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Runs pytest on ``targets`` (files or node ids) in a worker, with
+        ``code_dir`` importable and ``args`` as extra pytest options. Returns
+        exit_code, output, the JSON report summary (None if no report was
+        written), error and worker_pid.
+        """
+        self.start()
+        worker = self._idle.get()
+        retire = False
+        try:
+            worker.conn.send({"targets": [os.path.abspath(t) if os.path.exists(t) else t for t in targets],
+                              "code_dir": os.path.abspath(code_dir) if code_dir else None,
+                              "args": list(args or [])})
+            if worker.conn.poll(self.timeout):
+                result = worker.conn.recv()
+            else:
+                retire = True
+                result = {"exit_code": None, "output": "", "summary": None,
+                          "error": f"Tests timed out after {self.timeout}s", "worker_pid": worker.process.pid}
+        except (EOFError, OSError) as e:
+            retire = True
+            result = {"exit_code": None, "output": "", "summary": None,
+                      "error": f"Test worker died: {e}", "worker_pid": worker.process.pid}
+        finally:
+            worker.jobs += 1
+            self._release(worker, retire or worker.jobs >= self.max_jobs_per_worker)
+        return result
+
+    def _release(self, worker: _Worker, retire: bool) -> None:
+        if retire:
+            worker.stop(graceful=False)
+        with self._lock:
+            if self._closed:
+                if not retire:
+                    worker.stop()
+                return
+            self._idle.put(_Worker(self._ctx, self.max_jobs_per_worker) if retire else worker)
+
+    def close(self) -> None:
+        """Stops all idle workers; busy ones are stopped when they finish."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+    def __enter__(self) -> "PytestWorkerPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,166 +1,429 @@
 import libcst as cst
-from libcst.tool import get_module_from_code
+from libcst.metadata import PositionProvider
 import os
-from typing import List, Dict, Any
+import sys
+from contextlib import ExitStack
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+
+# Assuming rename_engine.py and changeset.py are in the same directory
+from changeset import ChangesetWriter, DEFAULT_BACKUP_DIR, atomic_write
+from rename_engine import ScopedRenameTransformer
+
+# Local (LLM-free) refactorings are shared with the app in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.core.refactorings import ExtractMethodTransformer, LOCAL_REFACTORINGS
+
+
 class RenameTransformer(cst.CSTTransformer):
-"""
-A CSTTransformer to rename a specific variable within a module.
-This is a simplified example and does not handle scope correctly.
-For production, you'd need proper scope analysis.
-"""
-def __init__(self, old_name: str, new_name: str):
-self.old_name = old_name
-self.new_name = new_name
-def leave_Name(self, original_node: cst.Name, updated_node: cst.Name) ->
-cst.Name:
-"""
-Called when leaving a Name node (e.g., variable names, function
-calls).
-"""
-if original_node.value == self.old_name:
-# Create a new Name node with the updated value
-return updated_node.with_changes(value=self.new_name)
-return updated_node
-def leave_FunctionDef(self, original_node: cst.FunctionDef, updated_node:
-cst.FunctionDef) -> cst.FunctionDef:
-"""
-Called when leaving a FunctionDef node.
-This is an example of how to modify parts of a function definition,
-e.g., renaming a parameter.
-"""
-# Example: if the function name itself needs to be renamed
-if original_node.name.value == self.old_name:
-return
-updated_node.with_changes(name=updated_node.name.with_changes(value=self.new_
-name))
-return updated_node
+    """
+    A CSTTransformer to rename a specific variable within a module.
+    This is a simplified example and does not handle scope correctly.
+    For scope-aware renames use rename_engine.ScopedRenameTransformer.
+    """
+
+    def __init__(self, old_name: str, new_name: str):
+        self.old_name = old_name
+        self.new_name = new_name
+
+    def leave_Name(self, original_node: cst.Name, updated_node: cst.Name) -> cst.Name:
+        """
+        Called when leaving a Name node (e.g., variable names, function
+        calls).
+        """
+        if original_node.value == self.old_name:
+            # Create a new Name node with the updated value
+            return updated_node.with_changes(value=self.new_name)
+        return updated_node
+
+    def leave_FunctionDef(self, original_node: cst.FunctionDef, updated_node: cst.FunctionDef) -> cst.FunctionDef:
+        """
+        Called when leaving a FunctionDef node.
+        This is an example of how to modify parts of a function definition,
+        e.g., renaming a parameter.
+        """
+        # Example: if the function name itself needs to be renamed
+        if original_node.name.value == self.old_name:
+            return updated_node.with_changes(name=updated_node.name.with_changes(value=self.new_name))
+        return updated_node
+
+
+class CompositeTransformer(cst.CSTTransformer):
+    """
+    Runs several transformers in a single traversal. Each node is handed to
+    the transformers in order, each one receiving the previous one's output.
+
+    A transformer whose ``visit_X`` returns False gets no callbacks for that
+    node's subtree (only the node's own ``leave_X``), as in a traversal of
+    its own. Every transformer's ``leave_X`` is always called so their
+    visit/leave bookkeeping stays balanced; once one returns a removal or
+    flatten sentinel, that is the result and later transformers are shown
+    the last node instead.
+
+    For the transformers listed in ``tracked``, ``touched[index]`` collects
+    the original nodes whose ``leave_X`` changed or removed the node, so
+    callers learn where each one edited without a traversal of its own.
+
+    Sub-transformers must already be resolved against the module's
+    MetadataWrapper (see ``apply_transformers``).
+    """
+
+    def __init__(self, transformers: List[cst.CSTTransformer], tracked: Iterable[int] = ()):
+        super().__init__()
+        self.transformers = transformers
+        # Per transformer: the node whose children it declined to visit
+        self._skipping: List[Optional[cst.CSTNode]] = [None] * len(transformers)
+        self.touched: Dict[int, List[cst.CSTNode]] = {index: [] for index in tracked}
+
+    def on_visit(self, node: cst.CSTNode) -> bool:
+        visit_children = False
+        for index, transformer in enumerate(self.transformers):
+            if self._skipping[index] is not None:
+                continue
+            if transformer.on_visit(node):
+                visit_children = True
+            else:
+                self._skipping[index] = node
+        return visit_children
+
+    def on_leave(self, original_node: cst.CSTNode, updated_node: cst.CSTNode) -> Any:
+        result = current = updated_node
+        for index, transformer in enumerate(self.transformers):
+            skipping = self._skipping[index]
+            if skipping is not None:
+                if skipping is not original_node:
+                    continue  # Inside a subtree this transformer opted out of
+                self._skipping[index] = None
+            returned = transformer.on_leave(original_node, current)
+            # Many leave_X return an equal copy (with_changes) even when nothing changed
+            if index in self.touched and returned is not current and not (
+                    isinstance(returned, cst.CSTNode) and returned.deep_equals(current)):
+                self.touched[index].append(original_node)
+            if isinstance(result, cst.CSTNode):
+                result = returned
+                if isinstance(returned, cst.CSTNode):
+                    current = returned
+        return result
+
+    def on_visit_attribute(self, node: cst.CSTNode, attribute: str) -> None:
+        for index, transformer in enumerate(self.transformers):
+            if self._skipping[index] is None:
+                transformer.on_visit_attribute(node, attribute)
+
+    def on_leave_attribute(self, original_node: cst.CSTNode, attribute: str) -> None:
+        for index, transformer in enumerate(self.transformers):
+            if self._skipping[index] is None:
+                transformer.on_leave_attribute(original_node, attribute)
+
+
+def apply_transformers(wrapper: cst.MetadataWrapper, transformers: List[cst.CSTTransformer]) -> cst.Module:
+    """
+    Applies many (already resolved) transformers to a module in one pass.
+    """
+    if len(transformers) == 1:
+        return wrapper.module.visit(transformers[0])
+    return wrapper.module.visit(CompositeTransformer(transformers))
+
+
+def _spans_overlap(a: Tuple[Tuple[int, int], Tuple[int, int]], b: Tuple[Tuple[int, int], Tuple[int, int]]) -> bool:
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def _node_spans(wrapper: cst.MetadataWrapper, nodes: List[cst.CSTNode]) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """Source ranges ((line, col), (line, col)) of nodes of ``wrapper.module``."""
+    positions = wrapper.resolve(PositionProvider)
+    spans = []
+    for node in nodes:
+        position = positions[node]
+        spans.append(((position.start.line, position.start.column), (position.end.line, position.end.column)))
+    return spans
+
+
 class AutomatedRefactorer:
-def __init__(self):
-pass
-def apply_refactoring(self, file_path: str, refactoring_suggestion:
-Dict[str, Any]) -> Dict[str, Any]:
-"""
-Applies a refactoring suggestion to a given file.
-This is a simplified dispatcher for demonstration.
-"""
-result = {
-"success": False,
-"message": "",
-"original_code": "",
-"refactored_code": ""
-}
-if not os.path.exists(file_path):
-result["message"] = f"File not found: {file_path}"
-return result
-with open(file_path, "r", encoding="utf-8") as f:
-original_code = f.read()
-result["original_code"] = original_code
-try:
-# Parse the code into a CST
-module = get_module_from_code(original_code)
-refactoring_type = refactoring_suggestion.get("type")
-# Dispatch based on refactoring type
-if refactoring_type == "rename_variable":
-old_name = refactoring_suggestion.get("old_name")
-new_name = refactoring_suggestion.get("new_name")
-if not old_name or not new_name:
-result["message"] = "Missing old_name or new_name for
-rename_variable refactoring."
-return result
-# Apply the transformation
-transformed_module = module.visit(RenameTransformer(old_name,
-new_name))
-refactored_code = transformed_module.code
-result["success"] = True
-result["message"] = f"Successfully applied rename_variable:
-{old_name} -> {new_name}"
-# Add more refactoring types here (e.g., extract_method,
-simplify_conditional)
-# elif refactoring_type == "extract_method":
-# # Implement ExtractMethodTransformer
-# pass
-else:
-result["message"] = f"Unsupported refactoring type:
-{refactoring_type}"
-return result
-result["refactored_code"] = refactored_code
-except cst.ParserSyntaxError as e:
-result["message"] = f"Syntax error in code: {e}"
-except Exception as e:
-result["message"] = f"Error applying refactoring: {e}"
-return result
-def save_refactored_code(self, file_path: str, refactored_code: str,
-create_backup: bool = True) -> bool:
-"""
-Saves the refactored code to the file, optionally creating a backup.
-"""
-try:
-if create_backup:
-backup_path = f"{file_path}.bak"
-os.rename(file_path, backup_path)
-print(f"Created backup: {backup_path}")
-with open(file_path, "w", encoding="utf-8") as f:
-f.write(refactored_code)
-print(f"Refactored code saved to: {file_path}")
-return True
-except Exception as e:
-print(f"Error saving refactored code or creating backup: {e}")
-return False
+    def __init__(self, backup_dir: str = DEFAULT_BACKUP_DIR):
+        self.changeset_writer = ChangesetWriter(backup_dir)
+        self.last_transaction: Optional[str] = None
+
+    def _build_transformer(self, refactoring_suggestion: Dict[str, Any]) -> cst.CSTTransformer:
+        """
+        Creates the transformer for one suggestion. Raises ValueError with a
+        user-facing message for unsupported or incomplete suggestions.
+        """
+        refactoring_type = refactoring_suggestion.get("type")
+
+        # Dispatch based on refactoring type
+        if refactoring_type == "rename_variable":
+            old_name = refactoring_suggestion.get("old_name")
+            new_name = refactoring_suggestion.get("new_name")
+            if not old_name or not new_name:
+                raise ValueError("Missing old_name or new_name for rename_variable refactoring.")
+            # Rename the binding the suggestion points at (by line or
+            # qualified name), or every binding of old_name
+            return ScopedRenameTransformer(
+                old_name,
+                new_name,
+                line=refactoring_suggestion.get("line"),
+                qualified_name=refactoring_suggestion.get("qualified_name")
+            )
+
+        if refactoring_type == "extract_method":
+            start_line = refactoring_suggestion.get("start_line")
+            end_line = refactoring_suggestion.get("end_line", start_line)
+            new_name = refactoring_suggestion.get("new_name")
+            if start_line is None or not new_name:
+                raise ValueError("Missing start_line or new_name for extract_method refactoring.")
+            return ExtractMethodTransformer(start_line, end_line, new_name)
+
+        # simplify_conditional, use_enumerate, use_comprehension, remove_dead_code
+        if refactoring_type in LOCAL_REFACTORINGS:
+            return LOCAL_REFACTORINGS[refactoring_type]()
+
+        raise ValueError(f"Unsupported refactoring type: {refactoring_type}")
+
+    def _success_message(self, refactoring_suggestion: Dict[str, Any]) -> str:
+        refactoring_type = refactoring_suggestion.get("type")
+        if refactoring_type == "rename_variable":
+            return f"Successfully applied rename_variable: {refactoring_suggestion['old_name']} -> {refactoring_suggestion['new_name']}"
+        return f"Successfully applied {refactoring_type}"
+
+    def _changed(self, transformer: cst.CSTTransformer) -> bool:
+        if hasattr(transformer, "changes"):
+            return bool(transformer.changes)
+        return getattr(transformer, "renamed", 1) > 0
+
+    def _edit_spans(self, transformer: cst.CSTTransformer,
+                    refactoring_suggestion: Dict[str, Any]) -> Optional[List[Tuple[Tuple[int, int], Tuple[int, int]]]]:
+        """
+        Source ranges a suggestion will touch: precise node ranges when the
+        transformer can report them, else its line range. None when neither
+        is known in advance; such suggestions claim the nodes they change
+        during the pass itself.
+        """
+        if hasattr(transformer, "edit_spans"):
+            return transformer.edit_spans()
+        start_line = refactoring_suggestion.get("start_line")
+        end_line = refactoring_suggestion.get("end_line", start_line)
+        if start_line is not None:
+            return [((start_line, 0), (end_line + 1, 0))]
+        return None
+
+    def apply_refactorings(self, file_path: str, refactoring_suggestions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Applies many suggestions to one file with a single read, parse and
+        traversal. Suggestions whose edits overlap an already accepted one are
+        skipped as conflicts. Each suggestion gets an outcome entry with status
+        ``applied``, ``no_change``, ``conflict``, ``invalid`` or ``error``.
+
+        Suggestions whose location is only known once they run (e.g.
+        ``use_comprehension`` without lines) claim the nodes they changed in
+        that same pass, after every located suggestion. If one of them
+        overlaps an earlier claim it is reported as a conflict and the pass
+        is run again without it, the only case that costs a second pass.
+        """
+        result = {
+            "success": False,
+            "message": "",
+            "original_code": "",
+            "refactored_code": "",
+            "outcomes": []
+        }
+
+        if not os.path.exists(file_path):
+            result["message"] = f"File not found: {file_path}"
+            return result
+
+        with open(file_path, "r", encoding="utf-8") as f:
+            original_code = f.read()
+        result["original_code"] = original_code
+
+        try:
+            wrapper = cst.MetadataWrapper(cst.parse_module(original_code))
+        except cst.ParserSyntaxError as e:
+            result["message"] = f"Syntax error in code: {e}"
+            return result
+
+        outcomes = result["outcomes"]
+        accepted = []  # (outcome, transformer, suggestion)
+        unlocated = []  # Positions in ``accepted`` of suggestions without spans
+        claimed_spans = []
+
+        def claim(outcome: Dict[str, Any], spans: List[Tuple[Tuple[int, int], Tuple[int, int]]]) -> bool:
+            clash = next((other for span in spans for other, claimed in claimed_spans if _spans_overlap(span, claimed)), None)
+            if clash is not None:
+                outcome.update(status="conflict", message=f"Overlaps with suggestion {clash}")
+                return False
+            claimed_spans.extend((outcome["index"], span) for span in spans)
+            return True
+
+        with ExitStack() as resolved:
+            for index, suggestion in enumerate(refactoring_suggestions):
+                outcome = {"index": index, "type": suggestion.get("type"), "status": "", "message": ""}
+                outcomes.append(outcome)
+                try:
+                    transformer = self._build_transformer(suggestion)
+                    resolved.enter_context(transformer.resolve(wrapper))
+                    spans = self._edit_spans(transformer, suggestion)
+                except ValueError as e:  # includes AmbiguousRenameError
+                    outcome.update(status="invalid", message=str(e))
+                    continue
+                except Exception as e:
+                    outcome.update(status="error", message=f"Error applying refactoring: {e}")
+                    continue
+
+                if spans is None:
+                    unlocated.append(len(accepted))
+                elif not claim(outcome, spans):
+                    continue
+                accepted.append((outcome, transformer, suggestion))
+
+            try:
+                transformers = [t for _, t, _ in accepted]
+                if unlocated and len(accepted) > 1:
+                    composite = CompositeTransformer(transformers, tracked=unlocated)
+                    transformed_module = wrapper.module.visit(composite)
+                    kept = [position for position in range(len(accepted)) if position not in unlocated or
+                            claim(accepted[position][0], _node_spans(wrapper, composite.touched[position]))]
+                    if len(kept) < len(accepted):
+                        # Transformers keep state, so the rerun gets fresh ones
+                        accepted = [(outcome, self._build_transformer(suggestion), suggestion)
+                                    for outcome, _, suggestion in (accepted[position] for position in kept)]
+                        for _, transformer, _ in accepted:
+                            resolved.enter_context(transformer.resolve(wrapper))
+                        transformed_module = apply_transformers(wrapper, [t for _, t, _ in accepted])
+                else:
+                    transformed_module = apply_transformers(wrapper, transformers)
+            except Exception as e:
+                for outcome, _, _ in accepted:
+                    outcome.update(status="error", message=f"Error applying refactoring: {e}")
+                result["message"] = f"Error applying refactoring: {e}"
+                result["refactored_code"] = original_code
+                return result
+
+        for outcome, transformer, suggestion in accepted:
+            if getattr(transformer, "error", None):
+                outcome.update(status="invalid", message=transformer.error)
+            elif not self._changed(transformer):
+                outcome.update(status="no_change", message="Nothing to change")
+            else:
+                outcome.update(status="applied", message=self._success_message(suggestion))
+
+        applied = sum(1 for o in outcomes if o["status"] == "applied")
+        result["refactored_code"] = transformed_module.code
+        result["success"] = applied > 0
+        result["message"] = f"Applied {applied} of {len(outcomes)} suggestion(s) in one pass"
+        return result
+
+    def apply_refactoring(self, file_path: str, refactoring_suggestion: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Applies a refactoring suggestion to a given file.
+        This is a simplified dispatcher for demonstration.
+        """
+        batch = self.apply_refactorings(file_path, [refactoring_suggestion])
+        result = {
+            "success": False,
+            "message": batch["message"],
+            "original_code": batch["original_code"],
+            "refactored_code": ""
+        }
+        if batch["outcomes"]:
+            outcome = batch["outcomes"][0]
+            result["message"] = outcome["message"]
+            if outcome["status"] in ("applied", "no_change"):
+                result["success"] = True
+                result["message"] = self._success_message(refactoring_suggestion)
+                result["refactored_code"] = batch["refactored_code"]
+        return result
+
+    def save_refactored_code(self, file_path: str, refactored_code: str, create_backup: bool = True) -> bool:
+        """
+        Saves the refactored code to the file, optionally creating a backup.
+        The write is atomic; with a backup it can be undone with ``rollback``.
+        """
+        if not create_backup:
+            try:
+                atomic_write(file_path, refactored_code.encode("utf-8"))
+                print(f"Refactored code saved to: {file_path}")
+                return True
+            except Exception as e:
+                print(f"Error saving refactored code: {e}")
+                return False
+        return self.save_changeset({file_path: refactored_code})["success"]
+
+    def save_changeset(self, changes: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Writes many refactored files as one transaction: all of them are
+        updated or none is. Backups of the originals are kept so the whole
+        changeset can be undone with ``rollback``.
+        """
+        result = self.changeset_writer.apply(changes)
+        if result["success"]:
+            if result["transaction_id"]:
+                self.last_transaction = result["transaction_id"]
+                print(f"Created backup: transaction {result['transaction_id']}")
+            print(result["message"])
+        else:
+            print(f"Error saving refactored code or creating backup: {result['message']}")
+        return result
+
+    def rollback(self, transaction_id: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        Restores all files of a saved changeset (the last one by default).
+        Files edited since are only overwritten with ``force``.
+        """
+        return self.changeset_writer.rollback(transaction_id or self.last_transaction, force=force)
+
+
 if __name__ == "__main__":
-# --- Example Usage ---
-# Create a dummy Python file for testing
-dummy_code = """
+    # --- Example Usage ---
+    # Create a dummy Python file for testing
+    dummy_code = """
 def calculate_area(length, width):
-# This function calculates the area of a rectangle
-area = length * width
-return area
+    # This function calculates the area of a rectangle
+    area = length * width
+    return area
+
 class ShapeCalculator:
-def __init__(self, factor):
-self.factor = factor
-def process_shape(self, value):
-result = value * self.factor
-return result
+    def __init__(self, factor):
+        self.factor = factor
+
+    def process_shape(self, value):
+        result = value * self.factor
+        return result
 """
-original_file_path = "dummy_code_to_refactor.py"
-with open(original_file_path, "w", encoding="utf-8") as f:
-f.write(dummy_code)
-refactorer = AutomatedRefactorer()
-# Example 1: Rename a variable
-print("\n--- Applying rename_variable refactoring ---")
-rename_suggestion = {
-"type": "rename_variable",
-"old_name": "area",
-"new_name": "rectangle_area"
-}
-refactoring_result = refactorer.apply_refactoring(original_file_path,
-rename_suggestion)
-if refactoring_result["success"]:
-print("Refactoring successful. Proposed code:")
-print(refactoring_result["refactored_code"])
-# Optional: Developer override mode - ask for confirmation
-confirm = input("Apply this refactoring to the file? (y/n):
-").lower()
-if confirm == 'y':
-if refactorer.save_refactored_code(original_file_path,
-refactoring_result["refactored_code"]):
-print("File updated successfully.")
-else:
-print("Failed to update file.")
-else:
-print("Refactoring not applied to file.")
-# Restore original file if not applied and backup was made
-if os.path.exists(f"{original_file_path}.bak") and not
-os.path.exists(original_file_path):
-os.rename(f"{original_file_path}.bak", original_file_path)
-print("Original file restored from backup.")
-else:
-print(f"Refactoring failed: {refactoring_result["message"]}")
-# Clean up dummy files (restore original if it was renamed)
-if os.path.exists(f"{original_file_path}.bak"):
-if os.path.exists(original_file_path):
-os.remove(original_file_path) # Remove the refactored version
-os.rename(f"{original_file_path}.bak", original_file_path) # Restore
-original
-elif os.path.exists(original_file_path):
-os.remove(original_file_path)
-print("\n--- Demonstration Complete ---")
\ No newline at end of file
+    original_file_path = "dummy_code_to_refactor.py"
+    with open(original_file_path, "w", encoding="utf-8") as f:
+        f.write(dummy_code)
+
+    refactorer = AutomatedRefactorer()
+
+    # Example 1: Rename a variable
+    print("\n--- Applying rename_variable refactoring ---")
+    rename_suggestion = {
+        "type": "rename_variable",
+        "old_name": "area",
+        "new_name": "rectangle_area"
+    }
+    refactoring_result = refactorer.apply_refactoring(original_file_path, rename_suggestion)
+
+    if refactoring_result["success"]:
+        print("Refactoring successful. Proposed code:")
+        print(refactoring_result["refactored_code"])
+
+        # Optional: Developer override mode - ask for confirmation
+        confirm = input("Apply this refactoring to the file? (y/n): ").lower()
+        if confirm == 'y':
+            if refactorer.save_refactored_code(original_file_path, refactoring_result["refactored_code"]):
+                print("File updated successfully.")
+            else:
+                print("Failed to update file.")
+        else:
+            print("Refactoring not applied to file.")
+    else:
+        print(f"Refactoring failed: {refactoring_result['message']}")
+
+    # Undo the saved changeset, then clean up the dummy file
+    if refactorer.last_transaction:
+        print(refactorer.rollback()["message"])
+    if os.path.exists(original_file_path):
+        os.remove(original_file_path)
+
+    print("\n--- Demonstration Complete ---")
@@ -0,0 +1,338 @@
+import difflib
+import hashlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import libcst as cst
+from libcst.metadata import (
+    Assignment,
+    ClassScope,
+    ComprehensionScope,
+    FunctionScope,
+    GlobalScope,
+    ImportAssignment,
+    MetadataWrapper,
+    PositionProvider,
+    QualifiedNameProvider,
+    Scope,
+    ScopeProvider,
+)
+
+# Assuming symbol_index.py is in the same directory
+from symbol_index import SymbolIndex, module_name_for, resolve_relative_import
+
+WRAPPER_CACHE_SIZE = 64
+
+# Per-process cache of parsed modules with their resolved metadata, keyed by
+# (absolute path, content hash). Workers in the rename pool keep theirs alive
+# between tasks, so repeated renames in one session reuse scope analysis.
+_WRAPPER_CACHE: "OrderedDict[Tuple[str, str], MetadataWrapper]" = OrderedDict()
+
+
+class AmbiguousRenameError(ValueError):
+    """Raised when a rename hint matches no binding or more than one."""
+
+
+def get_metadata_wrapper(file_path: str, source_code: str) -> MetadataWrapper:
+    """
+    Returns a cached MetadataWrapper for this exact file content. Metadata
+    resolved through it (scopes, qualified names, positions) is cached on
+    the wrapper by libcst.
+    """
+    key = (os.path.abspath(file_path), hashlib.sha256(source_code.encode("utf-8")).hexdigest())
+    wrapper = _WRAPPER_CACHE.get(key)
+    if wrapper is None:
+        wrapper = MetadataWrapper(cst.parse_module(source_code), unsafe_skip_copy=True)
+        _WRAPPER_CACHE[key] = wrapper
+        if len(_WRAPPER_CACHE) > WRAPPER_CACHE_SIZE:
+            _WRAPPER_CACHE.popitem(last=False)
+    else:
+        _WRAPPER_CACHE.move_to_end(key)
+    return wrapper
+
+
+def _scope_path(scope: Scope) -> List[str]:
+    """
+    Dotted path of a scope from the module down, e.g. ``["Shape", "area"]``.
+    """
+    path = []
+    while scope is not None and not isinstance(scope, GlobalScope):
+        if isinstance(scope, (FunctionScope, ClassScope)):
+            path.append(scope.name or "<lambda>")
+        elif isinstance(scope, ComprehensionScope):
+            path.append("<comprehension>")
+        scope = scope.parent
+    return list(reversed(path))
+
+
+def _bound_alias(node: cst.CSTNode, name: str) -> Optional[cst.ImportAlias]:
+    """
+    The alias of an import statement that binds ``name``, if any.
+    """
+    if not isinstance(node, (cst.Import, cst.ImportFrom)) or isinstance(node.names, cst.ImportStar):
+        return None
+    for alias in node.names:
+        bound = alias.asname.name.value if alias.asname else cst.helpers.get_full_name_for_node(alias.name)
+        if bound == name or (isinstance(node, cst.Import) and not alias.asname and bound.split(".")[0] == name):
+            return alias
+    return None
+
+
+class ScopedRenameTransformer(cst.CSTTransformer):
+    """
+    Renames one binding of ``old_name`` and the references that resolve to it,
+    using libcst scope analysis instead of matching every ``Name`` node.
+
+    The binding is picked by ``qualified_name`` (``"func.var"``, ``"Cls.attr"``
+    or ``"name"`` for module level) or by a ``line`` on which it is assigned or
+    used. Without a hint every binding of ``old_name`` is renamed, which still
+    leaves attributes, keyword arguments and strings alone.
+
+    With ``source_module`` the transformer works on a file that imports
+    ``old_name`` from that module: the import is rewritten, together with
+    the bare references it binds and ``module.old_name`` attribute accesses.
+    """
+
+    METADATA_DEPENDENCIES = (ScopeProvider, PositionProvider, QualifiedNameProvider)
+
+    def __init__(self, old_name: str, new_name: str, line: Optional[int] = None,
+                 qualified_name: Optional[str] = None, source_module: Optional[str] = None,
+                 current_module: str = "", is_package: bool = False):
+        super().__init__()
+        self.old_name = old_name
+        self.new_name = new_name
+        self.line = line
+        self.qualified_name = qualified_name
+        self.source_module = source_module
+        self.current_module = current_module
+        self.is_package = is_package
+        self.renamed = 0
+        self._names: Set[cst.Name] = set()
+        self._aliases: Set[cst.ImportAlias] = set()
+        self._collected = False
+
+    def _line(self, node: cst.CSTNode) -> int:
+        return self.get_metadata(PositionProvider, node).start.line
+
+    def _imports_from_source(self, node: cst.CSTNode) -> bool:
+        if not isinstance(node, cst.ImportFrom) or node.module is None and not node.relative:
+            return False
+        target = cst.helpers.get_full_name_for_node(node.module) if node.module else None
+        return resolve_relative_import(self.current_module, self.is_package, len(node.relative), target) == self.source_module
+
+    def _definition_names(self, assignment: Assignment) -> List[cst.CSTNode]:
+        node = assignment.node
+        if isinstance(node, cst.Name):
+            return [node]
+        if isinstance(node, (cst.FunctionDef, cst.ClassDef, cst.Param)):
+            return [node.name]
+        if isinstance(node, cst.ExceptHandler) and node.name is not None:
+            return [node.name.name]
+        alias = _bound_alias(node, self.old_name)
+        return [alias] if alias is not None else []
+
+    def _bindings(self) -> Dict[Scope, List[Assignment]]:
+        scopes = {scope for scope in self.metadata[ScopeProvider].values() if scope is not None}
+        bindings: Dict[Scope, List[Assignment]] = {}
+        for scope in scopes:
+            for assignment in scope.assignments[self.old_name]:
+                if isinstance(assignment, Assignment) and assignment.scope is scope:
+                    bindings.setdefault(scope, []).append(assignment)
+        return bindings
+
+    def _select(self, bindings: Dict[Scope, List[Assignment]]) -> Dict[Scope, List[Assignment]]:
+        if self.source_module is not None:
+            return {scope: [a for a in assignments
+                            if isinstance(a, ImportAssignment) and self._imports_from_source(a.node)]
+                    for scope, assignments in bindings.items()}
+        if self.qualified_name is not None:
+            selected = {scope: assignments for scope, assignments in bindings.items()
+                        if ".".join(_scope_path(scope) + [self.old_name]) == self.qualified_name}
+        elif self.line is not None:
+            selected = {}
+            for scope, assignments in bindings.items():
+                nodes = [n for a in assignments for n in self._definition_names(a)]
+                nodes += [r.node for a in assignments for r in a.references]
+                if any(self._line(n) == self.line for n in nodes):
+                    selected[scope] = assignments
+        else:
+            return bindings
+        if len(selected) != 1:
+            hint = self.qualified_name or f"line {self.line}"
+            found = "no binding" if not selected else f"{len(selected)} bindings"
+            raise AmbiguousRenameError(f"Cannot rename '{self.old_name}': {found} match {hint}")
+        return selected
+
+    def collect_targets(self) -> None:
+        """
+        Resolves which nodes will be renamed. Runs from ``visit_Module``, or
+        earlier under ``self.resolve(wrapper)`` when a caller needs
+        ``edit_spans()`` before transforming.
+        """
+        if self._collected:
+            return
+        self._collected = True
+        for assignments in self._select(self._bindings()).values():
+            for assignment in assignments:
+                for name_node in self._definition_names(assignment):
+                    if isinstance(name_node, cst.ImportAlias):
+                        self._aliases.add(name_node)
+                        if name_node.asname is not None:
+                            continue  # references use the alias, not the imported name
+                    else:
+                        self._names.add(name_node)
+                    for access in assignment.references:
+                        if isinstance(access.node, cst.Name):
+                            self._names.add(access.node)
+
+    def edit_spans(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Source ranges ((line, col), (line, col)) this rename will rewrite.
+        """
+        self.collect_targets()
+        spans = []
+        for node in list(self._names) + list(self._aliases):
+            position = self.get_metadata(PositionProvider, node)
+            spans.append(((position.start.line, position.start.column), (position.end.line, position.end.column)))
+        return spans
+
+    def visit_Module(self, node: cst.Module) -> None:
+        self.collect_targets()
+
+    def leave_Name(self, original_node: cst.Name, updated_node: cst.Name) -> cst.Name:
+        if original_node in self._names:
+            self.renamed += 1
+            return updated_node.with_changes(value=self.new_name)
+        return updated_node
+
+    def leave_ImportAlias(self, original_node: cst.ImportAlias, updated_node: cst.ImportAlias) -> cst.ImportAlias:
+        if original_node not in self._aliases:
+            return updated_node
+        self.renamed += 1
+        if updated_node.asname is not None and self.source_module is None:
+            return updated_node.with_changes(asname=updated_node.asname.with_changes(
+                name=cst.Name(self.new_name)))
+        if self.source_module is not None:
+            # The symbol itself was renamed in its defining module
+            return updated_node.with_changes(name=cst.Name(self.new_name))
+        if not isinstance(updated_node.name, cst.Name):
+            raise AmbiguousRenameError(f"Cannot rename dotted import binding '{self.old_name}'")
+        # Local rename of an imported name: keep the import, bind it under the new name
+        return updated_node.with_changes(asname=cst.AsName(name=cst.Name(self.new_name)))
+
+    def leave_Attribute(self, original_node: cst.Attribute, updated_node: cst.Attribute) -> cst.BaseExpression:
+        if self.source_module is None or original_node.attr.value != self.old_name:
+            return updated_node
+        target = f"{self.source_module}.{self.old_name}"
+        qualified_names = self.get_metadata(QualifiedNameProvider, original_node, set())
+        if any(q.name == target for q in qualified_names):
+            self.renamed += 1
+            return updated_node.with_changes(attr=cst.Name(self.new_name))
+        return updated_node
+
+
+def _rename_file(job: Tuple[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Worker: applies one rename to one file and returns the new source.
+    """
+    path, options = job
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            source_code = f.read()
+        wrapper = get_metadata_wrapper(path, source_code)
+        transformer = ScopedRenameTransformer(**options)
+        new_code = wrapper.visit(transformer).code
+        return {"path": path, "original_code": source_code, "refactored_code": new_code,
+                "renamed": transformer.renamed, "error": None}
+    except Exception as e:
+        return {"path": path, "original_code": None, "refactored_code": None, "renamed": 0, "error": str(e)}
+
+
+def consolidated_diff(changes: List[Dict[str, Any]], root_dir: str) -> str:
+    """
+    One unified diff covering every changed file, ordered by path.
+    """
+    chunks = []
+    for change in sorted(changes, key=lambda c: c["path"]):
+        rel_path = os.path.relpath(change["path"], root_dir)
+        chunks.extend(difflib.unified_diff(
+            change["original_code"].splitlines(keepends=True),
+            change["refactored_code"].splitlines(keepends=True),
+            fromfile=f"a/{rel_path}",
+            tofile=f"b/{rel_path}"
+        ))
+    return "".join(chunks)
+
+
+class RepositoryRenamer:
+    """
+    Renames a module-level symbol across a repository.
+
+    The symbol index finds the defining file and every importer; each file is
+    rewritten by a ScopedRenameTransformer in a process pool that lives as
+    long as the renamer, so each worker's wrapper cache survives between
+    renames. Nothing is written to disk; the result carries the new sources
+    and one consolidated diff.
+    """
+
+    def __init__(self, root_dir: str, index: Optional[SymbolIndex] = None, max_workers: Optional[int] = None):
+        self.root_dir = os.path.abspath(root_dir)
+        self.index = index or SymbolIndex()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _map(self, jobs: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        if self.max_workers == 1 or len(jobs) == 1:
+            return [_rename_file(job) for job in jobs]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return list(self._executor.map(_rename_file, jobs))
+
+    def _jobs(self, module: str, old_name: str, new_name: str) -> List[Tuple[str, Dict[str, Any]]]:
+        definition_path = self.index.module_path(module)
+        if definition_path is None:
+            raise AmbiguousRenameError(f"Module '{module}' is not in the symbol index")
+
+        jobs = [(definition_path, {"old_name": old_name, "new_name": new_name, "qualified_name": old_name})]
+        importer_paths = {row["path"] for row in self.index.find_importers(module, old_name)}
+        importer_paths |= {row["path"] for row in self.index.find_importers(module) if row["name"] is None}
+        if "." in module:
+            package, submodule = module.rsplit(".", 1)
+            importer_paths |= {row["path"] for row in self.index.find_importers(package, submodule)}
+        importer_paths.discard(definition_path)
+
+        for path in sorted(importer_paths):
+            jobs.append((path, {
+                "old_name": old_name,
+                "new_name": new_name,
+                "source_module": module,
+                "current_module": module_name_for(path, self.root_dir),
+                "is_package": os.path.basename(path) == "__init__.py"
+            }))
+        return jobs
+
+    def rename_symbol(self, module: str, old_name: str, new_name: str) -> Dict[str, Any]:
+        """
+        Renames ``module.old_name`` to ``new_name`` in its defining file and in
+        every file that imports it.
+        """
+        self.index.update(self.root_dir)
+        results = self._map(self._jobs(module, old_name, new_name))
+
+        errors = {r["path"]: r["error"] for r in results if r["error"]}
+        changes = [r for r in results if not r["error"] and r["refactored_code"] != r["original_code"]]
+        return {
+            "success": not errors,
+            "message": f"Renamed {module}.{old_name} -> {new_name} in {len(changes)} file(s)",
+            "changes": {c["path"]: c["refactored_code"] for c in changes},
+            "renamed": {c["path"]: c["renamed"] for c in changes},
+            "errors": errors,
+            "diff": consolidated_diff(changes, self.root_dir)
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -1,197 +1,336 @@
 import json
 import os
-import difflib
-from typing import Dict, Any, List
+import string
+import sys
+from typing import Dict, Any, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# The line diff engine is shared with the app in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.core.text_diff import unified_diff
+
+# Sections of the Markdown report, in order. Fields are filled per report;
+# sections without fields are rendered once and reused as they are.
+REPORT_SECTIONS = {
+    "header": ("# AI Code Refactoring Report\n"
+               "**Date**: {date}\n"
+               "**Original File**: `{original_file}`\n"
+               "**Refactored File**: `{refactored_file}`\n\n"),
+    "summary": ("## 📊 Overall Summary\n"
+                "- **Total Refactorings Suggested**: {suggestion_count}\n"
+                "- **Validation Status**: {status}\n"
+                "- **Overall Success**: {success}\n\n"),
+    "details_heading": "## 💡 Refactoring Details\n",
+    "no_suggestions": "No specific refactoring suggestions were provided.\n\n",
+    "suggestion": ("### {number}. {type}\n"
+                   "- **Location**: Line(s) {start_line}-{end_line}\n"
+                   "- **Reason**: {reason}\n"
+                   "- **Expected Impact**: {impact}\n\n"),
+    "changes_heading": "## 📝 Code Changes\n",
+    "validation": ("## ✅ Validation Results\n"
+                   "### AST Comparison\n"
+                   "- **Structural Similarity**: {similarity}\n"
+                   "- **Message**: {ast_message}\n\n"
+                   "### Unit Test Results\n"),
+    "unit_tests": ("- **Tests Run**: {tests_run}\n"
+                   "- **Tests Passed**: {tests_passed}\n"
+                   "- **Tests Failed**: {tests_failed}\n"
+                   "- **Success**: {success}\n"),
+    "no_unit_tests": "No unit tests were executed or results not available.\n",
+    "recommendations_passed": ("## 🚀 Next Steps & Recommendations\n"
+                               "The refactoring appears successful and validated. Consider reviewing the changes "
+                               "and committing them to your version control system.\n\n"),
+    "recommendations_failed": ("## 🚀 Next Steps & Recommendations\n"
+                               "The refactoring encountered issues during validation. Please review the details "
+                               "above, manually inspect the code, and address any failures before proceeding.\n\n"),
+}
+
+_WRITE_BUFFER = 1 << 16
+
+
+def _check(flag: bool) -> str:
+    return '✅' if flag else '❌'
+
+
+class ReportTemplate:
+    """
+    REPORT_SECTIONS parsed once. Static sections are kept as finished
+    strings and the others as (literal, field) pieces, so rendering a
+    section is a join; one template is shared by every report of a batch.
+    """
+
+    def __init__(self, sections: Optional[Dict[str, str]] = None):
+        self._static: Dict[str, str] = {}
+        self._pieces: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        for name, text in (sections or REPORT_SECTIONS).items():
+            pieces = [(literal, field) for literal, field, _, _ in string.Formatter().parse(text)]
+            if all(field is None for _, field in pieces):
+                self._static[name] = text
+            else:
+                self._pieces[name] = pieces
+
+    def render(self, name: str, **fields: Any) -> str:
+        if name in self._static:
+            return self._static[name]
+        return "".join(literal + ("" if field is None else str(fields[field]))
+                       for literal, field in self._pieces[name])
+
+
+DEFAULT_TEMPLATE = ReportTemplate()
+
+
+class MarkdownReportWriter:
+    """
+    Writes a report to its file as it is produced: sections go out as soon
+    as they are rendered and line iterators are copied through, so memory
+    does not grow with the size of the diff or of the test output.
+    """
+
+    def __init__(self, path: str, template: ReportTemplate = DEFAULT_TEMPLATE):
+        self.path = path
+        self.template = template
+        self._file: Optional[TextIO] = None
+
+    def __enter__(self) -> "MarkdownReportWriter":
+        self._file = open(self.path, "w", encoding="utf-8", buffering=_WRITE_BUFFER)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._file.close()
+        self._file = None
+
+    def write(self, text: str) -> None:
+        self._file.write(text)
+
+    def section(self, name: str, **fields: Any) -> None:
+        self._file.write(self.template.render(name, **fields))
+
+    def fenced(self, lines: Iterable[str], lang: str = "") -> None:
+        """A code block streamed from ``lines``; lines without a newline get one."""
+        self._file.write(f"```{lang}\n")
+        for line in lines:
+            self._file.write(line)
+            if not line.endswith("\n"):
+                self._file.write("\n")
+        self._file.write("```\n")
+
+
+def _read_lines(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.readlines()
+
+
+def iter_file_diff(original_file_path: str, refactored_file_path: str) -> Iterator[str]:
+    """
+    Diff lines of one file pair, without the file and hunk headers. Both
+    files are read when iteration starts.
+    """
+    original_lines, refactored_lines = _read_lines(original_file_path), _read_lines(refactored_file_path)
+    for line in unified_diff(original_lines, refactored_lines, lineterm=""):
+        if not line.startswith(("--- ", "+++ ", "@@ ")):
+            yield line
+
+
+def iter_changeset_diff(file_pairs: Iterable[Tuple[str, str]], root_dir: str = "") -> Iterator[str]:
+    """
+    Unified diff of a whole changeset, one (original, refactored) file pair
+    at a time, so only the pair being diffed is held in memory. Paths in the
+    headers are relative to ``root_dir`` when it is given.
+    """
+    for original_path, refactored_path in file_pairs:
+        name = os.path.relpath(refactored_path, root_dir) if root_dir else refactored_path
+        try:
+            original_lines, refactored_lines = _read_lines(original_path), _read_lines(refactored_path)
+        except (OSError, UnicodeDecodeError) as e:
+            yield f"# {name}: could not read ({e})\n"
+            continue
+        for line in unified_diff(original_lines, refactored_lines, fromfile=f"a/{name}", tofile=f"b/{name}"):
+            yield line if line.endswith("\n") else line + "\n"
+
+
 class ReportGenerator:
-def __init__(self):
-pass
-def _generate_code_diff(self, original_code: str, refactored_code: str,
-lang: str = "python") -> str:
-"""
-Generates a side-by-side diff of two code snippets in Markdown
-format.
-"""
-diff_lines = difflib.unified_diff(
-original_code.splitlines(keepends=True),
-refactored_code.splitlines(keepends=True),
-fromfile="> Original Code",
-tofile="> Refactored Code",
-lineterm=
-)
-# Filter out the '---' and '+++' lines that difflib adds
-filtered_diff = [line for line in diff_lines if not
-line.startswith("--- ") and not line.startswith("+++ ") and not
-line.startswith("@@ ")]
-# Add syntax highlighting for the diff
-return f"```diff\n{''.join(filtered_diff)}```\n"
-def generate_report(self,
-original_file_path: str,
-refactored_file_path: str,
-suggestions: List[Dict[str, Any]],
-validation_results: Dict[str, Any],
-report_output_path: str = "refactoring_report.md") ->
-str:
-"""
-Generates a comprehensive Markdown report for the refactoring
-session.
-"""
-report_content = []
-# --- Report Header ---
-report_content.append(f"# AI Code Refactoring Report\n")
-report_content.append(f"**Date**:
-{os.path.basename(original_file_path)}\n")
-report_content.append(f"**Original File**: `{original_file_path}`\n")
-report_content.append(f"**Refactored File**:
-`{refactored_file_path}`\n\n")
-# --- Overall Summary ---
-report_content.append("## 📊 Overall Summary\n")
-report_content.append(f"- **Total Refactorings Suggested**:
-{len(suggestions)}\n")
-report_content.append(f"- **Validation Status**:
-{validation_results.get("message", "N/A")}\n")
-report_content.append(f"- **Overall Success**: {'✅' if
-validation_results.get('overall_success', False) else '❌'}\n\n")
-# --- Refactoring Suggestions Details ---
-report_content.append("## 💡 Refactoring Details\n")
-if not suggestions:
-report_content.append("No specific refactoring suggestions were
-provided.\n\n")
-else:
-for i, suggestion in enumerate(suggestions):
-report_content.append(f"### {i+1}. {suggestion.get('type',
-'Unknown Refactoring')}\n")
-report_content.append(f"- **Location**: Line(s)
-{suggestion.get('start_line', 'N/A')}-{suggestion.get('end_line', 'N/A')}\n")
-report_content.append(f"- **Reason**:
-{suggestion.get('reason', 'No reason provided.')}\n")
-report_content.append(f"- **Expected Impact**:
-{suggestion.get('impact', 'Improved code quality.')}\n\n")
-# --- Code Changes (Diff) ---
-report_content.append("## 📝 Code Changes\n")
-try:
-with open(original_file_path, "r", encoding="utf-8") as f:
-original_code = f.read()
-with open(refactored_file_path, "r", encoding="utf-8") as f:
-refactored_code = f.read()
-report_content.append(self._generate_code_diff(original_code,
-refactored_code))
-except FileNotFoundError:
-report_content.append("Could not generate diff: one or both code
-files not found.\n")
-except Exception as e:
-report_content.append(f"Error generating diff: {e}\n")
-report_content.append("\n")
-# --- Validation Results ---
-report_content.append("## ✅ Validation Results\n")
-report_content.append(f"### AST Comparison\n")
-ast_comp = validation_results.get("ast_comparison", {})
-report_content.append(f"- **Structural Similarity**:
-{ast_comp.get('structural_similarity', 'N/A')}\n")
-report_content.append(f"- **Message**: {ast_comp.get('message',
-'N/A')}\n\n")
-report_content.append(f"### Unit Test Results\n")
-unit_tests = validation_results.get("unit_tests", {})
-if unit_tests:
-report_content.append(f"- **Tests Run**:
-{unit_tests.get('tests_run', 'N/A')}\n")
-report_content.append(f"- **Tests Passed**:
-{unit_tests.get('tests_passed', 'N/A')}\n")
-report_content.append(f"- **Tests Failed**:
-{unit_tests.get('tests_failed', 'N/A')}\n")
-report_content.append(f"- **Success**: {'✅' if
-unit_tests.get('success', False) else '❌'}\n")
-if unit_tests.get('test_output'):
-report_content.append(f"\n```\n{unit_tests['test_output']}\n```\n")
-else:
-report_content.append("No unit tests were executed or results not
-available.\n")
-report_content.append("\n")
-# --- Final Recommendations ---
-report_content.append("## 🚀 Next Steps & Recommendations\n")
-if validation_results.get('overall_success', False):
-report_content.append("The refactoring appears successful and
-validated. Consider reviewing the changes and committing them to your version
-control system.\n")
-else:
-report_content.append("The refactoring encountered issues during
-validation. Please review the details above, manually inspect the code, and
-address any failures before proceeding.\n")
-report_content.append("\n")
-full_report_content = "".join(report_content)
-with open(report_output_path, "w", encoding="utf-8") as f:
-f.write(full_report_content)
-print(f"Refactoring report generated at: {report_output_path}")
-return report_output_path
+    def __init__(self, template: ReportTemplate = DEFAULT_TEMPLATE):
+        self.template = template
+
+    def _generate_code_diff(self, original_code: str, refactored_code: str,
+                            lang: str = "python") -> str:
+        """
+        Generates a side-by-side diff of two code snippets in Markdown
+        format.
+        """
+        diff_lines = unified_diff(
+            original_code.splitlines(keepends=True),
+            refactored_code.splitlines(keepends=True),
+            fromfile="> Original Code",
+            tofile="> Refactored Code",
+            lineterm=""
+        )
+        # Filter out the '---' and '+++' lines that the diff adds
+        filtered_diff = [line for line in diff_lines if not
+                         line.startswith("--- ") and not line.startswith("+++ ") and not
+                         line.startswith("@@ ")]
+        # Add syntax highlighting for the diff
+        return f"```diff\n{''.join(filtered_diff)}```\n"
+
+    def _write_diff(self, writer: MarkdownReportWriter, diff_lines: Iterator[str]) -> None:
+        # The first line is taken before the fence opens so that unreadable
+        # files are reported in place of the diff
+        try:
+            first = next(diff_lines, None)
+        except FileNotFoundError:
+            writer.write("Could not generate diff: one or both code files not found.\n")
+            return
+        except Exception as e:
+            writer.write(f"Error generating diff: {e}\n")
+            return
+        writer.write("```diff\n")
+        if first is not None:
+            writer.write(first)
+        for line in diff_lines:
+            writer.write(line)
+        writer.write("```\n")
+
+    def _write_unit_tests(self, writer: MarkdownReportWriter, unit_tests: Dict[str, Any]) -> None:
+        if not unit_tests:
+            writer.section("no_unit_tests")
+            return
+        writer.section("unit_tests",
+                       tests_run=unit_tests.get('tests_run', 'N/A'),
+                       tests_passed=unit_tests.get('tests_passed', 'N/A'),
+                       tests_failed=unit_tests.get('tests_failed', 'N/A'),
+                       success=_check(unit_tests.get('success', False)))
+        test_output = unit_tests.get('test_output')
+        if isinstance(test_output, str):
+            if test_output:
+                writer.write(f"\n```\n{test_output}\n```\n")
+        elif test_output is not None:
+            # An iterable of output lines, e.g. an open log file
+            writer.write("\n")
+            writer.fenced(test_output)
+
+    def generate_report(self,
+                        original_file_path: str,
+                        refactored_file_path: str,
+                        suggestions: List[Dict[str, Any]],
+                        validation_results: Dict[str, Any],
+                        report_output_path: str = "refactoring_report.md",
+                        diff_lines: Optional[Iterable[str]] = None) -> str:
+        """
+        Generates a comprehensive Markdown report for the refactoring
+        session, writing each section as soon as it is ready.
+
+        ``diff_lines`` replaces the diff of the two files, e.g. with
+        iter_changeset_diff() for a multi-file changeset; the unit tests'
+        ``test_output`` may be a string or an iterable of lines. Both are
+        streamed into the report, never held in memory as a whole.
+        """
+        if diff_lines is None:
+            diff_lines = iter_file_diff(original_file_path, refactored_file_path)
+        overall_success = validation_results.get('overall_success', False)
+        ast_comp = validation_results.get("ast_comparison", {})
+
+        with MarkdownReportWriter(report_output_path, self.template) as writer:
+            # --- Report Header ---
+            writer.section("header", date=os.path.basename(original_file_path),
+                           original_file=original_file_path, refactored_file=refactored_file_path)
+            # --- Overall Summary ---
+            writer.section("summary", suggestion_count=len(suggestions),
+                           status=validation_results.get('message', 'N/A'), success=_check(overall_success))
+            # --- Refactoring Suggestions Details ---
+            writer.section("details_heading")
+            if not suggestions:
+                writer.section("no_suggestions")
+            for i, suggestion in enumerate(suggestions):
+                writer.section("suggestion", number=i + 1,
+                               type=suggestion.get('type', 'Unknown Refactoring'),
+                               start_line=suggestion.get('start_line', 'N/A'),
+                               end_line=suggestion.get('end_line', 'N/A'),
+                               reason=suggestion.get('reason', 'No reason provided.'),
+                               impact=suggestion.get('impact', 'Improved code quality.'))
+            # --- Code Changes (Diff) ---
+            writer.section("changes_heading")
+            self._write_diff(writer, iter(diff_lines))
+            writer.write("\n")
+            # --- Validation Results ---
+            writer.section("validation", similarity=ast_comp.get('structural_similarity', 'N/A'),
+                           ast_message=ast_comp.get('message', 'N/A'))
+            self._write_unit_tests(writer, validation_results.get("unit_tests", {}))
+            writer.write("\n")
+            # --- Final Recommendations ---
+            writer.section("recommendations_passed" if overall_success else "recommendations_failed")
+        print(f"Refactoring report generated at: {report_output_path}")
+        return report_output_path
+
+    def generate_reports(self, jobs: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Generates one report per job; each job holds generate_report's
+        keyword arguments. All reports share this generator's template.
+        """
+        return [self.generate_report(**job) for job in jobs]
+
+
 if __name__ == "__main__":
-# --- Example Usage ---
-# Create dummy code files
-original_code_content = """
+    # --- Example Usage ---
+    # Create dummy code files
+    original_code_content = """
 def old_function_name(a, b):
-# This is an old function
-result = a + b
-return result
+    # This is an old function
+    result = a + b
+    return result
 """
-refactored_code_content = """
+    refactored_code_content = """
 def new_function_name(x, y):
-# This is a new and improved function
-sum_val = x + y
-return sum_val
+    # This is a new and improved function
+    sum_val = x + y
+    return sum_val
 """
-original_file = "example_original.py"
-refactored_file = "example_refactored.py"
-with open(original_file, "w", encoding="utf-8") as f:
-f.write(original_code_content)
-with open(refactored_file, "w", encoding="utf-8") as f:
-f.write(refactored_code_content)
-# Dummy AI Suggestions (from Step 3)
-dummy_suggestions = [
-{
-"type": "Rename Function",
-"start_line": 1,
-"end_line": 4,
-"reason": "Function name 'old_function_name' was not descriptive.
-Renamed to 'new_function_name' for clarity.",
-"impact": "Improved readability and maintainability."
-},
-{
-"type": "Rename Variable",
-"start_line": 3,
-"end_line": 3,
-"reason": "Variable 'result' was too generic. Renamed to
-'sum_val' for better context.",
-"impact": "Enhanced code clarity."
-}
-]
-# Dummy Validation Results (from Step 4)
-dummy_validation_results = {
-"ast_comparison": {
-"structural_similarity": False, # ASTs will differ due to renames
-"message": "ASTs differ due to function and variable renames, but
-logic is preserved."
-},
-"unit_tests": {
-"tests_run": 2,
-"tests_passed": 2,
-"tests_failed": 0,
-"test_output": "============================= test session starts
-==============================\nplatform linux -- Python 3.x.x, pytest-x.x.x,
-pluggy-x.x.x\nrootdir: /path/to/project\n\nPASSED
-[100%]\n============================== 2 passed in x.xs
-==============================\n",
-"success": True
-},
-"overall_success": True,
-"message": "Refactoring validated: ASTs differ but all tests passed."
-}
-generator = ReportGenerator()
-report_path = generator.generate_report(
-original_file,
-refactored_file,
-dummy_suggestions,
-dummy_validation_results,
-"refactoring_session_report.md"
-)
-print(f"Report saved to {report_path}")
-# Clean up dummy files
-os.remove(original_file)
-os.remove(refactored_file)
\ No newline at end of file
+    original_file = "example_original.py"
+    refactored_file = "example_refactored.py"
+    with open(original_file, "w", encoding="utf-8") as f:
+        f.write(original_code_content)
+    with open(refactored_file, "w", encoding="utf-8") as f:
+        f.write(refactored_code_content)
+    # Dummy AI Suggestions (from Step 3)
+    dummy_suggestions = [
+        {
+            "type": "Rename Function",
+            "start_line": 1,
+            "end_line": 4,
+            "reason": "Function name 'old_function_name' was not descriptive. Renamed to 'new_function_name' for clarity.",
+            "impact": "Improved readability and maintainability."
+        },
+        {
+            "type": "Rename Variable",
+            "start_line": 3,
+            "end_line": 3,
+            "reason": "Variable 'result' was too generic. Renamed to 'sum_val' for better context.",
+            "impact": "Enhanced code clarity."
+        }
+    ]
+    # Dummy Validation Results (from Step 4)
+    dummy_validation_results = {
+        "ast_comparison": {
+            "structural_similarity": False,  # ASTs will differ due to renames
+            "message": "ASTs differ due to function and variable renames, but logic is preserved."
+        },
+        "unit_tests": {
+            "tests_run": 2,
+            "tests_passed": 2,
+            "tests_failed": 0,
+            "test_output": "============================= test session starts ==============================\nplatform linux -- Python 3.x.x, pytest-x.x.x, pluggy-x.x.x\nrootdir: /path/to/project\n\nPASSED [100%]\n============================== 2 passed in x.xs ==============================\n",
+            "success": True
+        },
+        "overall_success": True,
+        "message": "Refactoring validated: ASTs differ but all tests passed."
+    }
+    generator = ReportGenerator()
+    report_path = generator.generate_report(
+        original_file,
+        refactored_file,
+        dummy_suggestions,
+        dummy_validation_results,
+        "refactoring_session_report.md"
+    )
+    print(f"Report saved to {report_path}")
+    # Clean up dummy files
+    os.remove(original_file)
+    os.remove(refactored_file)
@@ -0,0 +1,317 @@
+import ast
+import os
+import sqlite3
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+import networkx as nx
+
+# Assuming preprocessor.py is in the same directory
+from preprocessor import MetadataCache, metadata_extractor
+
+DEFAULT_INDEX_PATH = os.path.join(".neurorefactor_cache", "symbols.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    path TEXT PRIMARY KEY,
+    module TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS definitions (
+    name TEXT NOT NULL,
+    qualname TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    module TEXT NOT NULL,
+    path TEXT NOT NULL,
+    start_line INTEGER,
+    end_line INTEGER
+);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT NOT NULL,
+    module TEXT NOT NULL,
+    imported_module TEXT NOT NULL,
+    name TEXT,
+    alias TEXT,
+    line INTEGER
+);
+CREATE TABLE IF NOT EXISTS refs (
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    module TEXT NOT NULL,
+    path TEXT NOT NULL,
+    line INTEGER,
+    scope TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_definitions_name ON definitions(name);
+CREATE INDEX IF NOT EXISTS idx_definitions_qualname ON definitions(qualname);
+CREATE INDEX IF NOT EXISTS idx_definitions_path ON definitions(path);
+CREATE INDEX IF NOT EXISTS idx_imports_imported ON imports(imported_module, name);
+CREATE INDEX IF NOT EXISTS idx_imports_path ON imports(path);
+CREATE INDEX IF NOT EXISTS idx_refs_name ON refs(name);
+CREATE INDEX IF NOT EXISTS idx_refs_path ON refs(path);
+"""
+
+
+def module_name_for(path: str, root_dir: str) -> str:
+    """
+    Dotted module name of ``path`` relative to ``root_dir``
+    (``pkg/__init__.py`` -> ``pkg``, ``pkg/mod.py`` -> ``pkg.mod``).
+    """
+    rel_path = os.path.relpath(path, root_dir)
+    parts = rel_path[:-3].split(os.sep) if rel_path.endswith(".py") else rel_path.split(os.sep)
+    if parts[-1] == "__init__" and len(parts) > 1:
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def resolve_relative_import(module: str, is_package: bool, level: int, target: Optional[str]) -> str:
+    """
+    Turns ``from ..x import y`` inside ``module`` into an absolute module name.
+    """
+    if level == 0:
+        return target or ""
+    package = module.split(".") if is_package else module.split(".")[:-1]
+    base = package[:len(package) - (level - 1)] if level > 1 else package
+    return ".".join(base + ([target] if target else []))
+
+
+class _ReferenceCollector(ast.NodeVisitor):
+    """
+    Collects imports and name references, tagging each reference with the
+    qualified name of the enclosing function or class (``<module>`` at top level).
+    """
+
+    def __init__(self, module: str, is_package: bool):
+        self.module = module
+        self.is_package = is_package
+        self.imports: List[Tuple[str, Optional[str], Optional[str], int]] = []
+        self.references: List[Tuple[str, str, int, str]] = []
+        self._scope: List[str] = []
+
+    def _current_scope(self) -> str:
+        return ".".join(self._scope) if self._scope else "<module>"
+
+    def _visit_scope(self, node: ast.AST) -> None:
+        for decorator in getattr(node, "decorator_list", []):
+            self.visit(decorator)
+        self._scope.append(node.name)
+        for child in ast.iter_child_nodes(node):
+            if child not in getattr(node, "decorator_list", []):
+                self.visit(child)
+        self._scope.pop()
+
+    visit_FunctionDef = _visit_scope
+    visit_AsyncFunctionDef = _visit_scope
+    visit_ClassDef = _visit_scope
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports.append((alias.name, None, alias.asname, node.lineno))
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        target = resolve_relative_import(self.module, self.is_package, node.level, node.module)
+        for alias in node.names:
+            self.imports.append((target, alias.name, alias.asname, node.lineno))
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if isinstance(node.func, ast.Name):
+            self.references.append((node.func.id, "call", node.lineno, self._current_scope()))
+        elif isinstance(node.func, ast.Attribute):
+            self.references.append((node.func.attr, "call", node.lineno, self._current_scope()))
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.references.append((node.id, "name", node.lineno, self._current_scope()))
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.references.append((node.attr, "attribute", node.lineno, self._current_scope()))
+        self.generic_visit(node)
+
+
+def _qualified_definitions(metadata: Dict[str, Any]) -> Iterator[Tuple[str, str, str, int, int]]:
+    """
+    Yields (name, qualname, kind, start_line, end_line) for every function and
+    class in preprocessor metadata, nesting them by their line spans.
+    """
+    items = [("class", c) for c in metadata.get("classes", [])] + \
+            [("function", f) for f in metadata.get("functions", [])]
+    items.sort(key=lambda item: (item[1]["start_line"], -item[1]["end_line"]))
+    stack: List[Tuple[str, int]] = []
+    for kind, item in items:
+        while stack and item["start_line"] > stack[-1][1]:
+            stack.pop()
+        qualname = ".".join([name for name, _ in stack] + [item["name"]])
+        yield item["name"], qualname, kind, item["start_line"], item["end_line"]
+        stack.append((item["name"], item["end_line"]))
+
+
+class SymbolIndex:
+    """
+    Persistent repository-wide index of definitions, imports and references.
+
+    Change detection goes through the preprocessor's MetadataCache, so an
+    update only re-indexes modules whose content hash changed. Lookups are
+    single indexed SQLite queries.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH, cache: Optional[MetadataCache] = None):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.cache = cache or MetadataCache()
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        if db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._extract, self._variant = metadata_extractor(backend="ast")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def update(self, root_dir: str) -> Dict[str, int]:
+        """
+        Brings the index in line with the Python files under ``root_dir``:
+        changed files are re-indexed, unchanged ones skipped, deleted ones dropped.
+        """
+        root_dir = os.path.abspath(root_dir)
+        stats = {"indexed": 0, "unchanged": 0, "removed": 0, "errors": 0}
+        seen = set()
+        for dirpath, dirnames, filenames in os.walk(root_dir):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".") and d != "__pycache__"]
+            for filename in filenames:
+                if not filename.endswith(".py"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                seen.add(path)
+                status = self.update_file(path, root_dir)
+                stats[status] += 1
+
+        prefix = root_dir.rstrip(os.sep) + os.sep
+        stale = [row["path"] for row in self.conn.execute("SELECT path FROM modules")
+                 if row["path"].startswith(prefix) and row["path"] not in seen]
+        with self.conn:
+            for path in stale:
+                self._delete_file(path)
+                self.conn.execute("DELETE FROM modules WHERE path = ?", (path,))
+        stats["removed"] = len(stale)
+        return stats
+
+    def update_file(self, path: str, root_dir: str) -> str:
+        """
+        Re-indexes one file if its content changed. Returns ``indexed``,
+        ``unchanged`` or ``errors``.
+        """
+        path = os.path.abspath(path)
+        metadata, content_hash = self.cache.lookup(path, self._extract, self._variant)
+        row = self.conn.execute("SELECT content_hash FROM modules WHERE path = ?", (path,)).fetchone()
+        if row is not None and row["content_hash"] == content_hash:
+            return "unchanged"
+
+        module = module_name_for(path, os.path.abspath(root_dir))
+        collector = _ReferenceCollector(module, os.path.basename(path) == "__init__.py")
+        if "error" not in metadata:
+            with open(path, "r", encoding="utf-8") as f:
+                collector.visit(ast.parse(f.read()))
+
+        with self.conn:
+            self._delete_file(path)
+            self.conn.executemany(
+                "INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(name, qualname, kind, module, path, start, end)
+                 for name, qualname, kind, start, end in _qualified_definitions(metadata)])
+            self.conn.executemany(
+                "INSERT INTO imports VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, module, imported, name, alias, line) for imported, name, alias, line in collector.imports])
+            self.conn.executemany(
+                "INSERT INTO refs VALUES (?, ?, ?, ?, ?, ?)",
+                [(name, kind, module, path, line, scope) for name, kind, line, scope in collector.references])
+            self.conn.execute("INSERT OR REPLACE INTO modules VALUES (?, ?, ?)", (path, module, content_hash))
+        return "errors" if "error" in metadata else "indexed"
+
+    def _delete_file(self, path: str) -> None:
+        for table in ("definitions", "imports", "refs"):
+            self.conn.execute(f"DELETE FROM {table} WHERE path = ?", (path,))
+
+    # --- Lookups ---
+
+    def find_definitions(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Where is ``name`` defined? Accepts a bare name or a qualname (``Cls.method``).
+        """
+        column = "qualname" if "." in name else "name"
+        rows = self.conn.execute(f"SELECT * FROM definitions WHERE {column} = ?", (name,))
+        return [dict(row) for row in rows]
+
+    def find_references(self, name: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Where is ``name`` used? ``kind`` narrows to ``call``, ``name`` or ``attribute``.
+        """
+        if kind is None:
+            rows = self.conn.execute("SELECT * FROM refs WHERE name = ?", (name,))
+        else:
+            rows = self.conn.execute("SELECT * FROM refs WHERE name = ? AND kind = ?", (name, kind))
+        return [dict(row) for row in rows]
+
+    def find_importers(self, module: str, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Which files import ``module`` (or ``name`` from ``module``)?
+        """
+        if name is None:
+            rows = self.conn.execute("SELECT * FROM imports WHERE imported_module = ?", (module,))
+        else:
+            rows = self.conn.execute("SELECT * FROM imports WHERE imported_module = ? AND name = ?", (module, name))
+        return [dict(row) for row in rows]
+
+    def module_path(self, module: str) -> Optional[str]:
+        row = self.conn.execute("SELECT path FROM modules WHERE module = ?", (module,)).fetchone()
+        return row["path"] if row else None
+
+    # --- Graphs ---
+
+    def import_graph(self) -> nx.DiGraph:
+        """
+        Module-level import graph. Modules outside the index are kept as
+        nodes with ``external=True``.
+        """
+        graph = nx.DiGraph()
+        internal = {row["module"] for row in self.conn.execute("SELECT module FROM modules")}
+        graph.add_nodes_from(internal, external=False)
+        for row in self.conn.execute("SELECT DISTINCT module, imported_module, name FROM imports"):
+            target = row["imported_module"]
+            # "from pkg import mod" imports a submodule when one is indexed
+            if row["name"] and f"{target}.{row['name']}" in internal:
+                target = f"{target}.{row['name']}"
+            if target not in graph:
+                graph.add_node(target, external=True)
+            graph.add_edge(row["module"], target)
+        return graph
+
+    def call_graph(self) -> nx.DiGraph:
+        """
+        Function-level call graph with ``module:qualname`` nodes. Callees are
+        resolved to a definition in the same module, then to one imported by
+        name, then to a unique definition anywhere in the index.
+        """
+        graph = nx.DiGraph()
+        by_name: Dict[str, List[sqlite3.Row]] = {}
+        for row in self.conn.execute("SELECT name, qualname, module FROM definitions"):
+            by_name.setdefault(row["name"], []).append(row)
+            graph.add_node(f"{row['module']}:{row['qualname']}")
+
+        imported = {}
+        for row in self.conn.execute("SELECT module, imported_module, name, alias FROM imports WHERE name IS NOT NULL"):
+            imported[(row["module"], row["alias"] or row["name"])] = (row["imported_module"], row["name"])
+
+        for row in self.conn.execute("SELECT DISTINCT name, module, scope FROM refs WHERE kind = 'call'"):
+            candidates = by_name.get(row["name"], [])
+            local = [c for c in candidates if c["module"] == row["module"]]
+            if not local and (row["module"], row["name"]) in imported:
+                source_module, source_name = imported[(row["module"], row["name"])]
+                local = [c for c in by_name.get(source_name, []) if c["module"] == source_module]
+            if not local and len(candidates) == 1:
+                local = candidates
+            for callee in local:
+                graph.add_edge(f"{row['module']}:{row['scope']}", f"{callee['module']}:{callee['qualname']}")
+        return graph
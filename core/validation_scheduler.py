@@ -0,0 +1,181 @@
+import ast
+import concurrent.futures
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Any, Iterator, List, Optional
+
+from radon.complexity import cc_visit
+# Assuming validator.py is in the same directory for the test stage
+from validator import CodeValidator
+
+# The structural diff is shared with the app in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.core.ast_diff import structural_diff
+from src.core.lint import DEFAULT_LINT_ENGINE, LintUnavailableError
+
+STAGES = ["ast", "lint", "complexity", "tests"]
+
+
+# --- Stages run in the process pool; each returns {"passed", "message", ...} ---
+
+def _ast_stage(original_code: str, refactored_code: str, max_risk: Optional[float] = None) -> Dict[str, Any]:
+    try:
+        ast.parse(refactored_code)
+        diff = structural_diff(original_code, refactored_code, normalize=True)
+    except SyntaxError as e:
+        return {"passed": False, "message": f"Syntax error in code: {e}"}
+    if max_risk is not None and diff.risk_score > max_risk:
+        return {"passed": False, "message": f"Risk score {diff.risk_score:.2f} exceeds {max_risk:.2f}",
+                "risk_score": diff.risk_score}
+    return {"passed": True, "message": f"{len(diff.changes)} structural change(s)", "risk_score": diff.risk_score}
+
+
+def _lint_stage(original_code: str, refactored_code: str) -> Dict[str, Any]:
+    try:
+        delta = DEFAULT_LINT_ENGINE.delta(original_code, refactored_code)
+    except LintUnavailableError as e:
+        return {"passed": True, "message": f"Skipped: {e}", "skipped": True}
+    before, after = delta["before"], delta["after"]
+    if delta["new"]:
+        return {"passed": False, "message": f"Introduced {len(delta['new'])} new lint error(s)",
+                "before": before, "after": after, "new": delta["new"]}
+    return {"passed": True, "message": f"Lint errors: {before} -> {after}", "before": before, "after": after}
+
+
+def _complexity_stage(original_code: str, refactored_code: str) -> Dict[str, Any]:
+    try:
+        before = sum(block.complexity for block in cc_visit(original_code))
+        after = sum(block.complexity for block in cc_visit(refactored_code))
+    except SyntaxError as e:
+        return {"passed": False, "message": f"Syntax error in code: {e}"}
+    if after > before:
+        return {"passed": False, "message": f"Complexity increased: {before} -> {after}", "before": before, "after": after}
+    return {"passed": True, "message": f"Complexity: {before} -> {after}", "before": before, "after": after}
+
+
+def _timed(stage, *args) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        outcome = stage(*args)
+    except Exception as e:
+        outcome = {"passed": False, "message": f"Error in validation stage: {e}"}
+    outcome["duration"] = time.perf_counter() - start
+    return outcome
+
+
+class ValidationScheduler:
+    """
+    Validates many refactoring candidates in parallel.
+
+    The AST stage of every candidate runs first; once it passes, its lint,
+    complexity and test stages are scheduled concurrently. Analysis stages
+    share a bounded process pool and tests run in the validator's warm
+    pytest workers. The first failing stage of a candidate cancels its
+    remaining ones, and results are yielded as candidates complete.
+
+    A candidate is a dict with ``original_code`` and ``refactored_code``,
+    and optionally ``id``, ``file_path`` (the original module, needed for
+    tests) and ``test_file_path``.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, validator: Optional[CodeValidator] = None,
+                 max_risk: Optional[float] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.validator = validator or CodeValidator()
+        self.max_risk = max_risk
+
+    def _tests_stage(self, candidate: Dict[str, Any]) -> Dict[str, Any]:
+        test_file_path = candidate["test_file_path"]
+        file_path = candidate["file_path"]
+        affected = self.validator.impact_map.affected_tests(
+            test_file_path, file_path, candidate["original_code"], candidate["refactored_code"])
+        if affected == []:
+            return {"passed": True, "message": "Skipped: no tests cover the changed functions", "skipped": True}
+
+        # The candidate replaces the original module under the same name
+        with tempfile.TemporaryDirectory(prefix="neurorefactor-candidate-") as work_dir:
+            code_path = os.path.join(work_dir, os.path.basename(file_path))
+            with open(code_path, "w", encoding="utf-8") as f:
+                f.write(candidate["refactored_code"])
+            results = self.validator._run_unit_tests(test_file_path, code_path, affected)
+        message = f"{results['tests_passed']}/{results['tests_run']} tests passed"
+        return {"passed": results["success"], "message": message, "unit_tests": results}
+
+    def validate_many(self, candidates: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yields one result per candidate, in completion order:
+        {id, success, failed_stage, stages: {stage: outcome}, duration}.
+        Stages cancelled after a failure are reported with ``cancelled``.
+        """
+        states = []
+        for index, candidate in enumerate(candidates):
+            stages = ["ast", "lint", "complexity"]
+            if candidate.get("test_file_path") and candidate.get("file_path"):
+                stages.append("tests")
+            states.append({"id": candidate.get("id", index), "stages": stages, "outcomes": {},
+                           "futures": {}, "done": False, "start": time.perf_counter()})
+
+        test_workers = getattr(self.validator.worker_pool, "size", None) or min(4, self.max_workers)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) as processes, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=test_workers) as threads:
+            pending = {}
+
+            def submit(index: int, stage: str) -> None:
+                candidate = candidates[index]
+                original, refactored = candidate["original_code"], candidate["refactored_code"]
+                if stage == "ast":
+                    future = processes.submit(_timed, _ast_stage, original, refactored, self.max_risk)
+                elif stage == "lint":
+                    future = processes.submit(_timed, _lint_stage, original, refactored)
+                elif stage == "complexity":
+                    future = processes.submit(_timed, _complexity_stage, original, refactored)
+                else:
+                    future = threads.submit(_timed, self._tests_stage, candidate)
+                states[index]["futures"][stage] = future
+                pending[future] = (index, stage)
+
+            for index in range(len(candidates)):
+                submit(index, "ast")
+
+            while pending:
+                done, _ = concurrent.futures.wait(list(pending), return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    if future not in pending:
+                        continue  # Dropped when a sibling stage in this batch failed
+                    index, stage = pending.pop(future)
+                    state = states[index]
+                    if state["done"] or future.cancelled():
+                        continue
+                    outcome = future.result()
+                    state["outcomes"][stage] = outcome
+
+                    if not outcome["passed"]:
+                        for other, other_future in state["futures"].items():
+                            if other not in state["outcomes"]:
+                                other_future.cancel()  # Running stages finish, but are ignored
+                                pending.pop(other_future, None)
+                        for other in state["stages"]:
+                            state["outcomes"].setdefault(other, {"passed": False, "cancelled": True,
+                                                                 "message": f"Cancelled after {stage} failed"})
+                    elif stage == "ast":
+                        for other in state["stages"][1:]:
+                            submit(index, other)
+
+                    if len(state["outcomes"]) == len(state["stages"]):
+                        state["done"] = True
+                        failed = [s for s in state["stages"]
+                                  if not state["outcomes"][s]["passed"] and not state["outcomes"][s].get("cancelled")]
+                        yield {
+                            "id": state["id"],
+                            "success": not failed,
+                            "failed_stage": failed[0] if failed else None,
+                            "stages": {s: state["outcomes"][s] for s in state["stages"]},
+                            "duration": time.perf_counter() - state["start"]
+                        }
+
+    def validate_all(self, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Like ``validate_many``, but returns the results in candidate order."""
+        order = {candidate.get("id", index): index for index, candidate in enumerate(candidates)}
+        return sorted(self.validate_many(candidates), key=lambda result: order[result["id"]])
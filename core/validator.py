@@ -1,213 +1,335 @@
-import libcst as cst
 import json
 import os
-import subprocess
 import sys
-from typing import Dict, Any, List, Tuple
-# Assuming preprocessor.py is in the same directory for AST parsing
-from preprocessor import preprocess_code
+import time
+from typing import Dict, Any, List, Optional
+from impact_map import TestImpactMap
+from pytest_pool import PytestWorkerPool
+from differential_tester import DifferentialTester
+
+# The structural diff is shared with the app in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.core.ast_diff import structural_diff
+from src.core.validation_cache import ValidationCache
+
+
 class CodeValidator:
-def __init__(self):
-pass
-def _compare_asts(self, original_code: str, refactored_code: str) ->
-Dict[str, Any]:
-"""
-Compares the ASTs of two code snippets to identify structural
-differences.
-Returns a summary of changes (simplified for this example).
-A more robust implementation would use a dedicated AST diffing
-library.
-"""
-try:
-original_tree = cst.parse_module(original_code)
-refactored_tree = cst.parse_module(refactored_code)
-# For a true AST comparison, you'd need a sophisticated diffing
-algorithm.
-# For simplicity, we'll just compare their string representations
-of the AST.
-# This is a very basic check and not robust for all refactorings.
-original_ast_str = str(original_tree.body)
-refactored_ast_str = str(refactored_tree.body)
-is_structural_similar = (original_ast_str == refactored_ast_str)
-# A more advanced comparison would involve traversing both trees
-# and identifying added, removed, or modified nodes.
-# For example, using a library like tree-sitter or custom
-algorithms.
-return {
-"structural_similarity": is_structural_similar,
-"message": "ASTs are identical" if is_structural_similar else
-"ASTs differ"
-}
-except cst.ParserSyntaxError as e:
-return {"structural_similarity": False, "message": f"Syntax error
-in code: {e}"}
-except Exception as e:
-return {"structural_similarity": False, "message": f"Error
-comparing ASTs: {e}"}
-def _run_unit_tests(self, test_file_path: str, code_file_path: str) ->
-Dict[str, Any]:
-"""
-Runs pytest on a specified test file and captures the results.
-Temporarily modifies sys.path to ensure the code file can be imported
-by tests.
-"""
-results = {
-"tests_run": 0,
-"tests_passed": 0,
-"tests_failed": 0,
-"test_output": "",
-"success": False
-}
-if not os.path.exists(test_file_path):
-results["test_output"] = f"Test file not found: {test_file_path}"
-return results
-# Add the directory of the code file to sys.path so tests can import
-it
-code_dir = os.path.dirname(os.path.abspath(code_file_path))
-original_sys_path = list(sys.path) # Save original sys.path
-if code_dir not in sys.path:
-sys.path.insert(0, code_dir)
-try:
-# Run pytest programmatically
-# -s to show print statements, --json-report to get structured
-output
-# --json-report-file to specify output file
-json_report_path = "pytest_report.json"
-command = [sys.executable, "-m", "pytest", test_file_path, "--
-json-report", f"--json-report-file={json_report_path}"]
-process = subprocess.run(command, capture_output=True, text=True,
-check=False)
-results["test_output"] = process.stdout + process.stderr
-if os.path.exists(json_report_path):
-with open(json_report_path, "r", encoding="utf-8") as f:
-pytest_data = json.load(f)
-summary = pytest_data.get("summary", {})
-results["tests_run"] = summary.get("total", 0)
-results["tests_passed"] = summary.get("passed", 0)
-results["tests_failed"] = summary.get("failed", 0) +
-summary.get("errors", 0)
-results["success"] = (results["tests_failed"] == 0)
-os.remove(json_report_path) # Clean up report file
-else:
-results["test_output"] += "\nPytest JSON report not
-generated."
-except Exception as e:
-results["test_output"] = f"Error running tests: {e}"
-finally:
-# Restore original sys.path
-sys.path = original_sys_path
-return results
-def validate_refactoring(self, original_code_path: str,
-refactored_code_path: str, test_file_path: str = None) -> Dict[str, Any]:
-"""
-Performs a comprehensive validation of a refactoring.
-"""
-validation_results = {
-"ast_comparison": {},
-"unit_tests": {},
-"overall_success": False,
-"message": ""
-}
-# 1. AST Comparison
-with open(original_code_path, "r", encoding="utf-8") as f:
-original_code = f.read()
-with open(refactored_code_path, "r", encoding="utf-8") as f:
-refactored_code = f.read()
-validation_results["ast_comparison"] =
-self._compare_asts(original_code, refactored_code)
-# 2. Unit Test Execution (if test_file_path is provided)
-if test_file_path:
-validation_results["unit_tests"] =
-self._run_unit_tests(test_file_path, refactored_code_path)
-# Determine overall success based on AST and tests
-ast_ok =
-validation_results["ast_comparison"].get("structural_similarity", False)
-tests_ok = validation_results["unit_tests"].get("success", False)
-validation_results["overall_success"] = ast_ok and tests_ok
-if validation_results["overall_success"]:
-validation_results["message"] = "Refactoring validated: ASTs
-are similar and all tests passed."
-elif not ast_ok:
-validation_results["message"] = "Validation failed: ASTs
-differ significantly or syntax error."
-elif not tests_ok:
-validation_results["message"] = "Validation failed: Unit
-tests failed after refactoring."
-else:
-# If no tests provided, rely solely on AST comparison
-validation_results["overall_success"] =
-validation_results["ast_comparison"].get("structural_similarity", False)
-if validation_results["overall_success"]:
-validation_results["message"] = "Refactoring validated: ASTs
-are similar (no unit tests provided)."
-else:
-validation_results["message"] = "Validation failed: ASTs
-differ significantly or syntax error (no unit tests provided)."
-return validation_results
+    def __init__(self, impact_map: Optional[TestImpactMap] = None, worker_pool: Optional[PytestWorkerPool] = None,
+                 differential_tester: Optional[DifferentialTester] = None, cache: Optional[ValidationCache] = None):
+        # Maps tests to the functions they cover, so only affected tests run
+        self.impact_map = impact_map or TestImpactMap()
+        # Started on the first test run and shared by later validations
+        self.worker_pool = worker_pool
+        # Behavioral evidence for code without tests, also started lazily
+        self.differential_tester = differential_tester
+        # Verdicts keyed on code, test and tool hashes
+        self.cache = cache or ValidationCache()
+
+    def _compare_asts(self, original_code: str, refactored_code: str) -> Dict[str, Any]:
+        """
+        Compares the ASTs of two code snippets to identify structural
+        differences.
+        Subtrees are hashed bottom-up, so identical parts are skipped in one
+        comparison; differing statements are reported as added, removed,
+        moved or modified with their line ranges. Code that only differs by
+        renamed locals/parameters, docstrings or formatting is reported as
+        alpha-equivalent.
+        """
+        try:
+            diff = structural_diff(original_code, refactored_code)
+            normalized = diff if diff.identical else structural_diff(original_code, refactored_code, normalize=True)
+        except SyntaxError as e:
+            return {"structural_similarity": False, "message": f"Syntax error in code: {e}"}
+        except Exception as e:
+            return {"structural_similarity": False, "message": f"Error comparing ASTs: {e}", "error": True}
+
+        if diff.identical:
+            message = "ASTs are identical"
+        elif normalized.identical:
+            message = "ASTs are equivalent up to renamed locals, docstrings and formatting"
+        else:
+            counts = ", ".join(f"{count} {kind}" for kind, count in normalized.summary().items() if count)
+            message = f"ASTs differ: {counts}"
+        return {
+            "structural_similarity": normalized.identical,
+            "alpha_equivalent": normalized.identical,
+            "similarity": diff.similarity,
+            "risk_score": normalized.risk_score,
+            "changes": diff.to_dict()["changes"],
+            "message": message
+        }
+
+    def _run_unit_tests(self, test_file_path: str, code_file_path: str, test_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Runs pytest on a specified test file in a warm worker of the test
+        pool and captures the results. The code file's directory is made
+        importable for the tests. ``test_ids`` restricts the run to those
+        tests of the file.
+        """
+        results = {
+            "tests_run": 0,
+            "tests_passed": 0,
+            "tests_failed": 0,
+            "test_output": "",
+            "success": False,
+            "error": False  # The run itself failed, so the outcome says nothing about the code
+        }
+
+        if not os.path.exists(test_file_path):
+            results["test_output"] = f"Test file not found: {test_file_path}"
+            results["error"] = True
+            return results
+
+        if self.worker_pool is None:
+            self.worker_pool = PytestWorkerPool()
+
+        try:
+            # Each job gets its own temp dir and JSON report, so concurrent
+            # validations cannot overwrite each other's results
+            targets = [f"{os.path.abspath(test_file_path)}::{test_id}" for test_id in test_ids] if test_ids else [test_file_path]
+            # Append mode keeps the code file's directory ahead of the test
+            # file's, so tests import the code under validation
+            run = self.worker_pool.run(targets, os.path.dirname(os.path.abspath(code_file_path)), ["--import-mode=append"])
+            results["test_output"] = run["output"]
+            if run["error"]:
+                results["test_output"] += f"\n{run['error']}"
+                results["error"] = True
+
+            if run["summary"] is not None:
+                summary = run["summary"]
+                results["tests_run"] = summary.get("total", 0)
+                results["tests_passed"] = summary.get("passed", 0)
+                results["tests_failed"] = summary.get("failed", 0) + summary.get("errors", 0)
+                results["success"] = (results["tests_failed"] == 0)
+            else:
+                results["test_output"] += "\nPytest JSON report not generated."
+                results["error"] = True
+
+        except Exception as e:
+            results["test_output"] = f"Error running tests: {e}"
+            results["error"] = True
+
+        return results
+
+    def validate_refactoring(self, original_code_path: str, refactored_code_path: str, test_file_path: str = None,
+                             use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Performs a comprehensive validation of a refactoring.
+        Verdicts are cached on the hashes of both files, the test file (and
+        its conftest.py) and the tool versions, so re-validating unchanged
+        inputs returns instantly with the original timings. Verdicts reached
+        despite an error, timeout or crash are not cached.
+        """
+        start = time.perf_counter()
+        with open(original_code_path, "r", encoding="utf-8") as f:
+            original_code = f.read()
+        with open(refactored_code_path, "r", encoding="utf-8") as f:
+            refactored_code = f.read()
+
+        key = None
+        if use_cache and self.cache is not None:
+            test_files = []
+            if test_file_path:
+                test_files = [test_file_path, os.path.join(os.path.dirname(os.path.abspath(test_file_path)), "conftest.py")]
+            key = self.cache.key("validate_refactoring", original_code, refactored_code, test_files,
+                                 module=os.path.basename(refactored_code_path),
+                                 test_file=os.path.abspath(test_file_path) if test_file_path else None,
+                                 # Sibling modules the differential check may import
+                                 search_path=os.path.dirname(os.path.abspath(original_code_path)))
+            entry = self.cache.get(key)
+            if entry is not None:
+                validation_results = entry["result"]
+                validation_results["cached"] = True
+                return validation_results
+
+        validation_results = self._validate(original_code_path, refactored_code_path, test_file_path,
+                                            original_code, refactored_code)
+        validation_results["timings"]["total"] = time.perf_counter() - start
+        if key is not None and not self._transient(validation_results):
+            self.cache.put(key, validation_results, validation_results["timings"]["total"])
+        return validation_results
+
+    @staticmethod
+    def _transient(validation_results: Dict[str, Any]) -> bool:
+        """
+        True when a stage errored, timed out or crashed: the verdict may
+        differ on the next run, so it must not be reused.
+        """
+        differential = validation_results.get("differential", {}).get("functions", {})
+        return bool(validation_results["ast_comparison"].get("error")
+                    or validation_results["unit_tests"].get("error")
+                    or any(result["status"] == "error" for result in differential.values()))
+
+    def _validate(self, original_code_path: str, refactored_code_path: str, test_file_path: Optional[str],
+                  original_code: str, refactored_code: str) -> Dict[str, Any]:
+        validation_results = {
+            "ast_comparison": {},
+            "unit_tests": {},
+            "risk_score": None,
+            "overall_success": False,
+            "message": "",
+            "timings": {},
+            "cached": False
+        }
+        timings = validation_results["timings"]
+
+        # 1. AST Comparison
+        stage_start = time.perf_counter()
+        validation_results["ast_comparison"] = self._compare_asts(original_code, refactored_code)
+        validation_results["risk_score"] = validation_results["ast_comparison"].get("risk_score")
+        timings["ast"] = time.perf_counter() - stage_start
+
+        # 2. Unit Test Execution (if test_file_path is provided)
+        if test_file_path and validation_results["ast_comparison"].get("alpha_equivalent"):
+            # Same program up to renames and formatting: tests cannot tell them apart
+            validation_results["unit_tests"] = {
+                "tests_run": 0,
+                "tests_passed": 0,
+                "tests_failed": 0,
+                "test_output": "Skipped: refactoring is equivalent up to renames and formatting.",
+                "success": True,
+                "skipped": True
+            }
+            validation_results["overall_success"] = True
+            validation_results["message"] = "Refactoring validated: ASTs are equivalent (tests not needed)."
+            return validation_results
+
+        if test_file_path:
+            # Only tests that execute a changed function can observe the change
+            stage_start = time.perf_counter()
+            affected = None
+            if os.path.exists(test_file_path):
+                affected = self.impact_map.affected_tests(test_file_path, original_code_path, original_code, refactored_code)
+            if affected == []:
+                validation_results["unit_tests"] = {
+                    "tests_run": 0,
+                    "tests_passed": 0,
+                    "tests_failed": 0,
+                    "test_output": "Skipped: no tests cover the changed functions.",
+                    "success": True,
+                    "skipped": True
+                }
+            else:
+                validation_results["unit_tests"] = self._run_unit_tests(test_file_path, refactored_code_path, affected)
+                validation_results["unit_tests"]["selected_tests"] = affected
+            timings["tests"] = time.perf_counter() - stage_start
+
+        # 3. Verdict
+        unit_tests = validation_results["unit_tests"]
+        if unit_tests and not unit_tests.get("skipped") and (unit_tests["tests_run"] or not unit_tests["success"]):
+            # Tests that execute the changed code decide; the AST comparison stays as information
+            validation_results["overall_success"] = unit_tests["success"]
+            if unit_tests["success"]:
+                validation_results["message"] = "Refactoring validated: all tests covering the change passed."
+            else:
+                validation_results["message"] = "Validation failed: Unit tests failed after refactoring."
+        else:
+            # Without tests covering the change, rely on AST comparison and differential execution
+            why = "no tests cover the change" if test_file_path else "no unit tests provided"
+            validation_results["overall_success"] = validation_results["ast_comparison"].get("structural_similarity", False)
+            behaves_same = False
+            if not validation_results["overall_success"] and "changes" in validation_results["ast_comparison"]:
+                if self.differential_tester is None:
+                    self.differential_tester = DifferentialTester()
+                stage_start = time.perf_counter()
+                differential = self.differential_tester.check(
+                    original_code, refactored_code, os.path.dirname(os.path.abspath(original_code_path)))
+                timings["differential"] = time.perf_counter() - stage_start
+                validation_results["differential"] = differential
+                behaves_same = bool(differential["equivalent"]) and \
+                    self.differential_tester.covers_change(original_code, refactored_code, differential)
+                validation_results["overall_success"] = behaves_same
+
+            if behaves_same:
+                validation_results["message"] = f"Refactoring validated: changed functions behaved identically on generated inputs ({why})."
+            elif validation_results["overall_success"]:
+                validation_results["message"] = f"Refactoring validated: ASTs are similar ({why})."
+            elif validation_results.get("differential", {}).get("equivalent") is False:
+                validation_results["message"] = f"Validation failed: {validation_results['differential']['message']} ({why})."
+            else:
+                validation_results["message"] = f"Validation failed: ASTs differ significantly or syntax error ({why})."
+
+        return validation_results
+
+
 if __name__ == "__main__":
-# --- Example Usage ---
-# Create dummy code files
-original_dummy_code = """
+    # --- Example Usage ---
+    # Create dummy code files
+    original_dummy_code = """
 def add(a, b):
-return a + b
+    return a + b
+
 def subtract(a, b):
-return a - b
+    return a - b
 """
-refactored_dummy_code_ok = """
+
+    refactored_dummy_code_ok = """
 def add(x, y):
-return x + y # Renamed variables, functionally same
+    return x + y # Renamed variables, functionally same
+
 def subtract(a, b):
-return a - b
+    return a - b
 """
-refactored_dummy_code_bad = """
+
+    refactored_dummy_code_bad = """
 def add(a, b):
-return a * b # Functional change
+    return a * b # Functional change
+
 def subtract(a, b):
-return a - b
+    return a - b
 """
-with open("original_code.py", "w", encoding="utf-8") as f:
-f.write(original_dummy_code)
-with open("refactored_code_ok.py", "w", encoding="utf-8") as f:
-f.write(refactored_dummy_code_ok)
-with open("refactored_code_bad.py", "w", encoding="utf-8") as f:
-f.write(refactored_dummy_code_bad)
-# Create a dummy test file for original_code.py
-dummy_test_code = """
+
+    with open("original_code.py", "w", encoding="utf-8") as f:
+        f.write(original_dummy_code)
+    with open("refactored_code_ok.py", "w", encoding="utf-8") as f:
+        f.write(refactored_dummy_code_ok)
+    with open("refactored_code_bad.py", "w", encoding="utf-8") as f:
+        f.write(refactored_dummy_code_bad)
+
+    # Create a dummy test file for original_code.py
+    dummy_test_code = """
 import pytest
 from original_code import add, subtract
+
 def test_add():
-assert add(1, 2) == 3
-assert add(-1, 1) == 0
+    assert add(1, 2) == 3
+    assert add(-1, 1) == 0
+
 def test_subtract():
-assert subtract(5, 2) == 3
-assert subtract(10, 10) == 0
+    assert subtract(5, 2) == 3
+    assert subtract(10, 10) == 0
 """
-with open("test_original_code.py", "w", encoding="utf-8") as f:
-f.write(dummy_test_code)
-validator = CodeValidator()
-print("\n--- Validating refactored_code_ok.py (should pass) ---")
-results_ok = validator.validate_refactoring(
-"original_code.py",
-"refactored_code_ok.py",
-"test_original_code.py"
-)
-print(json.dumps(results_ok, indent=2))
-print("\n--- Validating refactored_code_bad.py (should fail tests) ---")
-results_bad = validator.validate_refactoring(
-"original_code.py",
-"refactored_code_bad.py",
-"test_original_code.py"
-)
-print(json.dumps(results_bad, indent=2))
-print("\n--- Validating refactored_code_ok.py (no tests provided) ---")
-results_no_tests = validator.validate_refactoring(
-"original_code.py",
-"refactored_code_ok.py",
-test_file_path=None
-)
-print(json.dumps(results_no_tests, indent=2))
-# Clean up dummy files
-os.remove("original_code.py")
-os.remove("refactored_code_ok.py")
-os.remove("refactored_code_bad.py")
-os.remove("test_original_code.py")
\ No newline at end of file
+    with open("test_original_code.py", "w", encoding="utf-8") as f:
+        f.write(dummy_test_code)
+
+    validator = CodeValidator()
+
+    print("\n--- Validating refactored_code_ok.py (should pass) ---")
+    results_ok = validator.validate_refactoring(
+        "original_code.py",
+        "refactored_code_ok.py",
+        "test_original_code.py"
+    )
+    print(json.dumps(results_ok, indent=2))
+
+    print("\n--- Validating refactored_code_bad.py (should fail tests) ---")
+    results_bad = validator.validate_refactoring(
+        "original_code.py",
+        "refactored_code_bad.py",
+        "test_original_code.py"
+    )
+    print(json.dumps(results_bad, indent=2))
+
+    print("\n--- Validating refactored_code_ok.py (no tests provided) ---")
+    results_no_tests = validator.validate_refactoring(
+        "original_code.py",
+        "refactored_code_ok.py",
+        test_file_path=None
+    )
+    print(json.dumps(results_no_tests, indent=2))
+
+    # Clean up dummy files
+    os.remove("original_code.py")
+    os.remove("refactored_code_ok.py")
+    os.remove("refactored_code_bad.py")
+    os.remove("test_original_code.py")
@@ -5,8 +5,10 @@ import os
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 import libcst as cst
-from radon.complexity import cc_visit
-from radon.metrics import mi_visit
+from src.core.ast_diff import structural_diff
+from src.core.metrics import code_metrics
+from src.core.refactorings import apply_local_refactorings
+from src.core.text_diff import line_changes
 
 @dataclass
 class RefactoringResult:
@@ -46,10 +48,11 @@ class AIRefactoringAgent:
         }
 
         try:
-            cc_results = cc_visit(code)
-            if cc_results:
-                metrics["cyclomatic_complexity"] = sum(b.complexity for b in cc_results)
-                max_complexity = max(b.complexity for b in cc_results)
+            # CC and MI from one traversal (same numbers as radon's cc_visit/mi_visit)
+            results = code_metrics(code)
+            if results["blocks"]:
+                metrics["cyclomatic_complexity"] = results["complexity"]
+                max_complexity = results["max_complexity"]
 
                 # Rank complexity
                 if max_complexity <= 5:
@@ -61,9 +64,8 @@ class AIRefactoringAgent:
                 else:
                     metrics["complexity_rank"] = "F"
 
-            mi_results = mi_visit(code, multi=True)
-            if mi_results:
-                metrics["maintainability_index"] = round(mi_results, 2)
+            if results["maintainability"]:
+                metrics["maintainability_index"] = round(results["maintainability"], 2)
 
         except Exception as e:
             print(f"Metrics computation error: {e}")
@@ -81,12 +83,15 @@ class AIRefactoringAgent:
     def _calculate_risk_score(self, original: str, refactored: str) -> float:
         """Calculate risk score based on code changes"""
         try:
-            original_lines = set(original.splitlines())
-            refactored_lines = set(refactored.splitlines())
+            # Share of the AST that changed; formatting and comments don't count
+            return structural_diff(original, refactored).risk_score
+        except SyntaxError:
+            pass
 
-            added = len(refactored_lines - original_lines)
-            removed = len(original_lines - refactored_lines)
-            total_lines = len(original_lines)
+        # Fall back to a line diff when either side does not parse
+        try:
+            removed, added = line_changes(original, refactored)
+            total_lines = len(original.splitlines())
 
             if total_lines == 0:
                 return 0.0
@@ -164,21 +169,56 @@ Return a JSON object with this structure:
                 "priority_fixes": []
             }
 
-    def refactor_code(self, code: str, focus_areas: Optional[List[str]] = None) -> RefactoringResult:
+    def _local_result(self, code: str, refactored_code: str, changes: List[Dict[str, Any]],
+                      metrics_before: Dict[str, Any], explanation: str) -> RefactoringResult:
+        """Build the result for code handled entirely by local refactorings"""
+        metrics_after = self._compute_metrics(refactored_code) if changes else metrics_before
+        return RefactoringResult(
+            success=True,
+            original_code=code,
+            refactored_code=refactored_code,
+            changes=changes,
+            explanation=explanation,
+            metrics_before=metrics_before,
+            metrics_after=metrics_after,
+            risk_score=self._calculate_risk_score(code, refactored_code),
+            confidence=1.0
+        )
+
+    def refactor_code(self, code: str, focus_areas: Optional[List[str]] = None,
+                      use_llm: bool = True) -> RefactoringResult:
         """
         Perform AI-powered refactoring on the provided code
 
+        Deterministic local refactorings (guard clauses, enumerate,
+        comprehensions, dead code removal) run first; the LLM is only asked
+        to handle the issues that remain.
+
         Args:
             code: Source code to refactor
             focus_areas: Optional list of specific areas to focus on
+            use_llm: Set to False to apply only the local refactorings
 
         Returns:
             RefactoringResult with original and refactored code
         """
-        # First, analyze the code
-        analysis = self.analyze_code(code)
         metrics_before = self._compute_metrics(code)
 
+        try:
+            local_code, local_changes = apply_local_refactorings(code)
+        except cst.ParserSyntaxError:
+            local_code, local_changes = code, []
+        local_summary = f"Applied {len(local_changes)} local refactoring(s)"
+
+        if not use_llm:
+            return self._local_result(code, local_code, local_changes, metrics_before, local_summary)
+
+        # Analyze what the local refactorings left behind
+        analysis = self.analyze_code(local_code)
+        if not focus_areas and "issues" in analysis and not analysis["issues"]:
+            return self._local_result(code, local_code, local_changes, metrics_before,
+                                      f"{local_summary}; no issues left for the AI model")
+
         # Build refactoring prompt
         focus_instruction = ""
         if focus_areas:
@@ -213,7 +253,7 @@ Return a JSON object:
         user_prompt = f"""Refactor this Python code:
 
 ```python
-{code}
+{local_code}
 ```
 
 Issues identified:
@@ -247,7 +287,7 @@ Provide the refactored code that fixes these issues."""
                 content = content[json_start:json_end].strip()
 
             result = json.loads(content)
-            refactored_code = result.get("refactored_code", code)
+            refactored_code = result.get("refactored_code", local_code)
 
             # Validate syntax
             if not self._validate_syntax(refactored_code):
@@ -263,7 +303,7 @@ Provide the refactored code that fixes these issues."""
                 success=True,
                 original_code=code,
                 refactored_code=refactored_code,
-                changes=result.get("changes", []),
+                changes=local_changes + result.get("changes", []),
                 explanation=result.get("explanation", "Code refactored successfully"),
                 metrics_before=metrics_before,
                 metrics_after=metrics_after,
@@ -273,6 +313,9 @@ Provide the refactored code that fixes these issues."""
 
         except Exception as e:
             print(f"Refactoring error: {e}")
+            if local_changes:
+                return self._local_result(code, local_code, local_changes, metrics_before,
+                                          f"{local_summary}; AI refactoring failed: {str(e)}")
             return RefactoringResult(
                 success=False,
                 original_code=code,
@@ -0,0 +1,531 @@
+# src/core/ast_diff.py
+"""
+Structural diff of two Python sources based on Merkle-hashed ASTs.
+
+Every subtree gets a digest computed bottom-up from its node type, its
+non-positional fields and its children's digests, so identical subtrees are
+recognized with one comparison wherever they sit in the file. Statement
+lists are aligned on these digests; only the statements that differ are
+inspected further and reported as added, removed, moved or modified along
+with their line ranges.
+"""
+import ast
+import hashlib
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.core.text_diff import diff_opcodes
+
+# Weights used to turn a diff into a 0-100 risk score
+MOVE_WEIGHT = 0.25
+
+_BLOCK_ITEM_TYPES = (ast.stmt, ast.excepthandler) + ((ast.match_case,) if hasattr(ast, "match_case") else ())
+_SCOPE_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+@dataclass
+class NodeChange:
+    """One added, removed, moved or modified statement."""
+    kind: str
+    node_type: str
+    scope: str
+    old_lines: Optional[Tuple[int, int]] = None
+    new_lines: Optional[Tuple[int, int]] = None
+    detail: str = ""
+    name: str = ""  # Name of the changed function or class itself, if it is one
+
+    @property
+    def qualname(self) -> str:
+        """Qualified name of the innermost function/class affected ("" for module level)."""
+        return ".".join(part for part in (self.scope, self.name) if part)
+
+
+@dataclass
+class StructuralDiff:
+    """Result of ``structural_diff``."""
+    identical: bool
+    changes: List[NodeChange] = field(default_factory=list)
+    old_size: int = 0
+    new_size: int = 0
+    matched_size: float = 0.0
+    moved_size: int = 0
+
+    @property
+    def similarity(self) -> float:
+        """Share of AST nodes (of the larger tree) that are unchanged, 0..1."""
+        largest = max(self.old_size, self.new_size)
+        return 1.0 if largest == 0 else round(min(self.matched_size / largest, 1.0), 4)
+
+    @property
+    def risk_score(self) -> float:
+        """0 for identical code, 100 when nothing structural survived."""
+        largest = max(self.old_size, self.new_size)
+        if largest == 0 or self.identical:
+            return 0.0
+        changed = largest - self.matched_size + MOVE_WEIGHT * self.moved_size
+        return round(min(max(changed, 0.0) / largest * 100, 100.0), 2)
+
+    def summary(self) -> Dict[str, int]:
+        counts = {"added": 0, "removed": 0, "moved": 0, "modified": 0}
+        for change in self.changes:
+            counts[change.kind] += 1
+        return counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "identical": self.identical,
+            "similarity": self.similarity,
+            "risk_score": self.risk_score,
+            "summary": self.summary(),
+            "changes": [asdict(change) for change in self.changes]
+        }
+
+
+class MerkleIndex:
+    """Bottom-up digests and subtree sizes for every node of a tree."""
+
+    def __init__(self, tree: ast.AST):
+        self.tree = tree
+        self._info: Dict[int, Tuple[bytes, int]] = {}
+        self._build(tree)
+
+    def token(self, value: Any) -> bytes:
+        """Digest-based encoding of a field value (node, list or scalar)."""
+        if isinstance(value, ast.expr_context):
+            return type(value).__name__.encode()
+        if isinstance(value, ast.AST):
+            return self._info[id(value)][0]
+        if isinstance(value, list):
+            return b"[" + b",".join(self.token(item) for item in value) + b"]"
+        return repr(value).encode()
+
+    def _build(self, tree: ast.AST) -> None:
+        info = self._info
+        context = ast.expr_context
+        node_type = ast.AST
+        # Iterative post-order so deeply nested expressions don't hit the recursion limit
+        stack: List[Tuple[ast.AST, bool]] = [(tree, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, True))
+                for child in ast.iter_child_nodes(node):
+                    if not isinstance(child, context):
+                        stack.append((child, False))
+                continue
+            parts = [type(node).__name__.encode()]
+            size = 1
+            for name in node._fields:
+                if name == "type_comment":
+                    continue
+                value = getattr(node, name, None)
+                if isinstance(value, node_type) and not isinstance(value, context):
+                    digest, child_size = info[id(value)]
+                    parts.append(digest)
+                    size += child_size
+                elif isinstance(value, list):
+                    items = []
+                    for item in value:
+                        if isinstance(item, node_type):
+                            digest, child_size = info[id(item)]
+                            items.append(digest)
+                            size += child_size
+                        else:
+                            items.append(repr(item).encode())
+                    parts.append(b"[" + b",".join(items) + b"]")
+                else:
+                    parts.append(self.token(value))
+            info[id(node)] = (hashlib.blake2b(b"\x00".join(parts), digest_size=16).digest(), size)
+
+    def digest(self, node: ast.AST) -> bytes:
+        return self._info[id(node)][0]
+
+    def size(self, node: ast.AST) -> int:
+        return self._info[id(node)][1]
+
+
+def _line_range(node: ast.AST) -> Optional[Tuple[int, int]]:
+    if not hasattr(node, "lineno"):
+        return None
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+    return start, getattr(node, "end_lineno", None) or node.lineno
+
+
+def _key(node: ast.AST) -> Tuple[str, Optional[str]]:
+    """Statements with the same key are treated as versions of each other."""
+    return type(node).__name__, getattr(node, "name", None) if isinstance(node, _SCOPE_TYPES) else None
+
+
+def _name(node: ast.AST) -> str:
+    return node.name if isinstance(node, _SCOPE_TYPES) else ""
+
+
+def _is_block(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(item, _BLOCK_ITEM_TYPES) for item in value)
+
+
+class _Differ:
+    def __init__(self, old: MerkleIndex, new: MerkleIndex):
+        self.old = old
+        self.new = new
+        self.changes: List[NodeChange] = []
+        self.matched = 0.0
+        self.moved = 0
+        self._removed: List[Tuple[ast.AST, str]] = []
+        self._added: List[Tuple[ast.AST, str]] = []
+
+    # --- Similarity of two subtrees (tree alignment on digests) ---
+
+    def match_size(self, a: ast.AST, b: ast.AST) -> int:
+        if self.old.digest(a) == self.new.digest(b):
+            return self.old.size(a)
+        if type(a) is not type(b):
+            return 0
+        total = 1
+        for name, value_a in ast.iter_fields(a):
+            total += self._match_field(value_a, getattr(b, name, None))
+        return total
+
+    def _match_field(self, value_a: Any, value_b: Any) -> int:
+        if isinstance(value_a, ast.AST) and isinstance(value_b, ast.AST) \
+                and not isinstance(value_a, ast.expr_context):
+            return self.match_size(value_a, value_b)
+        if not isinstance(value_a, list) or not isinstance(value_b, list):
+            return 0
+        items_a = [item for item in value_a if isinstance(item, ast.AST)]
+        items_b = [item for item in value_b if isinstance(item, ast.AST)]
+        total = 0
+        opcodes = diff_opcodes([self.old.digest(x) for x in items_a], [self.new.digest(y) for y in items_b])
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "equal":
+                total += sum(self.old.size(x) for x in items_a[i1:i2])
+            elif tag == "replace":
+                total += sum(self.match_size(x, y) for x, y in zip(items_a[i1:i2], items_b[j1:j2]))
+        return total
+
+    # --- Statement-level diff ---
+
+    def diff_blocks(self, old_items: List[ast.AST], new_items: List[ast.AST], scope: str) -> None:
+        opcodes = diff_opcodes([self.old.digest(x) for x in old_items], [self.new.digest(y) for y in new_items])
+        regions = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "equal":
+                # Identical subtrees: counted, never descended into
+                self.matched += sum(self.old.size(x) for x in old_items[i1:i2])
+            else:
+                regions.append((old_items[i1:i2], new_items[j1:j2]))
+
+        pending = {id(n): n for _, news in regions for n in news}
+        by_digest: Dict[bytes, List[ast.AST]] = {}
+        by_name: Dict[Tuple[str, Optional[str]], ast.AST] = {}
+        for node in pending.values():
+            by_digest.setdefault(self.new.digest(node), []).append(node)
+            if _key(node)[1] is not None:
+                by_name.setdefault(_key(node), node)
+
+        old_keys = {_key(node) for node in old_items}
+
+        def take(node: ast.AST) -> ast.AST:
+            del pending[id(node)]
+            return node
+
+        for olds, news in regions:
+            for old_node in olds:
+                # 1. An identical subtree elsewhere in the block: it moved
+                same = [n for n in by_digest.get(self.old.digest(old_node), []) if id(n) in pending]
+                if same:
+                    self._record_move(old_node, scope, take(same[0]), scope)
+                    continue
+                # 2. Definitions pair by name anywhere in the block, other
+                #    statements by type within the same changed region
+                key = _key(old_node)
+                if key[1] is not None:
+                    partner = by_name.get(key)
+                    partner = partner if partner is not None and id(partner) in pending else None
+                    if partner is None:
+                        # A renamed definition: same kind, name unknown to the old block
+                        partner = next((n for n in news if id(n) in pending and type(n) is type(old_node)
+                                        and _key(n) not in old_keys), None)
+                else:
+                    partner = next((n for n in news if id(n) in pending and _key(n) == key), None)
+                if partner is None:
+                    self._removed.append((old_node, scope))
+                else:
+                    self.diff_pair(old_node, take(partner), scope)
+        self._added.extend((node, scope) for node in pending.values())
+
+    def _record_move(self, old_node: ast.AST, old_scope: str, new_node: ast.AST, new_scope: str) -> None:
+        size = self.old.size(old_node)
+        self.matched += size
+        self.moved += size
+        detail = f"to {new_scope or '<module>'}" if new_scope != old_scope else ""
+        self.changes.append(NodeChange("moved", type(old_node).__name__, old_scope,
+                                       _line_range(old_node), _line_range(new_node), detail, _name(old_node)))
+
+    def diff_pair(self, a: ast.AST, b: ast.AST, scope: str) -> None:
+        block_fields = [name for name, value in ast.iter_fields(a) if _is_block(value) or _is_block(getattr(b, name, None))]
+        if not block_fields:
+            self.matched += self.match_size(a, b)
+            self.changes.append(NodeChange("modified", type(a).__name__, scope, _line_range(a), _line_range(b)))
+            return
+
+        header = [(name, value) for name, value in ast.iter_fields(a) if name not in block_fields]
+        self.matched += 1 + sum(self._match_field(value, getattr(b, name, None)) for name, value in header)
+        if any(self.old.token(value) != self.new.token(getattr(b, name, None)) for name, value in header):
+            self.changes.append(NodeChange("modified", type(a).__name__, scope, _line_range(a), _line_range(b),
+                                           detail="header", name=_name(a)))
+
+        inner = scope
+        if isinstance(a, _SCOPE_TYPES):
+            inner = f"{scope}.{a.name}" if scope else a.name
+        for name in block_fields:
+            self.diff_blocks(getattr(a, name) or [], getattr(b, name) or [], inner)
+
+    def finish(self) -> None:
+        """Pairs removed and added subtrees with equal digests as moves."""
+        added_by_digest: Dict[bytes, List[Tuple[ast.AST, str]]] = {}
+        for node, scope in self._added:
+            added_by_digest.setdefault(self.new.digest(node), []).append((node, scope))
+        moved_new = set()
+        for node, scope in self._removed:
+            candidates = added_by_digest.get(self.old.digest(node))
+            if candidates:
+                new_node, new_scope = candidates.pop(0)
+                moved_new.add(id(new_node))
+                self._record_move(node, scope, new_node, new_scope)
+            else:
+                self.changes.append(NodeChange("removed", type(node).__name__, scope, _line_range(node), None,
+                                               name=_name(node)))
+        for node, scope in self._added:
+            if id(node) not in moved_new:
+                self.changes.append(NodeChange("added", type(node).__name__, scope, None, _line_range(node),
+                                               name=_name(node)))
+        self.changes.sort(key=lambda c: ((c.old_lines or c.new_lines or (0, 0))[0], c.kind))
+
+
+def diff_trees(old_tree: ast.Module, new_tree: ast.Module) -> StructuralDiff:
+    """Structural diff of two already parsed (and possibly normalized) modules."""
+    old_index, new_index = MerkleIndex(old_tree), MerkleIndex(new_tree)
+    result = StructuralDiff(identical=old_index.digest(old_tree) == new_index.digest(new_tree),
+                            old_size=old_index.size(old_tree), new_size=new_index.size(new_tree))
+    if result.identical:
+        result.matched_size = result.old_size
+        return result
+    differ = _Differ(old_index, new_index)
+    differ.diff_blocks(old_tree.body, new_tree.body, "")
+    differ.finish()
+    result.changes = differ.changes
+    result.matched_size = differ.matched
+    result.moved_size = differ.moved
+    return result
+
+
+# --- Alpha-equivalence normalization ---
+
+_FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+# Calls that observe local variable names at run time
+_NAME_INTROSPECTION = {"locals", "vars", "eval", "exec"}
+
+
+def _strip_docstring(node: ast.AST) -> None:
+    body = getattr(node, "body", None)
+    if isinstance(body, list) and body and isinstance(body[0], ast.Expr) \
+            and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str):
+        node.body = body[1:] or [ast.Pass(lineno=body[0].lineno, col_offset=body[0].col_offset,
+                                          end_lineno=body[0].end_lineno, end_col_offset=body[0].end_col_offset)]
+
+
+def _scope_bindings(function: ast.AST) -> Tuple[List[str], set, set]:
+    """
+    Names bound in a function's own scope, in first-binding order, plus the
+    names it declares global and nonlocal. Nested functions and classes are
+    not entered (only their names bind here).
+    """
+    order: List[str] = []
+    declared_global, declared_nonlocal = set(), set()
+
+    def bind(name: Optional[str]) -> None:
+        if name and name not in order:
+            order.append(name)
+
+    body = [function.body] if isinstance(function, ast.Lambda) else list(function.body)
+    stack = list(reversed(body))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bind(node.name)
+            continue
+        if isinstance(node, ast.Lambda):
+            continue
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            bind(node.id)
+        elif isinstance(node, ast.ExceptHandler):
+            bind(node.name)
+        elif isinstance(node, ast.alias):
+            bind(node.asname or (None if "." in node.name else node.name))
+        elif isinstance(node, ast.Global):
+            declared_global.update(node.names)
+        elif isinstance(node, ast.Nonlocal):
+            declared_nonlocal.update(node.names)
+        elif type(node).__name__ in ("MatchAs", "MatchStar"):
+            bind(node.name)
+        elif type(node).__name__ == "MatchMapping":
+            bind(node.rest)
+        stack.extend(reversed(list(ast.iter_child_nodes(node))))
+    return order, declared_global, declared_nonlocal
+
+
+class AlphaNormalizer(ast.NodeTransformer):
+    """
+    Renames function-local variables and parameters to canonical names based
+    on their scope depth and order of first binding (de Bruijn style), and
+    drops docstrings. Two modules that differ only by consistent local
+    renames, docstrings, comments or formatting normalize to the same tree.
+
+    Module-level names, attributes, class attributes and every parameter
+    that can be passed by keyword keep their names since other code can
+    refer to them; only positional-only and ``*args``/``**kwargs`` parameters
+    are renamed. Functions
+    that call locals()/vars()/eval()/exec() are left untouched.
+    """
+
+    def __init__(self):
+        self._scopes: List[Tuple[str, Dict[str, Optional[str]]]] = []
+
+    def _lookup(self, name: str) -> Optional[str]:
+        for index in range(len(self._scopes) - 1, -1, -1):
+            kind, mapping = self._scopes[index]
+            # Class bodies are only visible to themselves, not to nested functions
+            if kind == "class" and index != len(self._scopes) - 1:
+                continue
+            if name in mapping:
+                return mapping[name]
+        return None
+
+    def visit_Module(self, node: ast.Module) -> ast.AST:
+        _strip_docstring(node)
+        return self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> ast.AST:
+        _strip_docstring(node)
+        for field_name in ("decorator_list", "bases", "keywords"):
+            setattr(node, field_name, [self.visit(item) for item in getattr(node, field_name)])
+        canonical = self._lookup(node.name)
+        if canonical:
+            node.name = canonical
+        bound, _, _ = _scope_bindings(node)
+        self._scopes.append(("class", {name: None for name in bound}))
+        node.body = [self.visit(statement) for statement in node.body]
+        self._scopes.pop()
+        return node
+
+    def _visit_function(self, node: ast.AST) -> ast.AST:
+        if not isinstance(node, ast.Lambda):
+            _strip_docstring(node)
+            node.decorator_list = [self.visit(item) for item in node.decorator_list]
+            if node.returns is not None:
+                node.returns = self.visit(node.returns)
+            canonical = self._lookup(node.name)
+            if canonical:
+                node.name = canonical
+        arguments = node.args
+        arguments.defaults = [self.visit(item) for item in arguments.defaults]
+        arguments.kw_defaults = [self.visit(item) if item is not None else None for item in arguments.kw_defaults]
+        params = arguments.posonlyargs + arguments.args + [a for a in (arguments.vararg,) if a] \
+            + arguments.kwonlyargs + [a for a in (arguments.kwarg,) if a]
+        for param in params:
+            if param.annotation is not None:
+                param.annotation = self.visit(param.annotation)
+
+        bound, declared_global, declared_nonlocal = _scope_bindings(node)
+        introspects = any(isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id in _NAME_INTROSPECTION
+                          for n in ast.walk(node))
+        keep = set(declared_global) | {param.arg for param in arguments.args + arguments.kwonlyargs}
+        depth = sum(1 for kind, _ in self._scopes if kind == "function")
+        mapping: Dict[str, Optional[str]] = {}
+        for name in [param.arg for param in params] + bound:
+            if name in mapping or name in declared_nonlocal:
+                continue
+            # Invalid identifiers, so canonical names never collide with real ones
+            mapping[name] = None if introspects or name in keep else f"<{depth}:{len(mapping)}>"
+
+        self._scopes.append(("function", mapping))
+        for param in params:
+            param.arg = mapping.get(param.arg) or param.arg
+        if isinstance(node, ast.Lambda):
+            node.body = self.visit(node.body)
+        else:
+            node.body = [self.visit(statement) for statement in node.body]
+        self._scopes.pop()
+        return node
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+    visit_Lambda = _visit_function
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        canonical = self._lookup(node.id)
+        if canonical:
+            node.id = canonical
+        return node
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> ast.AST:
+        if node.name:
+            node.name = self._lookup(node.name) or node.name
+        return self.generic_visit(node)
+
+    def visit_Nonlocal(self, node: ast.Nonlocal) -> ast.AST:
+        node.names = [self._lookup(name) or name for name in node.names]
+        return node
+
+    def visit_alias(self, node: ast.alias) -> ast.AST:
+        bound = node.asname or node.name
+        canonical = self._lookup(bound) if "." not in bound else None
+        if canonical:
+            node.asname = canonical
+        return node
+
+    def _visit_capture(self, node: ast.AST, field_name: str) -> ast.AST:
+        name = getattr(node, field_name)
+        if name:
+            setattr(node, field_name, self._lookup(name) or name)
+        return self.generic_visit(node)
+
+    def visit_MatchAs(self, node: ast.AST) -> ast.AST:
+        return self._visit_capture(node, "name")
+
+    def visit_MatchStar(self, node: ast.AST) -> ast.AST:
+        return self._visit_capture(node, "name")
+
+    def visit_MatchMapping(self, node: ast.AST) -> ast.AST:
+        return self._visit_capture(node, "rest")
+
+
+def normalize_tree(tree: ast.Module) -> ast.Module:
+    """Alpha-normalizes a parsed module in place (see AlphaNormalizer)."""
+    return AlphaNormalizer().visit(tree)
+
+
+def structural_diff(original_code: str, refactored_code: str, normalize: bool = False) -> StructuralDiff:
+    """
+    Diffs two sources structurally. Formatting and comments never show up as
+    changes. With ``normalize`` both sides are alpha-normalized first, so
+    consistent renames of locals and parameters and docstring edits do not
+    count either. Raises SyntaxError if either source does not parse.
+    """
+    if original_code == refactored_code:
+        tree = ast.parse(original_code)
+        size = MerkleIndex(tree).size(tree)
+        return StructuralDiff(identical=True, old_size=size, new_size=size, matched_size=size)
+    old_tree, new_tree = ast.parse(original_code), ast.parse(refactored_code)
+    if normalize:
+        old_tree, new_tree = normalize_tree(old_tree), normalize_tree(new_tree)
+    return diff_trees(old_tree, new_tree)
+
+
+def alpha_equivalent(original_code: str, refactored_code: str) -> bool:
+    """
+    True when the sources differ only by consistent renames of local
+    variables and parameters, docstrings, comments and formatting.
+    """
+    return structural_diff(original_code, refactored_code, normalize=True).identical
@@ -0,0 +1,587 @@
+# src/core/edit_program.py
+"""
+Edit programs: a small line-oriented language for refactoring edits,
+compiled to LibCST transformers.
+
+One statement per line (or separated by ``;``), ``#`` starts a comment::
+
+    RENAME tmp -> count IN parse_args      # scoped rename; IN is optional
+    SIMPLIFY_CONDITION "x == True" -> "x"  # rewrite matching if/while/ternary tests
+    EXTRACT LINES 12-18 AS load_rows       # move statements into a new function
+    INLINE total IN report                 # inline a variable assigned once
+    APPLY use_enumerate                    # run a local refactoring by type
+
+Expressions are double-quoted Python expressions; ``IN`` takes a dotted
+scope such as ``Shape.area``. Line numbers in EXTRACT refer to the code
+as it is when that statement runs. Every statement must change the code,
+so a program that no longer fits the code fails instead of doing nothing.
+"""
+import abc
+import ast
+import functools
+import keyword
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import libcst as cst
+import libcst.matchers as m
+from libcst.metadata import (
+    ClassScope,
+    ComprehensionScope,
+    FunctionScope,
+    GlobalScope,
+    MetadataWrapper,
+    PositionProvider,
+    Scope,
+    ScopeProvider,
+)
+
+from src.core.refactorings import AUTOMATIC_REFACTORINGS, ExtractMethodTransformer
+
+OPERATIONS = ("RENAME", "SIMPLIFY_CONDITION", "EXTRACT", "INLINE", "APPLY")
+APPLY_KINDS = {transformer.refactoring_type: transformer for transformer in AUTOMATIC_REFACTORINGS}
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<arrow>->)
+      | (?P<number>\d+)
+      | (?P<dash>-)
+      | (?P<word>[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*)
+      | (?P<other>\S)
+    )""", re.VERBOSE)
+_TOKEN_NAMES = {"string": "a quoted expression", "arrow": "'->'", "number": "a line number", "dash": "'-'",
+                "word": "a name"}
+# SIMPLIFY_CONDITION "old" new-code-to-end-of-line, as older callers wrote it
+_LEGACY_CONDITION = re.compile(r'^(SIMPLIFY_CONDITION\s+"(?:[^"\\]|\\.)*")\s+(?!->|")(.+)$', re.IGNORECASE)
+
+
+class EditProgramError(ValueError):
+    """Raised for a malformed edit program, with the 1-based program line."""
+
+    def __init__(self, message: str, line: Optional[int] = None):
+        super().__init__(f"line {line}: {message}" if line else message)
+        self.line = line
+
+
+class EditNotApplicableError(EditProgramError):
+    """Raised when a well-formed statement does not fit the code."""
+
+
+# --- Helpers ---
+
+def _scope_path(scope: Scope) -> str:
+    """Dotted path of a scope from the module down, e.g. ``Shape.area``."""
+    path = []
+    while scope is not None and not isinstance(scope, GlobalScope):
+        if isinstance(scope, (FunctionScope, ClassScope)):
+            path.append(scope.name or "<lambda>")
+        elif isinstance(scope, ComprehensionScope):
+            path.append("<comprehension>")
+        scope = scope.parent
+    return ".".join(reversed(path))
+
+
+def _scopes_between(inner: Scope, outer: Scope) -> Optional[List[Scope]]:
+    """
+    Scopes from ``inner`` up to, but not including, ``outer``; None when
+    ``outer`` does not enclose ``inner``.
+    """
+    path = []
+    while inner is not outer:
+        if inner is None or isinstance(inner, GlobalScope):
+            return None
+        path.append(inner)
+        inner = inner.parent
+    return path
+
+
+def _binds(scope: Scope, name: str) -> bool:
+    return any(assignment.scope is scope for assignment in scope.assignments[name])
+
+
+def _normalized(code: str) -> str:
+    return ast.dump(ast.parse(code.strip(), mode="eval"))
+
+
+def _expression(text: str, line: int) -> cst.BaseExpression:
+    # Conditions copied from source often keep their keyword and colon
+    text = re.sub(r"^(?:if|elif|while)\s+", "", text.strip()).rstrip(":").strip()
+    try:
+        return cst.parse_expression(text)
+    except cst.ParserSyntaxError as e:
+        raise EditProgramError(f"Invalid expression {text!r}: {e.message}", line) from e
+
+
+def _identifier(name: str, line: int) -> str:
+    if not name.isidentifier() or keyword.iskeyword(name):
+        raise EditProgramError(f"Invalid identifier {name!r}", line)
+    return name
+
+
+# Expressions an inlined value may be built from: names, immutable literals and operators
+_PURE_EXPRESSIONS = (cst.Name, cst.BaseNumber, cst.SimpleString, cst.ConcatenatedString, cst.Ellipsis,
+                     cst.UnaryOperation, cst.BinaryOperation, cst.BooleanOperation, cst.Comparison, cst.IfExp)
+
+
+def _pure(node: cst.CSTNode) -> bool:
+    """True when every expression in ``node`` is one of _PURE_EXPRESSIONS."""
+    if isinstance(node, cst.BaseExpression) and not isinstance(node, _PURE_EXPRESSIONS):
+        return False
+    return all(_pure(child) for child in node.children)
+
+
+def _root_name(node: cst.BaseExpression) -> Optional[str]:
+    """``a`` for ``a``, ``a.b.c`` and ``a[i].b``; None for anything else."""
+    while isinstance(node, (cst.Attribute, cst.Subscript)):
+        node = node.value
+    return node.value if isinstance(node, cst.Name) else None
+
+
+def _atomic(expression: cst.BaseExpression) -> bool:
+    return isinstance(expression, (cst.Name, cst.Attribute, cst.Call, cst.Subscript, cst.BaseNumber,
+                                   cst.BaseString, cst.List, cst.Dict, cst.Set, cst.Tuple)) or bool(expression.lpar)
+
+
+# --- Transformers ---
+
+class _Step(cst.CSTTransformer, abc.ABC):
+    """Base class: ``changed`` counts rewrites, ``describe`` names the change."""
+
+    def __init__(self):
+        super().__init__()
+        self.changed = 0
+
+    @abc.abstractmethod
+    def describe(self) -> str:
+        """One-line summary of the change, for the change log."""
+
+
+class RenameTransformer(_Step):
+    """
+    Renames the bindings of ``old`` (in ``scope`` only, if given) and every
+    reference resolving to them. Attributes, keyword arguments and strings
+    are left alone. Renames that would change what a name refers to are
+    refused: ``new`` must not be bound between a renamed reference and its
+    binding, nor be read there from further out.
+    """
+
+    METADATA_DEPENDENCIES = (ScopeProvider,)
+
+    def __init__(self, old: str, new: str, scope: Optional[str] = None):
+        super().__init__()
+        self.old, self.new, self.scope = old, new, scope
+        self._names: Set[cst.Name] = set()
+
+    def visit_Module(self, node: cst.Module) -> None:
+        scopes = {scope for scope in self.metadata[ScopeProvider].values() if scope is not None}
+        selected = [scope for scope in scopes if scope.assignments[self.old]
+                    and (self.scope is None or _scope_path(scope) == self.scope)]
+        if not selected:
+            where = f" in {self.scope}" if self.scope else ""
+            raise EditNotApplicableError(f"No binding of '{self.old}'{where}")
+        for scope in selected:
+            if _binds(scope, self.new) or scope.accesses[self.new]:
+                raise EditNotApplicableError(f"'{self.new}' is already used in {_scope_path(scope) or 'the module'}")
+            for inner in scopes:
+                between = _scopes_between(inner, scope)
+                # A read of an outer ``new`` from inside would now find the renamed binding
+                if between and inner.accesses[self.new] and not any(_binds(s, self.new) for s in between):
+                    raise EditNotApplicableError(f"'{self.new}' is already used in {_scope_path(inner)}")
+            for assignment in scope.assignments[self.old]:
+                if assignment.scope is not scope:
+                    continue
+                for access in assignment.references:
+                    # A renamed reference would find a closer binding of ``new``
+                    shadowing = next((s for s in _scopes_between(access.scope, scope) or [] if _binds(s, self.new)), None)
+                    if shadowing is not None:
+                        raise EditNotApplicableError(f"'{self.new}' is already bound in {_scope_path(shadowing)}")
+                node = assignment.node
+                if isinstance(node, (cst.FunctionDef, cst.ClassDef, cst.Param)):
+                    node = node.name
+                elif isinstance(node, cst.ExceptHandler) and node.name is not None:
+                    node = node.name.name
+                if not isinstance(node, cst.Name):
+                    raise EditNotApplicableError(f"Cannot rename the import binding '{self.old}'")
+                self._names.add(node)
+                self._names.update(access.node for access in assignment.references
+                                   if isinstance(access.node, cst.Name))
+
+    def leave_Name(self, original_node: cst.Name, updated_node: cst.Name) -> cst.Name:
+        if original_node in self._names:
+            self.changed += 1
+            return updated_node.with_changes(value=self.new)
+        return updated_node
+
+    def describe(self) -> str:
+        return f"Renamed '{self.old}' to '{self.new}'"
+
+
+class SimplifyConditionTransformer(_Step):
+    """
+    Replaces ``if``/``elif``/``while`` tests and conditional-expression
+    tests equal to ``old`` (compared as ASTs, so spacing and redundant
+    parentheses do not matter) with ``new``.
+    """
+
+    METADATA_DEPENDENCIES = (ScopeProvider,)
+
+    def __init__(self, old: cst.BaseExpression, new: cst.BaseExpression, scope: Optional[str] = None):
+        super().__init__()
+        self.old, self.new, self.scope = old, new, scope
+        self._old = _normalized(cst.Module([]).code_for_node(old))
+        self._tests: Set[cst.BaseExpression] = set()
+
+    def _collect(self, node: cst.CSTNode) -> None:
+        if self.scope is not None and _scope_path(self.get_metadata(ScopeProvider, node)) != self.scope:
+            return
+        try:
+            if _normalized(cst.Module([]).code_for_node(node.test)) == self._old:
+                self._tests.add(node.test)
+        except SyntaxError:
+            pass  # Multi-line tests whose code does not stand alone
+
+    def visit_If(self, node: cst.If) -> None:
+        self._collect(node)
+
+    def visit_While(self, node: cst.While) -> None:
+        self._collect(node)
+
+    def visit_IfExp(self, node: cst.IfExp) -> None:
+        self._collect(node)
+
+    def _replace(self, original_node: cst.CSTNode, updated_node: cst.CSTNode) -> cst.CSTNode:
+        if original_node.test not in self._tests:
+            return updated_node
+        self.changed += 1
+        new = self.new
+        if isinstance(original_node, cst.IfExp) and isinstance(new, (cst.IfExp, cst.Lambda, cst.NamedExpr)) \
+                and not new.lpar:
+            new = new.with_changes(lpar=[cst.LeftParen()], rpar=[cst.RightParen()])
+        return updated_node.with_changes(test=new)
+
+    def leave_If(self, original_node: cst.If, updated_node: cst.If) -> cst.If:
+        return self._replace(original_node, updated_node)
+
+    def leave_While(self, original_node: cst.While, updated_node: cst.While) -> cst.While:
+        return self._replace(original_node, updated_node)
+
+    def leave_IfExp(self, original_node: cst.IfExp, updated_node: cst.IfExp) -> cst.IfExp:
+        return self._replace(original_node, updated_node)
+
+    def describe(self) -> str:
+        module = cst.Module([])
+        return f"Simplified condition '{module.code_for_node(self.old)}' to '{module.code_for_node(self.new)}'"
+
+
+class InlineTransformer(_Step):
+    """
+    Inlines a variable bound by exactly one plain ``name = value`` statement:
+    references are replaced by the value and the assignment is removed. The
+    value may only combine names and immutable literals with operators, since
+    evaluating anything else (a call, an attribute, a subscript, a list
+    display) at each use can give another result or another object. The names
+    it reads must not be rebound after the assignment, nor have an attribute
+    or item stored to between the assignment and the last use.
+    """
+
+    METADATA_DEPENDENCIES = (ScopeProvider, PositionProvider)
+
+    def __init__(self, name: str, scope: Optional[str] = None):
+        super().__init__()
+        self.name, self.scope = name, scope
+        self._statement: Optional[cst.SimpleStatementLine] = None
+        self._value: Optional[cst.BaseExpression] = None
+        self._references: Set[cst.Name] = set()
+
+    def _fail(self, reason: str) -> None:
+        raise EditNotApplicableError(f"Cannot inline '{self.name}': {reason}")
+
+    def visit_Module(self, node: cst.Module) -> None:
+        scopes = {scope for scope in self.metadata[ScopeProvider].values() if scope is not None}
+        candidates = [scope for scope in scopes if any(a.scope is scope for a in scope.assignments[self.name])
+                      and (self.scope is None or _scope_path(scope) == self.scope)]
+        if len(candidates) != 1:
+            self._fail("no binding found" if not candidates else f"bound in {len(candidates)} scopes, use IN")
+        scope = candidates[0]
+        assignments = [a for a in scope.assignments[self.name] if a.scope is scope]
+        if len(assignments) != 1:
+            self._fail(f"assigned {len(assignments)} times")
+        assignment = assignments[0]
+
+        statement = None
+        for line in m.findall(node, m.SimpleStatementLine()):
+            small = line.body[0] if len(line.body) == 1 else None
+            if isinstance(small, cst.Assign) and len(small.targets) == 1 and small.targets[0].target is assignment.node:
+                statement = line
+        if statement is None:
+            self._fail("not bound by a plain assignment statement")
+        value = statement.body[0].value
+        if not _pure(value):
+            self._fail("its value is not built from names and immutable literals only")
+        assigned_line = self.get_metadata(PositionProvider, statement).start.line
+        reads = {read.value for read in m.findall(value, m.Name())}
+        for name in sorted(reads):
+            for other in scope.assignments[name]:
+                if other.scope is scope and self.get_metadata(PositionProvider, other.node).start.line >= assigned_line:
+                    self._fail(f"'{name}' is rebound after the assignment")
+        for access in assignment.references:
+            if not isinstance(access.node, cst.Name) or access.scope is not scope:
+                self._fail("it is used from a nested scope")
+            if self.get_metadata(PositionProvider, access.node).start.line <= assigned_line:
+                self._fail("it is used before its assignment")
+
+        # Storing to e.g. ``a.x`` or ``a[i]`` can change what the value evaluates to
+        last_use = max((self.get_metadata(PositionProvider, access.node).start.line
+                        for access in assignment.references), default=assigned_line)
+        stores = [target.target for target in m.findall(node, m.AssignTarget())] \
+            + [store.target for store in m.findall(node, m.AugAssign() | m.AnnAssign() | m.Del())]
+        for store in stores:
+            for target in m.findall(store, m.Attribute() | m.Subscript()):
+                name = _root_name(target)
+                if name in reads and assigned_line < self.get_metadata(PositionProvider, target).start.line <= last_use:
+                    self._fail(f"'{name}' is modified before the last use")
+        self._statement, self._value = statement, value
+        self._references = {access.node for access in assignment.references}
+
+    def leave_Name(self, original_node: cst.Name, updated_node: cst.BaseExpression) -> cst.BaseExpression:
+        if original_node not in self._references:
+            return updated_node
+        self.changed += 1
+        if _atomic(self._value):
+            return self._value
+        return self._value.with_changes(lpar=[cst.LeftParen()], rpar=[cst.RightParen()])
+
+    def leave_SimpleStatementLine(self, original_node: cst.SimpleStatementLine,
+                                  updated_node: cst.SimpleStatementLine) -> Any:
+        if original_node is not self._statement:
+            return updated_node
+        self.changed += 1
+        return cst.RemoveFromParent()
+
+    def leave_IndentedBlock(self, original_node: cst.IndentedBlock, updated_node: cst.IndentedBlock) -> cst.IndentedBlock:
+        if updated_node.body:
+            return updated_node
+        return updated_node.with_changes(body=[cst.SimpleStatementLine([cst.Pass()])])
+
+    def describe(self) -> str:
+        return f"Inlined '{self.name}'"
+
+
+# --- Programs ---
+
+@dataclass
+class EditStatement:
+    """One parsed statement: ``operation`` plus its arguments."""
+    operation: str
+    arguments: Dict[str, Any]
+    line: int
+    text: str
+
+    def transformer(self) -> cst.CSTTransformer:
+        """A fresh transformer for this statement (transformers keep state)."""
+        arguments = self.arguments
+        if self.operation == "RENAME":
+            return RenameTransformer(arguments["old"], arguments["new"], arguments.get("scope"))
+        if self.operation == "SIMPLIFY_CONDITION":
+            return SimplifyConditionTransformer(arguments["old"], arguments["new"], arguments.get("scope"))
+        if self.operation == "INLINE":
+            return InlineTransformer(arguments["name"], arguments.get("scope"))
+        if self.operation == "EXTRACT":
+            return ExtractMethodTransformer(arguments["start"], arguments["end"], arguments["name"])
+        return APPLY_KINDS[arguments["kind"]]()
+
+
+@dataclass
+class EditProgram:
+    """A parsed edit program; ``apply`` runs its statements in order."""
+    statements: List[EditStatement] = field(default_factory=list)
+    source: str = ""
+
+    def apply(self, module: cst.Module, wrapper: Optional[MetadataWrapper] = None) -> Tuple[cst.Module, List[Dict[str, Any]]]:
+        """
+        Applies the program to a parsed module and returns the new module and
+        the changes made. ``wrapper`` may carry metadata already resolved for
+        ``module``. Raises EditNotApplicableError naming the failing line.
+        """
+        changes = []
+        for statement in self.statements:
+            transformer = statement.transformer()
+            try:
+                if transformer.get_inherited_dependencies():
+                    wrapper = wrapper or MetadataWrapper(module, unsafe_skip_copy=True)
+                    updated = wrapper.visit(transformer)
+                else:
+                    updated = module.visit(transformer)
+            except EditNotApplicableError as e:
+                raise EditNotApplicableError(str(e), statement.line) from e
+            if isinstance(transformer, ExtractMethodTransformer):
+                if transformer.error:
+                    raise EditNotApplicableError(transformer.error, statement.line)
+                changes.extend(transformer.changes)
+            elif isinstance(transformer, _Step):
+                if not transformer.changed:
+                    raise EditNotApplicableError(f"{statement.text!r} matched nothing", statement.line)
+                changes.append({"type": statement.operation.lower(), "description": transformer.describe(),
+                                "reason": "Edit program"})
+            else:
+                if not transformer.changes:
+                    raise EditNotApplicableError(f"{statement.text!r} made no change", statement.line)
+                changes.extend(transformer.changes)
+            module, wrapper = updated, None  # Metadata is resolved again for the new tree
+        return module, changes
+
+
+def _tokens(text: str, line: int) -> List[Tuple[str, str]]:
+    tokens, position = [], 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or not match.group(0).strip():
+            break
+        kind = match.lastgroup
+        if kind == "other":
+            raise EditProgramError(f"Unexpected character {match.group(kind)!r}", line)
+        value = match.group(kind)
+        if kind == "string":
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+def _split(source: str) -> List[Tuple[int, str]]:
+    """Statements with their line numbers; ``;`` and ``#`` outside strings."""
+    statements = []
+    for number, line in enumerate(source.splitlines(), start=1):
+        current, quoted, escaped = "", False, False
+        for char in line:
+            if quoted:
+                current += char
+                quoted = escaped or char != '"'
+                escaped = not escaped and char == "\\"
+                continue
+            if char == "#":
+                break
+            if char == ";":
+                statements.append((number, current.strip()))
+                current = ""
+                continue
+            quoted = char == '"'
+            current += char
+        if quoted:
+            raise EditProgramError("Unterminated string", number)
+        statements.append((number, current.strip()))
+    return [(number, text) for number, text in statements if text]
+
+
+class _Parser:
+    def __init__(self, text: str, line: int):
+        self.text, self.line = text, line
+        legacy = _LEGACY_CONDITION.match(text)
+        if legacy:
+            new = legacy.group(2).replace("\\", "\\\\").replace('"', '\\"')
+            text = f'{legacy.group(1)} -> "{new}"'
+        self.tokens = _tokens(text, line)
+        self.position = 0
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, kind: str, value: Optional[str] = None) -> str:
+        actual_kind, actual = self.peek()
+        if actual_kind != kind or (value is not None and actual != value):
+            expected = repr(value) if value else _TOKEN_NAMES[kind]
+            found = actual if actual is not None else "end of statement"
+            raise EditProgramError(f"Expected {expected}, found {found!r}", self.line)
+        self.position += 1
+        return actual
+
+    def accept(self, kind: str, value: Optional[str] = None) -> bool:
+        actual_kind, actual = self.peek()
+        if actual_kind == kind and (value is None or actual == value):
+            self.position += 1
+            return True
+        return False
+
+    def scope(self) -> Optional[str]:
+        return self.take("word") if self.accept("word", "IN") else None
+
+    def end(self) -> None:
+        if self.position < len(self.tokens):
+            raise EditProgramError(f"Unexpected {self.tokens[self.position][1]!r}", self.line)
+
+    def statement(self) -> EditStatement:
+        operation = self.take("word").upper()
+        arguments: Dict[str, Any] = {}
+        if operation == "RENAME":
+            arguments["old"] = _identifier(self.take("word"), self.line)
+            self.take("arrow")
+            arguments["new"] = _identifier(self.take("word"), self.line)
+            arguments["scope"] = self.scope()
+        elif operation == "SIMPLIFY_CONDITION":
+            arguments["old"] = _expression(self.take("string"), self.line)
+            self.take("arrow")
+            arguments["new"] = _expression(self.take("string"), self.line)
+            arguments["scope"] = self.scope()
+        elif operation == "EXTRACT":
+            self.accept("word", "LINES")
+            arguments["start"] = int(self.take("number"))
+            self.take("dash")
+            arguments["end"] = int(self.take("number"))
+            self.take("word", "AS")
+            arguments["name"] = _identifier(self.take("word"), self.line)
+            if arguments["end"] < arguments["start"]:
+                raise EditProgramError("EXTRACT range ends before it starts", self.line)
+        elif operation == "INLINE":
+            arguments["name"] = _identifier(self.take("word"), self.line)
+            arguments["scope"] = self.scope()
+        elif operation == "APPLY":
+            arguments["kind"] = self.take("word").lower()
+            if arguments["kind"] not in APPLY_KINDS:
+                raise EditProgramError(f"Unknown refactoring {arguments['kind']!r}; "
+                                       f"expected one of {', '.join(sorted(APPLY_KINDS))}", self.line)
+        else:
+            raise EditProgramError(f"Unknown operation {operation!r}; expected one of {', '.join(OPERATIONS)}",
+                                   self.line)
+        self.end()
+        return EditStatement(operation, arguments, self.line, self.text)
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_program(source: str) -> EditProgram:
+    """
+    Parses an edit program. Raises EditProgramError (with the line) when it
+    is malformed; the result is cached, so reparsing a program is free.
+    """
+    statements = [_Parser(text, number).statement() for number, text in _split(source)]
+    if not statements:
+        raise EditProgramError("Empty edit program")
+    return EditProgram(statements, source)
+
+
+def apply_program(code: str, source: str) -> str:
+    """Applies one edit program to the code and returns the new code."""
+    module, _ = parse_program(source).apply(cst.parse_module(code))
+    return module.code
+
+
+def apply_programs(code: str, sources: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Validates and applies many edit programs to the same code, parsing the
+    code once and sharing its resolved metadata between programs. Returns
+    one {success, code, changes, message} dict per program, in order.
+    Raises libcst.ParserSyntaxError when the code itself does not parse.
+    """
+    module = cst.parse_module(code)
+    wrapper = MetadataWrapper(module, unsafe_skip_copy=True)
+    results = []
+    for source in sources:
+        try:
+            updated, changes = parse_program(source).apply(module, wrapper)
+        except EditProgramError as e:
+            results.append({"success": False, "code": code, "changes": [], "message": str(e)})
+            continue
+        results.append({"success": True, "code": updated.code, "changes": changes,
+                        "message": f"Applied {len(changes)} change(s)"})
+    return results
@@ -0,0 +1,156 @@
+# src/core/input_generation.py
+import ast
+import random
+from typing import Any, Dict, List, Optional
+
+ANY_POOL = "any"
+
+
+def _strategy(annotation: Optional[str]):
+    """
+    A generator description for an annotation string, or None when the
+    annotation is not supported. A missing annotation draws from a mixed
+    pool of common values.
+    """
+    if annotation is None:
+        return ANY_POOL
+    try:
+        node = ast.parse(annotation, mode="eval").body
+    except SyntaxError:
+        return None
+    return _strategy_for_node(node)
+
+
+def _strategy_for_node(node: ast.AST):
+    if isinstance(node, ast.Constant) and node.value is None:
+        return ("none",)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        left, right = _strategy_for_node(node.left), _strategy_for_node(node.right)
+        return ("union", [left, right]) if left and right else None
+    name = node.attr if isinstance(node, ast.Attribute) else node.id if isinstance(node, ast.Name) else None
+    if name in ("int", "float", "bool", "str", "bytes"):
+        return (name,)
+    if name == "Any":
+        return ANY_POOL
+    if name in ("list", "List", "set", "Set", "tuple", "Tuple", "dict", "Dict"):
+        return (name.lower(), [ANY_POOL] * (2 if name.lower() == "dict" else 1) + ([...] if name.lower() == "tuple" else []))
+    if isinstance(node, ast.Subscript):
+        base = node.value.attr if isinstance(node.value, ast.Attribute) else getattr(node.value, "id", None)
+        items = list(node.slice.elts) if isinstance(node.slice, ast.Tuple) else [node.slice]
+        if base == "Optional" and len(items) == 1:
+            inner = _strategy_for_node(items[0])
+            return ("union", [inner, ("none",)]) if inner else None
+        if base == "Union":
+            options = [_strategy_for_node(item) for item in items]
+            return ("union", options) if all(options) else None
+        if base in ("list", "List", "set", "Set") and len(items) == 1:
+            inner = _strategy_for_node(items[0])
+            return (base.lower(), [inner]) if inner else None
+        if base in ("dict", "Dict") and len(items) == 2:
+            key, value = _strategy_for_node(items[0]), _strategy_for_node(items[1])
+            return ("dict", [key, value]) if key and value else None
+        if base in ("tuple", "Tuple"):
+            if len(items) == 2 and isinstance(items[1], ast.Constant) and items[1].value is Ellipsis:
+                inner = _strategy_for_node(items[0])
+                return ("tuple", [inner, ...]) if inner else None
+            elements = [_strategy_for_node(item) for item in items]
+            return ("tuple", elements) if all(elements) else None
+    return None
+
+
+_EDGE_VALUES = {
+    "int": [0, 1, -1, 2, 10, -7, 255, 2 ** 31],
+    "float": [0.0, 1.0, -1.0, 0.5, 1e-9, 3.75, -2.5e6],
+    "bool": [False, True],
+    "str": ["", "a", "abc", " ", "Hello, World", "a1_b2", "ünï"],
+    "bytes": [b"", b"a", b"\x00\xff"],
+}
+
+
+_ANY_KINDS = [("int",), ("float",), ("str",), ("bool",), ("none",), ("list", [("int",)])]
+
+
+def _generate(strategy, rng: random.Random, depth: int = 0):
+    if strategy == ANY_POOL:
+        strategy = rng.choice(_ANY_KINDS)
+    kind = strategy[0]
+    if kind == "none":
+        return None
+    if kind in _EDGE_VALUES:
+        if rng.random() < 0.4:
+            return rng.choice(_EDGE_VALUES[kind])
+        if kind == "int":
+            return rng.randint(-1000, 1000)
+        if kind == "float":
+            return rng.uniform(-1000, 1000)
+        if kind == "str":
+            return "".join(rng.choice("abcxyz XYZ019_-") for _ in range(rng.randint(0, 12)))
+        if kind == "bytes":
+            return bytes(rng.randrange(256) for _ in range(rng.randint(0, 8)))
+        return rng.random() < 0.5
+    if kind == "union":
+        return _generate(rng.choice(strategy[1]), rng, depth)
+    size = 0 if depth > 2 else rng.choice([0, 1, 2, 3, rng.randint(4, 10)])
+    if kind == "list":
+        return [_generate(strategy[1][0], rng, depth + 1) for _ in range(size)]
+    if kind == "set":
+        values = [_generate(strategy[1][0], rng, depth + 1) for _ in range(size)]
+        return {value for value in values if value.__hash__ is not None}
+    if kind == "dict":
+        items = [(_generate(strategy[1][0], rng, depth + 1), _generate(strategy[1][1], rng, depth + 1)) for _ in range(size)]
+        return {key: value for key, value in items if key.__hash__ is not None}
+    if kind == "tuple":
+        if len(strategy[1]) == 2 and strategy[1][1] is ...:
+            return tuple(_generate(strategy[1][0], rng, depth + 1) for _ in range(size))
+        return tuple(_generate(element, rng, depth + 1) for element in strategy[1])
+    raise ValueError(f"Unknown strategy: {strategy}")
+
+
+def generate_inputs(parameters: List[Dict[str, Any]], cases: int, seed: int = 0) -> Optional[List[tuple]]:
+    """
+    Argument tuples for a function's parameters (CodeMetadataExtractor's
+    ``parameters`` list). Returns None if an annotation is not supported.
+    """
+    strategies = [_strategy(param.get("annotation")) for param in parameters]
+    if not all(strategies):
+        return None
+    rng = random.Random(seed)
+    inputs, seen = [], set()
+    for _ in range(cases * 3):
+        # Unannotated parameters mostly share one type per call, so e.g.
+        # ``a + b`` is exercised with operands that actually combine
+        shared = rng.choice(_ANY_KINDS) if rng.random() < 0.75 else ANY_POOL
+        args = tuple(_generate(shared if strategy == ANY_POOL else strategy, rng) for strategy in strategies)
+        key = repr(args)
+        if key not in seen:
+            seen.add(key)
+            inputs.append(args)
+        if len(inputs) == cases:
+            break
+    return inputs
+
+
+def function_parameters(code: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Module-level functions that can be called positionally, with their
+    ``parameters`` (name, annotation) and ``returns_annotation``, in the
+    same shape CodeMetadataExtractor reports.
+    """
+    functions = {}
+    for node in ast.parse(code).body:
+        if not isinstance(node, ast.FunctionDef):
+            continue
+        args = node.args
+        if any(default is None for default in args.kw_defaults):
+            continue  # Required keyword-only arguments
+        parameters = []
+        for arg in args.posonlyargs + args.args:
+            parameter = {"name": arg.arg}
+            if arg.annotation is not None:
+                parameter["annotation"] = ast.unparse(arg.annotation)
+            parameters.append(parameter)
+        functions[node.name] = {
+            "parameters": parameters,
+            "returns_annotation": ast.unparse(node.returns) if node.returns else None
+        }
+    return functions
@@ -0,0 +1,181 @@
+# src/core/lint.py
+import collections
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class LintUnavailableError(RuntimeError):
+    """Raised when the ruff binary cannot be found or fails."""
+
+
+def _digest(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def _violation(entry: Dict[str, Any]) -> Dict[str, Any]:
+    location = entry.get("location") or {}
+    return {
+        "code": entry.get("code"),
+        "message": entry.get("message", ""),
+        "line": location.get("row"),
+        "column": location.get("column")
+    }
+
+
+class LintEngine:
+    """
+    Lints source code with the ruff binary in batches.
+
+    Every distinct content is linted once: results are cached by the sha256
+    of the code (in memory, and on disk when ``cache_dir`` is given), and
+    all cache misses of a call are written to a temp dir and linted by a
+    single ruff process. ruff runs with ``--isolated`` so results do not
+    depend on where the code lives.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 10000,
+                 ruff_path: Optional[str] = None, timeout: Optional[float] = 120):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ruff_path = ruff_path
+        self.timeout = timeout
+        self.spawns = 0
+        self._memory: "collections.OrderedDict[str, List[Dict[str, Any]]]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ruff(self) -> str:
+        ruff = self.ruff_path or shutil.which("ruff")
+        if ruff is None:
+            raise LintUnavailableError("ruff is not installed")
+        return ruff
+
+    # --- Cache ---
+
+    def _disk_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def _cached(self, digest: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return self._memory[digest]
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(digest), "r", encoding="utf-8") as f:
+                    violations = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self._remember(digest, violations, persist=False)
+            return violations
+        return None
+
+    def _remember(self, digest: str, violations: List[Dict[str, Any]], persist: bool = True) -> None:
+        with self._lock:
+            self._memory[digest] = violations
+            self._memory.move_to_end(digest)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+        if persist and self.cache_dir:
+            path = self._disk_path(digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(violations, f)
+            os.replace(tmp_path, path)
+
+    # --- Linting ---
+
+    def _run_batch(self, codes: Dict[str, str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Lints ``{digest: code}`` with one ruff process."""
+        ruff = self._ruff()
+        with tempfile.TemporaryDirectory(prefix="neurorefactor-lint-") as work_dir:
+            for digest, code in codes.items():
+                with open(os.path.join(work_dir, f"m_{digest}.py"), "w", encoding="utf-8") as f:
+                    f.write(code)
+            self.spawns += 1
+            try:
+                process = subprocess.run(
+                    [ruff, "check", "--isolated", "--no-cache", "--exit-zero", "--output-format=json", work_dir],
+                    capture_output=True, text=True, check=False, timeout=self.timeout)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                raise LintUnavailableError(f"ruff failed: {e}") from e
+            if process.returncode != 0:
+                raise LintUnavailableError(f"ruff failed: {process.stderr.strip()}")
+            try:
+                entries = json.loads(process.stdout or "[]")
+            except ValueError as e:
+                raise LintUnavailableError(f"Unreadable ruff output: {e}") from e
+
+        results: Dict[str, List[Dict[str, Any]]] = {digest: [] for digest in codes}
+        for entry in entries:
+            digest = os.path.basename(entry.get("filename", ""))[len("m_"):-len(".py")]
+            if digest in results:
+                results[digest].append(_violation(entry))
+        for violations in results.values():
+            violations.sort(key=lambda v: (v["line"] or 0, v["column"] or 0, v["code"] or ""))
+        return results
+
+    def lint_many(self, codes: Sequence[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Violations ({code, message, line, column}) for each source string,
+        in order. Uncached contents are linted together in one ruff run.
+        """
+        digests = [_digest(code) for code in codes]
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        missing: Dict[str, str] = {}
+        for digest, code in zip(digests, codes):
+            if digest in results or digest in missing:
+                continue
+            cached = self._cached(digest)
+            if cached is None:
+                missing[digest] = code
+            else:
+                results[digest] = cached
+        if missing:
+            for digest, violations in self._run_batch(missing).items():
+                self._remember(digest, violations)
+                results[digest] = violations
+        return [list(results[digest]) for digest in digests]
+
+    def lint(self, code: str) -> List[Dict[str, Any]]:
+        return self.lint_many([code])[0]
+
+    def lint_files(self, paths: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Violations for each file, keyed by the path as given."""
+        codes = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                codes.append(f.read())
+        return dict(zip(paths, self.lint_many(codes)))
+
+    def delta(self, before_code: str, after_code: str) -> Dict[str, Any]:
+        """
+        Lint difference of a change: counts before and after, plus the
+        violations introduced and fixed (matched by rule and message, so
+        moved lines do not count as new).
+        """
+        before, after = self.lint_many([before_code, after_code])
+        before_keys = collections.Counter((v["code"], v["message"]) for v in before)
+        after_keys = collections.Counter((v["code"], v["message"]) for v in after)
+        new, fixed = after_keys - before_keys, before_keys - after_keys
+        introduced, remaining = [], dict(new)
+        for violation in after:
+            key = (violation["code"], violation["message"])
+            if remaining.get(key):
+                remaining[key] -= 1
+                introduced.append(violation)
+        return {
+            "before": len(before),
+            "after": len(after),
+            "new": introduced,
+            "fixed": sum(fixed.values())
+        }
+
+
+DEFAULT_LINT_ENGINE = LintEngine(cache_dir=os.path.join(".neurorefactor_cache", "lint"))
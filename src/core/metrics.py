@@ -0,0 +1,271 @@
+# src/core/metrics.py
+"""
+Code metrics in one pass, with radon's numbers.
+
+radon computes cyclomatic complexity, Halstead metrics and raw line counts
+with separate visitors, and mi_visit parses and tokenizes the source again
+for each of them (raw metrics re-tokenize line by line). code_metrics walks
+the AST once for complexity and Halstead together and tokenizes the source
+once for the line counts, then derives the maintainability index from
+those parts exactly as radon's mi_visit(code, multi=True) does.
+"""
+import ast
+import io
+import math
+import re
+import tokenize
+from typing import Any, Dict, List, Optional, Tuple
+
+from radon.metrics import mi_compute
+from radon.raw import analyze
+
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+_LOOPS = (ast.For, ast.While, ast.AsyncFor)
+_SKIPPED_TOKENS = (tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER)
+_LINE_ENDS = (tokenize.NL, tokenize.NEWLINE)
+_OPENING, _CLOSING = set("([{"), set(")]}")
+# Line breaks str.splitlines() knows but the tokenizer does not
+_OTHER_BREAKS = re.compile("\r(?!\n)|[\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+class _Frame:
+    """Complexity bookkeeping of one radon ComplexityVisitor."""
+
+    __slots__ = ("complexity", "functions", "classes", "to_method", "classname")
+
+    def __init__(self, complexity: int = 0, to_method: bool = False, classname: Optional[str] = None):
+        self.complexity = complexity
+        self.functions: List[Tuple[str, int, bool, Optional[str]]] = []
+        self.classes: List[Tuple[str, int, list]] = []
+        self.to_method = to_method
+        self.classname = classname
+
+
+class _Walker:
+    """
+    One traversal computing what radon's ComplexityVisitor and
+    HalsteadVisitor compute separately. ``frame`` is None where radon's
+    complexity visitor does not look (assert bodies, class bases and
+    decorators) but the Halstead visitor still does.
+    """
+
+    def __init__(self):
+        self.operators = 0
+        self.operands = 0
+        self.operators_seen = set()
+        self.operands_seen = set()
+
+    def _operand(self, context: Optional[str], node: ast.AST) -> None:
+        if isinstance(node, ast.Name):
+            value = node.id
+        elif isinstance(node, ast.Attribute):
+            value = node.attr
+        elif isinstance(node, ast.Constant):
+            value = node.value
+        else:
+            value = node  # radon keys other operands by the node itself
+        self.operands_seen.add((context, value))
+
+    def _halstead(self, node: ast.AST, context: Optional[str]) -> None:
+        if isinstance(node, ast.BinOp):
+            operators, operands = (type(node.op).__name__,), (node.left, node.right)
+        elif isinstance(node, ast.Compare):
+            operators, operands = [type(op).__name__ for op in node.ops], node.comparators + [node.left]
+        elif isinstance(node, ast.BoolOp):
+            operators, operands = (type(node.op).__name__,), node.values
+        elif isinstance(node, ast.UnaryOp):
+            operators, operands = (type(node.op).__name__,), (node.operand,)
+        elif isinstance(node, ast.AugAssign):
+            operators, operands = (type(node.op).__name__,), (node.target, node.value)
+        else:
+            return
+        self.operators += len(operators) if isinstance(node, ast.Compare) else 1
+        self.operands += len(operands)
+        self.operators_seen.update(operators)
+        for operand in operands:
+            self._operand(context, operand)
+
+    def walk(self, node: ast.AST, frame: Optional[_Frame], context: Optional[str]) -> None:
+        if isinstance(node, _FUNCTIONS):
+            # Both visitors only look at the body; decorators and defaults are skipped
+            body = _Frame()
+            for child in node.body:
+                self.walk(child, body if frame is not None else None, node.name)
+            if frame is not None:
+                frame.functions.append((node.name, 1 + body.complexity, frame.to_method, frame.classname))
+            return
+        if isinstance(node, ast.ClassDef):
+            for child in node.bases + [keyword.value for keyword in node.keywords] + node.decorator_list:
+                self.walk(child, None, context)
+            body = _Frame(to_method=True, classname=node.name)
+            for child in node.body:
+                self.walk(child, body if frame is not None else None, context)
+            if frame is not None:
+                real = 1 + body.complexity + sum(function[1] for function in body.functions)
+                frame.classes.append((node.name, real, body.functions))
+            return
+
+        self._halstead(node, context)
+        if frame is not None:
+            if isinstance(node, ast.Assert):
+                frame.complexity += 1
+                frame = None  # radon does not look inside asserts
+            elif isinstance(node, (ast.If, ast.IfExp)):
+                frame.complexity += 1
+            elif isinstance(node, ast.BoolOp):
+                frame.complexity += len(node.values) - 1
+            elif isinstance(node, _LOOPS):
+                frame.complexity += bool(node.orelse) + 1
+            elif isinstance(node, ast.comprehension):
+                frame.complexity += len(node.ifs) + 1
+            elif type(node) is ast.Try:
+                frame.complexity += len(node.handlers) + bool(node.orelse)
+            elif isinstance(node, ast.Match):
+                wildcard = any(getattr(case.pattern, "pattern", False) is None for case in node.cases)
+                frame.complexity += max(0, len(node.cases) - wildcard)
+        for child in ast.iter_child_nodes(node):
+            self.walk(child, frame, context)
+
+
+def _blocks(frame: _Frame) -> List[Tuple[str, str, int]]:
+    """(letter, name, complexity) like radon's cc_visit blocks."""
+    blocks = [("M" if is_method else "F", f"{classname}.{name}" if classname else name, complexity)
+              for name, complexity, is_method, classname in frame.functions]
+    for name, real, methods in frame.classes:
+        average = int(real / float(len(methods))) + (len(methods) > 1) if methods else real
+        blocks.append(("C", name, average))
+        blocks.extend(("M", f"{name}.{method}", complexity) for method, complexity, _, _ in methods)
+    return blocks
+
+
+def _logical_lines(tokens: List[tokenize.TokenInfo]) -> int:
+    """radon.raw._logical for the tokens of one statement group."""
+    parts: List[List[tokenize.TokenInfo]] = [[]]
+    for token in tokens:
+        if token.type == tokenize.OP and token.string == ";":
+            parts.append([])
+        else:
+            parts[-1].append(token)
+    count = 0
+    for index, part in enumerate(parts):
+        processed = [t for t in part if t.type not in (tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE)]
+        # radon tokenizes each group on its own, so the last part ends in ENDMARKER
+        ends_with_marker = index == len(parts) - 1
+        length = len(processed) + ends_with_marker
+        colons = [i for i, t in enumerate(processed) if t.type == tokenize.OP and t.string == ":"]
+        if colons:
+            count += 2 - (colons[-1] == length - 2)
+        elif processed:
+            count += 1
+    return count
+
+
+def raw_metrics(code: str) -> Dict[str, int]:
+    """
+    radon.raw.analyze with a single tokenization. radon retokenizes growing
+    line groups until they parse; here the groups are read off the tokens of
+    the whole source (a group ends at a line break outside brackets). Falls
+    back to radon for sources whose lines the tokenizer would split
+    differently.
+    """
+    if _OTHER_BREAKS.search(code):
+        return analyze(code)._asdict()
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(code).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return analyze(code)._asdict()
+    if any(token.type == tokenize.ERRORTOKEN for token in tokens):
+        return analyze(code)._asdict()
+
+    lines = code.splitlines()
+    counts = dict.fromkeys(("loc", "lloc", "sloc", "comments", "multi", "blank", "single_comments"), 0)
+    group: List[tokenize.TokenInfo] = []
+    depth, last_row = 0, 0
+    for token in tokens:
+        if token.type in _SKIPPED_TOKENS or token.start[0] <= last_row:
+            continue  # Indentation, or an end-of-file NEWLINE of a finished group
+        group.append(token)
+        if token.type == tokenize.OP:
+            depth += token.string in _OPENING
+            depth -= token.string in _CLOSING
+        if token.type not in _LINE_ENDS or depth > 0:
+            continue
+
+        end_row = token.start[0]
+        rows = [line.strip() for line in lines[last_row:end_row]]
+        significant = [t for t in group if t.type not in _LINE_ENDS]
+        counts["comments"] += sum(1 for t in group if t.type == tokenize.COMMENT)
+        if len(significant) == 1 and significant[0].type == tokenize.COMMENT:
+            counts["single_comments"] += 1
+        elif len(significant) == 1 and significant[0].type == tokenize.STRING:
+            if significant[0].start[0] == significant[0].end[0]:
+                counts["single_comments"] += 1
+            else:
+                counts["multi"] += sum(1 for row in rows if row)
+                counts["blank"] += sum(1 for row in rows if not row)
+        else:
+            counts["sloc"] += sum(1 for row in rows if row)
+            counts["blank"] += sum(1 for row in rows if not row)
+        counts["lloc"] += _logical_lines(group)
+        group, last_row = [], end_row
+
+    if last_row < len(lines) or group and any(t.type not in _LINE_ENDS for t in group):
+        return analyze(code)._asdict()  # Grouping did not cover the source; trust radon
+    counts["loc"] = counts["sloc"] + counts["blank"] + counts["multi"] + counts["single_comments"]
+    return counts
+
+
+def _halstead(walker: _Walker) -> Dict[str, float]:
+    h1, h2 = len(walker.operators_seen), len(walker.operands_seen)
+    n1, n2 = walker.operators, walker.operands
+    vocabulary, length = h1 + h2, n1 + n2
+    volume = length * math.log(vocabulary, 2) if vocabulary != 0 else 0
+    difficulty = (h1 * n2) / float(2 * h2) if h2 != 0 else 0
+    return {
+        "halstead_h1": h1,
+        "halstead_h2": h2,
+        "halstead_n1": n1,
+        "halstead_n2": n2,
+        "halstead_volume": volume,
+        "halstead_difficulty": difficulty,
+        "halstead_effort": difficulty * volume,
+        "halstead_bugs": volume / 3000.0,
+    }
+
+
+def code_metrics(code: str, tree: Optional[ast.Module] = None) -> Dict[str, Any]:
+    """
+    Complexity, Halstead, raw and maintainability metrics of ``code``:
+
+    * ``complexity``/``max_complexity``: sum and max over radon's cc_visit
+      blocks (``blocks`` lists them as (letter, name, complexity));
+    * ``total_complexity``: the complexity radon's MI uses;
+    * ``halstead_*``: radon's h_visit totals;
+    * ``loc``, ``lloc``, ``sloc``, ``comments``, ``multi``, ``blank``,
+      ``single_comments``: radon.raw.analyze;
+    * ``maintainability``: mi_visit(code, multi=True).
+
+    ``tree`` may be passed when the code was already parsed. Raises
+    SyntaxError for code that does not parse.
+    """
+    if tree is None:
+        tree = ast.parse(code)
+    frame = _Frame(complexity=1)
+    walker = _Walker()
+    for child in ast.iter_child_nodes(tree):
+        walker.walk(child, frame, None)
+
+    blocks = _blocks(frame)
+    total_complexity = (frame.complexity + sum(f[1] - 1 for f in frame.functions)
+                        + sum(c[1] - 1 for c in frame.classes))
+    metrics: Dict[str, Any] = {
+        "complexity": sum(block[2] for block in blocks),
+        "max_complexity": max((block[2] for block in blocks), default=0),
+        "total_complexity": total_complexity,
+        "blocks": blocks,
+    }
+    metrics.update(_halstead(walker))
+    metrics.update(raw_metrics(code))
+    comments = (metrics["comments"] + metrics["multi"]) / float(metrics["sloc"]) * 100 if metrics["sloc"] else 0
+    metrics["maintainability"] = mi_compute(metrics["halstead_volume"], total_complexity, metrics["lloc"], comments)
+    return metrics
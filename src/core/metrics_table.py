@@ -0,0 +1,307 @@
+# src/core/metrics_table.py
+import ast
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.core.lint import DEFAULT_LINT_ENGINE, LintUnavailableError
+from src.core.metrics import code_metrics
+
+# One row per file and per function/method; the column order of the table
+COLUMNS = {
+    "path": object,
+    "package": object,
+    "kind": object,
+    "name": object,
+    "start_line": np.int32,
+    "end_line": np.int32,
+    "complexity": np.int32,
+    "maintainability": np.float32,
+    "halstead_volume": np.float32,
+    "halstead_difficulty": np.float32,
+    "halstead_effort": np.float32,
+    "halstead_bugs": np.float32,
+    "loc": np.int32,
+    "lloc": np.int32,
+    "sloc": np.int32,
+    "comments": np.int32,
+    "blank": np.int32,
+    "lint_errors": np.int32,
+    "error": object,
+}
+CATEGORICAL = ("package", "kind")
+# Lower is worse for these columns; worst() sorts them ascending
+HIGHER_IS_BETTER = {"maintainability"}
+DEFAULT_PERCENTILES = (50, 75, 90, 95, 99)
+
+
+def iter_python_files(root_dir: str) -> Iterable[str]:
+    """Python files under ``root_dir``, skipping hidden dirs and __pycache__."""
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and d != "__pycache__")
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                yield os.path.join(dirpath, filename)
+
+
+def _package(path: str, root_dir: str) -> str:
+    directory = os.path.dirname(os.path.relpath(path, root_dir))
+    return directory.replace(os.sep, ".") if directory else "<root>"
+
+
+def _dedent(source: str) -> str:
+    """Removes the indentation of the first line (a def) from every line;
+    string contents indented less than the def are left alone."""
+    lines = source.splitlines(keepends=True)
+    indent = len(lines[0]) - len(lines[0].lstrip()) if lines else 0
+    return "".join(line[min(indent, len(line) - len(line.lstrip(" \t"))):] for line in lines)
+
+
+def _functions(tree: ast.Module) -> List[tuple]:
+    """(qualname, kind, node) for every function and method, outermost first."""
+    found = []
+
+    def walk(node: ast.AST, prefix: str, in_class: bool) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                qualname = f"{prefix}{child.name}"
+                found.append((qualname, "method" if in_class else "function", child))
+                walk(child, f"{qualname}.", False)
+            elif isinstance(child, ast.ClassDef):
+                walk(child, f"{prefix}{child.name}.", True)
+            else:
+                walk(child, prefix, in_class)
+
+    walk(tree, "", False)
+    return found
+
+
+def _measure(code: str, tree: ast.Module) -> Dict[str, Any]:
+    """
+    Radon metrics of one block of source code and its already parsed tree,
+    from a single traversal (see src.core.metrics).
+    """
+    metrics = code_metrics(code, tree)
+    return {
+        # Classes repeat the complexity of their methods; count functions only
+        "complexity": sum(complexity for letter, _, complexity in metrics["blocks"] if letter != "C"),
+        "maintainability": metrics["maintainability"],
+        "halstead_volume": metrics["halstead_volume"],
+        "halstead_difficulty": metrics["halstead_difficulty"],
+        "halstead_effort": metrics["halstead_effort"],
+        "halstead_bugs": metrics["halstead_bugs"],
+        "loc": metrics["loc"],
+        "lloc": metrics["lloc"],
+        "sloc": metrics["sloc"],
+        "comments": metrics["comments"],
+        "blank": metrics["blank"],
+    }
+
+
+def _file_rows(path: str, root_dir: str, code: str, violations: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    base = {"path": os.path.relpath(path, root_dir), "package": _package(path, root_dir)}
+    lint_lines = [v["line"] or 0 for v in violations] if violations is not None else None
+    lines = code.splitlines(keepends=True)
+    try:
+        tree = ast.parse(code)
+        rows = [dict(base, kind="file", name=os.path.basename(path), start_line=1, end_line=len(lines),
+                     lint_errors=len(lint_lines) if lint_lines is not None else -1, error=None,
+                     **_measure(code, tree))]
+    except (SyntaxError, ValueError) as e:
+        return [dict(base, kind="file", name=os.path.basename(path), start_line=1, end_line=len(lines),
+                     lint_errors=-1, error=f"{type(e).__name__}: {e}")]
+
+    for qualname, kind, node in _functions(tree):
+        start = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+        end = node.end_lineno
+        try:
+            # The function's own node stands in for a parse of its source
+            metrics = _measure(_dedent("".join(lines[start - 1:end])), ast.Module(body=[node], type_ignores=[]))
+            error = None
+        except (SyntaxError, ValueError) as e:
+            metrics, error = {}, f"{type(e).__name__}: {e}"
+        lint_errors = sum(1 for line in lint_lines if start <= line <= end) if lint_lines is not None else -1
+        rows.append(dict(base, kind=kind, name=qualname, start_line=start, end_line=end, lint_errors=lint_errors,
+                         error=error, **metrics))
+    return rows
+
+
+def _measure_batch(paths: Sequence[str], root_dir: str, lint: bool) -> Dict[str, List[Any]]:
+    """Worker: rows of a batch of files as columns. One ruff run per batch."""
+    codes = []
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                codes.append(f.read())
+        except (OSError, UnicodeDecodeError):
+            codes.append(None)
+    lint_results: List[Optional[List[Dict[str, Any]]]] = [None] * len(paths)
+    if lint:
+        readable = [code for code in codes if code is not None]
+        try:
+            linted = iter(DEFAULT_LINT_ENGINE.lint_many(readable))
+            lint_results = [next(linted) if code is not None else None for code in codes]
+        except LintUnavailableError:
+            pass
+
+    columns: Dict[str, List[Any]] = {column: [] for column in COLUMNS}
+    for path, code, violations in zip(paths, codes, lint_results):
+        if code is None:
+            rows = [{"path": os.path.relpath(path, root_dir), "package": _package(path, root_dir), "kind": "file",
+                     "name": os.path.basename(path), "error": "Unreadable file"}]
+        else:
+            rows = _file_rows(path, root_dir, code, violations)
+        for row in rows:
+            for column, values in columns.items():
+                values.append(row.get(column))
+    return columns
+
+
+def _frame(columns: Dict[str, List[Any]]) -> pd.DataFrame:
+    data = {}
+    for column, dtype in COLUMNS.items():
+        values = columns[column]
+        if dtype is object:
+            data[column] = pd.Series(values, dtype="category" if column in CATEGORICAL else object)
+        elif np.issubdtype(dtype, np.integer):
+            # Missing integer metrics (unparsable files) become -1, like compute_metrics
+            data[column] = np.array([-1 if v is None else v for v in values], dtype=dtype)
+        else:
+            data[column] = np.array([np.nan if v is None else v for v in values], dtype=dtype)
+    return pd.DataFrame(data)
+
+
+class MetricsTable:
+    """
+    Radon metrics (CC, MI, Halstead, raw line counts) and lint counts for
+    every file and function of a code base, as one pandas DataFrame.
+
+    Rows have ``kind`` "file", "function" or "method"; function names are
+    qualified (``Class.method``). Integer metrics are -1 and float metrics
+    NaN where they could not be computed (see the ``error`` column). All
+    aggregations work on the whole columns at once.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+
+    @classmethod
+    def build(cls, root_dir: str, paths: Optional[Sequence[str]] = None, max_workers: Optional[int] = None,
+              batch_size: int = 64, lint: bool = True) -> "MetricsTable":
+        """
+        Measures ``paths`` (default: every Python file under ``root_dir``)
+        with a process pool; each worker handles ``batch_size`` files at a
+        time so per-task overhead and ruff spawns stay small.
+        """
+        root_dir = os.path.abspath(root_dir)
+        paths = [os.path.abspath(path) for path in (paths if paths is not None else iter_python_files(root_dir))]
+        batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+        columns: Dict[str, List[Any]] = {column: [] for column in COLUMNS}
+
+        def collect(results: Iterable[Dict[str, List[Any]]]) -> None:
+            for result in results:
+                for column, values in result.items():
+                    columns[column].extend(values)
+
+        if len(batches) <= 1 or max_workers == 1:
+            collect(_measure_batch(batch, root_dir, lint) for batch in batches)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                collect(executor.map(_measure_batch, batches, [root_dir] * len(batches), [lint] * len(batches)))
+        return cls(_frame(columns))
+
+    # --- Views ---
+
+    def rows(self, kind: Optional[str] = None) -> pd.DataFrame:
+        """Rows of one kind; "function" includes methods."""
+        if kind is None:
+            return self.frame
+        kinds = ["function", "method"] if kind == "function" else [kind]
+        return self.frame[self.frame["kind"].isin(kinds).to_numpy()]
+
+    @property
+    def files(self) -> pd.DataFrame:
+        return self.rows("file")
+
+    @property
+    def functions(self) -> pd.DataFrame:
+        return self.rows("function")
+
+    # --- Aggregation ---
+
+    def percentiles(self, columns: Optional[Sequence[str]] = None, q: Sequence[float] = DEFAULT_PERCENTILES,
+                    kind: str = "function") -> pd.DataFrame:
+        """Percentiles (rows ``p50``, ``p90``...) of numeric columns, ignoring missing values."""
+        rows = self.rows(kind)
+        columns = list(columns or [c for c, dtype in COLUMNS.items() if dtype is not object
+                                   and c not in ("start_line", "end_line")])
+        values = rows[columns].to_numpy(dtype=np.float64, copy=True)
+        integer_columns = [i for i, c in enumerate(columns) if np.issubdtype(COLUMNS[c], np.integer)]
+        values[:, integer_columns] = np.where(values[:, integer_columns] < 0, np.nan, values[:, integer_columns])
+        if values.shape[0] == 0:
+            result = np.full((len(q), len(columns)), np.nan)
+        else:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN columns stay NaN
+                result = np.nanpercentile(values, q, axis=0)
+        return pd.DataFrame(result, index=[f"p{p:g}" for p in q], columns=columns)
+
+    def rollup(self, depth: Optional[int] = None, kind: str = "function") -> pd.DataFrame:
+        """
+        Per-package totals and averages. ``depth`` truncates package names
+        (``src.core.x`` at depth 2 rolls up into ``src.core``).
+        """
+        rows = self.rows(kind)
+        packages = rows["package"].astype(str)
+        if depth is not None:
+            packages = packages.str.split(".", n=depth).str[:depth].str.join(".")
+        measured = rows.assign(package=packages.to_numpy())
+        measured = measured[measured["complexity"].to_numpy() >= 0]
+        grouped = measured.groupby("package", observed=True, sort=True)
+        result = grouped.agg(
+            count=("name", "size"),
+            files=("path", "nunique"),
+            complexity_total=("complexity", "sum"),
+            complexity_mean=("complexity", "mean"),
+            complexity_max=("complexity", "max"),
+            maintainability_mean=("maintainability", "mean"),
+            halstead_volume_total=("halstead_volume", "sum"),
+            sloc_total=("sloc", "sum"),
+        )
+        lint = measured[measured["lint_errors"].to_numpy() >= 0].groupby("package", observed=True)["lint_errors"].sum()
+        result["lint_errors_total"] = lint.reindex(result.index).fillna(-1).astype(np.int64)
+        return result
+
+    def worst(self, column: str = "complexity", n: int = 10, kind: str = "function") -> pd.DataFrame:
+        """The ``n`` worst rows by ``column`` (lowest first for maintainability)."""
+        rows = self.rows(kind)
+        values = rows[column].to_numpy(dtype=np.float64)
+        if np.issubdtype(COLUMNS[column], np.integer):
+            values = np.where(values < 0, np.nan, values)
+        if column in HIGHER_IS_BETTER:
+            values = -values
+        valid = np.flatnonzero(~np.isnan(values))
+        n = min(n, valid.size)
+        if n == 0:
+            return rows.iloc[:0]
+        top = valid[np.argpartition(-values[valid], n - 1)[:n]]
+        top = top[np.argsort(-values[top], kind="stable")]
+        return rows.iloc[top]
+
+    # --- Storage ---
+
+    def to_parquet(self, path: str) -> None:
+        self.frame.to_parquet(path, index=False)
+
+    @classmethod
+    def from_parquet(cls, path: str) -> "MetricsTable":
+        return cls(pd.read_parquet(path))
+
+
+def build_metrics_table(root_dir: str, **options: Any) -> MetricsTable:
+    """Shortcut for MetricsTable.build."""
+    return MetricsTable.build(root_dir, **options)
@@ -1,29 +1,32 @@
 # src/core/parser.py
 import libcst as cst
-from radon.complexity import cc_visit
-import ruff
 import json
+from typing import List
+
+from src.core.lint import DEFAULT_LINT_ENGINE, LintUnavailableError
+from src.core.metrics import code_metrics
 
 def parse_code(code: str):
     """Parses code into a LibCST tree."""
     return cst.parse_module(code)
 
-def compute_metrics(code: str):
-    """Computes code quality metrics (Cyclomatic Complexity and Lint Errors)."""
+def _complexity(code: str) -> int:
     try:
-        # Calculate Cyclomatic Complexity (CC)
-        cc = cc_visit(code)
-        # Check if cc is not empty before summing complexities
-        complexity_score = sum(c.complexity for c in cc) if cc else 0
+        # Calculate Cyclomatic Complexity (CC), summed over radon's blocks
+        return code_metrics(code)["complexity"]
     except Exception:
-        complexity_score = -1 # Handle parsing errors
+        return -1 # Handle parsing errors
 
-    # Check linting violations using Ruff
+def compute_metrics(code: str):
+    """Computes code quality metrics (Cyclomatic Complexity and Lint Errors)."""
+    return compute_metrics_batch([code])[0]
+
+def compute_metrics_batch(codes: List[str]):
+    """compute_metrics for many snippets, linting them all with one ruff run."""
+    # Check linting violations using Ruff; -1 when ruff is unavailable
     try:
-        # ruff.lint() returns a list of violations, we just need the count
-        lint_violations = ruff.lint(code)
-        lint_score = len(lint_violations)
-    except Exception:
-        lint_score = -1
+        lint_scores = [len(violations) for violations in DEFAULT_LINT_ENGINE.lint_many(codes)]
+    except LintUnavailableError:
+        lint_scores = [-1] * len(codes)
 
-    return {"complexity": complexity_score, "lint_errors": lint_score}
\ No newline at end of file
+    return [{"complexity": _complexity(code), "lint_errors": lint_score} for code, lint_score in zip(codes, lint_scores)]
\ No newline at end of file
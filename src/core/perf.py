@@ -0,0 +1,251 @@
+# src/core/perf.py
+import copy
+import gc
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import types
+from typing import Any, Callable, Dict, List
+
+from src.core.ast_diff import structural_diff
+from src.core.input_generation import function_parameters, generate_inputs
+
+MIN_MEASUREMENT = 0.002  # Seconds per measurement after calibration
+MEMORY_FLOOR = 64 * 1024  # Peak differences below this are noise
+
+
+def _load(code: str, name: str) -> types.ModuleType:
+    module = types.ModuleType(name)
+    exec(compile(code, f"<{name}>", "exec"), module.__dict__)
+    return module
+
+
+def _workload(function: Callable, inputs: List[tuple]) -> Callable[[int], float]:
+    """A timer running ``function`` over every input ``number`` times."""
+    # Copies are made up front so copying is not measured; functions that
+    # mutate their arguments see them mutated on later repetitions
+    def run(number: int) -> float:
+        batches = [[copy.deepcopy(args) for args in inputs] for _ in range(number)]
+        start = time.perf_counter()
+        for batch in batches:
+            for args in batch:
+                try:
+                    function(*args)
+                except Exception:
+                    pass  # Raising is part of the measured behavior
+        return time.perf_counter() - start
+    return run
+
+
+def _peak_memory(function: Callable, inputs: List[tuple]) -> int:
+    peak = 0
+    tracemalloc.start()
+    try:
+        for args in inputs:
+            args = copy.deepcopy(args)
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            try:
+                function(*args)
+            except Exception:
+                pass
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _benchmark_functions(original_code: str, refactored_code: str, jobs: Dict[str, List[tuple]],
+                         rounds: int) -> Dict[str, Dict[str, Any]]:
+    """Runs in the isolated process: interleaved timing rounds plus peak memory."""
+    original, refactored = _load(original_code, "original"), _load(refactored_code, "refactored")
+    results = {}
+    for name, inputs in jobs.items():
+        before = _workload(getattr(original, name), inputs)
+        after = _workload(getattr(refactored, name), inputs)
+        before(1), after(1)  # Warm-up
+        number = 1
+        while max(before(number), after(number)) < MIN_MEASUREMENT and number < 1_000_000:
+            number *= 2
+
+        gc.disable()
+        try:
+            before_times, after_times = [], []
+            for round_index in range(rounds):
+                # Alternating order cancels out drift between the two runs
+                if round_index % 2:
+                    after_times.append(after(number))
+                    before_times.append(before(number))
+                else:
+                    before_times.append(before(number))
+                    after_times.append(after(number))
+        finally:
+            gc.enable()
+
+        calls = number * len(inputs)
+        results[name] = {
+            "before_times": [t / calls for t in before_times],
+            "after_times": [t / calls for t in after_times],
+            "memory_before": _peak_memory(getattr(original, name), inputs),
+            "memory_after": _peak_memory(getattr(refactored, name), inputs)
+        }
+    return results
+
+
+def _child(conn, *args) -> None:
+    try:
+        with tempfile.TemporaryDirectory(prefix="neurorefactor-perf-") as work_dir:
+            # Relative paths written by the benchmarked code land in a throwaway directory
+            previous = os.getcwd()
+            os.chdir(work_dir)
+            try:
+                conn.send(("ok", _benchmark_functions(*args)))
+            finally:
+                os.chdir(previous)  # A directory still in use cannot be removed on Windows
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _quantile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class PerformanceGate:
+    """
+    Micro-benchmarks the functions a refactoring changed.
+
+    Each changed module-level function with an unchanged signature is run
+    on inputs generated from its annotations. The original and refactored
+    versions are timed in alternating rounds inside a separate process,
+    and their peak allocations are measured with tracemalloc. A time
+    regression is reported only when the median per-round ratio exceeds
+    ``1 + threshold`` and the lower quartile of the ratios is above 1, so
+    a single noisy round does not reject a refactor, and the slowdown in the
+    fastest rounds is at least ``min_delta`` seconds per call, so
+    nanosecond-scale differences between tiny functions are ignored even
+    when a loaded machine stretches every round.
+
+    Functions the refactoring did not change are never called. The
+    benchmark process works in a temporary directory, but it is not a
+    sandbox: the code runs with the caller's permissions and can reach
+    absolute paths, the environment, subprocesses and the network.
+    """
+
+    def __init__(self, threshold: float = 0.25, memory_threshold: float = 0.5, min_delta: float = 1e-6,
+                 cases: int = 20, rounds: int = 7, timeout: float = 30.0, seed: int = 0):
+        self.threshold = threshold
+        self.memory_threshold = memory_threshold
+        self.min_delta = min_delta
+        self.cases = cases
+        self.rounds = rounds
+        self.timeout = timeout
+        self.seed = seed
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+    def _jobs(self, original_code: str, refactored_code: str) -> Dict[str, Any]:
+        before, after = function_parameters(original_code), function_parameters(refactored_code)
+        changed = {change.qualname.split(".")[0] for change in structural_diff(original_code, refactored_code).changes
+                   if change.qualname}
+        jobs, skipped = {}, {}
+        for name in sorted(changed):
+            if name not in before or name not in after:
+                continue  # Not a module-level function (or added/removed)
+            if before[name] != after[name]:
+                skipped[name] = "Signature or annotations changed"
+                continue
+            inputs = generate_inputs(before[name]["parameters"], self.cases, self.seed)
+            if inputs is None:
+                skipped[name] = "Unsupported parameter annotation"
+            else:
+                jobs[name] = inputs
+        return {"jobs": jobs, "skipped": skipped}
+
+    def _run(self, original_code: str, refactored_code: str, jobs: Dict[str, List[tuple]]) -> tuple:
+        parent, child = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(target=_child, args=(child, original_code, refactored_code, jobs, self.rounds),
+                                    daemon=True)
+        process.start()
+        child.close()
+        try:
+            if not parent.poll(self.timeout):
+                return "error", f"Benchmarks timed out after {self.timeout}s"
+            return parent.recv()
+        except EOFError:
+            return "error", "Benchmark process died"
+        finally:
+            if process.is_alive():
+                process.kill()
+            process.join()
+            parent.close()
+
+    def _judge(self, measurement: Dict[str, Any]) -> Dict[str, Any]:
+        ratios = [after / before for before, after in zip(measurement["before_times"], measurement["after_times"])
+                  if before > 0]
+        median = statistics.median(ratios) if ratios else 1.0
+        low, high = (_quantile(ratios, 0.25), _quantile(ratios, 0.75)) if ratios else (1.0, 1.0)
+        memory_before, memory_after = measurement["memory_before"], measurement["memory_after"]
+        time_before = statistics.median(measurement["before_times"])
+        time_after = statistics.median(measurement["after_times"])
+        # The fastest rounds are the least inflated by machine load, so they
+        # decide whether the difference clears the absolute floor
+        material = abs(min(measurement["after_times"]) - min(measurement["before_times"])) >= self.min_delta
+        time_regressed = material and median > 1 + self.threshold and low > 1
+        memory_regressed = memory_after - memory_before > MEMORY_FLOOR and \
+            memory_after > memory_before * (1 + self.memory_threshold)
+        if time_regressed or memory_regressed:
+            status = "regression"
+        elif material and median < 1 / (1 + self.threshold) and high < 1:
+            status = "improvement"
+        else:
+            status = "unchanged"
+        return {
+            "status": status,
+            "time_before": time_before,
+            "time_after": time_after,
+            "time_ratio": median,
+            "time_ratio_iqr": [low, high],
+            "memory_before": memory_before,
+            "memory_after": memory_after,
+            "time_regressed": time_regressed,
+            "memory_regressed": memory_regressed
+        }
+
+    def compare(self, original_code: str, refactored_code: str) -> Dict[str, Any]:
+        """
+        {functions: {name: {status, time/memory before/after, ratios...}},
+        regressions: [names], message, error}. Functions that cannot be
+        benchmarked have status ``skipped`` and a reason; ``error`` says why
+        the benchmark process failed (timeout, crash), or is None.
+        """
+        plan = self._jobs(original_code, refactored_code)
+        functions: Dict[str, Dict[str, Any]] = {name: {"status": "skipped", "reason": reason}
+                                               for name, reason in plan["skipped"].items()}
+        error = None
+        if plan["jobs"]:
+            status, payload = self._run(original_code, refactored_code, plan["jobs"])
+            if status == "ok":
+                functions.update((name, self._judge(measurement)) for name, measurement in payload.items())
+            else:
+                error = payload
+                functions.update((name, {"status": "skipped", "reason": payload}) for name in plan["jobs"])
+
+        regressions = sorted(name for name, result in functions.items() if result["status"] == "regression")
+        measured = [name for name, result in functions.items() if result["status"] != "skipped"]
+        if regressions:
+            details = ", ".join(f"{name} ({functions[name]['time_ratio']:.2f}x time, "
+                                f"{functions[name]['memory_after'] - functions[name]['memory_before']:+d} B peak)"
+                                for name in regressions)
+            message = f"Performance regression beyond {self.threshold:.0%}: {details}"
+        elif measured:
+            message = f"No performance regression in {len(measured)} changed function(s)"
+        else:
+            message = "No changed function could be benchmarked"
+        return {"functions": functions, "regressions": regressions, "measured": measured, "message": message,
+                "error": error}
@@ -0,0 +1,769 @@
+# src/core/refactorings.py
+"""
+Deterministic LibCST refactorings that run locally, without an LLM round trip.
+
+Every transformer records what it changed in ``changes`` (dicts with
+``type``, ``description`` and ``reason``, the same shape the AI agent
+returns) and leaves code it cannot prove safe to rewrite untouched.
+"""
+from collections import Counter
+from typing import Dict, Any, List, Optional, Sequence, Set, Tuple
+
+import libcst as cst
+import libcst.matchers as m
+from libcst.metadata import PositionProvider, ScopeProvider
+
+TERMINATORS = (cst.Return, cst.Raise)
+LOOP_EXITS = (cst.Break, cst.Continue)
+
+
+# --- Helpers ---
+
+def _lines(suite: cst.BaseSuite) -> List[cst.BaseStatement]:
+    """Statements of a block; a one-line suite becomes a single statement line."""
+    if isinstance(suite, cst.IndentedBlock):
+        return list(suite.body)
+    return [cst.SimpleStatementLine(body=suite.body)]
+
+
+def _has_comment(node: cst.CSTNode) -> bool:
+    """True when any comment lives inside the node."""
+    return bool(m.findall(node, m.Comment()))
+
+
+def _mentions(node: cst.CSTNode, names: Set[str]) -> int:
+    return len(m.findall(node, m.Name(value=m.MatchIfTrue(lambda value: value in names))))
+
+
+def _terminates(statements: Sequence[cst.BaseStatement], exits: tuple = TERMINATORS) -> bool:
+    """True when control can never fall off the end of the statements."""
+    if not statements:
+        return False
+    last = statements[-1]
+    if isinstance(last, cst.SimpleStatementLine):
+        return any(isinstance(small, exits) for small in last.body)
+    if isinstance(last, cst.If):
+        if last.orelse is None or not _terminates(_lines(last.body), exits):
+            return False
+        if isinstance(last.orelse, cst.If):
+            return _terminates([last.orelse], exits)
+        return _terminates(_lines(last.orelse.body), exits)
+    return False
+
+
+def _is_nested(statements: Sequence[cst.BaseStatement]) -> bool:
+    return any(isinstance(stmt, cst.BaseCompoundStatement) for stmt in statements)
+
+
+def _size(statements: Sequence[cst.BaseStatement]) -> int:
+    return sum(len(m.findall(stmt, m.SimpleStatementLine() | m.BaseCompoundStatement())) for stmt in statements)
+
+
+def _constant_truth(expression: cst.BaseExpression) -> Optional[bool]:
+    """Truth value of a literal condition, or None when it is not constant."""
+    if isinstance(expression, cst.Name) and expression.value in ("True", "False", "None"):
+        return expression.value == "True"
+    if isinstance(expression, cst.Integer):
+        return expression.evaluated_value != 0
+    return None
+
+
+NEGATED_OPERATORS = {
+    cst.Equal: cst.NotEqual,
+    cst.NotEqual: cst.Equal,
+    cst.In: cst.NotIn,
+    cst.NotIn: cst.In,
+    cst.Is: cst.IsNot,
+    cst.IsNot: cst.Is,
+}
+
+
+def negate(expression: cst.BaseExpression) -> cst.BaseExpression:
+    """
+    Logical negation of a condition. Ordering comparisons are wrapped in
+    ``not`` rather than flipped, which would change their meaning for NaN and
+    partially ordered types.
+    """
+    if m.matches(expression, m.UnaryOperation(operator=m.Not())):
+        return expression.expression.with_changes(lpar=[], rpar=[])
+    if isinstance(expression, cst.Comparison) and len(expression.comparisons) == 1:
+        target = expression.comparisons[0]
+        flipped = NEGATED_OPERATORS.get(type(target.operator))
+        if flipped is not None:
+            return expression.with_changes(comparisons=[target.with_changes(operator=flipped())])
+    if isinstance(expression, (cst.BooleanOperation, cst.IfExp, cst.Lambda, cst.NamedExpr)) and not expression.lpar:
+        expression = expression.with_changes(lpar=[cst.LeftParen()], rpar=[cst.RightParen()])
+    return cst.UnaryOperation(operator=cst.Not(), expression=expression)
+
+
+def _target_names(target: cst.BaseExpression) -> List[str]:
+    """Names an assignment target binds (``a.b`` and ``a[i]`` bind none)."""
+    if isinstance(target, cst.Name):
+        return [target.value]
+    if isinstance(target, (cst.Tuple, cst.List)):
+        return [name for element in target.elements for name in _target_names(element.value)]
+    if isinstance(target, cst.StarredElement):
+        return _target_names(target.value)
+    return []
+
+
+class _BindingCollector(cst.CSTVisitor):
+    """Counts the names bound in the scope of the visited code, not in nested scopes."""
+
+    def __init__(self):
+        super().__init__()
+        self.bound: Counter = Counter()
+
+    def _bind(self, names: Sequence[str]) -> None:
+        self.bound.update(names)
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> bool:
+        self._bind([node.name.value])
+        return False
+
+    def visit_ClassDef(self, node: cst.ClassDef) -> bool:
+        self._bind([node.name.value])
+        return False
+
+    def visit_Lambda(self, node: cst.Lambda) -> bool:
+        return False
+
+    def visit_AssignTarget(self, node: cst.AssignTarget) -> None:
+        self._bind(_target_names(node.target))
+
+    def visit_AugAssign(self, node: cst.AugAssign) -> None:
+        self._bind(_target_names(node.target))
+
+    def visit_AnnAssign(self, node: cst.AnnAssign) -> None:
+        self._bind(_target_names(node.target))
+
+    def visit_For(self, node: cst.For) -> None:
+        self._bind(_target_names(node.target))
+
+    def visit_AsName(self, node: cst.AsName) -> None:  # with ... as, except ... as, import ... as
+        self._bind(_target_names(node.name))
+
+    def visit_ImportAlias(self, node: cst.ImportAlias) -> None:
+        if node.asname is None:
+            name = node.name
+            while isinstance(name, cst.Attribute):
+                name = name.value
+            self._bind([name.value])
+
+    def visit_NamedExpr(self, node: cst.NamedExpr) -> None:
+        self._bind(_target_names(node.target))
+
+    def visit_Del(self, node: cst.Del) -> None:
+        self._bind(_target_names(node.target))
+
+
+def _bindings(nodes: Sequence[cst.CSTNode]) -> Counter:
+    collector = _BindingCollector()
+    for node in nodes:
+        node.visit(collector)
+    return collector.bound
+
+
+def _unique_name(base: str, taken: Set[str]) -> str:
+    name, suffix = base, 1
+    while name in taken:
+        suffix += 1
+        name = f"{base}{suffix}"
+    return name
+
+
+class LocalRefactoring(cst.CSTTransformer):
+    """Base class: keeps the enclosing function stack and the change log."""
+
+    refactoring_type = ""
+    reason = ""
+
+    def __init__(self):
+        super().__init__()
+        self.changes: List[Dict[str, Any]] = []
+        self._functions: List[cst.FunctionDef] = []
+        self._module: Optional[cst.Module] = None
+
+    def visit_Module(self, node: cst.Module) -> None:
+        self._module = node
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> None:
+        self._functions.append(node)
+
+    def leave_FunctionDef(self, original_node: cst.FunctionDef, updated_node: cst.FunctionDef) -> cst.BaseStatement:
+        self._functions.pop()
+        return updated_node
+
+    @property
+    def _scope_node(self) -> cst.CSTNode:
+        """Innermost function being visited, or the module."""
+        return self._functions[-1] if self._functions else self._module
+
+    def _record(self, description: str) -> None:
+        where = f" in {self._functions[-1].name.value}" if self._functions else ""
+        self.changes.append({
+            "type": self.refactoring_type,
+            "description": f"{description}{where}",
+            "reason": self.reason
+        })
+
+
+# --- Guard clauses ---
+
+class GuardClauseTransformer(LocalRefactoring):
+    """
+    Flattens nested conditionals in function bodies into early returns:
+    returns are pushed into branches that only assign the returned variable,
+    ``else`` after a returning branch is dedented, and a deeply nested branch
+    followed by a short exit is inverted into a guard clause.
+    """
+
+    refactoring_type = "simplify_conditional"
+    reason = "Early returns replace nesting and reduce complexity"
+
+    def leave_FunctionDef(self, original_node: cst.FunctionDef, updated_node: cst.FunctionDef) -> cst.BaseStatement:
+        if isinstance(updated_node.body, cst.IndentedBlock):
+            statements = self._push_returns(original_node, list(updated_node.body.body))
+            statements = self._flatten(statements)
+            if statements != list(updated_node.body.body):
+                updated_node = updated_node.with_changes(body=updated_node.body.with_changes(body=statements))
+        return super().leave_FunctionDef(original_node, updated_node)
+
+    def _push_returns(self, function: cst.FunctionDef, statements: List[cst.BaseStatement]) -> List[cst.BaseStatement]:
+        """``if ...: v = a else: v = b; return v`` -> ``if ...: return a else: return b; return v``"""
+        if len(statements) < 2 or not isinstance(statements[-2], cst.If):
+            return statements
+        if not m.matches(statements[-1], m.SimpleStatementLine(body=[m.Return(value=m.Name())])):
+            return statements
+        variable = statements[-1].body[0].value.value
+        # Closures and global/nonlocal declarations can observe the assignment
+        if m.findall(function.body, m.Global() | m.Nonlocal() | m.Lambda() | m.FunctionDef() | m.ClassDef()):
+            return statements
+        rewritten, pushed = self._push_into_if(statements[-2], variable)
+        if not pushed:
+            return statements
+        self._record(f"Returned directly from {pushed} branch(es) instead of through '{variable}'")
+        statements[-2] = rewritten
+        if _terminates([rewritten]):
+            # Every path returns now; the trailing return is unreachable
+            statements = statements[:-1]
+        return statements
+
+    def _push_into_if(self, node: cst.If, variable: str) -> Tuple[cst.If, int]:
+        body, pushed = self._push_into_block(node.body, variable)
+        orelse = node.orelse
+        if isinstance(orelse, cst.If):
+            orelse, count = self._push_into_if(orelse, variable)
+            pushed += count
+        elif isinstance(orelse, cst.Else):
+            else_body, count = self._push_into_block(orelse.body, variable)
+            orelse = orelse.with_changes(body=else_body)
+            pushed += count
+        return node.with_changes(body=body, orelse=orelse), pushed
+
+    def _push_into_block(self, suite: cst.BaseSuite, variable: str) -> Tuple[cst.BaseSuite, int]:
+        if not isinstance(suite, cst.IndentedBlock) or not suite.body:
+            return suite, 0
+        last = suite.body[-1]
+        assignment = m.SimpleStatementLine(body=[m.Assign(targets=[m.AssignTarget(target=m.Name(variable))])])
+        if m.matches(last, assignment):
+            returned = last.with_changes(body=[cst.Return(value=last.body[0].value)])
+            return suite.with_changes(body=[*suite.body[:-1], returned]), 1
+        if isinstance(last, cst.If):
+            rewritten, pushed = self._push_into_if(last, variable)
+            return suite.with_changes(body=[*suite.body[:-1], rewritten]), pushed
+        return suite, 0
+
+    def _flatten(self, statements: List[cst.BaseStatement]) -> List[cst.BaseStatement]:
+        index = 0
+        while index < len(statements):
+            statement = statements[index]
+            if isinstance(statement, cst.If) and isinstance(statement.body, cst.IndentedBlock) \
+                    and not _has_comment(statement.body.header):
+                replacement = self._drop_else(statement) or self._invert(statement, statements[index + 1:])
+                if replacement is not None:
+                    statements[index:] = replacement
+                    continue
+            index += 1
+        return statements
+
+    def _drop_else(self, node: cst.If) -> Optional[List[cst.BaseStatement]]:
+        """``if c: return a else: B`` -> ``if c: return a`` followed by B"""
+        if node.orelse is None or not _terminates(node.body.body):
+            return None
+        if isinstance(node.orelse, cst.If):
+            following = [node.orelse.with_changes(leading_lines=())]
+        else:
+            if _has_comment(node.orelse.body.header) or node.orelse.leading_lines:
+                return None
+            following = _lines(node.orelse.body)
+        self._record("Removed 'else' after a returning branch")
+        return [node.with_changes(orelse=None), *following]
+
+    def _invert(self, node: cst.If, rest: List[cst.BaseStatement]) -> Optional[List[cst.BaseStatement]]:
+        """``if c: <nested, returns>; <short exit>`` -> ``if not c: <short exit>; <dedented>``"""
+        body = list(node.body.body)
+        if node.orelse is not None or not rest or not _terminates(body) or not _terminates(rest):
+            return None
+        if not _is_nested(body) or _size(rest) >= _size(body) or _has_comment(node.body):
+            return None
+        guard = node.with_changes(test=negate(node.test), body=node.body.with_changes(body=[
+            rest[0].with_changes(leading_lines=()), *rest[1:]
+        ]))
+        self._record("Inverted a nested condition into a guard clause")
+        return [guard, *body]
+
+
+# --- range(len(x)) -> enumerate ---
+
+class EnumerateTransformer(LocalRefactoring):
+    """
+    Rewrites ``for i in range(len(seq))`` loops that index ``seq[i]`` into
+    ``for i, item in enumerate(seq)`` (or ``for item in seq`` when the index
+    is not otherwise used). Loops that mutate or rebind ``seq`` are skipped.
+    """
+
+    refactoring_type = "use_enumerate"
+    reason = "Iterating directly is clearer and avoids repeated indexing"
+
+    pattern = m.For(
+        target=m.Name(),
+        iter=m.Call(func=m.Name("range"), args=[m.Arg(keyword=None, star="", value=m.Call(
+            func=m.Name("len"), args=[m.Arg(keyword=None, star="", value=m.Name())]))]),
+        asynchronous=None
+    )
+
+    def leave_For(self, original_node: cst.For, updated_node: cst.For) -> cst.BaseStatement:
+        if not m.matches(updated_node, self.pattern):
+            return updated_node
+        index = updated_node.target.value
+        sequence = updated_node.iter.args[0].value.args[0].value.value
+        element = m.Subscript(value=m.Name(sequence), slice=[m.SubscriptElement(slice=m.Index(value=m.Name(index)))])
+        body = updated_node.body
+
+        element_reads = len(m.findall(body, element))
+        if not element_reads:
+            return updated_node
+        # seq may only appear as seq[...] reads, never as a target
+        if _mentions(body, {sequence}) != len(m.findall(body, m.Subscript(value=m.Name(sequence)))):
+            return updated_node
+        stores = m.findall(body, m.AssignTarget() | m.AugAssign() | m.AnnAssign() | m.Del() | m.For()
+                           | m.CompFor() | m.NamedExpr())
+        stores = [node.target for node in stores] + [node.name for node in m.findall(body, m.AsName())]
+        if any(_mentions(target, {index, sequence}) for target in stores):
+            return updated_node
+
+        taken = {name.value for name in m.findall(self._scope_node, m.Name())}
+        singular = sequence[:-1] if sequence.endswith("s") and not sequence.endswith("ss") and len(sequence) > 2 else ""
+        item = _unique_name(singular or "item", taken)
+        body = body.visit(_Replace(element, cst.Name(item)))
+
+        # The index survives the loop, so only drop it when nothing else uses it
+        uses_index = _mentions(self._scope_node, {index}) > _mentions(original_node, {index}) \
+            or _mentions(body, {index}) or updated_node.orelse is not None
+        if uses_index:
+            target = cst.Tuple(elements=[cst.Element(cst.Name(index)), cst.Element(cst.Name(item))], lpar=[], rpar=[])
+            iterator = cst.Call(func=cst.Name("enumerate"), args=[cst.Arg(cst.Name(sequence))])
+            self._record(f"Replaced range(len({sequence})) with enumerate({sequence})")
+        else:
+            target = cst.Name(item)
+            iterator = cst.Name(sequence)
+            self._record(f"Replaced range(len({sequence})) with direct iteration over {sequence}")
+        return updated_node.with_changes(target=target, iter=iterator, body=body)
+
+
+class _Replace(cst.CSTTransformer):
+    """Replaces every node matching a matcher with a fixed node."""
+
+    def __init__(self, matcher: m.BaseMatcherNode, replacement: cst.CSTNode):
+        super().__init__()
+        self.matcher = matcher
+        self.replacement = replacement
+
+    def on_leave(self, original_node: cst.CSTNode, updated_node: cst.CSTNode) -> Any:
+        if m.matches(updated_node, self.matcher):
+            return self.replacement
+        return updated_node
+
+
+# --- list.append loops -> comprehensions ---
+
+class ListComprehensionTransformer(LocalRefactoring):
+    """
+    Rewrites ``v = []`` followed by a loop whose only effect is ``v.append(e)``
+    (optionally under ``if`` filters and nested loops) into
+    ``v = [e for ... if ...]``.
+    """
+
+    refactoring_type = "use_comprehension"
+    reason = "A comprehension states intent directly and runs faster than append calls"
+
+    def __init__(self):
+        super().__init__()
+        # True for each enclosing class, False for each enclosing function:
+        # a comprehension in a class body cannot see the class's names
+        self._in_class: List[bool] = []
+
+    def visit_ClassDef(self, node: cst.ClassDef) -> None:
+        self._in_class.append(True)
+
+    def leave_ClassDef(self, original_node: cst.ClassDef, updated_node: cst.ClassDef) -> cst.BaseStatement:
+        self._in_class.pop()
+        return updated_node
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> None:
+        super().visit_FunctionDef(node)
+        self._in_class.append(False)
+
+    def leave_FunctionDef(self, original_node: cst.FunctionDef, updated_node: cst.FunctionDef) -> cst.BaseStatement:
+        self._in_class.pop()
+        return super().leave_FunctionDef(original_node, updated_node)
+
+    def leave_IndentedBlock(self, original_node: cst.IndentedBlock, updated_node: cst.IndentedBlock) -> cst.IndentedBlock:
+        if self._in_class and self._in_class[-1]:
+            return updated_node
+        return updated_node.with_changes(body=self._rewrite(list(updated_node.body)))
+
+    def leave_Module(self, original_node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        return updated_node.with_changes(body=self._rewrite(list(updated_node.body)))
+
+    def _rewrite(self, statements: List[cst.BaseStatement]) -> List[cst.BaseStatement]:
+        empty_list = m.SimpleStatementLine(body=[m.Assign(
+            targets=[m.AssignTarget(target=m.Name())], value=m.List(elements=[]))])
+        index = 0
+        while index < len(statements) - 1:
+            first, loop = statements[index], statements[index + 1]
+            if m.matches(first, empty_list) and isinstance(loop, cst.For) and not _has_comment(loop):
+                variable = first.body[0].targets[0].target.value
+                comprehension = self._comprehension(loop, variable)
+                if comprehension is not None:
+                    statements[index:index + 2] = [first.with_changes(
+                        body=[first.body[0].with_changes(value=comprehension)])]
+                    self._record(f"Built '{variable}' with a list comprehension")
+            index += 1
+        return statements
+
+    def _comprehension(self, loop: cst.For, variable: str) -> Optional[cst.ListComp]:
+        clauses: List[Tuple[cst.For, List[cst.BaseExpression]]] = []
+        statement: cst.BaseStatement = loop
+        while isinstance(statement, cst.For):
+            if statement.orelse is not None or statement.asynchronous is not None:
+                return None
+            tests = []
+            body = _lines(statement.body)
+            while len(body) == 1 and isinstance(body[0], cst.If) and body[0].orelse is None:
+                tests.append(body[0].test)
+                body = _lines(body[0].body)
+            if len(body) != 1:
+                return None
+            clauses.append((statement, tests))
+            statement = body[0]
+
+        append = m.SimpleStatementLine(body=[m.Expr(value=m.Call(
+            func=m.Attribute(value=m.Name(variable), attr=m.Name("append")),
+            args=[m.Arg(keyword=None, star="")]))])
+        if not clauses or not m.matches(statement, append):
+            return None
+        element = statement.body[0].value.args[0].value
+
+        # The list must not be read while it is being built, and loop
+        # variables must not be needed after the loop (comprehensions don't leak them)
+        if _mentions(loop, {variable}) != 1 or m.findall(loop, m.NamedExpr() | m.Yield() | m.Await()):
+            return None
+        loop_names = {name.value for clause, _ in clauses for name in m.findall(clause.target, m.Name())}
+        if _mentions(self._scope_node, loop_names) > _mentions(loop, loop_names):
+            return None
+
+        comp_for = None
+        for clause, tests in reversed(clauses):
+            comp_for = cst.CompFor(
+                target=clause.target,
+                iter=clause.iter,
+                ifs=[cst.CompIf(test=test) for test in tests],
+                inner_for_in=comp_for
+            )
+        return cst.ListComp(elt=element, for_in=comp_for)
+
+
+# --- Dead code ---
+
+class DeadCodeTransformer(LocalRefactoring):
+    """
+    Removes branches with literal conditions (``if False:``, ``while 0:``)
+    and statements after ``return``/``raise``/``break``/``continue``.
+    Code containing ``yield``, ``global`` or ``nonlocal`` is kept, since
+    removing it changes how the enclosing function is compiled. So is code
+    holding a function's only binding of a name: without it the name would
+    no longer be local, and reads would reach a global instead of raising
+    UnboundLocalError.
+    """
+
+    refactoring_type = "remove_dead_code"
+    reason = "Unreachable code misleads readers"
+
+    def __init__(self):
+        super().__init__()
+        # Per enclosing function: bindings still present in its scope
+        self._bound: List[Counter] = []
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> None:
+        super().visit_FunctionDef(node)
+        params = node.params
+        names = [param.name.value for param in
+                 [*params.posonly_params, *params.params, *params.kwonly_params]]
+        names += [param.name.value for param in (params.star_arg, params.star_kwarg) if isinstance(param, cst.Param)]
+        self._bound.append(Counter(names) + _bindings([node.body]))
+
+    def leave_FunctionDef(self, original_node: cst.FunctionDef, updated_node: cst.FunctionDef) -> cst.BaseStatement:
+        self._bound.pop()
+        return super().leave_FunctionDef(original_node, updated_node)
+
+    def leave_IndentedBlock(self, original_node: cst.IndentedBlock, updated_node: cst.IndentedBlock) -> cst.IndentedBlock:
+        return updated_node.with_changes(body=self._prune(list(updated_node.body)) or
+                                         [cst.SimpleStatementLine([cst.Pass()])])
+
+    def leave_Module(self, original_node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        return updated_node.with_changes(body=self._prune(list(updated_node.body)))
+
+    def _removable(self, nodes: Sequence[cst.CSTNode]) -> bool:
+        """Whether the nodes may be dropped; if so their bindings count as gone."""
+        if any(m.findall(node, m.Yield() | m.Global() | m.Nonlocal()) for node in nodes):
+            return False
+        if not self._bound:
+            return True
+        dropped = _bindings(nodes)
+        if any(self._bound[-1][name] <= count for name, count in dropped.items()):
+            return False
+        self._bound[-1] -= dropped
+        return True
+
+    def _prune(self, statements: List[cst.BaseStatement]) -> List[cst.BaseStatement]:
+        result: List[cst.BaseStatement] = []
+        for position, statement in enumerate(statements):
+            if isinstance(statement, cst.If):
+                result.extend(self._prune_if(statement))
+            elif isinstance(statement, cst.While) and _constant_truth(statement.test) is False \
+                    and self._removable([statement.body]):
+                self._record("Removed a loop that never runs")
+                if statement.orelse is not None:
+                    result.extend(_lines(statement.orelse.body))
+            else:
+                result.append(statement)
+
+            unreachable = statements[position + 1:]
+            if unreachable and _terminates([statement], TERMINATORS + LOOP_EXITS) and self._removable(unreachable):
+                self._record(f"Removed {len(unreachable)} unreachable statement(s)")
+                break
+        return result
+
+    def _prune_if(self, node: cst.If) -> List[cst.BaseStatement]:
+        truth = _constant_truth(node.test)
+        if truth is None:
+            orelse = self._prune_orelse(node.orelse)
+            return [node.with_changes(orelse=orelse)]
+
+        dropped = [node.orelse] if truth else [node.body]
+        if not self._removable([part for part in dropped if part is not None]):
+            return [node]
+        self._record(f"Removed a branch whose condition is always {truth}")
+        if truth:
+            kept = _lines(node.body)
+        elif isinstance(node.orelse, cst.If):
+            return self._prune_if(node.orelse.with_changes(leading_lines=node.leading_lines))
+        elif isinstance(node.orelse, cst.Else):
+            kept = _lines(node.orelse.body)
+        else:
+            return []
+        if kept:
+            kept[0] = kept[0].with_changes(leading_lines=node.leading_lines)
+        return kept
+
+    def _prune_orelse(self, orelse: Optional[cst.CSTNode]) -> Optional[cst.CSTNode]:
+        if not isinstance(orelse, cst.If):
+            return orelse
+        truth = _constant_truth(orelse.test)
+        if truth is None:
+            return orelse.with_changes(orelse=self._prune_orelse(orelse.orelse))
+        dropped = orelse.orelse if truth else orelse.body
+        if dropped is not None and not self._removable([dropped]):
+            return orelse
+        self._record(f"Removed an 'elif' whose condition is always {truth}")
+        if truth:
+            return cst.Else(body=orelse.body)
+        return self._prune_orelse(orelse.orelse)
+
+
+# --- Extract method ---
+
+class ExtractMethodTransformer(LocalRefactoring):
+    """
+    Moves the statements spanning ``start_line``..``end_line`` of a function
+    into a new module-level function. Variables read inside the range and
+    bound before it become parameters; variables bound inside and used
+    afterwards are returned and reassigned at the call site.
+
+    Requires a MetadataWrapper. ``error`` explains why nothing was extracted.
+    """
+
+    refactoring_type = "extract_method"
+    reason = "Smaller functions are easier to read and test"
+    METADATA_DEPENDENCIES = (PositionProvider, ScopeProvider)
+
+    def __init__(self, start_line: int, end_line: int, new_name: str):
+        super().__init__()
+        self.start_line = start_line
+        self.end_line = end_line
+        self.new_name = new_name
+        self.error: Optional[str] = "No whole statements of a function span the given lines"
+        self._target: Optional[Tuple[cst.IndentedBlock, int, int]] = None
+        self._extracted: Optional[cst.FunctionDef] = None
+        self._top_level: Optional[int] = None
+
+    def visit_Module(self, node: cst.Module) -> None:
+        super().visit_Module(node)
+        for index, statement in enumerate(node.body):
+            position = self.get_metadata(PositionProvider, statement)
+            if position.start.line <= self.start_line and self.end_line <= position.end.line:
+                self._top_level = index
+
+    def _lines_of(self, node: cst.CSTNode) -> Tuple[int, int]:
+        position = self.get_metadata(PositionProvider, node)
+        return position.start.line, position.end.line
+
+    def visit_IndentedBlock(self, node: cst.IndentedBlock) -> None:
+        # Blocks are visited outermost first, so the first block whose whole
+        # statements cover the range is the one the range was selected in
+        if self._target is not None or not self._functions:
+            return
+        selected = []
+        for index, statement in enumerate(node.body):
+            start, end = self._lines_of(statement)
+            inside = self.start_line <= start and end <= self.end_line
+            if not inside and start <= self.end_line and self.start_line <= end:
+                return  # Range cuts through this statement; a nested block may own it
+            if inside:
+                selected.append(index)
+        if selected and selected == list(range(selected[0], selected[-1] + 1)):
+            self._target = (node, selected[0], selected[-1] + 1)
+
+    def leave_IndentedBlock(self, original_node: cst.IndentedBlock, updated_node: cst.IndentedBlock) -> cst.IndentedBlock:
+        if self._target is None or self._target[0] is not original_node:
+            return updated_node
+        _, first, last = self._target
+        call = self._extract(original_node.body[first:last], updated_node.body[first:last])
+        if call is None:
+            return updated_node
+        return updated_node.with_changes(body=[*updated_node.body[:first], call, *updated_node.body[last:]])
+
+    def _extract(self, originals: Sequence[cst.BaseStatement],
+                 statements: Sequence[cst.BaseStatement]) -> Optional[cst.SimpleStatementLine]:
+        loops_inside = [loop for stmt in originals for loop in m.findall(stmt, m.For() | m.While())]
+        exits = [node for stmt in originals for node in m.findall(stmt, m.Break() | m.Continue())]
+        nested = [node for stmt in originals for node in m.findall(stmt, m.FunctionDef() | m.Lambda() | m.ClassDef())]
+        blocked = [node for stmt in originals for node in m.findall(stmt, m.Return() | m.Yield() | m.Await()
+                                                                     | m.Global() | m.Nonlocal())]
+        if blocked or nested or (exits and not loops_inside):
+            self.error = "Range contains return/yield/await, global/nonlocal, nested definitions or loop exits"
+            return None
+        if exits and not all(any(self._within(exit_node, loop) for loop in loops_inside) for exit_node in exits):
+            self.error = "Range contains break/continue for a loop outside the range"
+            return None
+
+        scope = self.get_metadata(ScopeProvider, originals[0])
+        module_scope = scope.globals
+        if self.new_name in module_scope:
+            self.error = f"'{self.new_name}' is already defined in this module"
+            return None
+
+        params: Dict[str, int] = {}
+        outputs: Dict[str, int] = {}
+        for assignment in scope.assignments:
+            if assignment.scope is not scope:
+                continue
+            name = assignment.name
+            line = self._lines_of(assignment.node)[0]
+            bound_inside = self.start_line <= line <= self.end_line
+            for access in assignment.references:
+                access_line = self._lines_of(access.node)[0]
+                read_inside = self.start_line <= access_line <= self.end_line
+                if read_inside and not bound_inside:
+                    params.setdefault(name, access_line)
+                elif bound_inside and not read_inside:
+                    outputs.setdefault(name, line)
+
+        # ``x += ...`` reads x, but scope analysis only records the binding
+        for target in m.findall(cst.Module(body=list(originals)), m.AugAssign(target=m.Name())):
+            name = target.target.value
+            if name not in params and any(self._lines_of(a.node)[0] < self.start_line for a in scope.assignments[name]
+                                          if a.scope is scope):
+                params[name] = self._lines_of(target)[0]
+
+        ordered_params = sorted(params, key=lambda name: (params[name], name))
+        ordered_outputs = sorted(outputs, key=lambda name: (outputs[name], name))
+
+        body = [statements[0].with_changes(leading_lines=()), *statements[1:]]
+        if ordered_outputs:
+            returned = [cst.Element(cst.Name(name)) for name in ordered_outputs]
+            value = returned[0].value if len(returned) == 1 else cst.Tuple(returned, lpar=[], rpar=[])
+            body.append(cst.SimpleStatementLine([cst.Return(value=value)]))
+        self._extracted = cst.FunctionDef(
+            name=cst.Name(self.new_name),
+            params=cst.Parameters(params=[cst.Param(cst.Name(name)) for name in ordered_params]),
+            body=cst.IndentedBlock(body=body),
+            leading_lines=[cst.EmptyLine(), cst.EmptyLine()]
+        )
+
+        call = cst.Call(func=cst.Name(self.new_name), args=[cst.Arg(cst.Name(name)) for name in ordered_params])
+        if not ordered_outputs:
+            small: cst.BaseSmallStatement = cst.Expr(call)
+        else:
+            targets = [cst.Element(cst.Name(name)) for name in ordered_outputs]
+            target = targets[0].value if len(targets) == 1 else cst.Tuple(targets, lpar=[], rpar=[])
+            small = cst.Assign(targets=[cst.AssignTarget(target)], value=call)
+        self.error = None
+        self._record(f"Extracted lines {self.start_line}-{self.end_line} into {self.new_name}()")
+        return cst.SimpleStatementLine(body=[small], leading_lines=statements[0].leading_lines)
+
+    def _within(self, node: cst.CSTNode, container: cst.CSTNode) -> bool:
+        start, end = self._lines_of(container)
+        line = self._lines_of(node)[0]
+        return start <= line <= end
+
+    def leave_Module(self, original_node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        if self._extracted is None or self._top_level is None:
+            return updated_node
+        body = list(updated_node.body)
+        body.insert(self._top_level + 1, self._extracted)
+        return updated_node.with_changes(body=body)
+
+
+# --- Driver ---
+
+AUTOMATIC_REFACTORINGS = (
+    DeadCodeTransformer,
+    EnumerateTransformer,
+    ListComprehensionTransformer,
+    GuardClauseTransformer,
+)
+
+LOCAL_REFACTORINGS = {
+    transformer.refactoring_type: transformer
+    for transformer in AUTOMATIC_REFACTORINGS + (ExtractMethodTransformer,)
+}
+
+
+def apply_local_refactorings(code: str, kinds: Optional[Sequence[str]] = None) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Runs every automatic refactoring (or only ``kinds``) over the code.
+    Returns the refactored code and the list of changes made.
+    Raises libcst.ParserSyntaxError for code that does not parse.
+    """
+    module = cst.parse_module(code)
+    changes: List[Dict[str, Any]] = []
+    for transformer_class in AUTOMATIC_REFACTORINGS:
+        if kinds is not None and transformer_class.refactoring_type not in kinds:
+            continue
+        transformer = transformer_class()
+        module = module.visit(transformer)
+        changes.extend(transformer.changes)
+    return module.code, changes
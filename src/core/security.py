@@ -0,0 +1,183 @@
+# src/core/security.py
+import ast
+import collections
+import hashlib
+import io
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from src.core.ast_diff import structural_diff
+
+SEVERITIES = ("LOW", "MEDIUM", "HIGH")
+MODULE_UNIT = "<module>"
+
+
+class SecurityUnavailableError(RuntimeError):
+    """Raised when bandit is not installed."""
+
+
+def _imports_preamble(tree: ast.Module, code: str) -> str:
+    """Top-level imports, so bandit can resolve e.g. ``subprocess.call``."""
+    lines = [ast.get_source_segment(code, node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "".join(f"{line}\n" for line in lines if line)
+
+
+def code_units(code: str) -> Dict[str, str]:
+    """
+    Scannable units of a module by qualname: every top-level function and
+    method (nested functions stay inside their parent), plus MODULE_UNIT
+    for the remaining top-level statements.
+    """
+    tree = ast.parse(code)
+    units = {}
+    module_statements = []
+    lines = code.splitlines(keepends=True)
+
+    def add_function(node: ast.AST, qualname: str) -> None:
+        # Decorators are part of the function's behavior
+        start = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+        units[qualname] = _dedent("".join(lines[start - 1:node.end_lineno]))
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            add_function(node, node.name)
+        elif isinstance(node, ast.ClassDef):
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    add_function(child, f"{node.name}.{child.name}")
+        else:
+            segment = ast.get_source_segment(code, node)
+            if segment is not None:
+                module_statements.append(segment)
+    if module_statements:
+        units[MODULE_UNIT] = "\n".join(module_statements) + "\n"
+    return units
+
+
+def _dedent(source: str) -> str:
+    lines = source.splitlines(keepends=True)
+    indent = min((len(line) - len(line.lstrip()) for line in lines if line.strip()), default=0)
+    return "".join(line[indent:] if line.strip() else line for line in lines)
+
+
+def changed_units(original_code: str, refactored_code: str, units: Set[str]) -> Set[str]:
+    """Units of the refactored code touched by the AST diff."""
+    changed = set()
+    for change in structural_diff(original_code, refactored_code).changes:
+        qualname = change.qualname
+        if not qualname:
+            changed.add(MODULE_UNIT)
+            continue
+        for unit in units:
+            if unit == qualname or unit.startswith(f"{qualname}.") or qualname.startswith(f"{unit}."):
+                changed.add(unit)
+    return changed & units
+
+
+class SecurityScanner:
+    """
+    Runs bandit's checks in-process on individual functions.
+
+    Bandit's configuration and test set are loaded once; each unit is then
+    scanned with the module's imports prepended, so calls like
+    ``subprocess.call`` resolve. Findings are cached per unit hash, so an
+    unchanged function is never rescanned.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.scans = 0
+        self._cache: "collections.OrderedDict[str, List[Dict[str, Any]]]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._manager = None
+
+    def _bandit(self):
+        if self._manager is None:
+            try:
+                from bandit.core import config, manager
+            except ImportError as e:
+                raise SecurityUnavailableError("bandit is not installed") from e
+            logging.getLogger("bandit").setLevel(logging.ERROR)
+            self._manager = manager.BanditManager(config.BanditConfig(), "file")
+        return self._manager
+
+    def _scan(self, preamble: str, source: str) -> List[Dict[str, Any]]:
+        from bandit.core import node_visitor
+        bandit = self._bandit()
+        snippet = preamble + source
+        visitor = node_visitor.BanditNodeVisitor("snippet.py", io.BytesIO(snippet.encode("utf-8")), bandit.b_ma,
+                                                 bandit.b_ts, False, {}, bandit.metrics)
+        visitor.process(snippet)
+        self.scans += 1
+        offset = preamble.count("\n")
+        lines = snippet.splitlines()
+        findings = []
+        for issue in visitor.tester.results:
+            if issue.lineno <= offset:
+                continue  # Import findings belong to the module unit
+            findings.append({
+                "test_id": issue.test_id,
+                "test": issue.test,
+                "severity": issue.severity,
+                "confidence": issue.confidence,
+                "text": issue.text,
+                "line": issue.lineno - offset,
+                "code": lines[issue.lineno - 1].strip() if issue.lineno - 1 < len(lines) else ""
+            })
+        return findings
+
+    def scan_unit(self, preamble: str, source: str) -> List[Dict[str, Any]]:
+        digest = hashlib.sha256(f"{preamble}\0{source}".encode("utf-8")).hexdigest()
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+        findings = self._scan(preamble, source)
+        with self._lock:
+            self._cache[digest] = findings
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return findings
+
+    def scan(self, code: str, units: Optional[Set[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Findings per unit of ``code`` (only ``units`` if given)."""
+        tree = ast.parse(code)
+        preamble = _imports_preamble(tree, code)
+        return {name: self.scan_unit("" if name == MODULE_UNIT else preamble, source)
+                for name, source in code_units(code).items() if units is None or name in units}
+
+    def new_issues(self, original_code: str, refactored_code: str, min_severity: str = "MEDIUM") -> Dict[str, Any]:
+        """
+        Findings introduced by a refactoring, scanning only the units the AST
+        diff marks as changed (on each side, so renamed and extracted
+        functions are compared with the code they came from). A check's
+        findings are new only when it fires more often in the changed units
+        than before, so renaming a variable on a flagged line or moving it to
+        another function is not a new issue. When it does fire more often,
+        findings on lines that did not already occur are reported first.
+        """
+        after_changed = changed_units(original_code, refactored_code, set(code_units(refactored_code)))
+        before_changed = changed_units(original_code, refactored_code, set(code_units(original_code)))
+        after = self.scan(refactored_code, after_changed)
+        before = self.scan(original_code, before_changed)
+
+        before_findings = [f for unit_findings in before.values() for f in unit_findings]
+        budget = collections.Counter(f["test_id"] for unit_findings in after.values() for f in unit_findings)
+        budget.subtract(f["test_id"] for f in before_findings)
+        old_lines = {(f["test_id"], f["code"]) for f in before_findings}
+        # Stable sort: findings on unseen lines first, otherwise in unit order
+        candidates = sorted(((unit, finding) for unit, findings in after.items() for finding in findings),
+                            key=lambda item: (item[1]["test_id"], item[1]["code"]) in old_lines)
+
+        threshold = SEVERITIES.index(min_severity)
+        introduced = []
+        for unit, finding in candidates:
+            if budget[finding["test_id"]] > 0:
+                budget[finding["test_id"]] -= 1
+                if SEVERITIES.index(finding["severity"]) >= threshold:
+                    introduced.append(dict(finding, unit=unit))
+        return {"scanned_units": sorted(after_changed), "new": introduced}
+
+
+DEFAULT_SECURITY_SCANNER = SecurityScanner()
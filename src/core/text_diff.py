@@ -0,0 +1,333 @@
+# src/core/text_diff.py
+"""
+Line diffs that stay fast on large files.
+
+difflib.SequenceMatcher looks for the longest matching block over and over,
+which gets quadratic on long files with many similar lines (blank lines,
+closing brackets, ``return None``). Here every line is first hashed to a
+small integer so comparisons are int comparisons, then the sequences are
+aligned with either
+
+* ``"myers"``: Myers' O(ND) algorithm in its linear-space form (middle
+  snake, divide and conquer), which finds a shortest edit script; or
+* ``"patience"``: patience diff, which anchors on lines that occur exactly
+  once on each side (longest increasing subsequence), recurses between the
+  anchors and uses Myers for the stretches without unique lines. Code diffs
+  align on the lines a reader would expect, and large edits stay cheap.
+
+The opcodes have the same shape as SequenceMatcher.get_opcodes(), and
+``unified_diff`` produces the same text as difflib.unified_diff, so either
+can be swapped in.
+"""
+import bisect
+import re
+from typing import Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+ALGORITHMS = ("patience", "myers")
+# Intraline markers, as in `git diff --word-diff`
+DELETE_MARKERS = ("[-", "-]")
+INSERT_MARKERS = ("{+", "+}")
+
+_WORDS = re.compile(r"\w+|\s+|[^\w\s]")
+
+Opcode = Tuple[str, int, int, int, int]
+_Block = Tuple[int, int, int]
+
+
+def _hash_lines(a: Sequence[Hashable], b: Sequence[Hashable]) -> Tuple[List[int], List[int]]:
+    """Maps equal items of both sequences to equal small integers."""
+    ids: Dict[Hashable, int] = {}
+    return ([ids.setdefault(item, len(ids)) for item in a],
+            [ids.setdefault(item, len(ids)) for item in b])
+
+
+def _middle_snake(a: List[int], alo: int, ahi: int, b: List[int], blo: int, bhi: int) -> Tuple[int, int, int, int, int]:
+    """
+    The middle snake of a shortest edit script of a[alo:ahi] -> b[blo:bhi]
+    as (x, y, u, v, d): the diagonal a[alo+x:alo+u] == b[blo+y:blo+v] lies
+    on a D-path with d edits. Forward and backward searches meet in the
+    middle, so only two diagonal vectors are kept.
+    """
+    n, m = ahi - alo, bhi - blo
+    delta = n - m
+    odd = delta & 1
+    limit = (n + m + 1) // 2
+    # Diagonals k in [-limit - 1, limit + 1]; negative k wraps around the end
+    forward = [0] * (2 * limit + 4)
+    backward = [0] * (2 * limit + 4)
+    for d in range(limit + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[k - 1] < forward[k + 1]):
+                x = forward[k + 1]
+            else:
+                x = forward[k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[k] = x
+            if odd and delta - (d - 1) <= k <= delta + (d - 1) and x + backward[delta - k] >= n:
+                return start_x, start_y, x, y, 2 * d - 1
+        for k in range(-d, d + 1, 2):
+            # Same search from the ends; x and y count from ahi and bhi backwards
+            if k == -d or (k != d and backward[k - 1] < backward[k + 1]):
+                x = backward[k + 1]
+            else:
+                x = backward[k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            backward[k] = x
+            if not odd and -d <= delta - k <= d and x + forward[delta - k] >= n:
+                return n - x, m - y, n - start_x, m - start_y, 2 * d
+    raise AssertionError("no middle snake")  # A path with n + m edits always exists
+
+
+def _trim(a: List[int], alo: int, ahi: int, b: List[int], blo: int, bhi: int,
+          blocks: List[_Block]) -> Tuple[int, int, int, int]:
+    """Records the common prefix and suffix and returns the range between them."""
+    start = alo
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    if alo > start:
+        blocks.append((start, blo - (alo - start), alo - start))
+    end = ahi
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+    if end > ahi:
+        blocks.append((ahi, bhi, end - ahi))
+    return alo, ahi, blo, bhi
+
+
+def _myers(a: List[int], alo: int, ahi: int, b: List[int], blo: int, bhi: int, blocks: List[_Block]) -> None:
+    """Matching blocks of a shortest edit script, in linear space."""
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        alo, ahi, blo, bhi = _trim(a, alo, ahi, b, blo, bhi, blocks)
+        if alo == ahi or blo == bhi:
+            continue  # Only insertions or only deletions are left
+        # Without a common prefix/suffix, both sides non-empty means d >= 2
+        x, y, u, v, _ = _middle_snake(a, alo, ahi, b, blo, bhi)
+        if u > x:
+            blocks.append((alo + x, blo + y, u - x))
+        stack.append((alo, alo + x, blo, blo + y))
+        stack.append((alo + u, ahi, blo + v, bhi))
+
+
+def _unique_anchors(a: List[int], alo: int, ahi: int, b: List[int], blo: int, bhi: int) -> List[Tuple[int, int]]:
+    """
+    Lines occurring exactly once in a[alo:ahi] and once in b[blo:bhi], as
+    (i, j) pairs forming the longest chain increasing on both sides.
+    """
+    seen: Dict[int, List[int]] = {}
+    for i in range(alo, ahi):
+        entry = seen.get(a[i])
+        if entry is None:
+            seen[a[i]] = [i, -1]
+        else:
+            entry[0] = -1  # Not unique in a
+    for j in range(blo, bhi):
+        entry = seen.get(b[j])
+        if entry is not None and entry[0] >= 0:
+            entry[1] = j if entry[1] == -1 else -2  # -2: not unique in b
+    pairs = sorted((i, j) for i, j in seen.values() if i >= 0 and j >= 0)
+    if not pairs:
+        return []
+
+    # Longest increasing subsequence of j by patience sorting
+    tops: List[int] = []
+    top_index: List[int] = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        pile = bisect.bisect_left(tops, j)
+        if pile > 0:
+            previous[index] = top_index[pile - 1]
+        if pile == len(tops):
+            tops.append(j)
+            top_index.append(index)
+        else:
+            tops[pile] = j
+            top_index[pile] = index
+    chain = []
+    index = top_index[-1]
+    while index >= 0:
+        chain.append(pairs[index])
+        index = previous[index]
+    chain.reverse()
+    return chain
+
+
+def _patience(a: List[int], alo: int, ahi: int, b: List[int], blo: int, bhi: int, blocks: List[_Block]) -> None:
+    """Matching blocks anchored on unique lines, Myers in between."""
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        alo, ahi, blo, bhi = _trim(a, alo, ahi, b, blo, bhi, blocks)
+        if alo == ahi or blo == bhi:
+            continue
+        anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+        if not anchors:
+            _myers(a, alo, ahi, b, blo, bhi, blocks)
+            continue
+        i, j = alo, blo
+        for anchor_i, anchor_j in anchors:
+            stack.append((i, anchor_i, j, anchor_j))
+            blocks.append((anchor_i, anchor_j, 1))
+            i, j = anchor_i + 1, anchor_j + 1
+        stack.append((i, ahi, j, bhi))
+
+
+def matching_blocks(a: Sequence[Hashable], b: Sequence[Hashable], algorithm: str = "patience") -> List[_Block]:
+    """
+    Matching blocks (i, j, size) of two sequences of hashable items, sorted
+    and merged, ending with the (len(a), len(b), 0) sentinel like
+    SequenceMatcher.get_matching_blocks().
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown diff algorithm {algorithm!r}; expected one of {', '.join(ALGORITHMS)}")
+    hashed_a, hashed_b = _hash_lines(a, b)
+    blocks: List[_Block] = []
+    align = _patience if algorithm == "patience" else _myers
+    align(hashed_a, 0, len(hashed_a), hashed_b, 0, len(hashed_b), blocks)
+
+    merged: List[_Block] = []
+    for i, j, size in sorted(blocks):
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        else:
+            merged.append((i, j, size))
+    merged.append((len(a), len(b), 0))
+    return merged
+
+
+def diff_opcodes(a: Sequence[Hashable], b: Sequence[Hashable], algorithm: str = "patience") -> List[Opcode]:
+    """Edit operations turning ``a`` into ``b``, like SequenceMatcher.get_opcodes()."""
+    opcodes: List[Opcode] = []
+    i = j = 0
+    for block_i, block_j, size in matching_blocks(a, b, algorithm):
+        tag = ""
+        if i < block_i and j < block_j:
+            tag = "replace"
+        elif i < block_i:
+            tag = "delete"
+        elif j < block_j:
+            tag = "insert"
+        if tag:
+            opcodes.append((tag, i, block_i, j, block_j))
+        i, j = block_i + size, block_j + size
+        if size:
+            opcodes.append(("equal", block_i, i, block_j, j))
+    return opcodes
+
+
+def _grouped(opcodes: List[Opcode], n: int) -> Iterator[List[Opcode]]:
+    """Hunks with up to ``n`` lines of context, like SequenceMatcher.get_grouped_opcodes()."""
+    codes = list(opcodes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+    group: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        # An equal run longer than twice the context splits the hunk
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _hunk_range(start: int, stop: int) -> str:
+    length = stop - start
+    beginning = start + 1
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1  # Empty ranges begin at the line just before
+    return f"{beginning},{length}"
+
+
+def mark_intraline(old: str, new: str) -> Tuple[str, str]:
+    """
+    Marks the words that changed between two versions of a line, as in
+    `git diff --word-diff`: deletions in ``old`` become ``[-...-]`` and
+    insertions in ``new`` become ``{+...+}``.
+    """
+    old_words, new_words = _WORDS.findall(old), _WORDS.findall(new)
+    old_parts: List[str] = []
+    new_parts: List[str] = []
+    for tag, i1, i2, j1, j2 in diff_opcodes(old_words, new_words, algorithm="myers"):
+        if tag == "equal":
+            old_parts.extend(old_words[i1:i2])
+            new_parts.extend(new_words[j1:j2])
+            continue
+        if i2 > i1:
+            old_parts.append(DELETE_MARKERS[0] + "".join(old_words[i1:i2]) + DELETE_MARKERS[1])
+        if j2 > j1:
+            new_parts.append(INSERT_MARKERS[0] + "".join(new_words[j1:j2]) + INSERT_MARKERS[1])
+    return "".join(old_parts), "".join(new_parts)
+
+
+def _replaced_lines(old: Sequence[str], new: Sequence[str], intraline: bool) -> Tuple[List[str], List[str]]:
+    if not intraline or len(old) != len(new):
+        return list(old), list(new)
+    # Line-for-line replacements: show what changed inside each line
+    pairs = [mark_intraline(old_line.rstrip("\r\n"), new_line.rstrip("\r\n")) for old_line, new_line in zip(old, new)]
+    return ([marked + line[len(line.rstrip("\r\n")):] for (marked, _), line in zip(pairs, old)],
+            [marked + line[len(line.rstrip("\r\n")):] for (_, marked), line in zip(pairs, new)])
+
+
+def unified_diff(a: Sequence[str], b: Sequence[str], fromfile: str = "", tofile: str = "",
+                 fromfiledate: str = "", tofiledate: str = "", n: int = 3, lineterm: str = "\n",
+                 algorithm: str = "patience", intraline: bool = False,
+                 opcodes: Optional[List[Opcode]] = None) -> Iterator[str]:
+    """
+    difflib.unified_diff on top of ``diff_opcodes``; same arguments and
+    output format, lazily generated hunk by hunk. With ``intraline`` the
+    changed words of line-for-line replacements are marked (for display;
+    the result is no longer a valid patch). Precomputed ``opcodes`` of
+    ``a`` and ``b`` may be passed in.
+    """
+    if opcodes is None:
+        opcodes = diff_opcodes(a, b, algorithm)
+    started = False
+    for group in _grouped(opcodes, n):
+        if not started:
+            started = True
+            from_date = f"\t{fromfiledate}" if fromfiledate else ""
+            to_date = f"\t{tofiledate}" if tofiledate else ""
+            yield f"--- {fromfile}{from_date}{lineterm}"
+            yield f"+++ {tofile}{to_date}{lineterm}"
+        first, last = group[0], group[-1]
+        yield f"@@ -{_hunk_range(first[1], last[2])} +{_hunk_range(first[3], last[4])} @@{lineterm}"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    yield " " + line
+                continue
+            old_lines, new_lines = _replaced_lines(a[i1:i2], b[j1:j2], intraline and tag == "replace")
+            for line in old_lines:
+                yield "-" + line
+            for line in new_lines:
+                yield "+" + line
+
+
+def line_changes(original: str, refactored: str, algorithm: str = "patience") -> Tuple[int, int]:
+    """(removed, added) line counts between two texts."""
+    removed = added = 0
+    for tag, i1, i2, j1, j2 in diff_opcodes(original.splitlines(), refactored.splitlines(), algorithm):
+        if tag != "equal":
+            removed += i2 - i1
+            added += j2 - j1
+    return removed, added
@@ -0,0 +1,138 @@
+# src/core/validation_cache.py
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from importlib import metadata
+from typing import Any, Dict, Iterable, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(".neurorefactor_cache", "validation")
+CACHE_VERSION = 4  # 4: entries are JSON instead of pickles
+TOOL_PACKAGES = ("libcst", "radon", "pytest", "pytest-json-report", "coverage", "bandit")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def tool_versions() -> Dict[str, str]:
+    """Versions of the Python interpreter and every tool a verdict depends on."""
+    versions = {"python": sys.version.split()[0]}
+    for package in TOOL_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = "missing"
+    ruff = shutil.which("ruff")
+    try:
+        versions["ruff"] = subprocess.run([ruff, "--version"], capture_output=True, text=True,
+                                          check=False).stdout.strip() if ruff else "missing"
+    except OSError:
+        versions["ruff"] = "missing"
+    return versions
+
+
+def _tag_tuples(value: Any) -> Any:
+    """JSON-ready copy of ``value`` with tuples marked, so they load as tuples again."""
+    if isinstance(value, tuple):
+        return {"__tuple__": [_tag_tuples(item) for item in value]}
+    if isinstance(value, list):
+        return [_tag_tuples(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _tag_tuples(item) for key, item in value.items()}
+    return value
+
+
+def _untag_tuples(obj: Dict[str, Any]) -> Any:
+    return tuple(obj["__tuple__"]) if obj.keys() == {"__tuple__"} else obj
+
+
+def file_fingerprints(paths: Iterable[str]) -> Dict[str, str]:
+    """sha256 of each file's content by absolute path ("missing" if absent)."""
+    fingerprints = {}
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                fingerprints[os.path.abspath(path)] = _sha256(f.read())
+        except OSError:
+            fingerprints[os.path.abspath(path)] = "missing"
+    return fingerprints
+
+
+class ValidationCache:
+    """
+    On-disk cache of validation verdicts.
+
+    Entries are keyed on the hashes of the original code, the refactored
+    code, the test files and the tool versions, so any change to an input
+    simply misses and stale verdicts are never returned. Each entry keeps
+    the time the original validation took. Entries are stored as JSON, so a
+    tampered cache can corrupt a verdict but never run code; results that
+    are not JSON data are not cached.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kind: str, original_code: str, refactored_code: str,
+            test_files: Optional[Iterable[str]] = None, **extra: Any) -> str:
+        """
+        Cache key for one validation. ``kind`` separates validators; ``extra``
+        holds any other option the verdict depends on.
+        """
+        payload = {
+            "version": CACHE_VERSION,
+            "kind": kind,
+            "original": _sha256(original_code.encode("utf-8")),
+            "refactored": _sha256(refactored_code.encode("utf-8")),
+            "tests": file_fingerprints(sorted(test_files or [])),
+            "tools": tool_versions(),
+            "extra": extra
+        }
+        return _sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8"))
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached entry ({result, duration, created_at}) or None."""
+        try:
+            with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f, object_hook=_untag_tuples)
+            if not isinstance(entry, dict) or "result" not in entry:
+                raise ValueError("Malformed cache entry")
+        except Exception:  # Unreadable or damaged entries are misses, whatever the damage
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, result: Any, duration: float) -> None:
+        entry = {"result": result, "duration": duration, "created_at": time.time()}
+        try:
+            data = json.dumps(_tag_tuples(entry))
+        except (TypeError, ValueError):
+            return  # Not JSON data: validate again next time
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, key: str) -> None:
+        if os.path.exists(self._entry_path(key)):
+            os.remove(self._entry_path(key))
+
+    def clear(self) -> None:
+        """Drops every entry, e.g. after changing tools in place."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        tool_versions.cache_clear()
@@ -0,0 +1,208 @@
+# src/inference/pipeline.py
+import concurrent.futures
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class GateResult:
+    """What a gate function returns. ``transient`` marks outcomes caused by
+    the environment (a missing tool, a timeout, a crash) rather than the code."""
+    passed: bool
+    message: str = ""
+    skipped: bool = False
+    details: Dict[str, Any] = field(default_factory=dict)
+    transient: bool = False
+
+
+@dataclass
+class GateReport:
+    """Outcome of one gate in a verdict. status is one of passed, failed,
+    skipped, error (the gate raised) or cancelled (not run after a failure)."""
+    name: str
+    status: str
+    message: str = ""
+    duration: float = 0.0
+    details: Dict[str, Any] = field(default_factory=dict)
+    transient: bool = False
+
+
+@dataclass
+class Verdict:
+    """Structured result of a gate pipeline; truthy when every gate passed."""
+    passed: bool
+    message: str
+    failed_gate: Optional[str] = None
+    gates: List[GateReport] = field(default_factory=list)
+    duration: float = 0.0
+    cached: bool = False
+
+    def __bool__(self) -> bool:
+        return self.passed
+
+    def gate(self, name: str) -> Optional[GateReport]:
+        return next((report for report in self.gates if report.name == name), None)
+
+    @property
+    def transient(self) -> bool:
+        """True when a gate raised or hit a transient condition, so running
+        again may give another verdict."""
+        return any(report.status == "error" or report.transient for report in self.gates)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Verdict":
+        return cls(**dict(data, gates=[GateReport(**report) for report in data["gates"]]))
+
+
+@dataclass
+class Gate:
+    """
+    A validation gate. ``cost`` orders gates (cheapest first) and
+    ``requires`` names gates that must pass before this one runs.
+    """
+    name: str
+    run: Callable[["GateContext"], GateResult]
+    cost: float = 1.0
+    requires: Tuple[str, ...] = ()
+
+
+class GateContext:
+    """
+    Inputs of one validation plus artifacts shared between gates. An
+    artifact (a parse tree, lint results...) is computed once, by whichever
+    gate asks first, even when gates run concurrently.
+    """
+
+    def __init__(self, before_code: str, after_code: str, test_files: Optional[Sequence[str]] = None):
+        self.before_code = before_code
+        self.after_code = after_code
+        self.test_files = list(test_files or [])
+        self._artifacts: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def artifact(self, name: str, factory: Callable[["GateContext"], Any]) -> Any:
+        """The artifact ``name``, computing it with ``factory(context)`` once.
+        A factory exception is re-raised to every gate that asks for it."""
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._artifacts:
+                try:
+                    self._artifacts[name] = (True, factory(self))
+                except Exception as e:
+                    self._artifacts[name] = (False, e)
+            ok, value = self._artifacts[name]
+        if not ok:
+            raise value
+        return value
+
+
+class GatePipeline:
+    """
+    Runs gates cheapest first. Gates whose requirements have passed run
+    concurrently on a thread pool; the first failing gate short-circuits
+    the pipeline and every gate not yet finished is reported as cancelled.
+    """
+
+    def __init__(self, gates: Sequence[Gate] = (), max_workers: int = 4):
+        self.gates: Dict[str, Gate] = {}
+        self.max_workers = max_workers
+        for gate in gates:
+            self.add(gate)
+
+    def add(self, gate: Gate) -> "GatePipeline":
+        if gate.name in self.gates:
+            raise ValueError(f"Duplicate gate: {gate.name}")
+        self.gates[gate.name] = gate
+        return self
+
+    def remove(self, name: str) -> "GatePipeline":
+        self.gates.pop(name, None)
+        return self
+
+    def _check(self) -> None:
+        for gate in self.gates.values():
+            missing = [name for name in gate.requires if name not in self.gates]
+            if missing:
+                raise ValueError(f"Gate {gate.name} requires unknown gate(s): {', '.join(missing)}")
+        visiting, done = set(), set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Gate dependency cycle through {name}")
+            visiting.add(name)
+            for required in self.gates[name].requires:
+                visit(required)
+            done.add(name)
+
+        for name in self.gates:
+            visit(name)
+
+    @staticmethod
+    def _run_gate(gate: Gate, context: GateContext) -> GateReport:
+        start = time.perf_counter()
+        try:
+            result = gate.run(context)
+            status = "skipped" if result.skipped else "passed" if result.passed else "failed"
+            report = GateReport(gate.name, status, result.message, details=result.details, transient=result.transient)
+        except Exception as e:
+            report = GateReport(gate.name, "error", f"{type(e).__name__}: {e}")
+        report.duration = time.perf_counter() - start
+        return report
+
+    def run(self, before_code: str, after_code: str, test_files: Optional[Sequence[str]] = None) -> Verdict:
+        self._check()
+        start = time.perf_counter()
+        context = GateContext(before_code, after_code, test_files)
+        reports: Dict[str, GateReport] = {}
+        failure: Optional[GateReport] = None
+        # Ties in cost keep registration order
+        order = {name: index for index, name in enumerate(self.gates)}
+        waiting = sorted(self.gates.values(), key=lambda gate: (gate.cost, order[gate.name]))
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        running: Dict[concurrent.futures.Future, str] = {}
+        try:
+            while waiting or running:
+                # Skipped requirements count as satisfied; failed ones never are
+                ready = [gate for gate in waiting
+                         if all(name in reports and reports[name].status in ("passed", "skipped") for name in gate.requires)]
+                for gate in ready:
+                    waiting.remove(gate)
+                    running[executor.submit(self._run_gate, gate, context)] = gate.name
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(list(running), return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: order[running[f]]):
+                    report = future.result()
+                    del running[future]
+                    reports[report.name] = report
+                    if report.status in ("failed", "error") and failure is None:
+                        failure = report
+                if failure is not None:
+                    break
+        finally:
+            # Gates already running cannot be interrupted; their results are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        for name in self.gates:
+            if name not in reports:
+                reason = f"Cancelled after {failure.name} failed" if failure else "Requirements not met"
+                reports[name] = GateReport(name, "cancelled", reason)
+
+        gates = [reports[gate.name] for gate in sorted(self.gates.values(), key=lambda gate: (gate.cost, order[gate.name]))]
+        if failure is None:
+            message = "All gates passed"
+        elif failure.status == "error":
+            message = f"Validation failed: {failure.name} gate raised {failure.message}"
+        else:
+            message = f"Validation failed: {failure.message}"
+        return Verdict(failure is None, message, failure.name if failure else None, gates, time.perf_counter() - start)
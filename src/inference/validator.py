@@ -1,64 +1,158 @@
 # src/inference/validator.py
 import libcst as cst
 from radon.complexity import cc_visit
-import ruff
-import subprocess
-import os
-import shutil
-
-# NOTE: The apply_edit function below is for SIMULATION ONLY.
-# In your final project, this logic will come from your refactoring agent.
-def apply_edit(code: str, edit_program: str):
-    """Applies a simple edit program to the code."""
-    if 'SIMPLIFY_CONDITION' in edit_program:
-        _, old, new = edit_program.split('"')
-        new = new.strip().strip(':')
-        return code.replace(old, new)
-    elif 'RENAME' in edit_program:
-        # Very simplified rename logic
-        if 'tmp' in code:
-            return code.replace("tmp", "count")
-    return code
-
-def validate_suggestion(before_code: str, after_code: str, test_files: list = None):
-    """Runs a 5-stage validation pipeline on the refactored code."""
-    
-    # Gate 1: AST Replay (Syntax Check)
+
+from src.core.edit_program import apply_program
+from src.core.lint import DEFAULT_LINT_ENGINE, LintUnavailableError
+from src.core.perf import PerformanceGate
+from src.core.security import DEFAULT_SECURITY_SCANNER, SecurityUnavailableError
+from src.core.validation_cache import ValidationCache
+from src.inference.pipeline import Gate, GateContext, GatePipeline, GateResult, Verdict
+
+# Shared by every call, so re-validating the same suggestion is instant
+DEFAULT_CACHE = ValidationCache()
+
+def apply_edit(code: str, edit_program: str) -> str:
+    """Applies an edit program (see src/core/edit_program.py) to the code.
+    Raises EditProgramError when the program is malformed or does not fit
+    the code; use src.core.edit_program.apply_programs to try many programs
+    on one parse."""
+    return apply_program(code, edit_program)
+
+# --- Shared artifacts: computed once per validation, whichever gate asks first ---
+
+def _after_tree(context: GateContext) -> cst.Module:
+    return cst.parse_module(context.after_code)
+
+def _complexity(code: str) -> int:
+    return sum(c.complexity for c in cc_visit(code))
+
+def _lint_delta(context: GateContext) -> dict:
+    # Before and after are linted by one ruff run (or come from the cache)
+    return DEFAULT_LINT_ENGINE.delta(context.before_code, context.after_code)
+
+
+# --- Gates ---
+
+def syntax_gate(context: GateContext) -> GateResult:
+    """Gate 1: AST Replay (Syntax Check)"""
     try:
-        cst.parse_module(after_code)
-    except cst.CSTSyntaxError:
-        print("Validation failed: Syntax error.")
-        return False
-        
-    # Gate 2: Style Check (only flag if *new* errors are introduced)
+        context.artifact("after_tree", _after_tree)
+    except cst.ParserSyntaxError as e:
+        return GateResult(False, f"Syntax error: {e.message}")
+    return GateResult(True, "Refactored code parses")
+
+def lint_gate(context: GateContext) -> GateResult:
+    """Gate 2: Style Check (only flag if *new* errors are introduced)"""
     try:
-        lint_errors_before = len(ruff.lint(before_code))
-        lint_errors_after = len(ruff.lint(after_code))
-        if lint_errors_after > lint_errors_before:
-            print("Validation failed: Introduced new lint errors.")
-            return False
-    except Exception:
-        pass # Skip if ruff fails
-        
-    # Gate 3: Complexity Guard (Refactoring must reduce or maintain CC)
+        delta = context.artifact("lint_delta", _lint_delta)
+    except LintUnavailableError as e:
+        return GateResult(True, f"Skipped: {e}", skipped=True, transient=True)
+    details = {"before": delta["before"], "after": delta["after"], "new": delta["new"]}
+    if delta["new"]:
+        rules = ", ".join(sorted({str(v["code"]) for v in delta["new"]}))
+        return GateResult(False, f"Introduced {len(delta['new'])} new lint error(s): {rules}", details=details)
+    return GateResult(True, f"Lint errors: {delta['before']} -> {delta['after']}", details=details)
+
+def complexity_gate(context: GateContext) -> GateResult:
+    """Gate 3: Complexity Guard (Refactoring must reduce or maintain CC)"""
     try:
-        complexity_before = sum(c.complexity for c in cc_visit(before_code))
-        complexity_after = sum(c.complexity for c in cc_visit(after_code))
-        if complexity_after >= complexity_before and complexity_before > 0:
-            print("Validation failed: Complexity did not improve.")
-            # We allow complexity to be the same only if the code was already simple (CC=1 or 0)
-            if complexity_after > 1:
-                return False
-    except Exception:
-        pass # Skip if radon fails
-
-    # Gate 4: Security Scan (Conceptual - requires `bandit` to be installed and integrated)
-    # This check is skipped for the initial setup.
-
-    # Gate 5: Test Pass-Through (Requires external files and proper environment setup)
-    if test_files:
-        # Test logic requires complex setup and is skipped for the initial setup.
-        # It relies on saving files and running subprocesses.
-        pass
-    
-    return True
\ No newline at end of file
+        before = context.artifact("complexity_before", lambda c: _complexity(c.before_code))
+        after = context.artifact("complexity_after", lambda c: _complexity(c.after_code))
+    except Exception as e:
+        return GateResult(True, f"Skipped: radon failed ({e})", skipped=True, transient=True)
+    details = {"before": before, "after": after}
+    # We allow complexity to be the same only if the code was already simple (CC=1 or 0)
+    if after >= before and before > 0 and after > 1:
+        return GateResult(False, "Complexity did not improve", details=details)
+    return GateResult(True, f"Complexity: {before} -> {after}", details=details)
+
+def security_gate(context: GateContext) -> GateResult:
+    """Gate 4: Security Scan (bandit checks on the changed functions only;
+    fails on issues of MEDIUM severity or higher that the change introduced)"""
+    try:
+        scan = DEFAULT_SECURITY_SCANNER.new_issues(context.before_code, context.after_code)
+    except SecurityUnavailableError as e:
+        return GateResult(True, f"Skipped: {e}", skipped=True, transient=True)
+    except SyntaxError as e:
+        return GateResult(True, f"Skipped: original code does not parse ({e})", skipped=True)
+    details = {"scanned_units": scan["scanned_units"], "new": scan["new"]}
+    if scan["new"]:
+        issues = ", ".join(f"{issue['test_id']} in {issue['unit']}" for issue in scan["new"])
+        return GateResult(False, f"Introduced security issue(s): {issues}", details=details)
+    return GateResult(True, f"No new security issues in {len(scan['scanned_units'])} changed unit(s)", details=details)
+
+def performance_gate(threshold: float = 0.25, memory_threshold: float = 0.5, **options):
+    """Gate 5: Performance Guard (micro-benchmarks the changed functions and
+    fails when one got slower than ``threshold`` or its peak memory grew by
+    more than ``memory_threshold``; extra options go to PerformanceGate).
+    This executes the suggested code, unsandboxed (see PerformanceGate)"""
+    benchmark = PerformanceGate(threshold=threshold, memory_threshold=memory_threshold, **options)
+
+    def gate(context: GateContext) -> GateResult:
+        try:
+            comparison = benchmark.compare(context.before_code, context.after_code)
+        except SyntaxError as e:
+            return GateResult(True, f"Skipped: original code does not parse ({e})", skipped=True)
+        details = {"functions": comparison["functions"]}
+        if comparison["regressions"]:
+            return GateResult(False, comparison["message"], details=details)
+        return GateResult(True, comparison["message"], skipped=not comparison["measured"], details=details,
+                          transient=comparison["error"] is not None)
+
+    # Part of the cache key, so verdicts under other thresholds are not reused
+    gate.config = dict(options, threshold=threshold, memory_threshold=memory_threshold)
+    return gate
+
+def tests_gate(context: GateContext) -> GateResult:
+    """Gate 6: Test Pass-Through"""
+    if not context.test_files:
+        return GateResult(True, "Skipped: no test files", skipped=True)
+    # The suggestion is not on disk, so the tests would run against the old
+    # code; file-based validation with tests is CodeValidator's job.
+    return GateResult(True, "Skipped: tests need the refactored code on disk (use CodeValidator)", skipped=True)
+
+
+def default_pipeline() -> GatePipeline:
+    """The standard gates; callers can add or remove gates on the result."""
+    return GatePipeline([
+        Gate("syntax", syntax_gate, cost=1),
+        Gate("complexity", complexity_gate, cost=2, requires=("syntax",)),
+        Gate("security", security_gate, cost=3, requires=("syntax",)),
+        Gate("lint", lint_gate, cost=5, requires=("syntax",)),
+        Gate("performance", performance_gate(), cost=50, requires=("syntax",)),
+        Gate("tests", tests_gate, cost=100, requires=("syntax",)),
+    ])
+
+
+DEFAULT_PIPELINE = default_pipeline()
+
+
+def validate_suggestion(before_code: str, after_code: str, test_files: list = None, cache: ValidationCache = None,
+                        use_cache: bool = True, pipeline: GatePipeline = None) -> Verdict:
+    """Runs the validation gate pipeline on the refactored code and returns
+    a structured Verdict (truthy when every gate passed) with per-gate
+    timings. Verdicts are cached on the hashes of both snippets, the test
+    files and the tool versions, unless a gate errored or was skipped for
+    a transient reason (a missing tool, a timeout)."""
+    pipeline = pipeline or DEFAULT_PIPELINE
+    cache = cache or DEFAULT_CACHE
+    key = None
+    if use_cache:
+        key = cache.key("validate_suggestion", before_code, after_code, test_files,
+                        gates=[(gate.name, gate.cost, gate.requires, getattr(gate.run, "config", None))
+                               for gate in pipeline.gates.values()])
+        entry = cache.get(key)
+        if entry is not None:
+            try:
+                verdict = Verdict.from_dict(entry["result"])
+            except (KeyError, TypeError):
+                verdict = None  # Not a verdict this version can read: validate again
+            if verdict is not None:
+                verdict.cached = True
+                return verdict
+
+    verdict = pipeline.run(before_code, after_code, test_files)
+    if key is not None and not verdict.transient:
+        cache.put(key, verdict.to_dict(), verdict.duration)
+    return verdict
@@ -1,45 +1,343 @@
 # src/reports/generator.py
+"""
+PDF audit reports.
+
+Reports are laid out with platypus flowables, so long diffs and tables
+continue on the next page instead of running off the first one. Every
+report gets its own file name (timestamp plus a random suffix) and is
+written to a temporary file that is renamed into place, so concurrent users
+never overwrite or read each other's half-written reports. Fonts and
+paragraph styles are set up once per process; batches of reports are
+rendered in a process pool.
+"""
 import os
-from reportlab.pdfgen import canvas
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+import reportlab
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle, XPreformatted
+
+from src.core.metrics import code_metrics
+from src.core.text_diff import unified_diff
+
+REPORT_DIR = "reports"
+# Diff lines beyond this are summarized in one line instead of being laid out
+MAX_DIFF_LINES = 3000
+# Functions shown in the per-function complexity chart
+MAX_CHART_FUNCTIONS = 15
+
+_DIFF_CHUNK = 60
+_MARGIN = 0.75 * inch
+# Page width less the side margins and the frame's padding
+_CODE_WIDTH = letter[0] - 2 * _MARGIN - 12
+_DIFF_COLORS = {"+": "#1a7f37", "-": "#cf222e", "@": "#0550ae"}
+_BEFORE_COLOR, _AFTER_COLOR = colors.HexColor("#9ca3af"), colors.HexColor("#2563eb")
+# Monospaced TTFs tried before falling back to Courier (Latin-1 only)
+_MONO_FONTS = ("/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
+               "/usr/share/fonts/dejavu/DejaVuSansMono.ttf",
+               "/Library/Fonts/Menlo.ttc")
+
+
+@lru_cache(maxsize=None)
+def _fonts() -> Tuple[str, str, str]:
+    """
+    (regular, bold, monospaced) font names, registered once per process.
+    The Vera fonts shipped with reportlab cover more than Latin-1.
+    """
+    regular, bold, mono = "Helvetica", "Helvetica-Bold", "Courier"
+    fonts_dir = os.path.join(os.path.dirname(reportlab.__file__), "fonts")
+    try:
+        pdfmetrics.registerFont(TTFont("Vera", os.path.join(fonts_dir, "Vera.ttf")))
+        pdfmetrics.registerFont(TTFont("VeraBd", os.path.join(fonts_dir, "VeraBd.ttf")))
+        regular, bold = "Vera", "VeraBd"
+    except Exception:
+        pass
+    for path in _MONO_FONTS:
+        if os.path.exists(path):
+            try:
+                pdfmetrics.registerFont(TTFont("ReportMono", path))
+                mono = "ReportMono"
+                break
+            except Exception:
+                continue
+    return regular, bold, mono
+
+
+@lru_cache(maxsize=None)
+def _styles() -> Dict[str, ParagraphStyle]:
+    """Paragraph styles of the report, built once per process."""
+    regular, bold, mono = _fonts()
+    return {
+        "title": ParagraphStyle("title", fontName=bold, fontSize=18, leading=22, spaceAfter=6),
+        "subtitle": ParagraphStyle("subtitle", fontName=regular, fontSize=9, leading=12,
+                                   textColor=colors.HexColor("#6b7280"), spaceAfter=12),
+        "heading": ParagraphStyle("heading", fontName=bold, fontSize=13, leading=16, spaceBefore=12, spaceAfter=6),
+        "body": ParagraphStyle("body", fontName=regular, fontSize=10, leading=13),
+        "note": ParagraphStyle("note", fontName=regular, fontSize=9, leading=12, textColor=colors.HexColor("#6b7280")),
+        "cell": ParagraphStyle("cell", fontName=regular, fontSize=9, leading=11),
+        "code": ParagraphStyle("code", fontName=mono, fontSize=7.5, leading=9.5),
+    }
+
+
+@lru_cache(maxsize=None)
+def _table_style() -> TableStyle:
+    regular, bold, _ = _fonts()
+    return TableStyle([
+        ("FONTNAME", (0, 0), (-1, 0), bold),
+        ("FONTNAME", (0, 1), (-1, -1), regular),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e5e7eb")),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f9fafb")]),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#d1d5db")),
+        ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ])
+
+
+def _unique_path(report_dir: str) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(report_dir, f"audit_report_{stamp}_{uuid.uuid4().hex[:8]}.pdf")
+
+
+def _format(value: Any) -> str:
+    if value is None:
+        return "N/A"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def _delta(before: Any, after: Any) -> str:
+    if isinstance(before, (int, float)) and isinstance(after, (int, float)) \
+            and not isinstance(before, bool) and not isinstance(after, bool):
+        return f"{after - before:+.2f}" if isinstance(after - before, float) else f"{after - before:+d}"
+    return ""
+
+
+def _summary_rows(before_metrics: Dict[str, Any], after_metrics: Dict[str, Any]) -> List[Tuple[str, Any, Any]]:
+    keys = list(before_metrics) + [key for key in after_metrics if key not in before_metrics]
+    if not keys:
+        keys = ["complexity", "lint_errors"]
+    return [(key, before_metrics.get(key), after_metrics.get(key)) for key in keys]
+
+
+def _label(key: str) -> str:
+    return key.replace("_", " ").title()
+
+
+def _metrics_table(rows: Sequence[Tuple[str, Any, Any]], first_column: str) -> Table:
+    styles = _styles()
+    data = [[first_column, "Before", "After", "Change"]]
+    data += [[Paragraph(escape(name), styles["cell"]), _format(before), _format(after), _delta(before, after)]
+             for name, before, after in rows]
+    table = Table(data, colWidths=[3.4 * inch, 1 * inch, 1 * inch, 1 * inch], repeatRows=1)
+    table.setStyle(_table_style())
+    return table
+
+
+def _bar_chart(labels: Sequence[str], before: Sequence[float], after: Sequence[float]) -> Drawing:
+    """Grouped before/after bars."""
+    regular, _, _ = _fonts()
+    drawing = Drawing(6.5 * inch, 2.6 * inch)
+    chart = VerticalBarChart()
+    chart.x, chart.y = 40, 45
+    chart.width, chart.height = 6.5 * inch - 60, 2.6 * inch - 75
+    chart.data = [list(before), list(after)]
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontName = regular
+    chart.valueAxis.labels.fontSize = 7
+    chart.categoryAxis.categoryNames = [label if len(label) <= 18 else label[:17] + "…" for label in labels]
+    chart.categoryAxis.labels.fontName = regular
+    chart.categoryAxis.labels.fontSize = 7
+    chart.categoryAxis.labels.angle = 30 if len(labels) > 5 else 0
+    chart.categoryAxis.labels.boxAnchor = "ne" if len(labels) > 5 else "n"
+    chart.bars[0].fillColor = _BEFORE_COLOR
+    chart.bars[1].fillColor = _AFTER_COLOR
+    drawing.add(chart)
+    legend = Legend()
+    legend.x, legend.y = drawing.width - 110, drawing.height - 5
+    legend.fontName, legend.fontSize = regular, 8
+    legend.colorNamePairs = [(_BEFORE_COLOR, "Before"), (_AFTER_COLOR, "After")]
+    drawing.add(legend)
+    return drawing
+
+
+def _function_complexity(code: Optional[str]) -> Optional[Dict[str, int]]:
+    """Complexity of each function and method, None if the code does not parse."""
+    if code is None:
+        return None
+    try:
+        blocks = code_metrics(code)["blocks"]
+    except (SyntaxError, ValueError):
+        return None
+    return {name: complexity for letter, name, complexity in blocks if letter != "C"}
+
+
+def _fold(line: str, style: ParagraphStyle, width: float = _CODE_WIDTH) -> List[str]:
+    """Pieces of a line no wider than ``width``: preformatted text never wraps."""
+    pieces, start, used = [], 0, 0.0
+    for index, char in enumerate(line):
+        advance = pdfmetrics.stringWidth(char, style.fontName, style.fontSize)
+        if used + advance > width and index > start:
+            pieces.append(line[start:index])
+            start, used = index, 0.0
+        used += advance
+    pieces.append(line[start:])
+    return pieces
+
+
+def _diff_flowables(original_code: str, refactored_code: str, max_lines: int) -> List[Any]:
+    """The unified diff as colored code blocks of a few dozen lines each."""
+    styles = _styles()
+    lines = []
+    for line in unified_diff(original_code.splitlines(), refactored_code.splitlines(),
+                             fromfile="original", tofile="refactored", lineterm=""):
+        lines.append(line)
+        if len(lines) > max_lines:
+            break
+    if not lines:
+        return [Paragraph("No textual changes.", styles["note"])]
+    omitted = len(lines) > max_lines
+    lines = lines[:max_lines]
+
+    flowables: List[Any] = []
+    for start in range(0, len(lines), _DIFF_CHUNK):
+        markup = []
+        for line in lines[start:start + _DIFF_CHUNK]:
+            color = None if line.startswith(("---", "+++")) else _DIFF_COLORS.get(line[:1])
+            for piece in _fold(line.expandtabs(4), styles["code"]):
+                text = escape(piece)
+                markup.append(f'<font color="{color}">{text}</font>' if color else text)
+        flowables.append(XPreformatted("\n".join(markup), styles["code"]))
+    if omitted:
+        flowables.append(Paragraph(f"Diff truncated after {max_lines} lines.", styles["note"]))
+    return flowables
+
+
+def _page_footer(canvas, doc) -> None:
+    regular, _, _ = _fonts()
+    canvas.saveState()
+    canvas.setFont(regular, 8)
+    canvas.setFillColor(colors.HexColor("#6b7280"))
+    canvas.drawString(doc.leftMargin, 0.5 * inch, "AI Refactor Agent - Audit Report")
+    canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 0.5 * inch, f"Page {doc.page}")
+    canvas.restoreState()
+
+
+def _story(edit_program: str, before_metrics: Dict[str, Any], after_metrics: Dict[str, Any],
+           original_code: Optional[str], refactored_code: Optional[str], max_diff_lines: int) -> List[Any]:
+    styles = _styles()
+    program = "\n".join(piece for line in str(edit_program).splitlines() for piece in _fold(line, styles["code"]))
+    story: List[Any] = [
+        Paragraph("AI Refactor Agent - Audit Report", styles["title"]),
+        Paragraph(escape(time.strftime("Generated %Y-%m-%d %H:%M:%S")), styles["subtitle"]),
+        Paragraph("Suggested Change", styles["heading"]),
+        XPreformatted(escape(program), styles["code"]),
+    ]
+
+    # --- Summary metrics ---
+    rows = _summary_rows(before_metrics, after_metrics)
+    story += [Paragraph("Metrics", styles["heading"]),
+              _metrics_table([(_label(key), before, after) for key, before, after in rows], "Metric")]
+    numeric = [(key, before, after) for key, before, after in rows
+               if isinstance(before, (int, float)) and isinstance(after, (int, float))
+               and not isinstance(before, bool) and not isinstance(after, bool)]
+    if numeric:
+        story += [Spacer(1, 8), _bar_chart([_label(key) for key, _, _ in numeric],
+                                           [before for _, before, _ in numeric], [after for _, _, after in numeric])]
+
+    # --- Per-function metrics ---
+    before_functions = _function_complexity(original_code)
+    after_functions = _function_complexity(refactored_code)
+    if before_functions is not None or after_functions is not None:
+        before_functions, after_functions = before_functions or {}, after_functions or {}
+        names = list(before_functions) + [name for name in after_functions if name not in before_functions]
+        story.append(Paragraph("Per-Function Complexity", styles["heading"]))
+        if names:
+            story.append(_metrics_table([(name, before_functions.get(name), after_functions.get(name))
+                                         for name in names], "Function"))
+            charted = sorted(names, key=lambda name: -max(before_functions.get(name, 0),
+                                                          after_functions.get(name, 0)))[:MAX_CHART_FUNCTIONS]
+            story += [Spacer(1, 8), KeepTogether([
+                Paragraph(f"Most complex functions (top {len(charted)})", styles["note"]),
+                _bar_chart(charted, [before_functions.get(name, 0) for name in charted],
+                           [after_functions.get(name, 0) for name in charted])])]
+        else:
+            story.append(Paragraph("No functions found.", styles["note"]))
+
+    # --- Diff ---
+    if original_code is not None and refactored_code is not None:
+        story.append(Paragraph("Code Changes", styles["heading"]))
+        story += _diff_flowables(original_code, refactored_code, max_diff_lines)
+
+    # --- Rollback ---
+    story += [KeepTogether([
+        Paragraph("Rollback Instructions", styles["heading"]),
+        Paragraph("1. Ensure your code is under version control (e.g., Git).", styles["body"]),
+        Paragraph("2. Run 'git revert &lt;commit-hash&gt;' to undo the changes.", styles["body"]),
+    ])]
+    return story
+
+
+def generate_audit_report(edit_program, before_metrics, after_metrics, original_code: Optional[str] = None,
+                          refactored_code: Optional[str] = None, report_dir: str = REPORT_DIR,
+                          output_path: Optional[str] = None, max_diff_lines: int = MAX_DIFF_LINES) -> str:
+    """
+    Generates a PDF audit report and returns its path.
+
+    Without ``output_path`` the report gets a unique name in ``report_dir``.
+    Passing both versions of the code adds per-function complexity tables,
+    a chart and the diff.
+    """
+    if output_path is None:
+        output_path = _unique_path(report_dir)
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+
+    story = _story(edit_program, before_metrics or {}, after_metrics or {}, original_code, refactored_code,
+                   max_diff_lines)
+    # Render next to the target and rename, so the report appears complete or not at all
+    temp_path = f"{output_path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        doc = SimpleDocTemplate(temp_path, pagesize=letter, title="AI Refactor Agent - Audit Report",
+                                leftMargin=_MARGIN, rightMargin=_MARGIN,
+                                topMargin=0.75 * inch, bottomMargin=0.85 * inch)
+        doc.build(story, onFirstPage=_page_footer, onLaterPages=_page_footer)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    print(f"PDF report saved to {output_path}")
+    return output_path
+
+
+def _render_job(job: Dict[str, Any]) -> str:
+    """Worker: one report of a batch (fonts and styles are cached per worker)."""
+    return generate_audit_report(**job)
+
 
-def generate_audit_report(edit_program, before_metrics, after_metrics):
-    """Generates a PDF audit report."""
-    filename = "audit_report.pdf"
-    
-    # Create the reports directory if it doesn't exist
-    report_dir = "reports"
-    if not os.path.exists(report_dir):
-        os.makedirs(report_dir)
-        
-    c = canvas.Canvas(os.path.join(report_dir, filename), pagesize=letter)
-    width, height = letter
-    y_pos = height - 50
-
-    c.drawString(50, y_pos, "AI Refactor Agent - Audit Report")
-    y_pos -= 30
-    c.drawString(50, y_pos, f"Suggested Change: {edit_program}")
-    
-    y_pos -= 40
-    c.drawString(50, y_pos, "Metrics Before Refactoring:")
-    y_pos -= 20
-    c.drawString(50, y_pos, f"  - Complexity: {before_metrics.get('complexity', 'N/A')}")
-    y_pos -= 20
-    c.drawString(50, y_pos, f"  - Lint Errors: {before_metrics.get('lint_errors', 'N/A')}")
-
-    y_pos -= 30
-    c.drawString(50, y_pos, "Metrics After Refactoring:")
-    y_pos -= 20
-    c.drawString(50, y_pos, f"  - Complexity: {after_metrics.get('complexity', 'N/A')}")
-    y_pos -= 20
-    c.drawString(50, y_pos, f"  - Lint Errors: {after_metrics.get('lint_errors', 'N/A')}")
-    
-    y_pos -= 40
-    c.drawString(50, y_pos, "Rollback Instructions:")
-    y_pos -= 20
-    c.drawString(50, y_pos, "1. Ensure your code is under version control (e.g., Git).")
-    y_pos -= 20
-    c.drawString(50, y_pos, "2. Run 'git revert <commit-hash>' to undo the changes.")
-    
-    c.save()
-    print(f"PDF report saved to {os.path.join(report_dir, filename)}")
\ No newline at end of file
+def generate_audit_reports(jobs: Sequence[Dict[str, Any]], max_workers: Optional[int] = None) -> List[str]:
+    """
+    Renders many reports in a process pool; each job holds
+    generate_audit_report's keyword arguments. Returns the paths in job
+    order.
+    """
+    jobs = list(jobs)
+    if len(jobs) <= 1 or max_workers == 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_render_job, jobs))
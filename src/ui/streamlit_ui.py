@@ -1,5 +1,6 @@
 import streamlit as st
-import difflib
+
+from src.core.text_diff import unified_diff
 
 def inject_custom_css():
     st.markdown("""
@@ -499,7 +500,7 @@ def show_results_ui(before_code, after_code, before_metrics, after_metrics, edit
     tab1, tab2 = st.tabs(["⚡ Unified Diff", "📝 Side-by-Side View"])
 
     with tab1:
-        diff_lines = list(difflib.unified_diff(
+        diff_lines = list(unified_diff(
             before_code.splitlines(),
             after_code.splitlines(),
             lineterm=''
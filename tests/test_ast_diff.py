@@ -0,0 +1,143 @@
+# tests/test_ast_diff.py
+"""
+Tests for the Merkle-hashed structural AST diff, alpha-equivalence and
+their use in CodeValidator
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from src.core.ast_diff import alpha_equivalent, structural_diff
+from validator import CodeValidator
+
+ORIGINAL = """import os
+
+def area(w, h):
+    return w * h
+
+class Shape:
+    def scale(self, k):
+        self.w *= k
+        self.h *= k
+
+def perimeter(w, h):
+    return 2 * (w + h)
+"""
+
+
+def _kinds(diff):
+    return [(c.kind, c.node_type, c.scope, c.old_lines, c.new_lines) for c in diff.changes]
+
+
+def test_formatting_and_comments_are_identical():
+    reformatted = ORIGINAL.replace("return w * h", "return (w *   h)  # product")
+    diff = structural_diff(ORIGINAL, reformatted)
+
+    assert diff.identical and diff.changes == [] and diff.risk_score == 0.0
+
+
+def test_modified_added_removed_with_line_ranges():
+    changed = ORIGINAL.replace("return w * h", "return w * h * 1").replace(
+        "        self.h *= k\n", "        self.h *= k\n        self.d *= k\n").replace(
+        "import os\n", "")
+    diff = structural_diff(ORIGINAL, changed)
+
+    assert _kinds(diff) == [
+        ("removed", "Import", "", (1, 1), None),
+        ("modified", "Return", "area", (4, 4), (3, 3)),
+        ("added", "AugAssign", "Shape.scale", None, (9, 9)),
+    ]
+    assert 0 < diff.risk_score < 50
+
+
+def test_moves_are_detected():
+    moved = ORIGINAL.replace("class Shape", "class Other:\n    pass\n\nclass Shape").replace(
+        "def perimeter(w, h):\n    return 2 * (w + h)\n", "")
+    moved = moved.replace("import os\n", "import os\n\ndef perimeter(w, h):\n    return 2 * (w + h)\n")
+    diff = structural_diff(ORIGINAL, moved)
+
+    assert diff.summary() == {"added": 1, "removed": 0, "moved": 1, "modified": 0}
+    assert [c.old_lines for c in diff.changes if c.kind == "moved"] == [(11, 12)]
+
+
+def test_renamed_function_is_modified_not_replaced():
+    diff = structural_diff(ORIGINAL, ORIGINAL.replace("def perimeter", "def circumference"))
+
+    assert _kinds(diff) == [("modified", "FunctionDef", "", (11, 12), (11, 12))]
+
+
+def test_large_files_with_deep_expressions():
+    deep = "x = " + " + ".join(["1"] * 800) + "\n"
+    source = ORIGINAL * 200 + deep
+    diff = structural_diff(source, source.replace("return 2 * (w + h)", "return 2 * w + 2 * h", 1))
+
+    assert diff.summary()["modified"] == 1
+    assert diff.similarity > 0.99
+
+
+def test_validator_reports_structural_changes(tmp_path):
+    original = tmp_path / "original.py"
+    refactored = tmp_path / "refactored.py"
+    original.write_text(ORIGINAL, encoding="utf-8")
+    refactored.write_text(ORIGINAL.replace("w * h", "h * w"), encoding="utf-8")
+
+    results = CodeValidator().validate_refactoring(str(original), str(refactored))
+
+    comparison = results["ast_comparison"]
+    assert not comparison["structural_similarity"]
+    assert comparison["message"] == "ASTs differ: 1 modified"
+    assert comparison["changes"][0]["old_lines"] == (4, 4)
+    assert results["risk_score"] == comparison["risk_score"] > 0
+
+
+def test_alpha_equivalence():
+    renamed = (
+        "def area(w, h):\n"
+        "    '''Rectangle area.'''\n"
+        "    product = w * h\n"
+        "    return product\n"
+    )
+    assert alpha_equivalent("def area(w, h):\n    result = w * h\n    return result\n", renamed)
+    assert alpha_equivalent("def f(a, /, *args, **kw):\n    return a, args, kw\n",
+                            "def f(b, /, *rest, **options):\n    return b, rest, options\n")
+    # Swapped operands, renamed module-level names and captured globals are real changes
+    assert not alpha_equivalent("def area(w, h):\n    return w * h\n", "def area(w, h):\n    return h * w\n")
+    assert not alpha_equivalent("def area(w, h):\n    return w * h\n", "def size(w, h):\n    return w * h\n")
+    assert not alpha_equivalent("k = 2\ndef f(a):\n    return a * k\n", "k = 2\ndef f(k):\n    return k * k\n")
+    # Closures resolve to the enclosing function's canonical names
+    assert alpha_equivalent("def f(a):\n    t = a\n    return lambda: t\n",
+                            "def f(a):\n    s = a\n    return lambda: s\n")
+
+
+def test_parameter_rename_is_not_alpha_equivalent():
+    # Callers may pass these by keyword: area(width=2, height=3) breaks after the rename
+    assert not alpha_equivalent("def area(width, height):\n    return width * height\n",
+                                "def area(w, h):\n    return w * h\n")
+    assert not alpha_equivalent("def f(*, key):\n    return key\n", "def f(*, k):\n    return k\n")
+    assert not alpha_equivalent("scale = lambda factor: factor * 2\n", "scale = lambda f: f * 2\n")
+
+
+def test_validator_accepts_pure_renames_without_running_tests(tmp_path, monkeypatch):
+    original = tmp_path / "original.py"
+    refactored = tmp_path / "refactored.py"
+    test_file = tmp_path / "test_original.py"
+    original.write_text(ORIGINAL.replace("return 2 * (w + h)", "half = w + h\n    return 2 * half"),
+                        encoding="utf-8")
+    refactored.write_text(ORIGINAL.replace("return 2 * (w + h)", "semi = w + h\n    return 2 * semi"),
+                          encoding="utf-8")
+    test_file.write_text("def test_nothing():\n    pass\n", encoding="utf-8")
+    validator = CodeValidator()
+    monkeypatch.setattr(validator, "_run_unit_tests", lambda *args: pytest.fail("pytest was spawned"))
+
+    results = validator.validate_refactoring(str(original), str(refactored), str(test_file))
+
+    assert results["overall_success"]
+    assert results["ast_comparison"]["alpha_equivalent"]
+    assert results["unit_tests"]["skipped"]
+    assert results["risk_score"] == 0.0
+    assert CodeValidator().validate_refactoring(str(original), str(refactored))["overall_success"]
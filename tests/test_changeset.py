@@ -0,0 +1,148 @@
+# tests/test_changeset.py
+"""
+Tests for transactional, atomic application of multi-file changesets
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import changeset
+from changeset import ChangesetWriter
+from refactorer import AutomatedRefactorer
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / "src" / f"mod{i}.py"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(f"x = {i}\n", encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def writer(tmp_path):
+    return ChangesetWriter(str(tmp_path / "backups"), max_workers=2)
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_apply_and_rollback(writer, files):
+    new_file = os.path.join(os.path.dirname(files[0]), "new.py")
+    changes = {path: f"y = {i}\n" for i, path in enumerate(files)}
+    changes[files[2]] = "x = 2\n"  # unchanged
+    changes[new_file] = "z = 1\n"
+
+    result = writer.apply(changes)
+
+    assert result["success"], result["message"]
+    assert len(result["written"]) == 3 and result["unchanged"] == [files[2]]
+    assert _read(files[0]) == "y = 0\n" and _read(new_file) == "z = 1\n"
+    assert not [name for name in os.listdir(os.path.dirname(files[0])) if name.endswith(".tmp")]
+
+    rollback = writer.rollback()
+    assert rollback["success"], rollback["message"]
+    assert [_read(path) for path in files] == ["x = 0\n", "x = 1\n", "x = 2\n"]
+    assert not os.path.exists(new_file)
+    assert writer.transactions()[0]["status"] == "rolled_back"
+
+
+def test_identical_backups_are_stored_once(writer, files):
+    writer.apply({files[0]: "a = 1\n"})
+    writer.rollback()
+    writer.apply({files[0]: "b = 1\n"})
+
+    objects = [name for _, _, names in os.walk(writer.store.objects_dir) for name in names]
+    assert len(objects) == 1
+
+
+def test_failed_swap_restores_every_file(writer, files, monkeypatch):
+    real_replace = os.replace
+    calls = []
+
+    def flaky_replace(src, dst):
+        if dst in files:
+            calls.append(dst)
+        if dst == files[1] and len(calls) == 2:
+            raise OSError("disk full")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(changeset.os, "replace", flaky_replace)
+    result = writer.apply({path: "broken\n" for path in files})
+
+    assert not result["success"]
+    assert "disk full" in result["message"]
+    assert [_read(path) for path in files] == ["x = 0\n", "x = 1\n", "x = 2\n"]
+    assert writer.transactions()[0]["status"] == "rolled_back"
+
+
+def test_recover_rolls_back_pending_transactions(writer, files):
+    result = writer.apply({files[0]: "y = 0\n"})
+    journal = writer._read_journal(result["transaction_id"])
+    journal["status"] = "pending"  # as if the process died before committing
+    writer._write_journal(journal)
+
+    assert writer.recover() == [result["transaction_id"]]
+    assert _read(files[0]) == "x = 0\n"
+
+
+def test_recover_skips_transactions_of_live_processes(writer, files):
+    result = writer.apply({files[0]: "y = 0\n"})
+    journal = writer._read_journal(result["transaction_id"])
+    journal["status"] = "pending"
+    writer._write_journal(journal)
+
+    lock = writer._lock(result["transaction_id"])  # as if its owner were still applying it
+    with open(writer._lock_path(result["transaction_id"]), encoding="ascii") as f:
+        assert f.read() == str(os.getpid())
+    try:
+        assert writer.recover() == []
+        assert _read(files[0]) == "y = 0\n"
+    finally:
+        writer._unlock(result["transaction_id"], lock)
+
+    assert writer.recover() == [result["transaction_id"]]
+    assert not [name for name in os.listdir(writer.journal_dir) if name.endswith(".lock")]
+
+
+def test_rollback_refuses_to_overwrite_later_edits(writer, files):
+    writer.apply({files[0]: "y = 0\n", files[1]: "y = 1\n"})
+    with open(files[1], "w", encoding="utf-8") as f:
+        f.write("edited = True\n")
+
+    refused = writer.rollback()
+    assert not refused["success"]
+    assert refused["conflicts"] == [files[1]]
+    assert [_read(path) for path in files[:2]] == ["y = 0\n", "edited = True\n"]
+
+    forced = writer.rollback(force=True)
+    assert forced["success"], forced["message"]
+    assert [_read(path) for path in files[:2]] == ["x = 0\n", "x = 1\n"]
+
+
+def test_new_files_get_the_umask_mode(writer, tmp_path):
+    path = str(tmp_path / "created.py")
+    umask = os.umask(0o027)
+    try:
+        assert writer.apply({path: "x = 1\n"})["success"]
+    finally:
+        os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+
+def test_refactorer_save_and_rollback(tmp_path, files):
+    refactorer = AutomatedRefactorer(backup_dir=str(tmp_path / "backups"))
+
+    assert refactorer.save_refactored_code(files[0], "saved = True\n")
+    assert _read(files[0]) == "saved = True\n"
+    assert refactorer.rollback()["success"]
+    assert _read(files[0]) == "x = 0\n"
@@ -0,0 +1,108 @@
+# tests/test_differential_tester.py
+"""
+Tests for the differential execution equivalence checker
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from differential_tester import DifferentialTester, generate_inputs
+from validator import CodeValidator
+
+ORIGINAL = """
+from typing import List, Optional
+
+
+def total(values: List[int]) -> int:
+    result = 0
+    for value in values:
+        result += value
+    return result
+
+
+def first(values: List[int], default: Optional[int] = None):
+    if values:
+        return values[0]
+    return default
+
+
+def spin(n: int):
+    while True:
+        pass
+
+
+class Box:
+    def total(self, values):
+        return 0
+"""
+
+
+@pytest.fixture(scope="module")
+def tester():
+    with DifferentialTester(workers=2, cases=12, time_limit=0.02) as tester:
+        yield tester
+
+
+def test_inputs_follow_annotations():
+    inputs = generate_inputs([{"name": "xs", "annotation": "List[int]"}, {"name": "flag", "annotation": "bool"}], 20)
+    assert len(inputs) == 20
+    assert all(isinstance(xs, list) and all(type(x) is int for x in xs) and type(flag) is bool for xs, flag in inputs)
+    assert generate_inputs([{"name": "path", "annotation": "pathlib.Path"}], 5) is None
+
+
+def test_behavior_changes_are_found(tester):
+    refactored = ORIGINAL.replace("        result += value\n    return result", "        result += value\n    return sum(values)") \
+        .replace("return values[0]", "return values[-1]")
+    report = tester.check(ORIGINAL, refactored)
+    assert report["equivalent"] is False
+    assert report["functions"]["total"]["status"] == "equivalent"
+    assert report["functions"]["first"]["status"] == "different"
+    assert "spin" not in report["functions"]  # Unchanged, so never called
+    assert "Box" not in report["functions"]
+
+
+def test_only_changed_functions_run_in_a_scratch_directory(tester, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writer = "\n\ndef save(n: int) -> int:\n    with open('saved.txt', 'w') as f:\n        f.write(str(n))\n    return n\n"
+    report = tester.check(ORIGINAL + writer, ORIGINAL + writer.replace("return n", "return n + 0"))
+    assert report["functions"] == {"save": {"status": "equivalent", "cases": 12}}
+    assert os.listdir(tmp_path) == []
+
+    refactored = ORIGINAL.replace("while True:\n        pass", "while n:\n        pass")
+    assert tester.check(ORIGINAL, refactored)["functions"]["spin"]["status"] == "error"  # Every call times out
+
+
+def test_changed_signatures_are_skipped(tester):
+    report = tester.check(ORIGINAL, ORIGINAL.replace("values: List[int]) -> int", "values: List[float]) -> float"))
+    assert report["functions"]["total"] == {"status": "skipped", "reason": "Signature or annotations changed"}
+
+
+def test_validator_uses_differential_evidence_without_tests(tmp_path, tester):
+    original = tmp_path / "original.py"
+    original.write_text(ORIGINAL, encoding="utf-8")
+    rewritten = tmp_path / "rewritten.py"
+    rewritten.write_text(ORIGINAL.replace("    result = 0\n    for value in values:\n        result += value\n    return result",
+                                          "    return sum(values)"), encoding="utf-8")
+    results = CodeValidator(differential_tester=tester).validate_refactoring(str(original), str(rewritten))
+    assert results["overall_success"]
+    assert results["differential"]["functions"]["total"]["status"] == "equivalent"
+
+
+def test_calls_that_never_reach_the_body_are_not_evidence(tmp_path, tester):
+    original = "def scaled(a: int, *, scale: int) -> int:\n    return a * scale\n"
+    original_path = tmp_path / "original.py"
+    original_path.write_text(original, encoding="utf-8")
+    rewritten_path = tmp_path / "rewritten.py"
+    rewritten_path.write_text(original.replace("a * scale", "a + scale"), encoding="utf-8")
+    results = CodeValidator(differential_tester=tester).validate_refactoring(str(original_path), str(rewritten_path))
+    assert not results["overall_success"]
+    assert "scaled" not in results["differential"]["functions"]  # Required keyword-only: cannot be called
+
+    rejected = "def size(n: int) -> int:\n    return len(n)\n"
+    report = tester.check(rejected, rejected.replace("len(n)", "len(n) + 1"))
+    assert report["functions"]["size"] == {"status": "error", "cases": 12,
+                                           "reason": "Every call raised TypeError on both sides"}
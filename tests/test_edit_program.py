@@ -0,0 +1,112 @@
+# tests/test_edit_program.py
+"""
+Tests for the edit-program language
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.edit_program import EditNotApplicableError, EditProgramError, apply_programs, parse_program
+from src.inference.validator import apply_edit
+
+CODE = '''def count_items(items, flag):
+    tmp = 0
+    for item in items:
+        if flag == True:
+            tmp += 1
+    label = "tmp"
+    return tmp
+
+
+class Shape:
+    def area(self, w, h):
+        base = w * h
+        return base if w > 0 else 0
+'''
+
+
+def test_rename_is_scoped():
+    result = apply_edit(CODE, "RENAME tmp -> count IN count_items")
+    assert "count = 0" in result and "count += 1" in result and "return count" in result
+    assert 'label = "tmp"' in result  # Strings are not identifiers
+    with pytest.raises(EditNotApplicableError):
+        apply_edit(CODE, "RENAME tmp -> label")  # Would capture an existing name
+
+
+
+@pytest.mark.parametrize("code", [
+    "def f():\n    tmp = 1\n    def g():\n        count = 2\n        return tmp + count\n    return g()\n",
+    "count = 5\n\ndef f():\n    tmp = 1\n    def g():\n        return count\n    return g() + tmp\n",
+])
+def test_rename_refuses_capture_in_nested_scopes(code):
+    with pytest.raises(EditNotApplicableError):
+        apply_edit(code, "RENAME tmp -> count IN f")
+
+
+def test_rename_allows_unrelated_inner_bindings():
+    code = "def f():\n    tmp = 1\n    def g():\n        count = 2\n        return count\n    return g() + tmp\n"
+    assert apply_edit(code, "RENAME tmp -> count IN f").endswith("    return g() + count\n")
+
+
+def test_simplify_condition_and_legacy_form():
+    expected = CODE.replace("if flag == True:", "if flag:")
+    assert apply_edit(CODE, 'SIMPLIFY_CONDITION "flag==True" -> "flag"') == expected
+    assert apply_edit(CODE, 'SIMPLIFY_CONDITION "if flag == True" flag:') == expected
+
+
+def test_inline_and_extract():
+    inlined = apply_edit(CODE, "INLINE base IN Shape.area")
+    assert "return (w * h) if w > 0 else 0" in inlined and "base" not in inlined
+    extracted = apply_edit(CODE, "EXTRACT LINES 3-5 AS tally")
+    assert "tmp = tally(items, flag, tmp)" in extracted and "def tally(items, flag, tmp):" in extracted
+
+
+@pytest.mark.parametrize("code, reason", [
+    # Would read self.items after it was replaced
+    ("def swap(self):\n    acc = self.items\n    self.items = []\n    return acc\n", "names and immutable"),
+    # Would build three different lists
+    ("def build(out):\n    acc = []\n    out.append(acc)\n    acc.append(1)\n    return acc\n", "names and immutable"),
+    ("def pair(a, b):\n    acc = (a, b)\n    return acc\n", "names and immutable"),
+    ("def first(rows):\n    acc = rows[0]\n    return acc\n", "names and immutable"),
+    ("async def fetch(job):\n    acc = await job\n    return acc\n", "names and immutable"),
+    # Would compare after box.size changed
+    ("def grow(box, limit):\n    acc = box > limit\n    box.size = 3\n    return acc\n", "'box' is modified"),
+    ("def bump(counts, key):\n    acc = counts + key\n    counts[key] += 1\n    return acc\n", "'counts' is modified"),
+])
+def test_inline_refuses_values_that_could_change(code, reason):
+    with pytest.raises(EditNotApplicableError, match=reason):
+        apply_edit(code, "INLINE acc")
+
+
+def test_inline_allows_stores_after_the_last_use():
+    code = "def grow(box, limit):\n    acc = box > limit\n    print(acc)\n    box.size = 3\n"
+    assert apply_edit(code, "INLINE acc") == "def grow(box, limit):\n    print((box > limit))\n    box.size = 3\n"
+
+
+def test_multi_statement_program():
+    program = """
+    # Comments and blank lines are ignored
+    RENAME tmp -> count; SIMPLIFY_CONDITION "w > 0" -> "w >= 1" IN Shape.area
+    """
+    result = apply_edit(CODE, program)
+    assert "return count" in result and "base if w >= 1 else 0" in result
+
+
+@pytest.mark.parametrize("program", ["FOO x", "RENAME a ->", "RENAME a -> class", 'SIMPLIFY_CONDITION "x ==" -> "x"',
+                                     "EXTRACT LINES 5-3 AS f", "APPLY unknown", ""])
+def test_malformed_programs(program):
+    with pytest.raises(EditProgramError):
+        parse_program(program)
+
+
+def test_many_programs_on_one_parse():
+    results = apply_programs(CODE, ["RENAME tmp -> count", "INLINE base", "RENAME missing -> x",
+                                    "RENAME tmp -> count\nINLINE tmp"])
+    assert [r["success"] for r in results] == [True, True, False, False]
+    assert "No binding of 'missing'" in results[2]["message"]
+    assert results[3]["message"].startswith("line 2:")  # Failing statement is reported
+    assert results[2]["code"] == CODE
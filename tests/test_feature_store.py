@@ -0,0 +1,67 @@
+# tests/test_feature_store.py
+"""
+Tests for the compact feature store (metadata rows + float16 embedding sidecar)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from feature_store import FeatureStore, write_feature_store
+
+
+def _features(file_path, seed):
+    rng = np.random.default_rng(seed)
+    return {
+        "file_path": os.path.abspath(file_path),
+        "lines_of_code": 20,
+        "file_metrics": {"cyclomatic_complexity": 3, "maintainability_index": 70.0},
+        "file_embedding": rng.standard_normal(768).tolist(),
+        "functions": [
+            {"name": "add", "start_line": 1, "end_line": 2,
+             "metrics": {"cyclomatic_complexity": 1}, "embedding": rng.standard_normal(768)},
+            {"name": "empty", "start_line": 4, "end_line": 5,
+             "metrics": {"cyclomatic_complexity": 1}, "embedding": []},
+        ],
+        "classes": [
+            {"name": "Box", "start_line": 7, "end_line": 20,
+             "metrics": {"cyclomatic_complexity": 1}, "embedding": rng.standard_normal(768)},
+        ],
+    }
+
+
+@pytest.mark.parametrize("metadata_format", ["jsonl", "parquet"])
+def test_round_trip_and_filter(tmp_path, metadata_format):
+    features = [_features("a.py", 0), _features("b.py", 1)]
+    manifest = write_feature_store(features, str(tmp_path), metadata_format=metadata_format)
+
+    assert manifest["rows"] == 8
+    assert np.load(tmp_path / "embeddings.npy").dtype == np.float16
+
+    store = FeatureStore(str(tmp_path))
+    rows, vectors = store.query(file_path="b.py", function="add")
+
+    assert len(rows) == 1
+    expected = np.asarray(features[1]["functions"][0]["embedding"], dtype=np.float16)
+    np.testing.assert_array_equal(vectors[0], expected)
+
+
+def test_missing_embedding_is_flagged(tmp_path):
+    write_feature_store([_features("a.py", 0)], str(tmp_path))
+    store = FeatureStore(str(tmp_path))
+
+    rows, vectors = store.query(function="empty")
+
+    assert not rows.iloc[0]["has_embedding"]
+    assert not vectors.any()
+
+
+def test_rejects_wrong_dimension(tmp_path):
+    features = _features("a.py", 0)
+    features["file_embedding"] = [0.1, 0.2]
+    with pytest.raises(ValueError, match="768"):
+        write_feature_store([features], str(tmp_path))
@@ -0,0 +1,78 @@
+# tests/test_gate_pipeline.py
+"""
+Tests for the cost-ordered validation gate pipeline
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.inference.pipeline import Gate, GatePipeline, GateResult
+from src.inference.validator import default_pipeline, validate_suggestion
+
+
+def recording_gate(name, log, passed=True, delay=0.0):
+    def run(context):
+        log.append(name)
+        time.sleep(delay)
+        return GateResult(passed, f"{name} {'ok' if passed else 'failed'}")
+    return run
+
+
+def test_cheap_gates_first_and_failure_short_circuits():
+    log = []
+    pipeline = GatePipeline([
+        Gate("expensive", recording_gate("expensive", log), cost=10, requires=("syntax",)),
+        Gate("syntax", recording_gate("syntax", log), cost=1),
+        Gate("cheap", recording_gate("cheap", log, passed=False), cost=2, requires=("syntax",)),
+        Gate("after_cheap", recording_gate("after_cheap", log), cost=3, requires=("cheap",)),
+    ], max_workers=1)
+    verdict = pipeline.run("x = 1\n", "x = 2\n")
+
+    assert not verdict and verdict.failed_gate == "cheap"
+    assert log[:2] == ["syntax", "cheap"]
+    assert [report.name for report in verdict.gates] == ["syntax", "cheap", "after_cheap", "expensive"]
+    assert verdict.gate("after_cheap").status == "cancelled"
+    assert all(report.duration >= 0 for report in verdict.gates)
+
+
+def test_independent_gates_run_concurrently_and_share_artifacts():
+    barrier = threading.Barrier(2, timeout=5)
+    parses = []
+
+    def gate(context):
+        tree = context.artifact("tree", lambda c: parses.append(1) or c.after_code.upper())
+        barrier.wait()  # Deadlocks unless both gates run at the same time
+        return GateResult(tree == "X = 2\n")
+
+    verdict = GatePipeline([Gate("a", gate), Gate("b", gate)]).run("x = 1\n", "x = 2\n")
+    assert verdict.passed
+    assert parses == [1]
+
+
+def test_gate_errors_fail_the_verdict():
+    verdict = GatePipeline([Gate("boom", lambda context: 1 / 0)]).run("", "")
+    assert verdict.gate("boom").status == "error"
+    assert verdict.failed_gate == "boom"
+
+
+def test_unknown_requirement_rejected():
+    with pytest.raises(ValueError):
+        GatePipeline([Gate("a", lambda context: GateResult(True), requires=("missing",))]).run("", "")
+
+
+def test_default_gates():
+    verdict = validate_suggestion("def f(:\n", "def f(:\n", use_cache=False)
+    assert verdict.failed_gate == "syntax"
+
+    before = "def f(x):\n    if x == 1:\n        return 'a'\n    elif x == 2:\n        return 'b'\n    return 'c'\n"
+    after = "def f(x):\n    return {1: 'a', 2: 'b'}.get(x, 'c')\n"
+    verdict = validate_suggestion(before, after, use_cache=False, pipeline=default_pipeline())
+    assert verdict.passed, verdict.message
+    assert verdict.gate("complexity").details == {"before": 3, "after": 1}
+    assert not validate_suggestion(after, before, use_cache=False)
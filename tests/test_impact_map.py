@@ -0,0 +1,134 @@
+# tests/test_impact_map.py
+"""
+Tests for coverage-based selection of the tests affected by a refactoring
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from impact_map import TestImpactMap, changed_functions
+from validator import CodeValidator
+
+SOURCE = """
+def add(a, b):
+    return a + b
+
+
+class Shapes:
+    def area(self, w, h):
+        return w * h
+"""
+
+TESTS = """
+from calc import add, Shapes
+
+
+def test_add():
+    assert add(1, 2) == 3
+
+
+class TestShapes:
+    def test_area(self):
+        assert Shapes().area(2, 3) == 6
+
+
+def test_nothing():
+    assert True
+"""
+
+
+@pytest.fixture
+def project(tmp_path):
+    source = tmp_path / "calc.py"
+    source.write_text(SOURCE, encoding="utf-8")
+    tests = tmp_path / "test_calc.py"
+    tests.write_text(TESTS, encoding="utf-8")
+    return str(source), str(tests)
+
+
+@pytest.fixture
+def impact_map(tmp_path):
+    return TestImpactMap(str(tmp_path / "cache"))
+
+
+def test_coverage_map_per_test(project, impact_map):
+    source, tests = project
+    mapping = impact_map.coverage_map(tests)
+    assert mapping["test_add"] == [f"{source}::add"]
+    assert mapping["TestShapes::test_area"] == [f"{source}::Shapes.area"]
+    assert "test_nothing" not in mapping  # Runs no source code
+
+
+def test_only_covering_tests_selected(project, impact_map):
+    source, tests = project
+    refactored = SOURCE.replace("return w * h", "result = w * h\n        return result")
+    assert changed_functions(SOURCE, refactored) == {"Shapes.area"}
+    assert impact_map.affected_tests(tests, source, SOURCE, refactored) == ["TestShapes::test_area"]
+
+    unrelated = SOURCE + "\n\ndef extra():\n    return 1\n"
+    assert impact_map.affected_tests(tests, source, SOURCE, unrelated) == []
+
+
+def test_map_reused_until_tests_change(project, impact_map, monkeypatch):
+    source, tests = project
+    impact_map.coverage_map(tests)
+    builds = []
+    monkeypatch.setattr(impact_map, "_build", lambda *args: builds.append(args) or {})
+    impact_map.coverage_map(tests)
+    assert builds == []
+
+    with open(tests, "a", encoding="utf-8") as f:
+        f.write("\n\ndef test_more():\n    assert add(0, 0) == 0\n")
+    impact_map.coverage_map(tests)
+    assert len(builds) == 1
+
+
+def test_map_rebuilt_when_source_changes(project, impact_map, monkeypatch):
+    source, tests = project
+    impact_map.coverage_map(tests, source_path=source)
+    builds = []
+    monkeypatch.setattr(impact_map, "_build", lambda *args: builds.append(args) or {})
+    impact_map.coverage_map(tests, source_path=source)
+    assert builds == []
+
+    with open(source, "a", encoding="utf-8") as f:
+        f.write("\n\ndef extra():\n    return 1\n")
+    impact_map.coverage_map(tests, source_path=source)
+    impact_map.coverage_map(tests, code_dir=os.path.dirname(tests), source_path=source)
+    assert len(builds) == 2
+
+
+def test_module_the_map_never_saw_selects_everything(project, tmp_path, impact_map):
+    _, tests = project
+    other = tmp_path / "other.py"
+    other.write_text("def helper():\n    return 1\n", encoding="utf-8")
+    refactored = "def helper():\n    return 2\n"
+    assert impact_map.affected_tests(tests, str(other), other.read_text(encoding="utf-8"), refactored) is None
+
+
+def test_validator_runs_only_affected_tests(project, tmp_path, impact_map):
+    source, tests = project
+    refactored = tmp_path / "calc_refactored.py"
+    refactored.write_text(SOURCE.replace("return a + b", "total = a + b\n    return total"), encoding="utf-8")
+    results = CodeValidator(impact_map).validate_refactoring(source, str(refactored), tests)
+    assert results["unit_tests"]["selected_tests"] == ["test_add"]
+    assert results["unit_tests"]["tests_run"] == 1
+
+
+def test_passing_covering_tests_decide_over_the_ast(project, tmp_path, impact_map):
+    source, tests = project
+    (tmp_path / "rewritten").mkdir()
+    refactored = tmp_path / "rewritten" / "calc.py"
+    refactored.write_text(SOURCE.replace("return a + b", "total = a + b\n    return total"), encoding="utf-8")
+    results = CodeValidator(impact_map).validate_refactoring(source, str(refactored), tests, use_cache=False)
+    assert not results["ast_comparison"]["structural_similarity"]  # Kept as information only
+    assert results["overall_success"]
+
+    refactored.write_text(SOURCE.replace("return a + b", "return a - b"), encoding="utf-8")
+    results = CodeValidator(impact_map).validate_refactoring(source, str(refactored), tests, use_cache=False)
+    assert not results["overall_success"]
+    assert results["unit_tests"]["tests_failed"] == 1
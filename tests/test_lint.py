@@ -0,0 +1,58 @@
+# tests/test_lint.py
+"""
+Tests for the batched, content-cached ruff lint engine
+"""
+
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.lint import LintEngine, LintUnavailableError
+from src.core.parser import compute_metrics
+
+pytestmark = pytest.mark.skipif(shutil.which("ruff") is None, reason="ruff is not installed")
+
+CLEAN = "def add(a, b):\n    return a + b\n"
+UNUSED_IMPORT = "import os\n\n\ndef add(a, b):\n    return a + b\n"
+
+
+def test_batch_uses_one_ruff_process_and_caches(tmp_path):
+    engine = LintEngine(cache_dir=str(tmp_path / "lint"))
+    clean, unused, again = engine.lint_many([CLEAN, UNUSED_IMPORT, CLEAN])
+    assert clean == again == []
+    assert [v["code"] for v in unused] == ["F401"]
+    assert unused[0]["line"] == 1
+    assert engine.spawns == 1
+
+    assert engine.lint(UNUSED_IMPORT) == unused
+    assert engine.spawns == 1
+
+    # The on-disk cache is shared with a new engine
+    fresh = LintEngine(cache_dir=str(tmp_path / "lint"))
+    assert fresh.lint(UNUSED_IMPORT) == unused and fresh.spawns == 0
+
+
+def test_delta_reports_only_new_violations():
+    engine = LintEngine()
+    before = UNUSED_IMPORT + "\n\ndef unused(x):\n    y = 1\n    return x\n"
+    after = UNUSED_IMPORT
+    delta = engine.delta(before, after)
+    assert delta["new"] == [] and delta["fixed"] == 1
+
+    delta = engine.delta(CLEAN, UNUSED_IMPORT)
+    assert [v["code"] for v in delta["new"]] == ["F401"]
+    assert (delta["before"], delta["after"]) == (0, 1)
+    assert engine.spawns == 2
+
+
+def test_missing_ruff_is_reported():
+    with pytest.raises(LintUnavailableError):
+        LintEngine(ruff_path=os.path.join("nonexistent", "ruff")).lint(CLEAN)
+
+
+def test_compute_metrics_counts_lint_errors():
+    assert compute_metrics(UNUSED_IMPORT) == {"complexity": 1, "lint_errors": 1}
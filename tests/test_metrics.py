@@ -0,0 +1,106 @@
+# tests/test_metrics.py
+"""
+Tests for the fused metrics visitor against radon
+"""
+
+import os
+import sys
+
+import pytest
+from radon.complexity import cc_visit
+from radon.metrics import h_visit, mi_visit
+from radon.raw import analyze
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.metrics import code_metrics, raw_metrics
+
+SNIPPETS = {
+    "class": '''"""Module docstring."""
+import os
+
+
+class Store(dict):
+    """Keeps values."""
+
+    def get(self, key, default=None):
+        # Environment wins
+        if key in os.environ and not default:
+            return os.environ[key]
+        return super().get(key, default)
+
+    def keys(self):
+        return [k for k in super().keys() if k if not k.startswith("_")]
+''',
+    "closures": '''def outer(values):
+    def inner(x):
+        return x * 2 if x > 0 else -x
+    total = 0
+    for value in values:
+        while value > 10:
+            value //= 2
+        else:
+            total += inner(value)
+    return total
+''',
+    "assert_and_try": '''def check(x):
+    assert x and x > 0, "positive"
+    try:
+        y = 1 / x
+    except ZeroDivisionError:
+        y = 0
+    except (TypeError, ValueError):
+        y = -1
+    else:
+        y += 1
+    return y
+''',
+    "match": '''def kind(command):
+    match command.split():
+        case ["go", direction]:
+            return direction
+        case ["quit"] | ["exit"]:
+            return None
+        case _:
+            return "?"
+''',
+    "semicolons": '''x = 1; y = 2
+if x: y = 3; x = 4
+values = [
+    x,  # first
+    y,
+]
+text = """
+multi
+line
+"""
+''',
+    "empty": "",
+}
+
+
+@pytest.mark.parametrize("name", sorted(SNIPPETS))
+def test_matches_radon(name):
+    code = SNIPPETS[name]
+    metrics = code_metrics(code)
+    blocks = cc_visit(code)
+    assert sorted(metrics["blocks"]) == sorted((b.letter, b.fullname, b.complexity) for b in blocks)
+    assert metrics["complexity"] == sum(b.complexity for b in blocks)
+    assert metrics["maintainability"] == pytest.approx(mi_visit(code, multi=True))
+
+    halstead = h_visit(code).total
+    assert (metrics["halstead_h1"], metrics["halstead_h2"]) == (halstead.h1, halstead.h2)
+    assert (metrics["halstead_n1"], metrics["halstead_n2"]) == (halstead.N1, halstead.N2)
+    assert metrics["halstead_effort"] == pytest.approx(halstead.effort)
+    assert {key: metrics[key] for key in analyze(code)._fields} == analyze(code)._asdict()
+
+
+def test_raw_metrics_falls_back_to_radon():
+    # A lone carriage return splits lines for str.splitlines() but not for the tokenizer
+    code = "x = 1\ry = 2\n"
+    assert raw_metrics(code) == analyze(code)._asdict()
+
+
+def test_syntax_error_is_raised():
+    with pytest.raises(SyntaxError):
+        code_metrics("def broken(:\n")
@@ -0,0 +1,96 @@
+# tests/test_metrics_table.py
+"""
+Tests for the corpus-scale metrics table
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from radon.metrics import mi_visit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.metrics_table import MetricsTable
+
+SIMPLE = "def add(a, b):\n    return a + b\n"
+BRANCHY = '''import os
+
+
+def classify(value):
+    # Buckets a number
+    if value < 0:
+        return "negative"
+    elif value == 0:
+        return "zero"
+    elif value < 10:
+        return "small"
+    return "large"
+
+
+class Store:
+    def get(self, key):
+        return os.environ.get(key) if key else None
+'''
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "pkg" / "simple.py").write_text(SIMPLE)
+    (tmp_path / "pkg" / "sub" / "branchy.py").write_text(BRANCHY)
+    (tmp_path / "broken.py").write_text("def broken(:\n")
+    return tmp_path
+
+
+def test_rows_match_radon(corpus):
+    table = MetricsTable.build(str(corpus), lint=False)
+    functions = table.functions.set_index("name")
+    assert set(functions.index) == {"add", "classify", "Store.get"}
+    assert functions.loc["Store.get", "kind"] == "method"
+    assert functions.loc["classify", "complexity"] == 4
+    assert functions.loc["add", "lint_errors"] == -1  # Not linted
+
+    branchy = table.files.set_index("name").loc["branchy.py"]
+    assert branchy["package"] == "pkg.sub"
+    assert branchy["maintainability"] == pytest.approx(mi_visit(BRANCHY, True), rel=1e-5)
+    assert branchy["comments"] == 1
+
+    broken = table.files.set_index("name").loc["broken.py"]
+    assert broken["error"].startswith("SyntaxError") and broken["complexity"] == -1
+
+
+def test_aggregations(corpus):
+    table = MetricsTable.build(str(corpus), lint=False)
+    percentiles = table.percentiles(["complexity"], q=(50, 100))
+    assert percentiles.loc["p100", "complexity"] == 4
+
+    rollup = table.rollup()
+    assert rollup.loc["pkg.sub", "count"] == 2 and rollup.loc["pkg.sub", "complexity_max"] == 4
+    assert table.rollup(depth=1).loc["pkg", "count"] == 3
+
+    assert list(table.worst("complexity", 2)["name"]) == ["classify", "Store.get"]
+    worst_file = table.worst("maintainability", 1, kind="file")
+    assert worst_file["name"].iloc[0] == "branchy.py"  # broken.py has no MI
+
+
+def test_parallel_build_and_parquet(corpus, tmp_path):
+    serial = MetricsTable.build(str(corpus), lint=False, max_workers=1)
+    parallel = MetricsTable.build(str(corpus), lint=False, max_workers=2, batch_size=1)
+    assert serial.frame.equals(parallel.frame)
+
+    path = str(tmp_path / "metrics.parquet")
+    parallel.to_parquet(path)
+    loaded = MetricsTable.from_parquet(path)
+    assert loaded.frame.shape == parallel.frame.shape
+    assert np.array_equal(loaded.frame["complexity"].to_numpy(), parallel.frame["complexity"].to_numpy())
+
+
+def test_lint_counts(corpus):
+    table = MetricsTable.build(str(corpus))
+    if (table.files["lint_errors"] < 0).all():
+        pytest.skip("ruff is not installed")
+    files = table.files.set_index("name")
+    assert files.loc["simple.py", "lint_errors"] == 0
+    assert files.loc["broken.py", "lint_errors"] == -1
@@ -0,0 +1,91 @@
+# tests/test_perf.py
+"""
+Tests for the performance regression gate
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.perf import PerformanceGate
+from src.inference.pipeline import Gate
+from src.inference.validator import default_pipeline, performance_gate, validate_suggestion
+
+ORIGINAL = """
+from typing import List
+
+
+def has_duplicates(values: List[int]) -> bool:
+    return len(set(values)) != len(values)
+
+
+def label(value: int) -> str:
+    return "even" if value % 2 == 0 else "odd"
+"""
+
+# Quadratic; the inputs are small, so tests disable the per-call floor
+SLOW = ORIGINAL.replace("""    return len(set(values)) != len(values)
+""", """    for i, value in enumerate(values):
+        for other in values[i + 1:]:
+            if value == other:
+                return True
+    return False
+""")
+
+
+def test_detects_slowdown():
+    result = PerformanceGate(min_delta=0, cases=10, rounds=5).compare(ORIGINAL, SLOW)
+    assert result["regressions"] == ["has_duplicates"]
+    measured = result["functions"]["has_duplicates"]
+    assert measured["time_ratio"] > 1.25 and measured["time_regressed"]
+    assert "label" not in result["functions"]  # Unchanged functions are not benchmarked
+
+
+def test_equivalent_change_passes():
+    # Heavy enough (tens of microseconds per call) that the median/quartile
+    # filter, not the per-call floor, is what keeps scheduler noise out
+    original = ORIGINAL + """
+
+def balance(value: int) -> int:
+    total = 0
+    for step in range(400):
+        total += step if (value + step) % 2 == 0 else -step
+    return total
+"""
+    refactored = original.replace("total += step if (value + step) % 2 == 0 else -step",
+                                  "total += -step if (value + step) % 2 else step")
+    result = PerformanceGate(min_delta=0, cases=10, rounds=9).compare(original, refactored)
+    assert result["regressions"] == []
+    assert result["measured"] == ["balance"]
+    assert result["functions"]["balance"]["time_before"] > 1e-5
+
+
+def test_benchmarks_run_in_a_scratch_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writer = "\n\ndef save(n: int) -> int:\n    with open('saved.txt', 'w') as f:\n        f.write(str(n))\n    return n\n"
+    result = PerformanceGate(cases=3, rounds=3).compare(writer, writer.replace("return n", "return n + 0"))
+    assert result["measured"] == ["save"]
+    assert os.listdir(tmp_path) == []
+
+
+def test_signature_change_skipped():
+    changed = ORIGINAL.replace("def label(value: int)", "def label(value: int, upper: bool = False)")
+    result = PerformanceGate(cases=5, rounds=3).compare(ORIGINAL, changed)
+    assert result["functions"]["label"]["status"] == "skipped"
+
+
+def _pipeline(**options):
+    pipeline = default_pipeline().remove("complexity").remove("performance")
+    return pipeline.add(Gate("performance", performance_gate(min_delta=0, **options), cost=50, requires=("syntax",)))
+
+
+def test_gate_threshold_is_configurable():
+    verdict = validate_suggestion(SLOW, ORIGINAL, use_cache=False, pipeline=_pipeline())
+    assert verdict.passed, verdict.message  # Faster is never a regression
+    verdict = validate_suggestion(ORIGINAL, SLOW, use_cache=False, pipeline=_pipeline())
+    assert verdict.failed_gate == "performance"
+    assert "has_duplicates" in verdict.message
+
+    verdict = validate_suggestion(ORIGINAL, SLOW, use_cache=False, pipeline=_pipeline(threshold=1000))
+    assert verdict.gate("performance").status == "passed", verdict.message
@@ -0,0 +1,112 @@
+# tests/test_preprocessor.py
+"""
+Tests for the code metadata preprocessor and its metadata cache
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import preprocessor
+from preprocessor import MetadataCache, preprocess_code
+
+SAMPLE_CODE = '''import os.path
+from collections import defaultdict as dd
+
+# A module-level comment
+def calculate_sum(a: int, b: int = 10) -> int:
+    """Calculates the sum of two numbers."""
+    return a + b
+
+class MyClass(object):
+    """A simple example class."""
+    def greet(self):
+        return "hi"
+'''
+
+
+@pytest.fixture
+def sample_file(tmp_path):
+    path = tmp_path / "sample.py"
+    path.write_text(SAMPLE_CODE, encoding="utf-8")
+    return str(path)
+
+
+def test_extracts_metadata(sample_file):
+    metadata = preprocess_code(sample_file)
+
+    assert [i["module"] for i in metadata["imports"]] == ["os.path", "collections"]
+    assert [f["name"] for f in metadata["functions"]] == ["calculate_sum", "greet"]
+    calc = metadata["functions"][0]
+    assert (calc["start_line"], calc["end_line"]) == (5, 7)
+    assert calc["parameters"][1] == {"name": "b", "annotation": "int", "default": "10"}
+    assert calc["returns_annotation"] == "int"
+    assert calc["docstring"] == "Calculates the sum of two numbers."
+    assert metadata["classes"][0]["bases"] == ["object"]
+
+
+def test_comments_and_indentation_are_opt_in(sample_file):
+    metadata = preprocess_code(sample_file)
+    assert metadata["comments"] == []
+    assert metadata["indentation_style"] == ""
+
+    metadata = preprocess_code(sample_file, include_comments=True, include_indentation=True)
+    assert metadata["comments"] == [{"value": "# A module-level comment", "line": 4}]
+    assert metadata["indentation_style"] == "4 spaces"
+
+
+@pytest.mark.parametrize("options", [{}, {"include_comments": True, "include_indentation": True}])
+def test_backends_produce_identical_metadata(sample_file, options):
+    assert preprocess_code(sample_file, backend="ast", **options) == \
+        preprocess_code(sample_file, backend="libcst", **options)
+
+
+def test_unknown_backend_is_rejected(sample_file):
+    with pytest.raises(ValueError, match="backend"):
+        preprocess_code(sample_file, backend="tree-sitter")
+
+
+def test_syntax_error_is_reported(tmp_path):
+    path = tmp_path / "broken.py"
+    path.write_text("def broken(\n", encoding="utf-8")
+    assert "error" in preprocess_code(str(path))
+
+
+def test_cache_skips_unchanged_files(sample_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(preprocessor, "RACY_WINDOW_NS", 0)
+    cache = MetadataCache(str(tmp_path / "cache"))
+
+    first = preprocess_code(sample_file, cache=cache)
+    second = preprocess_code(sample_file, cache=cache)
+
+    assert first == second
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_rehashes_touched_files(sample_file, tmp_path):
+    cache = MetadataCache(str(tmp_path / "cache"))
+    preprocess_code(sample_file, cache=cache)
+
+    stat = os.stat(sample_file)
+    os.utime(sample_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    preprocess_code(sample_file, cache=cache)
+
+    assert cache.stats()["hash_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_invalidates_on_content_change(sample_file, tmp_path):
+    cache = MetadataCache(str(tmp_path / "cache"))
+    preprocess_code(sample_file, cache=cache)
+
+    with open(sample_file, "a", encoding="utf-8") as f:
+        f.write("\ndef extra():\n    pass\n")
+    metadata = preprocess_code(sample_file, cache=cache)
+
+    assert "extra" in [f["name"] for f in metadata["functions"]]
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["hit_rate"] == 0.0
@@ -0,0 +1,55 @@
+# tests/test_pytest_pool.py
+"""
+Tests for the pool of warm pytest workers used by the validator
+"""
+
+import concurrent.futures
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from pytest_pool import PytestWorkerPool
+
+
+def write_project(root, factor):
+    root.mkdir(exist_ok=True)
+    (root / "shapes.py").write_text(f"def area(w, h):\n    return w * h * {factor}\n", encoding="utf-8")
+    (root / "test_shapes.py").write_text(
+        "from shapes import area\n\n\n"
+        "def test_area():\n    assert area(2, 3) == 6\n\n\n"
+        "def test_zero():\n    assert area(0, 3) == 0\n", encoding="utf-8")
+    return str(root / "test_shapes.py")
+
+
+@pytest.fixture
+def pool():
+    with PytestWorkerPool(workers=2, max_jobs_per_worker=2, timeout=60) as pool:
+        yield pool
+
+
+def test_concurrent_jobs_have_isolated_reports(pool, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    good = write_project(tmp_path / "good", 1)
+    bad = write_project(tmp_path / "bad", 2)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        good_run, bad_run = executor.map(lambda path: pool.run([path], os.path.dirname(path)), [good, bad])
+    assert good_run["summary"]["passed"] == 2
+    assert bad_run["summary"]["failed"] == 1
+    assert not os.path.exists(tmp_path / "pytest_report.json")
+
+
+def test_code_is_reimported_between_jobs(pool, tmp_path):
+    test_file = write_project(tmp_path / "project", 1)
+    assert pool.run([test_file], str(tmp_path / "project"))["summary"]["passed"] == 2
+    write_project(tmp_path / "project", 2)
+    assert pool.run([f"{test_file}::test_area"], str(tmp_path / "project"))["summary"]["failed"] == 1
+
+
+def test_workers_are_recycled(tmp_path):
+    test_file = write_project(tmp_path / "project", 1)
+    with PytestWorkerPool(workers=1, max_jobs_per_worker=2, timeout=60) as pool:
+        pids = [pool.run([test_file], str(tmp_path / "project"))["worker_pid"] for _ in range(3)]
+    assert pids[0] == pids[1] != pids[2]
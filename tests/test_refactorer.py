@@ -0,0 +1,221 @@
+# tests/test_refactorer.py
+"""
+Tests for the automated refactorer and the scope-aware rename engine
+"""
+
+import os
+import sys
+
+import libcst as cst
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from preprocessor import MetadataCache
+from refactorer import AutomatedRefactorer, CompositeTransformer
+from rename_engine import RepositoryRenamer
+from symbol_index import SymbolIndex
+
+SHADOWED_CODE = """total = 0
+
+def add(values):
+    total = 0
+    for v in values:
+        total += v
+    return total
+
+def report(item):
+    return item.total + total
+"""
+
+
+@pytest.fixture
+def refactorer():
+    return AutomatedRefactorer()
+
+
+@pytest.fixture
+def code_file(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text(SHADOWED_CODE, encoding="utf-8")
+    return str(path)
+
+
+def test_rename_by_line_only_touches_that_scope(refactorer, code_file):
+    result = refactorer.apply_refactoring(code_file, {
+        "type": "rename_variable", "old_name": "total", "new_name": "running_sum", "line": 4
+    })
+
+    assert result["success"], result["message"]
+    code = result["refactored_code"]
+    assert "running_sum = 0\n    for" in code
+    assert "return running_sum" in code
+    assert code.startswith("total = 0")
+    assert "item.total + total" in code
+
+
+def test_rename_by_qualified_name(refactorer, code_file):
+    result = refactorer.apply_refactoring(code_file, {
+        "type": "rename_variable", "old_name": "total", "new_name": "grand_total", "qualified_name": "total"
+    })
+
+    code = result["refactored_code"]
+    assert code.startswith("grand_total = 0")
+    assert "item.total + grand_total" in code
+    assert "return total" in code
+
+
+def test_rename_without_hint_skips_attributes(refactorer, code_file):
+    result = refactorer.apply_refactoring(code_file, {
+        "type": "rename_variable", "old_name": "total", "new_name": "acc"
+    })
+
+    assert "item.total + acc" in result["refactored_code"]
+
+
+def test_rename_with_unmatched_hint_fails(refactorer, code_file):
+    result = refactorer.apply_refactoring(code_file, {
+        "type": "rename_variable", "old_name": "total", "new_name": "acc", "line": 8
+    })
+
+    assert not result["success"]
+    assert "no binding" in result["message"]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    pkg = tmp_path / "repo" / "pkg"
+    pkg.mkdir(parents=True)
+    (pkg / "__init__.py").write_text("", encoding="utf-8")
+    (pkg / "shapes.py").write_text("def area(w, h):\n    return w * h\n", encoding="utf-8")
+    (pkg / "report.py").write_text(
+        "from .shapes import area\n\ndef summary(w, h):\n    area_label = 'area'\n    return area(w, h)\n",
+        encoding="utf-8")
+    (pkg / "cli.py").write_text(
+        "import pkg.shapes\n\ndef main():\n    return pkg.shapes.area(1, 2)\n", encoding="utf-8")
+    (pkg / "other.py").write_text("def area():\n    return 0\n", encoding="utf-8")
+    return tmp_path / "repo"
+
+
+def test_repository_rename(repo, tmp_path):
+    index = SymbolIndex(str(tmp_path / "index.db"), cache=MetadataCache(str(tmp_path / "cache")))
+    renamer = RepositoryRenamer(str(repo), index=index, max_workers=2)
+    try:
+        result = renamer.rename_symbol("pkg.shapes", "area", "rectangle_area")
+    finally:
+        renamer.close()
+        index.close()
+
+    assert result["success"], result["errors"]
+    changes = {os.path.basename(path): code for path, code in result["changes"].items()}
+    assert set(changes) == {"shapes.py", "report.py", "cli.py"}
+    assert "def rectangle_area(w, h)" in changes["shapes.py"]
+    assert "from .shapes import rectangle_area" in changes["report.py"]
+    assert "return rectangle_area(w, h)" in changes["report.py"]
+    assert "'area'" in changes["report.py"]
+    assert "pkg.shapes.rectangle_area(1, 2)" in changes["cli.py"]
+    assert "+++ b/pkg/report.py" in result["diff"]
+
+
+def test_batch_applies_independent_suggestions_in_one_pass(refactorer, code_file):
+    result = refactorer.apply_refactorings(code_file, [
+        {"type": "rename_variable", "old_name": "total", "new_name": "running_sum", "line": 4},
+        {"type": "rename_variable", "old_name": "item", "new_name": "entry"},
+        {"type": "extract_constant"},
+    ])
+
+    assert [o["status"] for o in result["outcomes"]] == ["applied", "applied", "invalid"]
+    code = result["refactored_code"]
+    assert "return running_sum" in code
+    assert "def report(entry):\n    return entry.total + total" in code
+
+
+def test_batch_reports_overlapping_suggestions_as_conflicts(refactorer, code_file):
+    result = refactorer.apply_refactorings(code_file, [
+        {"type": "rename_variable", "old_name": "total", "new_name": "running_sum", "line": 4},
+        {"type": "rename_variable", "old_name": "total", "new_name": "acc", "line": 6},
+    ])
+
+    assert [o["status"] for o in result["outcomes"]] == ["applied", "conflict"]
+    assert "acc" not in result["refactored_code"]
+
+
+def test_unlocated_suggestion_claims_only_the_lines_it_changes(refactorer, tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text("def squares(values):\n    out = []\n    for v in values:\n        out.append(v * v)\n"
+                    "    return out\n\n\ndef scale(item):\n    return item * 2\n", encoding="utf-8")
+    result = refactorer.apply_refactorings(str(path), [
+        {"type": "use_comprehension"},
+        {"type": "rename_variable", "old_name": "item", "new_name": "entry"},
+    ])
+
+    assert [o["status"] for o in result["outcomes"]] == ["applied", "applied"]
+    assert "out = [v * v for v in values]" in result["refactored_code"]
+    assert "def scale(entry):" in result["refactored_code"]
+
+
+def test_unlocated_suggestions_run_in_the_single_pass(refactorer, tmp_path, monkeypatch):
+    path = tmp_path / "module.py"
+    path.write_text("def squares(values):\n    out = []\n    for v in values:\n        out.append(v * v)\n"
+                    "    return out\n\n\ndef scale(item):\n    return item * 2\n", encoding="utf-8")
+    built = []
+    build = refactorer._build_transformer
+    monkeypatch.setattr(refactorer, "_build_transformer", lambda s: built.append(s["type"]) or build(s))
+    refactorer.apply_refactorings(str(path), [
+        {"type": "use_comprehension"},
+        {"type": "rename_variable", "old_name": "item", "new_name": "entry"},
+    ])
+
+    assert built == ["use_comprehension", "rename_variable"]  # No dry run per suggestion
+
+
+def test_unlocated_suggestion_overlapping_a_claim_is_a_conflict(refactorer, tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text("def squares(values):\n    out = []\n    for v in values:\n        out.append(v * v)\n"
+                    "    return out\n", encoding="utf-8")
+    result = refactorer.apply_refactorings(str(path), [
+        {"type": "rename_variable", "old_name": "values", "new_name": "numbers"},
+        {"type": "use_comprehension"},
+    ])
+
+    assert [o["status"] for o in result["outcomes"]] == ["applied", "conflict"]
+    assert "for v in numbers:" in result["refactored_code"]
+
+
+class _Recorder(cst.CSTTransformer):
+    """Skips function bodies and checks its visit/leave calls stay balanced."""
+
+    def __init__(self):
+        super().__init__()
+        self.stack, self.names = [], []
+
+    def visit_FunctionDef(self, node):
+        return False
+
+    def visit_SimpleStatementLine(self, node):
+        self.stack.append(node)
+
+    def leave_SimpleStatementLine(self, original_node, updated_node):
+        assert self.stack.pop() is original_node
+        return updated_node
+
+    def visit_Name(self, node):
+        self.names.append(node.value)
+
+
+class _DropAssignmentToX(cst.CSTTransformer):
+    def leave_SimpleStatementLine(self, original_node, updated_node):
+        statement = original_node.body[0]
+        if isinstance(statement, cst.Assign) and statement.targets[0].target.value == "x":
+            return cst.RemoveFromParent()
+        return updated_node
+
+
+def test_composite_respects_opt_outs_and_calls_every_leave():
+    module = cst.parse_module("x = 1\ny = 2\n\ndef f(inner):\n    z = inner\n")
+    remover, recorder = _DropAssignmentToX(), _Recorder()
+    result = module.visit(CompositeTransformer([remover, recorder]))
+
+    assert result.code == "y = 2\n\ndef f(inner):\n    z = inner\n"
+    assert recorder.stack == []  # Its leave ran even for the removed statement
+    assert recorder.names == ["x", "y"]  # Nothing from the body it declined to visit
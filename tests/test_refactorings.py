@@ -0,0 +1,188 @@
+# tests/test_refactorings.py
+"""
+Tests for the local (LLM-free) LibCST refactorings
+"""
+
+import os
+import sys
+
+import libcst as cst
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from refactorer import AutomatedRefactorer
+from src.core.refactorings import ExtractMethodTransformer, apply_local_refactorings
+
+CALC = """def calc(x, y, z):
+    tmp = 0
+    if x > 0:
+        if y > 0:
+            if z > 0:
+                tmp = x + y + z
+            else:
+                tmp = x + y
+        else:
+            tmp = x
+    return tmp
+"""
+
+
+def _run(code, kind):
+    refactored, changes = apply_local_refactorings(code, kinds=[kind])
+    return refactored, [change["type"] for change in changes]
+
+
+def test_guard_clauses_flatten_nested_ifs():
+    code, kinds = _run(CALC, "simplify_conditional")
+
+    assert code == (
+        "def calc(x, y, z):\n"
+        "    tmp = 0\n"
+        "    if not x > 0:\n"
+        "        return tmp\n"
+        "    if not y > 0:\n"
+        "        return x\n"
+        "    if z > 0:\n"
+        "        return x + y + z\n"
+        "    return x + y\n"
+    )
+    assert set(kinds) == {"simplify_conditional"}
+
+    namespace = {}
+    exec(code, namespace)
+    original = {}
+    exec(CALC, original)
+    for args in [(1, 1, 1), (1, 1, -1), (1, -1, 0), (-1, 2, 3), (float("nan"), 1, 1)]:
+        assert namespace["calc"](*args) == original["calc"](*args)
+
+
+def test_range_len_becomes_enumerate_or_direct_iteration():
+    code, _ = _run(
+        "def f(values):\n"
+        "    for i in range(len(values)):\n"
+        "        print(i, values[i])\n"
+        "\n"
+        "def g(data):\n"
+        "    for i in range(len(data)):\n"
+        "        print(data[i])\n",
+        "use_enumerate")
+
+    assert "for i, value in enumerate(values):\n        print(i, value)" in code
+    assert "for item in data:\n        print(item)" in code
+
+
+def test_range_len_with_mutation_is_kept():
+    source = "def f(xs):\n    for i in range(len(xs)):\n        xs[i] = xs[i] * 2\n"
+    assert _run(source, "use_enumerate") == (source, [])
+
+
+def test_append_loop_becomes_comprehension():
+    code, _ = _run(
+        "def f(rows):\n"
+        "    out = []\n"
+        "    for row in rows:\n"
+        "        if row:\n"
+        "            out.append(row * 2)\n"
+        "    return out\n",
+        "use_comprehension")
+
+    assert "out = [row * 2 for row in rows if row]\n    return out" in code
+
+
+def test_append_loop_whose_variable_leaks_is_kept():
+    source = "def f(rows):\n    out = []\n    for row in rows:\n        out.append(row)\n    return row\n"
+    assert _run(source, "use_comprehension") == (source, [])
+
+
+def test_append_loop_in_class_body_is_kept():
+    # A comprehension there could not see `scale` and would fail at import
+    code, changes = _run(
+        "class Table:\n"
+        "    scale = 2\n"
+        "    cells = []\n"
+        "    for n in range(3):\n"
+        "        cells.append(n * scale)\n"
+        "\n"
+        "    def doubled(self, rows):\n"
+        "        out = []\n"
+        "        for row in rows:\n"
+        "            out.append(row * 2)\n"
+        "        return out\n",
+        "use_comprehension")
+
+    assert "    cells = []\n    for n in range(3):\n        cells.append(n * scale)" in code
+    assert "out = [row * 2 for row in rows]" in code
+    assert changes == ["use_comprehension"]
+    namespace = {}
+    exec(code, namespace)
+    assert namespace["Table"].cells == [0, 2, 4]
+
+
+def test_dead_branches_and_unreachable_code_are_removed():
+    code, kinds = _run(
+        "def f(x):\n"
+        "    if False:\n"
+        "        x = 1\n"
+        "    elif x:\n"
+        "        x = 2\n"
+        "    return x\n"
+        "    print(x)\n"
+        "\n"
+        "def gen():\n"
+        "    return\n"
+        "    yield\n",
+        "remove_dead_code")
+
+    assert code.startswith("def f(x):\n    if x:\n        x = 2\n    return x\n\n")
+    assert code.endswith("    return\n    yield\n")
+    assert len(kinds) == 2
+
+
+def test_dead_code_holding_the_only_binding_of_a_local_is_kept():
+    source = (
+        "x = 'global'\n"
+        "\n"
+        "def f():\n"
+        "    print(x)\n"
+        "    return\n"
+        "    x = 1\n"
+        "\n"
+        "def g():\n"
+        "    if False:\n"
+        "        x = 2\n"
+        "    return x\n")
+    code, kinds = _run(source, "remove_dead_code")
+
+    assert code == source  # Either removal would make x read the global
+    assert kinds == []
+
+
+def test_extract_method():
+    source = (
+        "def report(items, scale):\n"
+        "    total = 0\n"
+        "    for item in items:\n"
+        "        total += item * scale\n"
+        "    return total\n"
+    )
+    transformer = ExtractMethodTransformer(3, 4, "accumulate")
+    code = cst.MetadataWrapper(cst.parse_module(source)).visit(transformer).code
+
+    assert transformer.error is None
+    assert "    total = accumulate(items, scale, total)\n    return total\n" in code
+    assert "def accumulate(items, scale, total):\n    for item in items:" in code
+
+
+def test_refactorer_dispatches_local_refactorings(tmp_path):
+    path = tmp_path / "calc.py"
+    path.write_text(CALC, encoding="utf-8")
+    refactorer = AutomatedRefactorer()
+
+    result = refactorer.apply_refactorings(str(path), [
+        {"type": "simplify_conditional"},
+        {"type": "extract_method", "start_line": 2, "end_line": 2},
+    ])
+
+    assert [o["status"] for o in result["outcomes"]] == ["applied", "invalid"]
+    assert "return x + y" in result["refactored_code"]
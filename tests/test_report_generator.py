@@ -0,0 +1,91 @@
+# tests/test_report_generator.py
+"""
+Tests for the streaming Markdown report writer
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from report_generator import DEFAULT_TEMPLATE, ReportGenerator, iter_changeset_diff
+
+VALIDATION = {
+    "ast_comparison": {"structural_similarity": 0.9, "message": "Renames only"},
+    "unit_tests": {"tests_run": 2, "tests_passed": 2, "tests_failed": 0, "success": True,
+                   "test_output": "2 passed"},
+    "overall_success": True,
+    "message": "Validated",
+}
+SUGGESTIONS = [{"type": "Rename Variable", "start_line": 2, "end_line": 2, "reason": "Generic name"}]
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return str(path)
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_single_file_report(tmp_path):
+    original = _write(tmp_path / "a.py", "def f(a):\n    result = a\n    return result\n")
+    refactored = _write(tmp_path / "b.py", "def f(a):\n    value = a\n    return value\n")
+    path = ReportGenerator().generate_report(original, refactored, SUGGESTIONS, VALIDATION,
+                                             str(tmp_path / "report.md"))
+    report = _read(path)
+    assert "- **Total Refactorings Suggested**: 1\n" in report
+    assert "### 1. Rename Variable\n- **Location**: Line(s) 2-2\n" in report
+    assert "```diff\n def f(a):\n-    result = a\n-    return result\n+    value = a\n+    return value\n```\n" in report
+    assert "- **Tests Passed**: 2\n" in report and "\n```\n2 passed\n```\n" in report
+    assert report.endswith("committing them to your version control system.\n\n")
+
+
+def test_missing_file_is_reported(tmp_path):
+    path = ReportGenerator().generate_report(str(tmp_path / "gone.py"), str(tmp_path / "gone2.py"), [],
+                                             {"overall_success": False}, str(tmp_path / "report.md"))
+    report = _read(path)
+    assert "Could not generate diff: one or both code files not found.\n" in report
+    assert "No specific refactoring suggestions were provided." in report
+    assert "No unit tests were executed" in report and "address any failures" in report
+
+
+def test_changeset_report_streams(tmp_path):
+    pairs = []
+    for index in range(150):
+        lines = [f"value_{index}_{line} = compute({line})\n" for line in range(400)]
+        pairs.append((_write(tmp_path / f"old_{index}.py", "".join(lines)),
+                      _write(tmp_path / f"new_{index}.py",
+                             "".join(line.replace("compute", "evaluate") if n % 10 == 0 else line
+                                     for n, line in enumerate(lines)))))
+    validation = dict(VALIDATION, unit_tests=dict(VALIDATION["unit_tests"],
+                                                  test_output=(f"test_{n} PASSED" for n in range(20000))))
+
+    tracemalloc.start()
+    path = ReportGenerator().generate_report(pairs[0][0], pairs[0][1], [], validation, str(tmp_path / "report.md"),
+                                             diff_lines=iter_changeset_diff(pairs, str(tmp_path)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size = os.path.getsize(path)
+    assert size > 1_500_000
+    assert peak < size / 4  # Memory follows one file pair, not the whole report
+    report = _read(path)
+    assert "--- a/new_149.py\n+++ b/new_149.py\n" in report
+    assert "test_19999 PASSED\n```\n" in report
+
+
+def test_batch_shares_template(tmp_path):
+    original = _write(tmp_path / "a.py", "x = 1\n")
+    refactored = _write(tmp_path / "b.py", "x = 2\n")
+    generator = ReportGenerator()
+    jobs = [{"original_file_path": original, "refactored_file_path": refactored, "suggestions": [],
+             "validation_results": VALIDATION, "report_output_path": str(tmp_path / f"report_{n}.md")}
+            for n in range(3)]
+    paths = generator.generate_reports(jobs)
+    assert generator.template is DEFAULT_TEMPLATE
+    assert len({_read(path) for path in paths}) == 1
@@ -0,0 +1,64 @@
+# tests/test_reports.py
+"""
+Tests for the PDF audit reports
+"""
+
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.reports.generator import _CODE_WIDTH, _diff_flowables, generate_audit_report, generate_audit_reports
+
+ORIGINAL = "".join(f"def check_{i}(x):\n    if x > {i}:\n        return x\n    return -x\n\n" for i in range(200))
+REFACTORED = ORIGINAL.replace("return -x", "return abs(x)")
+BEFORE = {"complexity": 400, "lint_errors": 3, "complexity_rank": "A"}
+AFTER = {"complexity": 400, "lint_errors": 0, "complexity_rank": "A"}
+
+
+def _pages(path):
+    with open(path, "rb") as f:
+        return len(re.findall(rb"/Type /Page\b(?!s)", f.read()))
+
+
+def test_reports_get_unique_paths(tmp_path):
+    first = generate_audit_report("RENAME tmp -> count", BEFORE, AFTER, report_dir=str(tmp_path))
+    second = generate_audit_report("RENAME tmp -> count", BEFORE, AFTER, report_dir=str(tmp_path))
+    assert first != second
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in (first, second))
+    with open(first, "rb") as f:
+        assert f.read(5) == b"%PDF-"
+    assert _pages(first) == 1
+
+
+def test_long_report_flows_onto_more_pages(tmp_path):
+    path = generate_audit_report("APPLY simplify", BEFORE, AFTER, ORIGINAL, REFACTORED,
+                                 output_path=str(tmp_path / "long.pdf"))
+    assert path == str(tmp_path / "long.pdf")
+    assert _pages(path) > 5  # 200-row function table plus the diff
+    assert os.listdir(tmp_path) == ["long.pdf"]  # No temporary file left behind
+
+
+def test_unparsable_code_still_renders(tmp_path):
+    path = generate_audit_report("INLINE x", {}, {}, "def broken(:\n", "def fixed():\n    pass\n",
+                                 report_dir=str(tmp_path))
+    assert _pages(path) == 1
+
+
+def test_long_diff_lines_fold_to_the_frame():
+    refactored = "total = " + " + ".join(f"value_{i}" for i in range(30)) + "\n"  # About 300 characters
+    block = _diff_flowables("total = 0\n", refactored, 100)[0]
+    block.wrap(_CODE_WIDTH, 1000)
+    widths = block.getActualLineWidths0()
+    assert len(widths) > 5  # The long line became several
+    assert max(widths) <= _CODE_WIDTH
+
+
+def test_batch_in_process_pool(tmp_path):
+    jobs = [{"edit_program": f"RENAME a{n} -> b{n}", "before_metrics": BEFORE, "after_metrics": AFTER,
+             "original_code": ORIGINAL[:400], "refactored_code": REFACTORED[:400],
+             "output_path": str(tmp_path / f"report_{n}.pdf")} for n in range(4)]
+    paths = generate_audit_reports(jobs, max_workers=2)
+    assert paths == [job["output_path"] for job in jobs]
+    assert all(_pages(path) >= 1 for path in paths)
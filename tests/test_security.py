@@ -0,0 +1,84 @@
+# tests/test_security.py
+"""
+Tests for the incremental bandit security gate
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.security import SecurityScanner, code_units
+from src.inference.validator import default_pipeline, validate_suggestion
+
+ORIGINAL = """import subprocess
+
+
+def run(command):
+    return subprocess.call(command, shell=True)
+
+
+class Store:
+    def load(self, path):
+        with open(path) as f:
+            return f.read()
+
+
+def add(a, b):
+    return a + b
+"""
+
+
+def test_units():
+    units = code_units(ORIGINAL)
+    assert set(units) == {"run", "Store.load", "add", "<module>"}
+    assert units["Store.load"].startswith("def load(self, path):")
+
+
+def test_only_new_issues_in_changed_functions_fail():
+    scanner = SecurityScanner()
+    # The existing shell=True call is not new, and only `add` is rescanned
+    renamed = ORIGINAL.replace("return a + b", "total = a + b\n    return total")
+    result = scanner.new_issues(ORIGINAL, renamed)
+    assert result == {"scanned_units": ["add"], "new": []}
+
+    unsafe = ORIGINAL.replace("return a + b", "return eval(f'{a} + {b}')")
+    result = scanner.new_issues(ORIGINAL, unsafe)
+    assert [(issue["test_id"], issue["unit"]) for issue in result["new"]] == [("B307", "add")]
+
+
+def test_renamed_and_extracted_issues_are_not_new():
+    scanner = SecurityScanner()
+    renamed = ORIGINAL.replace("def run(command):\n    return subprocess.call(command, shell=True)",
+                               "def run(cmd):\n    return subprocess.call(cmd, shell=True)")
+    assert scanner.new_issues(ORIGINAL, renamed)["new"] == []
+
+    extracted = ORIGINAL.replace(
+        "def run(command):\n    return subprocess.call(command, shell=True)",
+        "def _shell(line):\n    return subprocess.call(line, shell=True)\n\n\ndef run(command):\n    return _shell(command)")
+    result = scanner.new_issues(ORIGINAL, extracted)
+    assert "_shell" in result["scanned_units"]
+    assert result["new"] == []
+
+    # A second shell call is still new, and the reported one is the unseen line
+    doubled = ORIGINAL.replace("    return subprocess.call(command, shell=True)",
+                               "    subprocess.call('ls ' + command, shell=True)\n"
+                               "    return subprocess.call(command, shell=True)")
+    new = scanner.new_issues(ORIGINAL, doubled)["new"]
+    assert [(issue["test_id"], issue["code"]) for issue in new] == [("B602", "subprocess.call('ls ' + command, shell=True)")]
+
+
+def test_findings_cached_per_function():
+    scanner = SecurityScanner()
+    scanner.scan(ORIGINAL)
+    scans = scanner.scans
+    scanner.scan(ORIGINAL.replace("return a + b", "return b + a"))
+    assert scanner.scans == scans + 1  # Only the edited function
+
+
+def test_security_gate():
+    unsafe = ORIGINAL.replace("return a + b", "return eval(f'{a} + {b}')")
+    # The complexity gate would reject this change too; check security alone
+    verdict = validate_suggestion(ORIGINAL, unsafe, use_cache=False, pipeline=default_pipeline().remove("complexity"))
+    assert verdict.failed_gate == "security"
+    assert "B307 in add" in verdict.message
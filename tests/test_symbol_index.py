@@ -0,0 +1,93 @@
+# tests/test_symbol_index.py
+"""
+Tests for the repository-wide symbol and import index
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from preprocessor import MetadataCache
+from symbol_index import SymbolIndex, module_name_for
+
+
+@pytest.fixture
+def repo(tmp_path):
+    pkg = tmp_path / "pkg"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("", encoding="utf-8")
+    (pkg / "shapes.py").write_text(
+        "def area(w, h):\n"
+        "    return w * h\n"
+        "\n"
+        "class Box:\n"
+        "    def volume(self, d):\n"
+        "        return area(self.w, self.h) * d\n",
+        encoding="utf-8")
+    (pkg / "report.py").write_text(
+        "from .shapes import area\n"
+        "import os\n"
+        "\n"
+        "def summary(w, h):\n"
+        "    return f'{area(w, h)}'\n",
+        encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def index(repo, tmp_path):
+    idx = SymbolIndex(str(tmp_path / "index.db"), cache=MetadataCache(str(tmp_path / "cache")))
+    idx.update(str(repo))
+    yield idx
+    idx.close()
+
+
+def test_module_names(repo):
+    assert module_name_for(str(repo / "pkg" / "__init__.py"), str(repo)) == "pkg"
+    assert module_name_for(str(repo / "pkg" / "shapes.py"), str(repo)) == "pkg.shapes"
+
+
+def test_definitions_and_references(index):
+    [definition] = index.find_definitions("area")
+    assert definition["module"] == "pkg.shapes"
+    assert index.find_definitions("Box.volume")[0]["kind"] == "function"
+
+    callers = {(r["module"], r["scope"]) for r in index.find_references("area", kind="call")}
+    assert callers == {("pkg.shapes", "Box.volume"), ("pkg.report", "summary")}
+
+
+def test_relative_imports_are_resolved(index):
+    [importer] = index.find_importers("pkg.shapes", "area")
+    assert importer["module"] == "pkg.report"
+
+
+def test_graphs(index):
+    imports = index.import_graph()
+    assert imports.has_edge("pkg.report", "pkg.shapes")
+    assert imports.nodes["os"]["external"]
+
+    calls = index.call_graph()
+    assert calls.has_edge("pkg.report:summary", "pkg.shapes:area")
+    assert calls.has_edge("pkg.shapes:Box.volume", "pkg.shapes:area")
+
+
+def test_incremental_update(index, repo):
+    assert index.update(str(repo)) == {"indexed": 0, "unchanged": 3, "removed": 0, "errors": 0}
+
+    (repo / "pkg" / "report.py").write_text("def summary():\n    return 1\n", encoding="utf-8")
+    os.remove(repo / "pkg" / "__init__.py")
+    stats = index.update(str(repo))
+
+    assert stats["indexed"] == 1 and stats["removed"] == 1
+    assert index.find_importers("pkg.shapes") == []
+
+
+def test_lookup_is_fast(index):
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.find_definitions("area")
+    assert (time.perf_counter() - start) / 1000 < 0.001
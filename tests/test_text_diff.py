@@ -0,0 +1,73 @@
+# tests/test_text_diff.py
+"""
+Tests for the line diff engine
+"""
+
+import difflib
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.text_diff import diff_opcodes, line_changes, mark_intraline, unified_diff
+
+OLD = "def f(x):\n    return x + 1\n\n\nprint(f(2))\n".splitlines(keepends=True)
+NEW = "def f(y):\n    return y + 1\n\n\nprint(f(2))\nprint(f(3))\n".splitlines(keepends=True)
+
+
+def _lcs(a, b):
+    table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) - 1, -1, -1):
+        for j in range(len(b) - 1, -1, -1):
+            table[i][j] = table[i + 1][j + 1] + 1 if a[i] == b[j] else max(table[i + 1][j], table[i][j + 1])
+    return table[0][0]
+
+
+@pytest.mark.parametrize("algorithm", ["patience", "myers"])
+def test_opcodes_rebuild_the_new_sequence(algorithm):
+    rng = random.Random(7)
+    for _ in range(300):
+        a = [rng.choice("abcde") for _ in range(rng.randint(0, 12))]
+        b = [rng.choice("abcde") for _ in range(rng.randint(0, 12))]
+        opcodes = diff_opcodes(a, b, algorithm)
+        rebuilt, i, j = [], 0, 0
+        for tag, i1, i2, j1, j2 in opcodes:
+            assert (i1, j1) == (i, j)
+            assert tag != "equal" or a[i1:i2] == b[j1:j2]
+            rebuilt.extend(b[j1:j2])
+            i, j = i2, j2
+        assert rebuilt == b and (i, j) == (len(a), len(b))
+        if algorithm == "myers":
+            # A shortest edit script keeps a longest common subsequence
+            assert sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal") == _lcs(a, b)
+
+
+@pytest.mark.parametrize("n", [0, 1, 3])
+def test_unified_diff_matches_difflib(n):
+    for lineterm in ("\n", ""):
+        expected = list(difflib.unified_diff(OLD, NEW, "a/f.py", "b/f.py", n=n, lineterm=lineterm))
+        assert list(unified_diff(OLD, NEW, "a/f.py", "b/f.py", n=n, lineterm=lineterm)) == expected
+    assert list(unified_diff(OLD, OLD)) == []
+    assert list(unified_diff([], NEW)) == list(difflib.unified_diff([], NEW))
+
+
+def test_repetitive_files_stay_aligned():
+    # difflib's autojunk drops lines making up over 1% of a long file
+    rng = random.Random(0)
+    old = [f"value = item[{rng.randrange(60)}]" for _ in range(2000)]
+    new = old[:1000] + ["changed"] + old[1000:]
+    assert diff_opcodes(old, new) == [("equal", 0, 1000, 0, 1000), ("insert", 1000, 1000, 1000, 1001),
+                                      ("equal", 1000, 2000, 1001, 2001)]
+
+
+def test_intraline_and_line_changes():
+    assert mark_intraline("return x + 1", "return y + 1") == ("return [-x-] + 1", "return {+y+} + 1")
+    marked = list(unified_diff(OLD, NEW, intraline=True))
+    assert "-def f([-x-]):\n" in marked and "+def f({+y+}):\n" in marked
+    assert "+print(f(3))\n" in marked  # Pure insertions are not marked
+    assert line_changes("".join(OLD), "".join(NEW)) == (2, 3)
+    with pytest.raises(ValueError):
+        diff_opcodes(OLD, NEW, algorithm="histogram")
@@ -0,0 +1,123 @@
+# tests/test_validation_cache.py
+"""
+Tests for caching validation verdicts on code, test and tool hashes
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.validation_cache import ValidationCache
+from src.inference import validator as suggestion_validator
+from src.inference.pipeline import Gate, GatePipeline, GateResult
+from validator import CodeValidator
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ValidationCache(str(tmp_path / "cache"))
+
+
+def test_key_changes_with_any_input(cache, tmp_path):
+    test_file = tmp_path / "test_mod.py"
+    test_file.write_text("def test_a():\n    pass\n", encoding="utf-8")
+    key = cache.key("kind", "a = 1\n", "a = 2\n", [str(test_file)])
+    assert key == cache.key("kind", "a = 1\n", "a = 2\n", [str(test_file)])
+    assert key != cache.key("kind", "a = 1\n", "a = 3\n", [str(test_file)])
+    assert key != cache.key("other", "a = 1\n", "a = 2\n", [str(test_file)])
+
+    test_file.write_text("def test_a():\n    assert True\n", encoding="utf-8")
+    assert key != cache.key("kind", "a = 1\n", "a = 2\n", [str(test_file)])
+
+
+def test_entries_are_json_and_damage_is_a_miss(cache):
+    key = cache.key("kind", "a = 1\n", "a = 2\n")
+    cache.put(key, {"lines": (2, 3), "changes": [{"span": (1, (4, 5))}]}, 0.5)
+    with open(cache._entry_path(key), encoding="utf-8") as f:
+        assert f.read().startswith("{")
+    assert cache.get(key)["result"] == {"lines": (2, 3), "changes": [{"span": (1, (4, 5))}]}
+
+    for damaged in ("{not json", "[1, 2]", '{"duration": 1}'):
+        with open(cache._entry_path(key), "w", encoding="utf-8") as f:
+            f.write(damaged)
+        assert cache.get(key) is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    cache.invalidate(key)
+    cache.put(key, {"value": object()}, 0.5)  # Not JSON data: not cached
+    assert not os.path.exists(cache._entry_path(key))
+
+
+def test_code_validator_returns_cached_verdict(cache, tmp_path, monkeypatch):
+    original = tmp_path / "original.py"
+    original.write_text("def add(a, b):\n    total = a + b\n    return total\n", encoding="utf-8")
+    refactored = tmp_path / "refactored.py"
+    refactored.write_text("def add(a, b):\n    result = a + b\n    return result\n", encoding="utf-8")
+    validator = CodeValidator(cache=cache)
+
+    first = validator.validate_refactoring(str(original), str(refactored))
+    assert first["overall_success"] and not first["cached"]
+
+    monkeypatch.setattr(validator, "_validate", lambda *args: pytest.fail("validated again"))
+    second = validator.validate_refactoring(str(original), str(refactored))
+    assert second["cached"]
+    assert second["overall_success"]
+    assert second["timings"] == first["timings"]
+
+    refactored.write_text("def add(a, b):\n    result = a - b\n    return result\n", encoding="utf-8")
+    with pytest.raises(pytest.fail.Exception):
+        validator.validate_refactoring(str(original), str(refactored))
+
+
+def test_validate_suggestion_is_cached(cache):
+    calls = []
+    pipeline = GatePipeline([Gate("count", lambda context: calls.append(context) or GateResult(True))])
+    first = suggestion_validator.validate_suggestion("x = 1\n", "x = 2\n", cache=cache, pipeline=pipeline)
+    second = suggestion_validator.validate_suggestion("x = 1\n", "x = 2\n", cache=cache, pipeline=pipeline)
+    assert first and second and second.cached
+    assert second.gates[0].duration == first.gates[0].duration
+    assert len(calls) == 1
+
+
+def test_transient_suggestion_verdicts_are_not_cached(cache):
+    calls = []
+
+    def unavailable(context):
+        calls.append(context)
+        return GateResult(True, "Skipped: ruff not installed", skipped=True, transient=True)
+
+    def crashing(context):
+        calls.append(context)
+        raise RuntimeError("worker crashed")
+
+    for gate in (unavailable, crashing):
+        pipeline = GatePipeline([Gate("flaky", gate)])
+        for _ in range(2):
+            verdict = suggestion_validator.validate_suggestion("x = 1\n", "x = 2\n", cache=cache, pipeline=pipeline)
+            assert verdict.transient and not verdict.cached
+    assert len(calls) == 4
+
+
+class _CrashingPool:
+    def run(self, *args):
+        raise RuntimeError("worker crashed")
+
+
+def test_code_validator_does_not_cache_errored_test_runs(cache, tmp_path, monkeypatch):
+    original = tmp_path / "original.py"
+    original.write_text("def add(a, b):\n    return a + b\n", encoding="utf-8")
+    refactored = tmp_path / "refactored.py"
+    refactored.write_text("def add(a, b):\n    return b + a\n", encoding="utf-8")
+    test_file = tmp_path / "test_original.py"
+    test_file.write_text("def test_nothing():\n    pass\n", encoding="utf-8")
+    validator = CodeValidator(worker_pool=_CrashingPool(), cache=cache)
+    monkeypatch.setattr(validator.impact_map, "affected_tests", lambda *args: None)
+
+    for _ in range(2):
+        results = validator.validate_refactoring(str(original), str(refactored), str(test_file))
+        assert "Error running tests: worker crashed" in results["unit_tests"]["test_output"]
+        assert not results["cached"]
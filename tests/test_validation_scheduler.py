@@ -0,0 +1,81 @@
+# tests/test_validation_scheduler.py
+"""
+Tests for parallel validation of many refactoring candidates
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from impact_map import TestImpactMap
+from pytest_pool import PytestWorkerPool
+from validation_scheduler import ValidationScheduler
+from validator import CodeValidator
+
+ORIGINAL = """
+def clamp(value, low, high):
+    if value < low:
+        return low
+    else:
+        if value > high:
+            return high
+        else:
+            return value
+"""
+
+TESTS = """
+from clamp import clamp
+
+
+def test_clamp():
+    assert clamp(5, 0, 3) == 3
+    assert clamp(-1, 0, 3) == 0
+    assert clamp(2, 0, 3) == 2
+"""
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    with PytestWorkerPool(workers=1, timeout=60) as pool:
+        validator = CodeValidator(TestImpactMap(str(tmp_path / "cache")), pool)
+        yield ValidationScheduler(max_workers=2, validator=validator)
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "clamp.py").write_text(ORIGINAL, encoding="utf-8")
+    (tmp_path / "test_clamp.py").write_text(TESTS, encoding="utf-8")
+    return {"file_path": str(tmp_path / "clamp.py"), "test_file_path": str(tmp_path / "test_clamp.py")}
+
+
+def test_candidates_validated_in_parallel(scheduler, project):
+    candidates = [
+        dict(project, id="good", original_code=ORIGINAL,
+             refactored_code="def clamp(value, low, high):\n    return max(low, min(value, high))\n"),
+        dict(project, id="wrong", original_code=ORIGINAL,
+             refactored_code="def clamp(value, low, high):\n    return min(low, max(value, high))\n"),
+        dict(project, id="broken", original_code=ORIGINAL, refactored_code="def clamp(value:\n"),
+    ]
+    results = {result["id"]: result for result in scheduler.validate_many(candidates)}
+
+    assert results["good"]["success"]
+    assert results["good"]["stages"]["tests"]["unit_tests"]["tests_passed"] == 1
+    assert results["wrong"]["failed_stage"] == "tests"
+
+    broken = results["broken"]
+    assert broken["failed_stage"] == "ast"
+    assert all(broken["stages"][stage]["cancelled"] for stage in ("lint", "complexity", "tests"))
+
+
+def test_complexity_failure_without_tests(scheduler):
+    worse = ORIGINAL.replace("            return value", "            if value == 0:\n                return 0\n            return value")
+    results = scheduler.validate_all([
+        {"original_code": ORIGINAL, "refactored_code": ORIGINAL.replace("value", "v")},
+        {"original_code": ORIGINAL, "refactored_code": worse},
+    ])
+    assert [result["id"] for result in results] == [0, 1]
+    assert results[0]["success"] and "tests" not in results[0]["stages"]
+    assert results[1]["failed_stage"] == "complexity"